@@ -19,7 +19,7 @@ from homework_agent.services.llm import LLMClient
 from homework_agent.api.session import (
     get_question_bank,
     get_question_index,
-    get_mistakes,
+    get_session_state,
     save_qindex_placeholder,
     save_question_bank,
     save_question_index,
@@ -355,8 +355,9 @@ async def _run_mandatory_visual_path(
                         session_id, "qindex skipped: redis_unavailable"
                     )
 
-    # 2) Refresh image refs + cached facts into focus_obj
-    qindex_now = get_question_index(session_id) if session_id else None
+    # 2) Refresh image refs + cached facts into focus_obj (one round trip for both).
+    state = get_session_state(session_id, ("qindex", "qbank"))
+    qindex_now = state["qindex"]
     if isinstance(qindex_now, dict):
         qs = qindex_now.get("questions")
         if isinstance(qs, dict) and str(fqnum) in qs:
@@ -365,7 +366,7 @@ async def _run_mandatory_visual_path(
             wrong_item_context["index_warnings"] = qindex_now.get("warnings")
 
     try:
-        qbank_now = get_question_bank(session_id) if session_id else None
+        qbank_now = state["qbank"]
         if isinstance(qbank_now, dict):
             qs = qbank_now.get("questions")
             if (
@@ -398,7 +399,9 @@ def _prepare_chat_context_or_abort(
     May raise _ChatAbort for deterministic early exits.
     """
     # Chat 只能基于 /grade 交付的“题库快照”对话；缺失则直接提示先批改，禁止编造。
-    qbank = get_question_bank(session_id) if session_id else None
+    # Mistakes are only needed for context_item_ids, but ride along in the same round trip.
+    state = get_session_state(session_id, ("qbank", "mistakes"))
+    qbank = state["qbank"]
     if not (
         isinstance(qbank, dict)
         and isinstance(qbank.get("questions"), dict)
@@ -458,7 +461,7 @@ def _prepare_chat_context_or_abort(
                         requested_qn_from_context = sorted(candidates, key=len)[0]
                         break
 
-            mistakes = get_mistakes(session_id) if session_id else None
+            mistakes = state["mistakes"]
             selected, missing = _resolve_context_items(context_ids, mistakes)
             if selected:
                 first = selected[0]
@@ -875,6 +878,7 @@ async def _stream_socratic_llm_to_sse(
                 model_override=model_override,
                 history=llm_history,
                 prompt_variant=prompt_variant,
+                hedge_site="chat",
             ):
                 asyncio.run_coroutine_threadsafe(q.put(chunk), loop)
             asyncio.run_coroutine_threadsafe(q.put(DONE), loop)
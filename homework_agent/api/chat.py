@@ -25,12 +25,14 @@ from homework_agent.core.qbank import _normalize_question_number
 from homework_agent.core.qindex import qindex_is_configured  # noqa: F401
 from homework_agent.api.session import (
     SESSION_TTL_SECONDS,
-    get_session,
+    get_session_async,
     save_session,
+    save_session_async,
     delete_session,
     persist_question_bank,
     save_mistakes,
-    get_question_bank,
+    session_pipeline,
+    get_question_bank_async,
     save_question_bank,
     _merge_bank_meta,
     _now_ts,
@@ -1216,7 +1218,7 @@ async def _init_chat_request(
     )
     started_m = time.monotonic()
     now_ts = _now_ts()
-    session_data = await asyncio.to_thread(get_session, session_id)
+    session_data = await get_session_async(session_id)
     return session_id, request_id, user_id, started_m, now_ts, session_data
 
 
@@ -1443,22 +1445,6 @@ def _rehydrate_session_from_submission_or_abort(
         else []
     )
     grade_summary = str(grade_result.get("summary") or "").strip()
-    persist_question_bank(
-        session_id=new_session_id,
-        bank=_merge_bank_meta(
-            bank, {"rehydrated_from_submission_id": str(submission_id)}
-        ),
-        grade_status="done",
-        grade_summary=grade_summary,
-        grade_warnings=[str(w) for w in warnings if str(w).strip()],
-        request_id=request_id,
-        timings_ms=None,
-    )
-
-    # Seed mistakes for context_item_ids routing (optional; but required for "Ask Teacher" deep links).
-    wrong_items = grade_result.get("wrong_items")
-    if isinstance(wrong_items, list) and wrong_items:
-        save_mistakes(new_session_id, [w for w in wrong_items if isinstance(w, dict)])
 
     # Seed session. Keep it minimal and deterministic.
     session_data: Dict[str, Any] = {
@@ -1475,7 +1461,31 @@ def _rehydrate_session_from_submission_or_abort(
         sanitize_session_data_for_persistence(session_data)
     except Exception as e:
         logger.debug(f"Sanitizing rehydrated session failed (best-effort): {e}")
-    save_session(new_session_id, session_data)
+
+    # qbank + mistakes + session are written together (one round trip).
+    with session_pipeline() as pipe:
+        persist_question_bank(
+            session_id=new_session_id,
+            bank=_merge_bank_meta(
+                bank, {"rehydrated_from_submission_id": str(submission_id)}
+            ),
+            grade_status="done",
+            grade_summary=grade_summary,
+            grade_warnings=[str(w) for w in warnings if str(w).strip()],
+            request_id=request_id,
+            timings_ms=None,
+            cache=pipe,
+        )
+
+        # Seed mistakes for context_item_ids routing (optional; but required for "Ask Teacher" deep links).
+        wrong_items = grade_result.get("wrong_items")
+        if isinstance(wrong_items, list) and wrong_items:
+            save_mistakes(
+                new_session_id,
+                [w for w in wrong_items if isinstance(w, dict)],
+                cache=pipe,
+            )
+        save_session(new_session_id, session_data, cache=pipe)
 
     # Best-effort link for observability + future slice lookups.
     try:
@@ -1734,7 +1744,7 @@ async def _best_effort_relook_if_needed(
                 wrong_item_context["focus_question"] = focus_obj
                 # Persist patch back to qbank for subsequent turns (best-effort).
                 try:
-                    qbank_now = await asyncio.to_thread(get_question_bank, session_id)
+                    qbank_now = await get_question_bank_async(session_id)
                     if isinstance(qbank_now, dict):
                         qs = qbank_now.get("questions")
                         if (
@@ -2043,7 +2053,7 @@ async def _run_chat_turn(
                     logger.debug(
                         f"Sanitizing compacted session for persistence failed (best-effort): {e}"
                     )
-                await asyncio.to_thread(save_session, session_id, session_data)
+                await save_session_async(session_id, session_data)
             except Exception as e:
                 logger.debug(f"Persisting compacted session failed (best-effort): {e}")
     except Exception as e:
@@ -7,7 +7,7 @@ import time
 import uuid
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from fastapi import (
     APIRouter,
@@ -30,8 +30,13 @@ from homework_agent.services.vision_grade_agent import UnifiedGradeResult
 from homework_agent.services.llm import MathGradingResult, EnglishGradingResult
 from homework_agent.services.autonomous_agent import run_autonomous_grade_agent
 from homework_agent.services.qindex_queue import enqueue_qindex_job
-from homework_agent.services.grade_queue import enqueue_grade_job
+from homework_agent.services.grade_queue import (
+    enqueue_grade_job_async,
+    get_job_summary_async,
+    set_job_status_async,
+)
 from homework_agent.services.facts_queue import enqueue_facts_job
+from homework_agent.utils.cache import get_async_cache_store
 from homework_agent.utils.settings import get_settings
 from homework_agent.core.qindex import qindex_is_configured
 from homework_agent.core.qbank import (
@@ -45,12 +50,14 @@ from homework_agent.core.slice_policy import should_create_slices_for_bank
 from homework_agent.core.slice_policy import pick_question_numbers_for_slices
 from homework_agent.api.session import (
     cache_store,
-    save_mistakes,
-    get_question_bank,
-    save_question_index,
+    save_mistakes_async,
+    get_question_bank_async,
+    save_question_index_async,
     save_grade_progress,
+    save_grade_progress_async,
     persist_question_bank,
-    save_qindex_placeholder,
+    session_pipeline,
+    save_qindex_placeholder_async,
     _merge_bank_meta,
     _ensure_session_id,
     IDP_TTL_HOURS,
@@ -305,10 +312,7 @@ def check_idempotency(idempotency_key: str) -> Optional[GradeResponse]:
         return None
 
 
-def _check_idempotency_or_raise(
-    *, idempotency_key: str, fingerprint: str
-) -> Optional[GradeResponse]:
-    cached = cache_store.get(f"idp:{idempotency_key}")
+def _idempotent_response(cached: Any, fingerprint: str) -> Optional[GradeResponse]:
     if not cached:
         return None
     try:
@@ -330,6 +334,19 @@ def _check_idempotency_or_raise(
         return None
 
 
+def _check_idempotency_or_raise(
+    *, idempotency_key: str, fingerprint: str
+) -> Optional[GradeResponse]:
+    return _idempotent_response(cache_store.get(f"idp:{idempotency_key}"), fingerprint)
+
+
+async def _check_idempotency_or_raise_async(
+    *, idempotency_key: str, fingerprint: str
+) -> Optional[GradeResponse]:
+    cached = await get_async_cache_store().get(f"idp:{idempotency_key}")
+    return _idempotent_response(cached, fingerprint)
+
+
 def _idempotency_fingerprint(req: GradeRequest) -> str:
     """
     Stable fingerprint for idempotency key collision detection.
@@ -366,17 +383,31 @@ def _idempotency_fingerprint(req: GradeRequest) -> str:
         return stable_text_hash(repr(req))
 
 
+def _idempotent_entry(response: GradeResponse, fingerprint: str) -> Dict[str, Any]:
+    return {
+        "response": response.model_dump(),
+        "ts": datetime.now().isoformat(),
+        "fingerprint": str(fingerprint or ""),
+    }
+
+
 def cache_response(
     idempotency_key: str, response: GradeResponse, *, fingerprint: str
 ) -> None:
     """缓存响应结果"""
     cache_store.set(
         f"idp:{idempotency_key}",
-        {
-            "response": response.model_dump(),
-            "ts": datetime.now().isoformat(),
-            "fingerprint": str(fingerprint or ""),
-        },
+        _idempotent_entry(response, fingerprint),
+        ttl_seconds=IDP_TTL_HOURS * 3600,
+    )
+
+
+async def cache_response_async(
+    idempotency_key: str, response: GradeResponse, *, fingerprint: str
+) -> None:
+    await get_async_cache_store().set(
+        f"idp:{idempotency_key}",
+        _idempotent_entry(response, fingerprint),
         ttl_seconds=IDP_TTL_HOURS * 3600,
     )
 
@@ -497,7 +528,10 @@ def _persist_done_qbank_snapshot(
     page_image_urls: List[str],
     vision_fallback_warning: Optional[str],
 ) -> Optional[str]:
-    """Persist question bank snapshot for chat routing; return optional extra warning."""
+    """
+    Persist question bank snapshot for chat routing, together with the "done" progress record
+    (one cache round trip); return optional extra warning.
+    """
     if not ctx.session_id:
         return None
 
@@ -514,17 +548,26 @@ def _persist_done_qbank_snapshot(
         visual_facts_map=visual_facts_map,
     )
     extra_warn = _visual_risk_warning_text() if _bank_has_visual_risk(bank) else None
-    persist_question_bank(
-        session_id=ctx.session_id,
-        bank=_merge_bank_meta(bank, ctx.meta_base),
-        grade_status="done",
-        grade_summary=(getattr(grading_result, "summary", "") or "").strip(),
-        grade_warnings=(getattr(grading_result, "warnings", None) or [])
-        + ([vision_fallback_warning] if vision_fallback_warning else [])
-        + ([extra_warn] if extra_warn else []),
-        request_id=ctx.request_id,
-        timings_ms=ctx.timings_ms,
-    )
+    with session_pipeline() as pipe:
+        persist_question_bank(
+            session_id=ctx.session_id,
+            bank=_merge_bank_meta(bank, ctx.meta_base),
+            grade_status="done",
+            grade_summary=(getattr(grading_result, "summary", "") or "").strip(),
+            grade_warnings=(getattr(grading_result, "warnings", None) or [])
+            + ([vision_fallback_warning] if vision_fallback_warning else [])
+            + ([extra_warn] if extra_warn else []),
+            request_id=ctx.request_id,
+            timings_ms=ctx.timings_ms,
+            cache=pipe,
+        )
+        save_grade_progress(
+            ctx.session_id,
+            "done",
+            "批改结果已生成",
+            {"timings_ms": ctx.timings_ms},
+            cache=pipe,
+        )
     return extra_warn
 
 
@@ -720,11 +763,22 @@ async def _perform_autonomous_grading(
     provider_str: str,
     *,
     experiment_key: Optional[str] = None,
+    meta_out: Optional[Dict[str, Any]] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], Any]] = None,
 ) -> GradeResponse:
-    """Run the autonomous agent loop and map to GradeResponse."""
+    """
+    Run the autonomous agent loop and map to GradeResponse.
+
+    `on_result` receives each graded question as soon as the aggregator streams it (before the
+    final parse), for early verdict cards.
+    """
     ctx = _init_grading_ctx(req, provider_str)
-    await asyncio.to_thread(
-        save_grade_progress,
+    if meta_out is not None:
+        # Expose this run's meta (llm_usage/llm_model/...) to the caller directly: concurrent
+        # page runs share one session qbank, so reading it back afterwards is racy.
+        meta_out.update(ctx.meta_base)
+        ctx.meta_base = meta_out
+    await save_grade_progress_async(
         ctx.session_id,
         "grade_start",
         "已接收请求，准备识别…",
@@ -740,8 +794,7 @@ async def _perform_autonomous_grading(
     grade_variant = getattr(req, "_grade_image_input_variant", None)
     if isinstance(grade_variant, str) and grade_variant.strip():
         ctx.meta_base["grade_image_input_variant"] = grade_variant.strip()
-    await asyncio.to_thread(
-        save_grade_progress,
+    await save_grade_progress_async(
         ctx.session_id,
         "vision_start",
         "自主阅卷中（规划→工具→反思）…",
@@ -771,6 +824,7 @@ async def _perform_autonomous_grading(
                     if isinstance(grade_variant, str) and grade_variant.strip()
                     else None
                 ),
+                on_result=on_result,
                 **overrides,
             )
             tms = getattr(autonomous, "timings_ms", None)
@@ -821,8 +875,7 @@ async def _perform_autonomous_grading(
                 error_type=e.__class__.__name__,
                 error=str(e),
             )
-            await asyncio.to_thread(
-                save_grade_progress,
+            await save_grade_progress_async(
                 ctx.session_id,
                 "failed",
                 "批改失败",
@@ -844,8 +897,7 @@ async def _perform_autonomous_grading(
             )
 
     if autonomous.status == "rejected":
-        await asyncio.to_thread(
-            save_grade_progress,
+        await save_grade_progress_async(
             ctx.session_id,
             "failed",
             "输入非作业图片，已拒绝批改",
@@ -895,13 +947,6 @@ async def _perform_autonomous_grading(
 
     _ensure_grading_counts(grading_result)
     _log_grade_done(ctx=ctx, grading_result=grading_result)
-    await asyncio.to_thread(
-        save_grade_progress,
-        ctx.session_id,
-        "done",
-        "批改结果已生成",
-        {"timings_ms": ctx.timings_ms},
-    )
 
     return _build_done_grade_response(
         ctx=ctx,
@@ -918,25 +963,33 @@ async def _perform_autonomous_grading(
 
 @trace_span("grade.perform_grading")
 async def perform_grading(
-    req: GradeRequest, provider_str: str, *, experiment_key: Optional[str] = None
+    req: GradeRequest,
+    provider_str: str,
+    *,
+    experiment_key: Optional[str] = None,
+    meta_out: Optional[Dict[str, Any]] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], Any]] = None,
 ) -> GradeResponse:
     """执行批改（同步/后台共用），统一走 Autonomous Agent。"""
     return await _perform_autonomous_grading(
-        req, provider_str, experiment_key=experiment_key
+        req,
+        provider_str,
+        experiment_key=experiment_key,
+        meta_out=meta_out,
+        on_result=on_result,
     )
 
 
 async def background_grade(job_id: str, req: GradeRequest, provider_str: str):
     """后台执行批改，更新 job_cache。"""
-    existing = await asyncio.to_thread(cache_store.get, f"job:{job_id}")
+    existing = await get_job_summary_async(job_id)
     existing_user_id = (
         str(existing.get("user_id") or "").strip() if isinstance(existing, dict) else ""
     )
     try:
         result = await perform_grading(req, provider_str)
-        await asyncio.to_thread(
-            cache_store.set,
-            f"job:{job_id}",
+        await set_job_status_async(
+            job_id,
             {
                 "user_id": existing_user_id,
                 "status": "done",
@@ -948,9 +1001,8 @@ async def background_grade(job_id: str, req: GradeRequest, provider_str: str):
             ttl_seconds=IDP_TTL_HOURS * 3600,
         )
     except Exception as e:
-        await asyncio.to_thread(
-            cache_store.set,
-            f"job:{job_id}",
+        await set_job_status_async(
+            job_id,
             {
                 "user_id": existing_user_id,
                 "status": "failed",
@@ -1157,8 +1209,7 @@ async def grade_homework(
     idempotency_key = get_idempotency_key(None, x_idempotency_key)
     if idempotency_key:
         fp = _idempotency_fingerprint(req)
-        cached_response = await asyncio.to_thread(
-            _check_idempotency_or_raise,
+        cached_response = await _check_idempotency_or_raise_async(
             idempotency_key=idempotency_key,
             fingerprint=fp,
         )
@@ -1174,8 +1225,7 @@ async def grade_homework(
     # 2.5 Ensure session_id is always present so results can be delivered to /chat
     session_for_ctx = _ensure_session_id(req.session_id or req.batch_id)
     req = req.model_copy(update={"session_id": session_for_ctx})
-    await asyncio.to_thread(
-        save_grade_progress,
+    await save_grade_progress_async(
         session_for_ctx,
         "accepted",
         "已开始处理…",
@@ -1237,8 +1287,7 @@ async def grade_homework(
             "yes",
         }
         try:
-            queued = await asyncio.to_thread(
-                enqueue_grade_job,
+            queued = await enqueue_grade_job_async(
                 job_id=job_id,
                 grade_request=req.model_dump(),
                 provider=provider_str,
@@ -1266,9 +1315,8 @@ async def grade_homework(
 
         if not queued:
             # Dev fallback: keep old in-process BackgroundTasks behavior when Redis is unavailable.
-            await asyncio.to_thread(
-                cache_store.set,
-                f"job:{job_id}",
+            await set_job_status_async(
+                job_id,
                 {
                     "user_id": user_id,
                     "status": "processing",
@@ -1321,7 +1369,7 @@ async def grade_homework(
         if upload_id:
             try:
                 bank_now = (
-                    await asyncio.to_thread(get_question_bank, session_for_ctx)
+                    await get_question_bank_async(session_for_ctx)
                     if session_for_ctx
                     else None
                 )
@@ -1414,7 +1462,7 @@ async def grade_homework(
                     except Exception as e:
                         logger.debug(f"dict conversion for wrong_item failed: {e}")
                         continue
-            await asyncio.to_thread(save_mistakes, session_for_ctx, wrong_items_payload)
+            await save_mistakes_async(session_for_ctx, wrong_items_payload)
             # QIndex: optional background optimization (bbox/slice).
             # Product decision: keep grading fast/stable by default; only run qindex when user explicitly requests it
             # (e.g. from Question Detail "生成图示切片") or when AUTO_QINDEX_ON_GRADE=1 is set.
@@ -1426,7 +1474,7 @@ async def grade_homework(
                 "yes",
             }
             bank = (
-                await asyncio.to_thread(get_question_bank, session_for_ctx)
+                await get_question_bank_async(session_for_ctx)
                 if session_for_ctx
                 else None
             )
@@ -1453,8 +1501,7 @@ async def grade_homework(
             ):
                 ok, reason = qindex_is_configured()
                 if not ok:
-                    await asyncio.to_thread(
-                        save_qindex_placeholder,
+                    await save_qindex_placeholder_async(
                         session_for_ctx,
                         f"qindex skipped: {reason}",
                     )
@@ -1484,14 +1531,12 @@ async def grade_homework(
                         request_id=request_id,
                     )
                     if enqueued:
-                        await asyncio.to_thread(
-                            save_question_index,
+                        await save_question_index_async(
                             session_for_ctx,
                             {"questions": {}, "warnings": ["qindex queued"]},
                         )
                     else:
-                        await asyncio.to_thread(
-                            save_qindex_placeholder,
+                        await save_qindex_placeholder_async(
                             session_for_ctx,
                             "qindex skipped: redis_unavailable",
                         )
@@ -1500,7 +1545,7 @@ async def grade_homework(
         if str(getattr(settings, "auth_mode", "dev") or "dev").strip().lower() != "dev":
             try:
                 bank_now = (
-                    await asyncio.to_thread(get_question_bank, session_for_ctx)
+                    await get_question_bank_async(session_for_ctx)
                     if session_for_ctx
                     else None
                 )
@@ -1571,8 +1616,7 @@ async def grade_homework(
                     error=str(e),
                 )
         if idempotency_key:
-            await asyncio.to_thread(
-                cache_response,
+            await cache_response_async(
                 idempotency_key,
                 response,
                 fingerprint=_idempotency_fingerprint(req),
@@ -1581,8 +1625,7 @@ async def grade_homework(
     except HTTPException:
         raise
     except Exception as e:
-        await asyncio.to_thread(
-            save_grade_progress,
+        await save_grade_progress_async(
             session_for_ctx,
             "failed",
             f"系统错误：{str(e)}",
@@ -1,17 +1,35 @@
 from __future__ import annotations
 
+import json
 import logging
 import time
 import uuid
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
 
-from fastapi import APIRouter, Header, HTTPException, status
+from fastapi import APIRouter, Header, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 
 from homework_agent.core.qbank import _normalize_question_number
 from homework_agent.core.qindex import build_question_index_for_pages
-from homework_agent.utils.cache import BaseCache, get_cache_store
+from homework_agent.utils.cache import (
+    BaseCache,
+    get_async_cache_store,
+    get_cache_store,
+)
+from homework_agent.services.job_events import (
+    TERMINAL_STATUSES,
+    count_pending_reviews,
+    latest_job_event_id_async,
+    wait_job_events_async,
+)
+from homework_agent.services.job_state import (
+    JOB_SEGMENTS,
+    read_job_async,
+    read_job_meta_async,
+)
 from homework_agent.utils.observability import log_event
+from homework_agent.utils.settings import get_settings
 from homework_agent.utils.user_context import require_user_id
 
 logger = logging.getLogger(__name__)
@@ -30,6 +48,11 @@ IDP_TTL_HOURS = 24
 SESSION_TTL_SECONDS = SESSION_TTL_HOURS * 3600
 
 
+def session_pipeline():
+    """Batch session writes (`cache=pipe` on the save_* helpers) into one cache round trip."""
+    return cache_store.pipeline()
+
+
 def _ensure_session_id(value: Optional[str]) -> str:
     """Ensure we always have a stable session_id for grade→chat delivery."""
     v = (value or "").strip()
@@ -58,8 +81,12 @@ def persist_question_bank(
     grade_warnings: List[str],
     request_id: Optional[str] = None,
     timings_ms: Optional[Dict[str, int]] = None,
+    cache: Optional[BaseCache] = None,
 ) -> None:
-    """Persist the canonical qbank snapshot that /chat must rely on."""
+    """
+    Persist the canonical qbank snapshot that /chat must rely on.
+    Pass `cache=<pipeline>` to batch it with other session writes.
+    """
     if not session_id:
         return
     now = datetime.now().isoformat()
@@ -88,7 +115,7 @@ def persist_question_bank(
     except Exception as e:
         logger.debug(f"Meta stats calculation failed: {e}")
     bank["meta"] = meta
-    save_question_bank(session_id, bank)
+    save_question_bank(session_id, bank, cache=cache)
     try:
         log_event(
             logger,
@@ -140,8 +167,7 @@ def _coerce_ts(v: Any) -> Optional[float]:
     return None
 
 
-def get_session(session_id: str) -> Optional[Dict[str, Any]]:
-    data = cache_store.get(f"sess:{session_id}")
+def _session_from_cache(data: Any) -> Optional[Dict[str, Any]]:
     if not isinstance(data, dict):
         return None
     # Normalize timestamps for runtime logic.
@@ -152,7 +178,7 @@ def get_session(session_id: str) -> Optional[Dict[str, Any]]:
     return data
 
 
-def save_session(session_id: str, data: Dict[str, Any]) -> None:
+def _session_for_cache(data: Dict[str, Any]) -> Dict[str, Any]:
     copy = dict(data or {})
     copy["created_at"] = _coerce_ts(copy.get("created_at")) or _now_ts()
     copy["updated_at"] = _coerce_ts(copy.get("updated_at")) or _now_ts()
@@ -162,7 +188,30 @@ def save_session(session_id: str, data: Dict[str, Any]) -> None:
         sanitize_session_data_for_persistence(copy)
     except Exception as e:
         logger.debug(f"Sanitizing session for persistence failed (best-effort): {e}")
-    cache_store.set(f"sess:{session_id}", copy, ttl_seconds=SESSION_TTL_SECONDS)
+    return copy
+
+
+def get_session(session_id: str) -> Optional[Dict[str, Any]]:
+    return _session_from_cache(cache_store.get(f"sess:{session_id}"))
+
+
+async def get_session_async(session_id: str) -> Optional[Dict[str, Any]]:
+    data = await get_async_cache_store().get(f"sess:{session_id}")
+    return _session_from_cache(data)
+
+
+def save_session(
+    session_id: str, data: Dict[str, Any], *, cache: Optional[BaseCache] = None
+) -> None:
+    (cache or cache_store).set(
+        f"sess:{session_id}", _session_for_cache(data), ttl_seconds=SESSION_TTL_SECONDS
+    )
+
+
+async def save_session_async(session_id: str, data: Dict[str, Any]) -> None:
+    await get_async_cache_store().set(
+        f"sess:{session_id}", _session_for_cache(data), ttl_seconds=SESSION_TTL_SECONDS
+    )
 
 
 def delete_session(session_id: str) -> None:
@@ -197,8 +246,7 @@ def save_question_history(
     session_data["question_histories"][str(question_number)] = history
 
 
-def save_mistakes(session_id: str, wrong_items: List[Dict[str, Any]]) -> None:
-    """缓存错题列表供辅导上下文使用，仅限当前批次，会话 TTL 同步。"""
+def _mistakes_payload(wrong_items: List[Dict[str, Any]]) -> Dict[str, Any]:
     # 为每个 wrong_item 补充本地索引与稳定 item_id，便于后续检索
     enriched = []
     for idx, item in enumerate(wrong_items):
@@ -215,20 +263,43 @@ def save_mistakes(session_id: str, wrong_items: List[Dict[str, Any]]) -> None:
         enriched_item["item_id"] = str(item_id)
         enriched_item.setdefault("id", idx)
         enriched.append(enriched_item)
-    cache_store.set(
+    return {"wrong_items": enriched, "ts": datetime.now().isoformat()}
+
+
+def save_mistakes(
+    session_id: str,
+    wrong_items: List[Dict[str, Any]],
+    *,
+    cache: Optional[BaseCache] = None,
+) -> None:
+    """缓存错题列表供辅导上下文使用，仅限当前批次，会话 TTL 同步。"""
+    (cache or cache_store).set(
         f"mistakes:{session_id}",
-        {"wrong_items": enriched, "ts": datetime.now().isoformat()},
+        _mistakes_payload(wrong_items),
         ttl_seconds=SESSION_TTL_SECONDS,
     )
 
 
-def get_mistakes(session_id: str) -> Optional[List[Dict[str, Any]]]:
-    data = cache_store.get(f"mistakes:{session_id}")
+async def save_mistakes_async(
+    session_id: str, wrong_items: List[Dict[str, Any]]
+) -> None:
+    await get_async_cache_store().set(
+        f"mistakes:{session_id}",
+        _mistakes_payload(wrong_items),
+        ttl_seconds=SESSION_TTL_SECONDS,
+    )
+
+
+def _mistakes_from_cache(data: Any) -> Optional[List[Dict[str, Any]]]:
     if not data:
         return None
     return data.get("wrong_items")
 
 
+def get_mistakes(session_id: str) -> Optional[List[Dict[str, Any]]]:
+    return _mistakes_from_cache(cache_store.get(f"mistakes:{session_id}"))
+
+
 def save_question_index(session_id: str, index: Dict[str, Any]) -> None:
     cache_store.set(
         f"qindex:{session_id}",
@@ -237,22 +308,30 @@ def save_question_index(session_id: str, index: Dict[str, Any]) -> None:
     )
 
 
-def get_question_index(session_id: str) -> Optional[Dict[str, Any]]:
-    data = cache_store.get(f"qindex:{session_id}")
-    if not data:
+async def save_question_index_async(session_id: str, index: Dict[str, Any]) -> None:
+    await get_async_cache_store().set(
+        f"qindex:{session_id}",
+        {"index": index, "ts": datetime.now().isoformat()},
+        ttl_seconds=SESSION_TTL_SECONDS,
+    )
+
+
+def _unwrap(data: Any, field: str) -> Optional[Dict[str, Any]]:
+    if not isinstance(data, dict):
         return None
-    idx = data.get("index")
-    return idx if isinstance(idx, dict) else None
+    value = data.get(field)
+    return value if isinstance(value, dict) else None
 
 
-def save_qindex_placeholder(session_id: str, warning: str) -> bool:
-    """
-    Persist a client-visible qindex status placeholder, without overwriting real results.
-    Returns True if placeholder was written.
-    """
-    if not session_id or not warning:
-        return False
-    current = get_question_index(session_id)
+def get_question_index(session_id: str) -> Optional[Dict[str, Any]]:
+    return _unwrap(cache_store.get(f"qindex:{session_id}"), "index")
+
+
+async def get_question_index_async(session_id: str) -> Optional[Dict[str, Any]]:
+    return _unwrap(await get_async_cache_store().get(f"qindex:{session_id}"), "index")
+
+
+def _placeholder_allowed(current: Optional[Dict[str, Any]]) -> bool:
     if isinstance(current, dict):
         # Do not overwrite real results or an existing queued marker.
         if current.get("questions"):
@@ -260,12 +339,37 @@ def save_qindex_placeholder(session_id: str, warning: str) -> bool:
         ws = current.get("warnings") or []
         if isinstance(ws, list) and any("queued" in str(w) for w in ws):
             return False
+    return True
+
+
+def save_qindex_placeholder(session_id: str, warning: str) -> bool:
+    """
+    Persist a client-visible qindex status placeholder, without overwriting real results.
+    Returns True if placeholder was written.
+    """
+    if not session_id or not warning:
+        return False
+    if not _placeholder_allowed(get_question_index(session_id)):
+        return False
     save_question_index(session_id, {"questions": {}, "warnings": [str(warning)]})
     return True
 
 
-def save_question_bank(session_id: str, bank: Dict[str, Any]) -> None:
-    cache_store.set(
+async def save_qindex_placeholder_async(session_id: str, warning: str) -> bool:
+    if not session_id or not warning:
+        return False
+    if not _placeholder_allowed(await get_question_index_async(session_id)):
+        return False
+    await save_question_index_async(
+        session_id, {"questions": {}, "warnings": [str(warning)]}
+    )
+    return True
+
+
+def save_question_bank(
+    session_id: str, bank: Dict[str, Any], *, cache: Optional[BaseCache] = None
+) -> None:
+    (cache or cache_store).set(
         f"qbank:{session_id}",
         {"bank": bank, "ts": datetime.now().isoformat()},
         ttl_seconds=SESSION_TTL_SECONDS,
@@ -273,19 +377,40 @@ def save_question_bank(session_id: str, bank: Dict[str, Any]) -> None:
 
 
 def get_question_bank(session_id: str) -> Optional[Dict[str, Any]]:
-    data = cache_store.get(f"qbank:{session_id}")
-    if not data:
-        return None
-    bank = data.get("bank")
-    return bank if isinstance(bank, dict) else None
+    return _unwrap(cache_store.get(f"qbank:{session_id}"), "bank")
 
 
-def save_grade_progress(
-    session_id: str, stage: str, message: str, extra: Optional[Dict[str, Any]] = None
-) -> None:
-    """Persist best-effort grade progress for UI polling during long /grade calls."""
+async def get_question_bank_async(session_id: str) -> Optional[Dict[str, Any]]:
+    return _unwrap(await get_async_cache_store().get(f"qbank:{session_id}"), "bank")
+
+
+_SESSION_STATE_PARTS = {
+    "session": ("sess", _session_from_cache),
+    "mistakes": ("mistakes", _mistakes_from_cache),
+    "qbank": ("qbank", lambda d: _unwrap(d, "bank")),
+    "qindex": ("qindex", lambda d: _unwrap(d, "index")),
+}
+
+
+def get_session_state(
+    session_id: str, parts: Iterable[str] = tuple(_SESSION_STATE_PARTS)
+) -> Dict[str, Any]:
+    """
+    Read several per-session records in one cache round trip.
+    Returns {part: value or None}, each value shaped like its `get_*` helper
+    (`session` -> get_session, `mistakes` -> get_mistakes, `qbank`, `qindex`).
+    """
+    parts = list(parts)
     if not session_id:
-        return
+        return {p: None for p in parts}
+    keys = {p: f"{_SESSION_STATE_PARTS[p][0]}:{session_id}" for p in parts}
+    found = cache_store.get_many(keys.values())
+    return {p: _SESSION_STATE_PARTS[p][1](found.get(k)) for p, k in keys.items()}
+
+
+def _grade_progress(
+    session_id: str, stage: str, message: str, extra: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
     payload: Dict[str, Any] = {
         "session_id": session_id,
         "stage": str(stage),
@@ -294,9 +419,35 @@ def save_grade_progress(
     }
     if isinstance(extra, dict) and extra:
         payload["extra"] = extra
-    cache_store.set(
+    return {"progress": payload}
+
+
+def save_grade_progress(
+    session_id: str,
+    stage: str,
+    message: str,
+    extra: Optional[Dict[str, Any]] = None,
+    *,
+    cache: Optional[BaseCache] = None,
+) -> None:
+    """Persist best-effort grade progress for UI polling during long /grade calls."""
+    if not session_id:
+        return
+    (cache or cache_store).set(
         f"grade_progress:{session_id}",
-        {"progress": payload},
+        _grade_progress(session_id, stage, message, extra),
+        ttl_seconds=SESSION_TTL_SECONDS,
+    )
+
+
+async def save_grade_progress_async(
+    session_id: str, stage: str, message: str, extra: Optional[Dict[str, Any]] = None
+) -> None:
+    if not session_id:
+        return
+    await get_async_cache_store().set(
+        f"grade_progress:{session_id}",
+        _grade_progress(session_id, stage, message, extra),
         ttl_seconds=SESSION_TTL_SECONDS,
     )
 
@@ -319,14 +470,11 @@ def _build_question_index_for_pages(
     return build_question_index_for_pages(page_urls, session_id=session_id)
 
 
-@router.get("/jobs/{job_id}")
-async def get_job(
-    job_id: str,
-    authorization: Optional[str] = Header(None, alias="Authorization"),
-    x_user_id: Optional[str] = Header(None, alias="X-User-Id"),
-):
-    user_id = require_user_id(authorization=authorization, x_user_id=x_user_id)
-    job = cache_store.get(f"job:{job_id}")
+async def _get_owned_job(
+    job_id: str, user_id: str, *, include: Iterable[str] = JOB_SEGMENTS
+) -> Dict[str, Any]:
+    """Ownership is checked on the small status record; `include` limits the segments loaded."""
+    job = await read_job_meta_async(job_id)
     if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
@@ -341,7 +489,160 @@ async def get_job(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
         )
-    return job
+    if not include:
+        return job
+    return await read_job_async(job_id, include=include) or job
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    authorization: Optional[str] = Header(None, alias="Authorization"),
+    x_user_id: Optional[str] = Header(None, alias="X-User-Id"),
+):
+    user_id = require_user_id(authorization=authorization, x_user_id=x_user_id)
+    return await _get_owned_job(job_id, user_id)
+
+
+def _sse_event(event: str, data: Any, event_id: Optional[str] = None) -> bytes:
+    parts = [f"event: {event}", f"data: {json.dumps(data, ensure_ascii=False)}"]
+    if event_id:
+        parts.append(f"id: {event_id}")
+    return ("\n".join(parts) + "\n\n").encode("utf-8")
+
+
+# SSE snapshots skip the (large) request/result segments entirely.
+_SNAPSHOT_SEGMENTS = ("page_summaries", "question_cards")
+
+
+def _job_snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Progress view of `job:{job_id}` without the (large) request/result payloads."""
+    keys = (
+        "status",
+        "total_pages",
+        "done_pages",
+        "elapsed_ms",
+        "error",
+        "page_summaries",
+        "question_cards",
+        "submission_id",
+    )
+    return {k: job.get(k) for k in keys}
+
+
+async def _job_event_stream(
+    job_id: str,
+    *,
+    job: Dict[str, Any],
+    request: Request,
+    last_event_id: Optional[str],
+) -> AsyncIterator[bytes]:
+    settings = get_settings()
+    poll_ms = int(getattr(settings, "job_events_poll_interval_ms", 250) or 250)
+    heartbeat_s = float(getattr(settings, "job_events_heartbeat_seconds", 15) or 15)
+    max_s = float(getattr(settings, "job_events_max_stream_seconds", 900) or 900)
+    # Never block past a heartbeat; 0 keeps the XRANGE polling loop.
+    block_ms = max(
+        0,
+        min(
+            int(getattr(settings, "job_events_block_ms", 5000) or 0),
+            int(heartbeat_s * 1000),
+        ),
+    )
+
+    cursor = str(last_event_id or "").strip() or None
+    done_seen = False
+    review_pending = 0
+    if cursor is None:
+        # Fresh subscriber: one snapshot, then only events after it (replays are idempotent).
+        cursor = await latest_job_event_id_async(job_id)
+        snapshot = _job_snapshot(
+            await read_job_async(job_id, include=_SNAPSHOT_SEGMENTS) or job
+        )
+        yield _sse_event("snapshot", snapshot, cursor if cursor != "0" else None)
+        if str(snapshot.get("status") or "") in TERMINAL_STATUSES:
+            done_seen = True
+            review_pending = count_pending_reviews(snapshot)
+    else:
+        # Resume: the `done` event may already be behind the cursor (or trimmed), so take
+        # terminal state from the job itself; anything still after the cursor is sent first.
+        meta = await read_job_meta_async(job_id) or job
+        if str(meta.get("status") or "") in TERMINAL_STATUSES:
+            done_seen = True
+            review_pending = count_pending_reviews(
+                await read_job_async(job_id, include=("question_cards",)) or job
+            )
+
+    started = time.monotonic()
+    last_sent = started
+    while True:
+        try:
+            events = await wait_job_events_async(
+                job_id, after=cursor, block_ms=block_ms, poll_ms=poll_ms
+            )
+        except Exception as e:
+            if not block_ms:
+                raise
+            # Blocking read unavailable (pool exhausted, proxy without XREAD BLOCK): poll.
+            log_event(
+                logger,
+                "job_events_block_read_failed",
+                level="warning",
+                job_id=job_id,
+                error_type=e.__class__.__name__,
+                error=str(e),
+            )
+            block_ms = 0
+            continue
+        for event_id, event, data in events:
+            cursor = event_id
+            yield _sse_event(event, data, event_id)
+            last_sent = time.monotonic()
+            if event == "done":
+                done_seen = True
+                review_pending = int(data.get("review_pending") or 0)
+            elif event == "card" and done_seen:
+                if data.get("card_state") in {"review_ready", "review_failed"}:
+                    review_pending -= 1
+        if done_seen and review_pending <= 0:
+            break
+        now = time.monotonic()
+        if now - started > max_s or await request.is_disconnected():
+            break
+        if now - last_sent >= heartbeat_s:
+            yield _sse_event(
+                "heartbeat",
+                {
+                    "timestamp": datetime.now(timezone.utc)
+                    .isoformat()
+                    .replace("+00:00", "Z")
+                },
+            )
+            last_sent = now
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    request: Request,
+    authorization: Optional[str] = Header(None, alias="Authorization"),
+    x_user_id: Optional[str] = Header(None, alias="X-User-Id"),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    SSE progress for an async job: `snapshot` (fresh connect), then `status`/`page`/`card`
+    deltas and a final `done`. Reconnect with `Last-Event-ID` to resume without gaps;
+    fetch `GET /jobs/{job_id}` once after `done` for the full result.
+    """
+    user_id = require_user_id(authorization=authorization, x_user_id=x_user_id)
+    job = await _get_owned_job(job_id, user_id, include=())
+    return StreamingResponse(
+        _job_event_stream(
+            job_id, job=job, request=request, last_event_id=last_event_id
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/session/{session_id}/qbank")
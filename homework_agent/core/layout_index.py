@@ -20,16 +20,22 @@ from __future__ import annotations
 
 import io
 import logging
+import os
 import re
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 from PIL import Image
 
+from homework_agent.utils.image_blob_cache import get_image_blob
+from homework_agent.utils.metrics import observe_histogram
 from homework_agent.utils.supabase_client import get_storage_client
 from homework_agent.utils.observability import log_event, redact_url
+from homework_agent.utils.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
@@ -237,7 +243,7 @@ def build_question_layouts_from_blocks(
     return layouts
 
 
-def download_image(url: str, timeout: float = 30.0) -> Image.Image:
+def _fetch_page_bytes(url: str, timeout: float) -> Tuple[bytes, str]:
     # Avoid local proxy interference for public object downloads (supabase/public URLs etc.).
     # If you rely on system proxies for other traffic, keep them for API calls, but downloads
     # used for bbox/slice should be direct.
@@ -247,15 +253,91 @@ def download_image(url: str, timeout: float = 30.0) -> Image.Image:
     ) as client:
         resp = client.get(url)
         resp.raise_for_status()
-        img = Image.open(io.BytesIO(resp.content)).convert("RGB")
+        data = resp.content or b""
     log_event(
         logger,
         "slice_page_downloaded",
         page_image_url=redact_url(url),
-        bytes=len(resp.content or b""),
+        bytes=len(data),
         elapsed_ms=int((time.monotonic() - t0) * 1000),
     )
-    return img
+    content_type = resp.headers.get("content-type", "image/jpeg").split(";", 1)[0]
+    return data, content_type.strip() or "image/jpeg"
+
+
+def download_image(url: str, timeout: float = 30.0) -> Image.Image:
+    """
+    RGB page image, downloaded once per process (shared image blob cache) and decoded once
+    for all consumers. The returned image is shared: crop/copy it, don't modify it in place.
+    """
+    # Unchecked direct fetch: cached apart from the SSRF-safe "public" entries.
+    blob = get_image_blob(
+        url,
+        max_bytes=None,
+        fetch=lambda u: _fetch_page_bytes(u, timeout),
+        policy="layout",
+    )
+    if blob is None:
+        raise ValueError(f"empty image download: {redact_url(url)}")
+    return blob.pil()
+
+
+_POOL_LOCK = threading.Lock()
+_ENCODE_POOL: Optional[ThreadPoolExecutor] = None
+_UPLOAD_POOL: Optional[ThreadPoolExecutor] = None
+_STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _slice_pools() -> Tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+    """Process-wide pools: CPU-bound crop+encode (bounded) and overlapped uploads."""
+    global _ENCODE_POOL, _UPLOAD_POOL
+    with _POOL_LOCK:
+        if _ENCODE_POOL is None:
+            workers = int(get_settings().slice_encode_workers)
+            if workers <= 0:
+                workers = min(4, os.cpu_count() or 1)
+            _ENCODE_POOL = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="slice-encode"
+            )
+        if _UPLOAD_POOL is None:
+            workers = int(get_settings().slice_upload_concurrency)
+            _UPLOAD_POOL = ThreadPoolExecutor(
+                max_workers=max(1, workers), thread_name_prefix="slice-upload"
+            )
+        return _ENCODE_POOL, _UPLOAD_POOL
+
+
+def _observe_stage(stage: str, seconds: float) -> None:
+    observe_histogram(
+        "slice_stage_seconds",
+        value=seconds,
+        buckets=_STAGE_BUCKETS,
+        labels={"stage": stage},
+    )
+
+
+def _crop_encode(img: Image.Image, bbox_px: Any) -> Tuple[bytes, int, int]:
+    t0 = time.monotonic()
+    crop = img.crop(bbox_px)
+    w, h = crop.size
+    out = io.BytesIO()
+    crop.save(out, format="JPEG", quality=90)
+    _observe_stage("crop_encode", time.monotonic() - t0)
+    return out.getvalue(), int(w), int(h)
+
+
+def _upload_slice(storage: Any, data: bytes, prefix: str) -> Tuple[str, float]:
+    t0 = time.monotonic()
+    url = storage.upload_bytes(
+        data,
+        mime_type="image/jpeg",
+        suffix=".jpg",
+        prefix=prefix,
+        content_addressed=True,
+    )
+    elapsed = time.monotonic() - t0
+    _observe_stage("upload", elapsed)
+    return url, elapsed
 
 
 def crop_and_upload_slices(
@@ -267,46 +349,83 @@ def crop_and_upload_slices(
 ) -> Dict[QuestionNumber, QuestionLayout]:
     """
     For each question bbox, crop and upload to Supabase and populate slice_image_urls.
+
+    Crop+encode runs in a bounded CPU pool and each finished slice is uploaded right away on
+    the upload pool, so the page is ready after roughly the slowest upload instead of the sum.
+    A failed slice only affects its own question (same warnings as before); slice order per
+    question follows `bboxes_norm`.
     """
+    t_page = time.monotonic()
     storage = get_storage_client()
     img = download_image(page_image_url)
     width, height = img.size
-    total_uploaded = 0
+    encode_pool, upload_pool = _slice_pools()
+
+    # (question_number, bbox index) -> (url, w, h) or the exception that stopped it.
+    results: Dict[Tuple[QuestionNumber, int], Any] = {}
+    sizes: Dict[Tuple[QuestionNumber, int], Tuple[int, int]] = {}
+    encodes: Dict[Future, Tuple[QuestionNumber, int]] = {}
     for qn, layout in layouts.items():
         if only_question_numbers is not None and qn not in only_question_numbers:
             # Skip cropping for non-visual questions; still keep bbox for future relook.
             continue
+        for idx, b_norm in enumerate(layout.bboxes_norm or []):
+            try:
+                bbox_px = _norm_to_px_bbox(b_norm, width, height)
+                encodes[encode_pool.submit(_crop_encode, img, bbox_px)] = (qn, idx)
+            except Exception as e:
+                results[(qn, idx)] = e
+
+    uploads: Dict[Future, Tuple[QuestionNumber, int]] = {}
+    for fut in as_completed(encodes):
+        key = encodes[fut]
+        try:
+            data, w, h = fut.result()
+        except Exception as e:
+            results[key] = e
+            continue
+        sizes[key] = (w, h)
+        uploads[upload_pool.submit(_upload_slice, storage, data, prefix)] = key
+
+    upload_max_s = 0.0
+    for fut in as_completed(uploads):
+        key = uploads[fut]
+        try:
+            url, elapsed = fut.result()
+        except Exception as e:
+            results[key] = e
+            continue
+        upload_max_s = max(upload_max_s, elapsed)
+        w, h = sizes[key]
+        results[key] = (url, w, h)
+
+    total_uploaded = 0
+    for qn, layout in layouts.items():
+        if only_question_numbers is not None and qn not in only_question_numbers:
+            continue
         if not layout.bboxes_norm:
             continue
         slice_urls: List[str] = []
         slice_sizes: List[Dict[str, int]] = []
-        for b_norm in layout.bboxes_norm:
-            try:
-                bbox_px = _norm_to_px_bbox(b_norm, width, height)
-                crop = img.crop(bbox_px)
-                w, h = crop.size
-                out = io.BytesIO()
-                crop.save(out, format="JPEG", quality=90)
-                url = storage.upload_bytes(
-                    out.getvalue(),
-                    mime_type="image/jpeg",
-                    suffix=".jpg",
-                    prefix=prefix,
-                )
+        for idx in range(len(layout.bboxes_norm)):
+            res = results.get((qn, idx))
+            if isinstance(res, tuple):
+                url, w, h = res
                 slice_urls.append(url)
                 slice_sizes.append({"width": int(w), "height": int(h)})
                 total_uploaded += 1
-            except Exception as e:
-                layout.warnings.append(f"切片上传失败：{e}")
-                log_event(
-                    logger,
-                    "slice_upload_failed",
-                    level="warning",
-                    question_number=qn,
-                    page_image_url=redact_url(page_image_url),
-                    error_type=e.__class__.__name__,
-                    error=str(e),
-                )
+                continue
+            e = res if isinstance(res, Exception) else RuntimeError("slice_missing")
+            layout.warnings.append(f"切片上传失败：{e}")
+            log_event(
+                logger,
+                "slice_upload_failed",
+                level="warning",
+                question_number=qn,
+                page_image_url=redact_url(page_image_url),
+                error_type=e.__class__.__name__,
+                error=str(e),
+            )
         layout.slice_image_urls = slice_urls
         layout.slice_sizes_px = slice_sizes
         if not slice_urls:
@@ -319,11 +438,15 @@ def crop_and_upload_slices(
                 slices=len(slice_urls),
                 prefix=prefix,
             )
+    elapsed_s = time.monotonic() - t_page
+    _observe_stage("page", elapsed_s)
     log_event(
         logger,
         "slice_page_done",
         page_image_url=redact_url(page_image_url),
         questions=len([1 for v in layouts.values() if v.bboxes_norm]),
         slices=total_uploaded,
+        upload_max_ms=int(upload_max_s * 1000),
+        elapsed_ms=int(elapsed_s * 1000),
     )
     return layouts
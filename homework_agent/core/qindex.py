@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import contextvars
 import logging
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from homework_agent.services.ocr_baidu import BaiduPaddleOCRVLClient
 from homework_agent.services.ocr_siliconflow import SiliconFlowDeepSeekOCRClient
@@ -57,94 +59,301 @@ def qindex_is_configured() -> tuple[bool, str]:
     return True, f"ok (OCR_PROVIDER={provider or 'siliconflow_deepseek'})"
 
 
-@trace_span("qindex.build_question_index_for_pages")
-def build_question_index_for_pages(
-    page_urls: List[str],
+def _page_concurrency() -> int:
+    settings = get_settings()
+    try:
+        return max(1, int(getattr(settings, "qindex_page_concurrency", 4) or 4))
+    except Exception:
+        return 4
+
+
+def _ocr_url_for(page_url: str) -> str:
+    return maybe_preprocess_for_ocr(page_url) or page_url
+
+
+def _merge_pages(
+    done: Dict[int, Tuple[Dict[str, Any], List[str]]],
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Merge per-page results in page order (same shape/order as the sequential build)."""
+    questions: Dict[str, Any] = {}
+    warnings: List[str] = []
+    for page_idx in sorted(done):
+        page_questions, page_warnings = done[page_idx]
+        for qn, page_entry in page_questions.items():
+            entry = questions.get(qn) or {"question_number": qn, "pages": []}
+            entry["pages"].append(page_entry)
+            questions[qn] = entry
+        warnings.extend(page_warnings)
+    return questions, warnings
+
+
+def _index_page(
+    page_idx: int,
+    page_url: str,
     *,
-    question_numbers: List[str] | None = None,
-    session_id: str | None = None,
-) -> Dict[str, Any]:
+    settings: Any,
+    provider: str,
+    ocr_baidu: BaiduPaddleOCRVLClient,
+    ocr_deepseek: SiliconFlowDeepSeekOCRClient,
+    qwen_locator: SiliconFlowQIndexLocator,
+    only_qnums: Optional[set[str]],
+    base_prefix: str,
+    ocr_page_url: Optional[str] = None,
+    ocr_task: Optional[Future] = None,
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
     """
-    Build per-question bbox/slice index using OCR + simple layout heuristics.
+    OCR/locate + slice one page.
 
-    Returns:
-      {
-        "questions": { "<question_number>": { "question_number": ..., "pages": [...] }, ... },
-        "warnings": [...],
-      }
+    `ocr_task` is this page's Baidu task from a job-level batch (already submitted); without
+    it the page submits and waits on its own.
+    Returns ({question_number: page entry}, page warnings); failures become warnings.
     """
-    settings = get_settings()
-    provider = (settings.ocr_provider or "").strip().lower()
+    page_questions: Dict[str, Dict[str, Any]] = {}
+    page_warnings: List[str] = []
+    t_page = time.monotonic()
+    ocr_page_url = ocr_page_url or _ocr_url_for(page_url)
+    try:
+        log_event(
+            logger,
+            "qindex_page_start",
+            page_index=page_idx,
+            page_image_url=redact_url(page_url),
+            ocr_image_url=(
+                redact_url(ocr_page_url) if ocr_page_url != page_url else None
+            ),
+        )
+        # Download image once to get size (also needed for slice cropping)
+        from homework_agent.core.layout_index import download_image
 
-    ocr_baidu = BaiduPaddleOCRVLClient()
-    ocr_deepseek = SiliconFlowDeepSeekOCRClient()
-    qwen_locator = SiliconFlowQIndexLocator()
+        img = download_image(page_url, timeout=30.0)
+        w, h = img.size
 
-    ok, reason = qindex_is_configured()
-    if not ok:
-        return {"questions": {}, "warnings": [f"qindex skipped: {reason}"]}
+        task_id = None
+        task_status = None
+        ocr_provider_name = "unknown"
+        if provider in ("baidu", "baidu_paddleocr_vl"):
+            if ocr_task is not None:
+                task = ocr_task.result(
+                    timeout=ocr_baidu.poll_max_seconds + 2 * ocr_baidu.timeout_seconds
+                )
+                task_id = task.task_id
+            else:
+                task_id = ocr_baidu.submit(image_url=ocr_page_url)
+                task = ocr_baidu.wait(task_id)
+            task_status = task.status
+            blocks = ocr_baidu.extract_text_blocks(task.raw)
+            ocr_provider_name = "baidu_paddleocr_vl"
+        elif provider in (
+            "siliconflow_qwen3_vl",
+            "siliconflow_qindex",
+            "siliconflow_vl",
+        ):
+            allow_list = sorted(list(only_qnums)) if only_qnums is not None else None
+            loc = qwen_locator.locate(
+                image_url=ocr_page_url, only_question_numbers=allow_list
+            )
+            task_status = "done" if loc.questions else "failed"
 
-    t_all = time.monotonic()
-    questions: Dict[str, Any] = {}
-    warnings: List[str] = []
-    only_qnums = (
-        {str(q).strip() for q in (question_numbers or []) if str(q).strip()}
-        if question_numbers
-        else None
-    )
-    # For storage hygiene and later cleanup, prefer a stable session-scoped prefix.
-    # Chat should NOT rely on path conventions; it must always rely on URLs stored in Redis qindex.
-    base_prefix = (
-        f"slices/{session_id}/"
-        if session_id
-        else f"slices/{datetime.now().strftime('%Y%m%d')}/"
-    )
+            # Build layouts directly from locator results so we can support multi-bbox per question
+            # (e.g. shared figure area + question work area).
+            layouts: Dict[str, QuestionLayout] = {}
+            region_kinds: Dict[str, List[str]] = {}
+            for q in loc.questions:
+                qn = q.get("question_number")
+                regions = q.get("regions")
+                if not isinstance(qn, str) or not qn.strip():
+                    continue
+                qn_s = qn.strip()
+                if only_qnums is not None and qn_s not in only_qnums:
+                    continue
+                if not isinstance(regions, list) or not regions:
+                    continue
+                bboxes_yxyx: List[List[float]] = []
+                kinds: List[str] = []
+                for r in regions:
+                    if not isinstance(r, dict):
+                        continue
+                    kind = str(r.get("kind") or "question").strip().lower()
+                    if kind not in ("question", "figure"):
+                        kind = "question"
+                    bbox = r.get("bbox_norm_xyxy")
+                    if not (
+                        isinstance(bbox, (list, tuple))
+                        and len(bbox) == 4
+                        and all(isinstance(v, (int, float)) for v in bbox)
+                    ):
+                        continue
+                    xmin, ymin, xmax, ymax = [float(v) for v in bbox]
+                    # Clamp
+                    xmin = 0.0 if xmin < 0.0 else 1.0 if xmin > 1.0 else xmin
+                    ymin = 0.0 if ymin < 0.0 else 1.0 if ymin > 1.0 else ymin
+                    xmax = 0.0 if xmax < 0.0 else 1.0 if xmax > 1.0 else xmax
+                    ymax = 0.0 if ymax < 0.0 else 1.0 if ymax > 1.0 else ymax
+                    # Convert to yxyx for downstream cropper
+                    b_yxyx = [ymin, xmin, ymax, xmax]
+                    # Apply kind-specific padding: figures usually need more margin to avoid cut-off.
+                    pad = float(settings.slice_padding_ratio or 0.05)
+                    if kind == "figure":
+                        pad = min(0.25, pad * 2.0)
+                    ymin2, xmin2, ymax2, xmax2 = b_yxyx
+                    h2 = max(0.0, ymax2 - ymin2)
+                    w2 = max(0.0, xmax2 - xmin2)
+                    pad_y = h2 * pad
+                    pad_x = w2 * pad
+                    b_yxyx = [
+                        max(0.0, ymin2 - pad_y),
+                        max(0.0, xmin2 - pad_x),
+                        min(1.0, ymax2 + pad_y),
+                        min(1.0, xmax2 + pad_x),
+                    ]
+                    bboxes_yxyx.append(b_yxyx)
+                    kinds.append(kind)
+                if not bboxes_yxyx:
+                    continue
+                layouts[qn_s] = QuestionLayout(
+                    question_number=qn_s,
+                    bboxes_norm=bboxes_yxyx,
+                    slice_image_urls=[],
+                    warnings=[],
+                )
+                region_kinds[qn_s] = kinds
+
+            if not layouts:
+                page_warnings.append(
+                    f"page[{page_idx}]: OCR 未返回可用 blocks，改用整页"
+                )
+                log_event(
+                    logger,
+                    "qindex_page_done",
+                    page_index=page_idx,
+                    status="no_blocks",
+                    task_id=task_id,
+                    elapsed_ms=int((time.monotonic() - t_page) * 1000),
+                )
+                return page_questions, page_warnings
 
-    for page_idx, page_url in enumerate(page_urls or []):
-        if not page_url:
-            continue
-        t_page = time.monotonic()
-        ocr_page_url = maybe_preprocess_for_ocr(page_url) or page_url
-        try:
+            layouts = crop_and_upload_slices(
+                page_image_url=page_url,
+                layouts=layouts,
+                only_question_numbers=only_qnums,
+                prefix=f"{base_prefix}p{page_idx}/",
+            )
+            slices_total = sum(len(v.slice_image_urls or []) for v in layouts.values())
             log_event(
                 logger,
-                "qindex_page_start",
+                "qindex_page_layouts_built",
                 page_index=page_idx,
-                page_image_url=redact_url(page_url),
-                ocr_image_url=(
-                    redact_url(ocr_page_url) if ocr_page_url != page_url else None
-                ),
+                task_id=task_id,
+                task_status=task_status,
+                blocks=None,
+                layouts=len(layouts),
+                slices=slices_total,
             )
-            # Download image once to get size (also needed for slice cropping)
-            from homework_agent.core.layout_index import download_image
 
-            img = download_image(page_url, timeout=30.0)
-            w, h = img.size
+            for qn, layout in layouts.items():
+                # Add region metadata (kind + bbox + slice url) while keeping old fields.
+                kinds = region_kinds.get(qn) or ["question"] * len(
+                    layout.bboxes_norm or []
+                )
+                regions_out: List[Dict[str, Any]] = []
+                for i, bbox_yxyx in enumerate(layout.bboxes_norm or []):
+                    u = (
+                        (layout.slice_image_urls or [None] * len(layout.bboxes_norm))[i]
+                        if i < len(layout.slice_image_urls or [])
+                        else None
+                    )
+                    regions_out.append(
+                        {
+                            "kind": kinds[i] if i < len(kinds) else "question",
+                            "bbox": bbox_yxyx,
+                            "slice_image_url": u,
+                        }
+                    )
+
+                page_questions[qn] = {
+                    "page_index": page_idx,
+                    "page_image_url": page_url,
+                    "question_bboxes": [
+                        {"coords": b, "kind": regions_out[i]["kind"]}
+                        for i, b in enumerate(layout.bboxes_norm or [])
+                    ],
+                    "slice_image_urls": layout.slice_image_urls,
+                    "regions": regions_out,
+                    "warnings": layout.warnings,
+                    "ocr": {
+                        "provider": "siliconflow_qwen3_vl_locator",
+                        "task_id": task_id,
+                        "status": task_status,
+                    },
+                }
 
+            log_event(
+                logger,
+                "qindex_page_done",
+                page_index=page_idx,
+                status="ok",
+                task_id=task_id,
+                questions=len(layouts),
+                slices=slices_total,
+                elapsed_ms=int((time.monotonic() - t_page) * 1000),
+            )
+            return page_questions, page_warnings
+        else:
+            res = ocr_deepseek.analyze(image_url=ocr_page_url)
             task_id = None
-            task_status = None
-            ocr_provider_name = "unknown"
-            if provider in ("baidu", "baidu_paddleocr_vl"):
-                task_id = ocr_baidu.submit(image_url=ocr_page_url)
-                task = ocr_baidu.wait(task_id)
-                task_status = task.status
-                blocks = ocr_baidu.extract_text_blocks(task.raw)
-                ocr_provider_name = "baidu_paddleocr_vl"
-            elif provider in (
-                "siliconflow_qwen3_vl",
-                "siliconflow_qindex",
-                "siliconflow_vl",
-            ):
+            task_status = "done" if res.blocks else "failed"
+            # Convert bbox_norm -> px location for layout_index
+            blocks = []
+            for b in res.blocks:
+                bbox = b.get("bbox_norm")
+                if not (
+                    isinstance(bbox, (list, tuple))
+                    and len(bbox) == 4
+                    and all(isinstance(v, (int, float)) for v in bbox)
+                ):
+                    continue
+                xmin, ymin, xmax, ymax = [float(v) for v in bbox]
+                xmin = 0.0 if xmin < 0.0 else 1.0 if xmin > 1.0 else xmin
+                ymin = 0.0 if ymin < 0.0 else 1.0 if ymin > 1.0 else ymin
+                xmax = 0.0 if xmax < 0.0 else 1.0 if xmax > 1.0 else xmax
+                ymax = 0.0 if ymax < 0.0 else 1.0 if ymax > 1.0 else ymax
+                left = xmin * w
+                top = ymin * h
+                width = max(1.0, (xmax - xmin) * w)
+                height = max(1.0, (ymax - ymin) * h)
+                blocks.append(
+                    {
+                        "text": b.get("text"),
+                        "location": {
+                            "left": left,
+                            "top": top,
+                            "width": width,
+                            "height": height,
+                        },
+                    }
+                )
+            ocr_provider_name = "siliconflow_deepseek_ocr"
+
+            # DeepSeek-OCR frequently returns no reliable bbox blocks; fall back to a
+            # multimodal locator (Qwen3-VL) to get per-question bboxes for slicing.
+            if not blocks and qwen_locator.is_configured():
+                log_event(
+                    logger,
+                    "qindex_fallback_locator",
+                    from_provider="siliconflow_deepseek_ocr",
+                    to_provider="siliconflow_qwen3_vl_locator",
+                    page_index=page_idx,
+                    page_image_url=redact_url(page_url),
+                    allowlist=len(only_qnums or []),
+                )
                 allow_list = (
                     sorted(list(only_qnums)) if only_qnums is not None else None
                 )
                 loc = qwen_locator.locate(
-                    image_url=ocr_page_url, only_question_numbers=allow_list
+                    image_url=page_url, only_question_numbers=allow_list
                 )
                 task_status = "done" if loc.questions else "failed"
 
-                # Build layouts directly from locator results so we can support multi-bbox per question
-                # (e.g. shared figure area + question work area).
                 layouts: Dict[str, QuestionLayout] = {}
                 region_kinds: Dict[str, List[str]] = {}
                 for q in loc.questions:
@@ -173,14 +382,11 @@ def build_question_index_for_pages(
                         ):
                             continue
                         xmin, ymin, xmax, ymax = [float(v) for v in bbox]
-                        # Clamp
                         xmin = 0.0 if xmin < 0.0 else 1.0 if xmin > 1.0 else xmin
                         ymin = 0.0 if ymin < 0.0 else 1.0 if ymin > 1.0 else ymin
                         xmax = 0.0 if xmax < 0.0 else 1.0 if xmax > 1.0 else xmax
                         ymax = 0.0 if ymax < 0.0 else 1.0 if ymax > 1.0 else ymax
-                        # Convert to yxyx for downstream cropper
                         b_yxyx = [ymin, xmin, ymax, xmax]
-                        # Apply kind-specific padding: figures usually need more margin to avoid cut-off.
                         pad = float(settings.slice_padding_ratio or 0.05)
                         if kind == "figure":
                             pad = min(0.25, pad * 2.0)
@@ -207,66 +413,38 @@ def build_question_index_for_pages(
                     )
                     region_kinds[qn_s] = kinds
 
-                if not layouts:
-                    warnings.append(
-                        f"page[{page_idx}]: OCR 未返回可用 blocks，改用整页"
-                    )
-                    log_event(
-                        logger,
-                        "qindex_page_done",
-                        page_index=page_idx,
-                        status="no_blocks",
-                        task_id=task_id,
-                        elapsed_ms=int((time.monotonic() - t_page) * 1000),
+                if layouts:
+                    ocr_provider_name = "siliconflow_qwen3_vl_locator_fallback"
+                    layouts = crop_and_upload_slices(
+                        page_image_url=page_url,
+                        layouts=layouts,
+                        only_question_numbers=only_qnums,
+                        prefix=f"{base_prefix}p{page_idx}/",
                     )
-                    continue
-
-                layouts = crop_and_upload_slices(
-                    page_image_url=page_url,
-                    layouts=layouts,
-                    only_question_numbers=only_qnums,
-                    prefix=f"{base_prefix}p{page_idx}/",
-                )
-                slices_total = sum(
-                    len(v.slice_image_urls or []) for v in layouts.values()
-                )
-                log_event(
-                    logger,
-                    "qindex_page_layouts_built",
-                    page_index=page_idx,
-                    task_id=task_id,
-                    task_status=task_status,
-                    blocks=None,
-                    layouts=len(layouts),
-                    slices=slices_total,
-                )
-
-                for qn, layout in layouts.items():
-                    # Add region metadata (kind + bbox + slice url) while keeping old fields.
-                    kinds = region_kinds.get(qn) or ["question"] * len(
-                        layout.bboxes_norm or []
-                    )
-                    regions_out: List[Dict[str, Any]] = []
-                    for i, bbox_yxyx in enumerate(layout.bboxes_norm or []):
-                        u = (
-                            (
-                                layout.slice_image_urls
-                                or [None] * len(layout.bboxes_norm)
-                            )[i]
-                            if i < len(layout.slice_image_urls or [])
-                            else None
-                        )
-                        regions_out.append(
-                            {
-                                "kind": kinds[i] if i < len(kinds) else "question",
-                                "bbox": bbox_yxyx,
-                                "slice_image_url": u,
-                            }
+                    for qn, layout in layouts.items():
+                        kinds = region_kinds.get(qn) or ["question"] * len(
+                            layout.bboxes_norm or []
                         )
-
-                    entry = questions.get(qn) or {"question_number": qn, "pages": []}
-                    entry["pages"].append(
-                        {
+                        regions_out: List[Dict[str, Any]] = []
+                        for i, bbox_yxyx in enumerate(layout.bboxes_norm or []):
+                            u = (
+                                (
+                                    layout.slice_image_urls
+                                    or [None] * len(layout.bboxes_norm)
+                                )[i]
+                                if i < len(layout.slice_image_urls or [])
+                                else None
+                            )
+                            regions_out.append(
+                                {
+                                    "kind": (
+                                        kinds[i] if i < len(kinds) else "question"
+                                    ),
+                                    "bbox": bbox_yxyx,
+                                    "slice_image_url": u,
+                                }
+                            )
+                        page_questions[qn] = {
                             "page_index": page_idx,
                             "page_image_url": page_url,
                             "question_bboxes": [
@@ -277,289 +455,215 @@ def build_question_index_for_pages(
                             "regions": regions_out,
                             "warnings": layout.warnings,
                             "ocr": {
-                                "provider": "siliconflow_qwen3_vl_locator",
+                                "provider": ocr_provider_name,
                                 "task_id": task_id,
                                 "status": task_status,
                             },
                         }
-                    )
-                    questions[qn] = entry
-
-                log_event(
-                    logger,
-                    "qindex_page_done",
-                    page_index=page_idx,
-                    status="ok",
-                    task_id=task_id,
-                    questions=len(layouts),
-                    slices=slices_total,
-                    elapsed_ms=int((time.monotonic() - t_page) * 1000),
-                )
-                continue
-            else:
-                res = ocr_deepseek.analyze(image_url=ocr_page_url)
-                task_id = None
-                task_status = "done" if res.blocks else "failed"
-                # Convert bbox_norm -> px location for layout_index
-                blocks = []
-                for b in res.blocks:
-                    bbox = b.get("bbox_norm")
-                    if not (
-                        isinstance(bbox, (list, tuple))
-                        and len(bbox) == 4
-                        and all(isinstance(v, (int, float)) for v in bbox)
-                    ):
-                        continue
-                    xmin, ymin, xmax, ymax = [float(v) for v in bbox]
-                    xmin = 0.0 if xmin < 0.0 else 1.0 if xmin > 1.0 else xmin
-                    ymin = 0.0 if ymin < 0.0 else 1.0 if ymin > 1.0 else ymin
-                    xmax = 0.0 if xmax < 0.0 else 1.0 if xmax > 1.0 else xmax
-                    ymax = 0.0 if ymax < 0.0 else 1.0 if ymax > 1.0 else ymax
-                    left = xmin * w
-                    top = ymin * h
-                    width = max(1.0, (xmax - xmin) * w)
-                    height = max(1.0, (ymax - ymin) * h)
-                    blocks.append(
-                        {
-                            "text": b.get("text"),
-                            "location": {
-                                "left": left,
-                                "top": top,
-                                "width": width,
-                                "height": height,
-                            },
-                        }
-                    )
-                ocr_provider_name = "siliconflow_deepseek_ocr"
-
-                # DeepSeek-OCR frequently returns no reliable bbox blocks; fall back to a
-                # multimodal locator (Qwen3-VL) to get per-question bboxes for slicing.
-                if not blocks and qwen_locator.is_configured():
                     log_event(
                         logger,
-                        "qindex_fallback_locator",
-                        from_provider="siliconflow_deepseek_ocr",
-                        to_provider="siliconflow_qwen3_vl_locator",
+                        "qindex_page_done",
                         page_index=page_idx,
-                        page_image_url=redact_url(page_url),
-                        allowlist=len(only_qnums or []),
-                    )
-                    allow_list = (
-                        sorted(list(only_qnums)) if only_qnums is not None else None
-                    )
-                    loc = qwen_locator.locate(
-                        image_url=page_url, only_question_numbers=allow_list
-                    )
-                    task_status = "done" if loc.questions else "failed"
-
-                    layouts: Dict[str, QuestionLayout] = {}
-                    region_kinds: Dict[str, List[str]] = {}
-                    for q in loc.questions:
-                        qn = q.get("question_number")
-                        regions = q.get("regions")
-                        if not isinstance(qn, str) or not qn.strip():
-                            continue
-                        qn_s = qn.strip()
-                        if only_qnums is not None and qn_s not in only_qnums:
-                            continue
-                        if not isinstance(regions, list) or not regions:
-                            continue
-                        bboxes_yxyx: List[List[float]] = []
-                        kinds: List[str] = []
-                        for r in regions:
-                            if not isinstance(r, dict):
-                                continue
-                            kind = str(r.get("kind") or "question").strip().lower()
-                            if kind not in ("question", "figure"):
-                                kind = "question"
-                            bbox = r.get("bbox_norm_xyxy")
-                            if not (
-                                isinstance(bbox, (list, tuple))
-                                and len(bbox) == 4
-                                and all(isinstance(v, (int, float)) for v in bbox)
-                            ):
-                                continue
-                            xmin, ymin, xmax, ymax = [float(v) for v in bbox]
-                            xmin = 0.0 if xmin < 0.0 else 1.0 if xmin > 1.0 else xmin
-                            ymin = 0.0 if ymin < 0.0 else 1.0 if ymin > 1.0 else ymin
-                            xmax = 0.0 if xmax < 0.0 else 1.0 if xmax > 1.0 else xmax
-                            ymax = 0.0 if ymax < 0.0 else 1.0 if ymax > 1.0 else ymax
-                            b_yxyx = [ymin, xmin, ymax, xmax]
-                            pad = float(settings.slice_padding_ratio or 0.05)
-                            if kind == "figure":
-                                pad = min(0.25, pad * 2.0)
-                            ymin2, xmin2, ymax2, xmax2 = b_yxyx
-                            h2 = max(0.0, ymax2 - ymin2)
-                            w2 = max(0.0, xmax2 - xmin2)
-                            pad_y = h2 * pad
-                            pad_x = w2 * pad
-                            b_yxyx = [
-                                max(0.0, ymin2 - pad_y),
-                                max(0.0, xmin2 - pad_x),
-                                min(1.0, ymax2 + pad_y),
-                                min(1.0, xmax2 + pad_x),
-                            ]
-                            bboxes_yxyx.append(b_yxyx)
-                            kinds.append(kind)
-                        if not bboxes_yxyx:
-                            continue
-                        layouts[qn_s] = QuestionLayout(
-                            question_number=qn_s,
-                            bboxes_norm=bboxes_yxyx,
-                            slice_image_urls=[],
-                            warnings=[],
-                        )
-                        region_kinds[qn_s] = kinds
-
-                    if layouts:
-                        ocr_provider_name = "siliconflow_qwen3_vl_locator_fallback"
-                        layouts = crop_and_upload_slices(
-                            page_image_url=page_url,
-                            layouts=layouts,
-                            only_question_numbers=only_qnums,
-                            prefix=f"{base_prefix}p{page_idx}/",
-                        )
-                        for qn, layout in layouts.items():
-                            kinds = region_kinds.get(qn) or ["question"] * len(
-                                layout.bboxes_norm or []
-                            )
-                            regions_out: List[Dict[str, Any]] = []
-                            for i, bbox_yxyx in enumerate(layout.bboxes_norm or []):
-                                u = (
-                                    (
-                                        layout.slice_image_urls
-                                        or [None] * len(layout.bboxes_norm)
-                                    )[i]
-                                    if i < len(layout.slice_image_urls or [])
-                                    else None
-                                )
-                                regions_out.append(
-                                    {
-                                        "kind": (
-                                            kinds[i] if i < len(kinds) else "question"
-                                        ),
-                                        "bbox": bbox_yxyx,
-                                        "slice_image_url": u,
-                                    }
-                                )
-                            entry = questions.get(qn) or {
-                                "question_number": qn,
-                                "pages": [],
-                            }
-                            entry["pages"].append(
-                                {
-                                    "page_index": page_idx,
-                                    "page_image_url": page_url,
-                                    "question_bboxes": [
-                                        {"coords": b, "kind": regions_out[i]["kind"]}
-                                        for i, b in enumerate(layout.bboxes_norm or [])
-                                    ],
-                                    "slice_image_urls": layout.slice_image_urls,
-                                    "regions": regions_out,
-                                    "warnings": layout.warnings,
-                                    "ocr": {
-                                        "provider": ocr_provider_name,
-                                        "task_id": task_id,
-                                        "status": task_status,
-                                    },
-                                }
-                            )
-                            questions[qn] = entry
-                        log_event(
-                            logger,
-                            "qindex_page_done",
-                            page_index=page_idx,
-                            status="ok",
-                            task_id=task_id,
-                            questions=len(layouts),
-                            slices=sum(
-                                len(v.slice_image_urls or []) for v in layouts.values()
-                            ),
-                            elapsed_ms=int((time.monotonic() - t_page) * 1000),
-                        )
-                        continue
-            if not blocks:
-                warnings.append(f"page[{page_idx}]: OCR 未返回可用 blocks，改用整页")
-                log_event(
-                    logger,
-                    "qindex_page_done",
-                    page_index=page_idx,
-                    status="no_blocks",
-                    task_id=task_id,
-                    elapsed_ms=int((time.monotonic() - t_page) * 1000),
-                )
-                continue
-
-            layouts = build_question_layouts_from_blocks(
-                blocks=blocks,
-                page_width=w,
-                page_height=h,
-                padding_ratio=settings.slice_padding_ratio,
-            )
-            # Upload slices (best-effort)
-            layouts = crop_and_upload_slices(
-                page_image_url=page_url,
-                layouts=layouts,
-                only_question_numbers=only_qnums,
-                prefix=f"{base_prefix}p{page_idx}/",
-            )
-            slices_total = sum(len(v.slice_image_urls or []) for v in layouts.values())
-            log_event(
-                logger,
-                "qindex_page_layouts_built",
-                page_index=page_idx,
-                task_id=task_id,
-                task_status=task_status,
-                blocks=len(blocks),
-                layouts=len(layouts),
-                slices=slices_total,
-            )
-
-            for qn, layout in layouts.items():
-                entry = questions.get(qn) or {"question_number": qn, "pages": []}
-                entry["pages"].append(
-                    {
-                        "page_index": page_idx,
-                        "page_image_url": page_url,
-                        "question_bboxes": (
-                            [{"coords": b} for b in layout.bboxes_norm]
-                            if layout.bboxes_norm
-                            else []
+                        status="ok",
+                        task_id=task_id,
+                        questions=len(layouts),
+                        slices=sum(
+                            len(v.slice_image_urls or []) for v in layouts.values()
                         ),
-                        "slice_image_urls": layout.slice_image_urls,
-                        "warnings": layout.warnings,
-                        "ocr": {
-                            "provider": ocr_provider_name,
-                            "task_id": task_id,
-                            "status": task_status,
-                        },
-                    }
-                )
-                questions[qn] = entry
+                        elapsed_ms=int((time.monotonic() - t_page) * 1000),
+                    )
+                    return page_questions, page_warnings
+        if not blocks:
+            page_warnings.append(f"page[{page_idx}]: OCR 未返回可用 blocks，改用整页")
             log_event(
                 logger,
                 "qindex_page_done",
                 page_index=page_idx,
-                status="ok",
+                status="no_blocks",
                 task_id=task_id,
-                questions=len(layouts),
-                slices=slices_total,
                 elapsed_ms=int((time.monotonic() - t_page) * 1000),
             )
-        except Exception as e:
-            warnings.append(f"page[{page_idx}]: OCR/切片失败，改用整页：{str(e)}")
-            log_event(
-                logger,
-                "qindex_page_done",
-                level="warning",
-                page_index=page_idx,
-                status="error",
-                page_image_url=redact_url(page_url),
-                error_type=e.__class__.__name__,
-                error=str(e),
-                elapsed_ms=int((time.monotonic() - t_page) * 1000),
-            )
-            continue
+            return page_questions, page_warnings
+
+        layouts = build_question_layouts_from_blocks(
+            blocks=blocks,
+            page_width=w,
+            page_height=h,
+            padding_ratio=settings.slice_padding_ratio,
+        )
+        # Upload slices (best-effort)
+        layouts = crop_and_upload_slices(
+            page_image_url=page_url,
+            layouts=layouts,
+            only_question_numbers=only_qnums,
+            prefix=f"{base_prefix}p{page_idx}/",
+        )
+        slices_total = sum(len(v.slice_image_urls or []) for v in layouts.values())
+        log_event(
+            logger,
+            "qindex_page_layouts_built",
+            page_index=page_idx,
+            task_id=task_id,
+            task_status=task_status,
+            blocks=len(blocks),
+            layouts=len(layouts),
+            slices=slices_total,
+        )
+
+        for qn, layout in layouts.items():
+            page_questions[qn] = {
+                "page_index": page_idx,
+                "page_image_url": page_url,
+                "question_bboxes": (
+                    [{"coords": b} for b in layout.bboxes_norm]
+                    if layout.bboxes_norm
+                    else []
+                ),
+                "slice_image_urls": layout.slice_image_urls,
+                "warnings": layout.warnings,
+                "ocr": {
+                    "provider": ocr_provider_name,
+                    "task_id": task_id,
+                    "status": task_status,
+                },
+            }
+        log_event(
+            logger,
+            "qindex_page_done",
+            page_index=page_idx,
+            status="ok",
+            task_id=task_id,
+            questions=len(layouts),
+            slices=slices_total,
+            elapsed_ms=int((time.monotonic() - t_page) * 1000),
+        )
+    except Exception as e:
+        page_warnings.append(f"page[{page_idx}]: OCR/切片失败，改用整页：{str(e)}")
+        log_event(
+            logger,
+            "qindex_page_done",
+            level="warning",
+            page_index=page_idx,
+            status="error",
+            page_image_url=redact_url(page_url),
+            error_type=e.__class__.__name__,
+            error=str(e),
+            elapsed_ms=int((time.monotonic() - t_page) * 1000),
+        )
+    return page_questions, page_warnings
+
+
+@trace_span("qindex.build_question_index_for_pages")
+def build_question_index_for_pages(
+    page_urls: List[str],
+    *,
+    question_numbers: List[str] | None = None,
+    session_id: str | None = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Build per-question bbox/slice index using OCR + simple layout heuristics.
+
+    Pages are processed concurrently (up to QINDEX_PAGE_CONCURRENCY). When `on_progress` is
+    given it receives the merged partial index after each page that completes before the last
+    one, so callers can publish page-1 slices while later pages are still in OCR. Partial
+    snapshots carry a "qindex queued (partial i/n pages)" warning, which keeps chat from
+    re-enqueueing or overwriting them.
+
+    Returns:
+      {
+        "questions": { "<question_number>": { "question_number": ..., "pages": [...] }, ... },
+        "warnings": [...],
+      }
+    """
+    settings = get_settings()
+    provider = (settings.ocr_provider or "").strip().lower()
+
+    ocr_baidu = BaiduPaddleOCRVLClient()
+    ocr_deepseek = SiliconFlowDeepSeekOCRClient()
+    qwen_locator = SiliconFlowQIndexLocator()
+
+    ok, reason = qindex_is_configured()
+    if not ok:
+        return {"questions": {}, "warnings": [f"qindex skipped: {reason}"]}
+
+    t_all = time.monotonic()
+    only_qnums = (
+        {str(q).strip() for q in (question_numbers or []) if str(q).strip()}
+        if question_numbers
+        else None
+    )
+    # For storage hygiene and later cleanup, prefer a stable session-scoped prefix.
+    # Chat should NOT rely on path conventions; it must always rely on URLs stored in Redis qindex.
+    base_prefix = (
+        f"slices/{session_id}/"
+        if session_id
+        else f"slices/{datetime.now().strftime('%Y%m%d')}/"
+    )
+
+    pages = [(i, u) for i, u in enumerate(page_urls or []) if u]
+    done: Dict[int, Tuple[Dict[str, Any], List[str]]] = {}
+    ocr_urls: Dict[int, str] = {}
+    ocr_tasks: Dict[int, Future] = {}
+    if pages:
+        with ThreadPoolExecutor(
+            max_workers=min(_page_concurrency(), len(pages)),
+            thread_name_prefix="qindex-page",
+        ) as pool:
+            if provider in ("baidu", "baidu_paddleocr_vl"):
+                # Submit every page's Baidu task up front and poll them together; each page
+                # worker then waits only for its own task.
+                prepared = [
+                    (i, pool.submit(contextvars.copy_context().run, _ocr_url_for, u))
+                    for i, u in pages
+                ]
+                ocr_urls = {i: fut.result() for i, fut in prepared}
+                ocr_tasks = dict(
+                    zip(ocr_urls, ocr_baidu.start_batch(list(ocr_urls.values())))
+                )
+            futures = {
+                pool.submit(
+                    contextvars.copy_context().run,
+                    _index_page,
+                    page_idx,
+                    page_url,
+                    settings=settings,
+                    provider=provider,
+                    ocr_baidu=ocr_baidu,
+                    ocr_deepseek=ocr_deepseek,
+                    qwen_locator=qwen_locator,
+                    only_qnums=only_qnums,
+                    base_prefix=base_prefix,
+                    ocr_page_url=ocr_urls.get(page_idx),
+                    ocr_task=ocr_tasks.get(page_idx),
+                ): page_idx
+                for page_idx, page_url in pages
+            }
+            for fut in as_completed(futures):
+                done[futures[fut]] = fut.result()
+                if on_progress is None or len(done) >= len(pages):
+                    continue
+                partial_questions, partial_warnings = _merge_pages(done)
+                try:
+                    on_progress(
+                        {
+                            "questions": partial_questions,
+                            "warnings": [
+                                *partial_warnings,
+                                f"qindex queued (partial {len(done)}/{len(pages)} pages)",
+                            ],
+                        }
+                    )
+                except Exception as e:
+                    log_event(
+                        logger,
+                        "qindex_progress_failed",
+                        level="warning",
+                        pages_done=len(done),
+                        error_type=e.__class__.__name__,
+                        error=str(e),
+                    )
+    questions, warnings = _merge_pages(done)
 
     slices_total = 0
     try:
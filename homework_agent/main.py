@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 
@@ -25,6 +26,7 @@ from homework_agent.utils.errors import (
 )
 from homework_agent.utils.observability import get_request_id_from_headers
 from homework_agent.utils.metrics import render_prometheus
+from homework_agent.utils.redis_pool import get_async_redis
 
 logger = logging.getLogger(__name__)
 
@@ -129,11 +131,10 @@ def create_app() -> FastAPI:
 
         # 1. Check Redis (critical for workers)
         try:
-            import redis.asyncio as redis
-
-            r = redis.from_url(str(settings.redis_url), socket_timeout=1.0)
-            await r.ping()
-            await r.close()
+            r = get_async_redis(str(settings.redis_url or "") or None)
+            if r is None:
+                raise RuntimeError("REDIS_URL not configured")
+            await asyncio.wait_for(r.ping(), timeout=1.0)
         except Exception as e:
             logger.error(f"Readiness check failed (Redis): {e}")
             return PlainTextResponse("not ready (redis)", status_code=503)
@@ -6,7 +6,7 @@ import logging
 import re
 import time
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -21,7 +21,7 @@ from homework_agent.core.prompts_autonomous import (
     build_aggregator_user_prompt,
 )
 from homework_agent.models.schemas import ImageRef, Subject
-from homework_agent.services.llm import LLMClient, _repair_json_text
+from homework_agent.services.llm import AsyncLLMClient
 from homework_agent.services.preprocessing import PreprocessingPipeline
 from homework_agent.services.session_state import SessionState, get_session_store
 from homework_agent.services.autonomous_tools import (
@@ -37,6 +37,8 @@ from homework_agent.models.tool_result import ToolResult
 from homework_agent.utils.observability import log_event, log_llm_usage, trace_span
 from homework_agent.utils.settings import get_settings
 from homework_agent.utils.budget import RunBudget
+from homework_agent.utils.json_repair import parse_json_object
+from homework_agent.utils.json_stream import StreamingArrayItems
 from homework_agent.utils.versioning import stable_json_hash
 from homework_agent.utils.url_image_helpers import _download_as_data_uri
 
@@ -57,9 +59,10 @@ def _is_rate_limit_error(err: Exception) -> bool:
 async def _call_llm_with_backoff(
     fn, *, timeout_s: float, retries: int = 2, base_delay: float = 1.0
 ):
+    """Await `fn()` (a coroutine factory, e.g. an AsyncLLMClient call) with timeout + 429 backoff."""
     for attempt in range(retries + 1):
         try:
-            return await asyncio.wait_for(asyncio.to_thread(fn), timeout=timeout_s)
+            return await asyncio.wait_for(fn(), timeout=timeout_s)
         except Exception as e:
             if _is_rate_limit_error(e) and attempt < retries:
                 await asyncio.sleep(base_delay * (2**attempt))
@@ -129,22 +132,21 @@ def _ensure_judgment_basis(result: Dict[str, Any], *, min_len: int) -> None:
     result["judgment_basis"] = out
 
 
-def _parse_json(text: str, model: Any) -> Optional[Any]:
+def _parse_json(
+    text: str, model: Any, *, allow_truncated: bool = True
+) -> Optional[Any]:
+    """`allow_truncated=False`: a cut-off answer counts as a failure (caller retries larger)."""
     if not text:
         return None
-    raw = str(text)
+    parsed = parse_json_object(text, site="autonomous")
+    if parsed.value is None:
+        return None
+    if not allow_truncated and "truncated" in parsed.repairs:
+        return None
     try:
-        data = json.loads(raw)
-        return model.model_validate(data)
+        return model.model_validate(parsed.value)
     except Exception:
-        repaired = _repair_json_text(raw)
-        if not repaired:
-            return None
-        try:
-            data = json.loads(repaired)
-            return model.model_validate(data)
-        except Exception:
-            return None
+        return None
 
 
 def _dedupe_images(images: List[str]) -> List[str]:
@@ -209,7 +211,7 @@ def _resolve_templates(value: Any, state: SessionState) -> Any:
 
 class PlannerAgent:
     def __init__(
-        self, llm: LLMClient, provider: str, max_tokens: int, timeout_s: float
+        self, llm: AsyncLLMClient, provider: str, max_tokens: int, timeout_s: float
     ) -> None:
         self.llm = llm
         self.provider = provider
@@ -263,6 +265,7 @@ class PlannerAgent:
                     provider=self.provider,
                     max_tokens=self.max_tokens,
                     temperature=0.2,
+                    hedge_site="agent_plan",
                 ),
                 timeout_s=effective_timeout,
             )
@@ -551,7 +554,7 @@ class ExecutorAgent:
 
 class ReflectorAgent:
     def __init__(
-        self, llm: LLMClient, provider: str, max_tokens: int, timeout_s: float
+        self, llm: AsyncLLMClient, provider: str, max_tokens: int, timeout_s: float
     ) -> None:
         self.llm = llm
         self.provider = provider
@@ -603,6 +606,7 @@ class ReflectorAgent:
                     provider=self.provider,
                     max_tokens=self.max_tokens,
                     temperature=0.2,
+                    hedge_site="agent_reflect",
                 ),
                 timeout_s=effective_timeout,
             )
@@ -663,7 +667,7 @@ class ReflectorAgent:
 class AggregatorAgent:
     def __init__(
         self,
-        llm: LLMClient,
+        llm: AsyncLLMClient,
         provider: str,
         max_tokens: int,
         subject: Subject,
@@ -681,6 +685,7 @@ class AggregatorAgent:
         *,
         request_id: Optional[str] = None,
         budget: Optional[RunBudget] = None,
+        on_result: Optional[Callable[[Dict[str, Any]], Any]] = None,
     ) -> AutonomousPayload:
         evidence = json.dumps(
             {
@@ -914,10 +919,42 @@ class AggregatorAgent:
                 # Only enable image_process when we either have explicit slices OR we have a clear
                 # diagram/geometry risk signal from OCR (slices may be missing in qindex_only/off).
                 use_image_tools = False
+            # image_process tool calls do not stream; those runs keep the batch call.
+            stream_results = bool(
+                on_result is not None
+                and not use_image_tools
+                and bool(getattr(settings, "grade_stream_results_enabled", True))
+            )
 
-            def _call_llm(max_tokens: int):
+            async def _call_llm(max_tokens: int):
+                if stream_results:
+                    try:
+                        res = await self._generate_streaming(
+                            state,
+                            prompt=prompt,
+                            system_prompt=system_prompt,
+                            images=image_refs if use_images_for_aggregate else None,
+                            max_tokens=int(max_tokens),
+                            on_result=on_result,
+                            request_id=request_id,
+                            started=start,
+                        )
+                        if str(getattr(res, "text", "") or "").strip():
+                            return res
+                    except Exception as e:
+                        if _is_rate_limit_error(e):
+                            raise
+                        log_event(
+                            aggregator_logger,
+                            "agent_aggregate_stream_failed",
+                            level="warning",
+                            session_id=state.session_id,
+                            request_id=request_id,
+                            error_type=e.__class__.__name__,
+                            error=str(e),
+                        )
                 if use_images_for_aggregate:
-                    return self.llm.generate_with_images(
+                    return await self.llm.generate_with_images(
                         system_prompt=system_prompt,
                         user_prompt=prompt,
                         images=image_refs,
@@ -925,13 +962,15 @@ class AggregatorAgent:
                         max_tokens=int(max_tokens),
                         temperature=0.2,
                         use_tools=use_image_tools,
+                        hedge_site="agent_aggregate",
                     )
-                return self.llm.generate(
+                return await self.llm.generate(
                     prompt=prompt,
                     system_prompt=system_prompt,
                     provider=self.provider,
                     max_tokens=int(max_tokens),
                     temperature=0.2,
+                    hedge_site="agent_aggregate",
                 )
 
             text = await _call_llm_with_backoff(
@@ -1032,7 +1071,8 @@ class AggregatorAgent:
         )
         raw_text = text.text if hasattr(text, "text") else str(text)
         parse_start = time.monotonic()
-        parsed = _parse_json(raw_text, AutonomousPayload)
+        # Truncated output lost its trailing results: prefer the higher-cap retry below.
+        parsed = _parse_json(raw_text, AutonomousPayload, allow_truncated=False)
         parse_ms = int((time.monotonic() - parse_start) * 1000)
         try:
             timings = state.partial_results.setdefault("timings_ms", {})
@@ -1085,6 +1125,19 @@ class AggregatorAgent:
                             error_type=retry_err.__class__.__name__,
                             error=str(retry_err),
                         )
+            # No (successful) retry: the complete part of a truncated answer beats nothing.
+            salvaged = _parse_json(raw_text, AutonomousPayload)
+            if salvaged:
+                log_event(
+                    aggregator_logger,
+                    "agent_aggregate_truncated",
+                    level="warning",
+                    session_id=state.session_id,
+                    request_id=request_id,
+                    results=len(salvaged.results),
+                )
+                salvaged.warnings.append("autonomous_agent_output_truncated")
+                return salvaged
             logger.error(
                 f"Aggregator parse failed for {state.session_id}. Raw response (first 500 chars): {raw_text[:500]}"
             )
@@ -1098,6 +1151,67 @@ class AggregatorAgent:
             )
         return parsed
 
+    async def _generate_streaming(
+        self,
+        state: SessionState,
+        *,
+        prompt: str,
+        system_prompt: str,
+        images: Optional[List[ImageRef]],
+        max_tokens: int,
+        on_result: Callable[[Dict[str, Any]], Any],
+        request_id: Optional[str],
+        started: float,
+    ) -> Any:
+        """Aggregate call in stream mode: each completed `results[]` element goes to `on_result`."""
+        parser = StreamingArrayItems(("results",))
+        min_len = int(getattr(get_settings(), "judgment_basis_min_length", 2))
+
+        async def _on_delta(delta: str) -> None:
+            for item in parser.feed(delta):
+                copy_item = dict(item)
+                copy_item["verdict"] = _normalize_verdict(copy_item.get("verdict"))
+                _ensure_judgment_basis(copy_item, min_len=min_len)
+                if parser.items_emitted == 1:
+                    timings = state.partial_results.setdefault("timings_ms", {})
+                    if isinstance(timings, dict):
+                        timings["llm_aggregate_first_result_ms"] = int(
+                            (time.monotonic() - started) * 1000
+                        )
+                try:
+                    out = on_result(copy_item)
+                    if asyncio.iscoroutine(out):
+                        await out
+                except Exception as e:
+                    log_event(
+                        aggregator_logger,
+                        "agent_aggregate_stream_item_failed",
+                        level="warning",
+                        session_id=state.session_id,
+                        request_id=request_id,
+                        error_type=e.__class__.__name__,
+                        error=str(e),
+                    )
+
+        res = await self.llm.generate_stream(
+            prompt=prompt,
+            on_delta=_on_delta,
+            system_prompt=system_prompt,
+            images=images,
+            provider=self.provider,
+            max_tokens=int(max_tokens),
+            temperature=0.2,
+        )
+        log_event(
+            aggregator_logger,
+            "agent_aggregate_streamed",
+            session_id=state.session_id,
+            request_id=request_id,
+            items=parser.items_emitted,
+            items_skipped=parser.items_skipped,
+        )
+        return res
+
 
 @trace_span("autonomous_agent.run")
 async def run_autonomous_grade_agent(
@@ -1113,9 +1227,10 @@ async def run_autonomous_grade_agent(
     token_budget_total_override: Optional[int] = None,
     experiments: Optional[Dict[str, Any]] = None,
     grade_image_input_variant: Optional[str] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], Any]] = None,
 ) -> AutonomousGradeResult:
     settings = get_settings()
-    llm = LLMClient()
+    llm = AsyncLLMClient()
     max_tokens = int(getattr(settings, "autonomous_agent_max_tokens", 1600))
     max_iterations = int(getattr(settings, "autonomous_agent_max_iterations", 3))
     confidence_threshold = float(
@@ -1487,7 +1602,9 @@ async def run_autonomous_grade_agent(
         if iteration == max_iterations - 1:
             state.warnings.append("Loop max iterations reached")
 
-    payload = await aggregator.run(state, request_id=request_id, budget=budget)
+    payload = await aggregator.run(
+        state, request_id=request_id, budget=budget, on_result=on_result
+    )
     timings_ms_out: Optional[Dict[str, int]] = None
     try:
         t0 = state.partial_results.get("timings_ms")
@@ -30,8 +30,9 @@ from homework_agent.core.prompts_autonomous import (
     QUESTION_CARDS_OCR_PROMPT,
 )
 from homework_agent.utils.settings import get_settings
-from homework_agent.utils.url_image_helpers import _safe_fetch_public_url_bytes
 from homework_agent.utils.cache import get_cache_store
+from homework_agent.utils.image_blob_cache import get_image_blob
+from homework_agent.utils.single_flight import single_flight
 from homework_agent.utils.supabase_client import get_storage_client
 
 logger = logging.getLogger(__name__)
@@ -216,22 +217,18 @@ def _compute_image_hash(image_url_or_base64: str) -> Optional[str]:
                 data = base64.b64decode(image_url_or_base64)
             return hashlib.sha256(data).hexdigest()
         else:
-            # URL: download and hash
+            # URL: download (shared image cache) and hash
             settings = get_settings()
             timeout = float(getattr(settings, "opencv_processing_timeout", 30))
             max_bytes = int(
                 getattr(settings, "max_upload_image_bytes", 5 * 1024 * 1024)
             )
-            fetched = _safe_fetch_public_url_bytes(
+            blob = get_image_blob(
                 image_url_or_base64,
                 timeout_seconds=float(timeout),
-                max_redirects=3,
                 max_bytes=max_bytes,
             )
-            if fetched:
-                data, _ct = fetched
-                return hashlib.sha256(data).hexdigest()
-            return None
+            return blob.sha256 if blob else None
     except Exception as e:
         logger.debug(f"Failed to compute image hash: {e}")
         return None
@@ -246,22 +243,20 @@ def _compress_image_if_needed(image_url: str, max_side: int = 1280) -> str:
         return image_url  # Skip base64
 
     try:
-        # Download image
+        # Download image (shared image cache)
         settings = get_settings()
         timeout = float(getattr(settings, "opencv_processing_timeout", 30))
         max_bytes = int(getattr(settings, "max_upload_image_bytes", 5 * 1024 * 1024))
-        fetched = _safe_fetch_public_url_bytes(
+        blob = get_image_blob(
             image_url,
             timeout_seconds=float(timeout),
-            max_redirects=3,
             max_bytes=max_bytes,
         )
-        if not fetched:
+        if not blob:
             return image_url
-        data, _ct = fetched
 
         # Check dimensions
-        img = Image.open(BytesIO(data))
+        img = blob.pil()
         w, h = img.size
         if max(w, h) <= max_side:
             return image_url  # No compression needed
@@ -284,6 +279,7 @@ def _compress_image_if_needed(image_url: str, max_side: int = 1280) -> str:
             mime_type="image/jpeg",
             suffix=".jpg",
             prefix="compressed/",
+            content_addressed=True,
         )
         logger.info(
             f"Compressed image from {w}x{h} to {new_w}x{new_h}: {compressed_url}"
@@ -329,21 +325,18 @@ def _compress_image_if_needed_with_metrics(
         timeout = float(getattr(settings, "opencv_processing_timeout", 30))
         max_bytes = int(getattr(settings, "max_upload_image_bytes", 5 * 1024 * 1024))
         t_dl = time.monotonic()
-        fetched = _safe_fetch_public_url_bytes(
+        blob = get_image_blob(
             image_url,
             timeout_seconds=float(timeout),
-            max_redirects=3,
             max_bytes=max_bytes,
         )
         metrics["download_ms"] = int((time.monotonic() - t_dl) * 1000)
-        if not fetched:
+        if not blob:
             metrics["total_ms"] = int((time.monotonic() - started) * 1000)
             return image_url, metrics
-        data, _ct = fetched
 
         t_dec = time.monotonic()
-        img = Image.open(BytesIO(data))
-        img.load()
+        img = blob.pil()
         metrics["decode_ms"] = int((time.monotonic() - t_dec) * 1000)
 
         w, h = img.size
@@ -377,6 +370,7 @@ def _compress_image_if_needed_with_metrics(
             mime_type="image/jpeg",
             suffix=".jpg",
             prefix="compressed/",
+            content_addressed=True,
         )
         metrics["upload_ms"] = int((time.monotonic() - t_up) * 1000)
         metrics["compressed"] = True
@@ -687,10 +681,27 @@ def math_verify(*, expression: str) -> Dict[str, Any]:
         )
 
 
+def _coalesced_ocr(name: str, fn, *, image: str, provider: str) -> Dict[str, Any]:
+    """Share one upstream OCR call between concurrent identical requests (API/worker/chat)."""
+    img_id = _compute_cache_id_fast(image)
+    if not img_id:
+        return fn(image=image, provider=provider)
+    return single_flight(
+        name,
+        [str(provider or "unknown"), img_id, PROMPT_VERSION],
+        lambda: fn(image=image, provider=provider),
+        share_if=lambda r: isinstance(r, dict) and r.get("status") == "ok",
+    )
+
+
 def ocr_fallback(*, image: str, provider: str) -> Dict[str, Any]:
     """OCR fallback using Vision API.
     P0.1: Cache OCR results using image content hash.
     """
+    return _coalesced_ocr("ocr_fallback", _ocr_fallback, image=image, provider=provider)
+
+
+def _ocr_fallback(*, image: str, provider: str) -> Dict[str, Any]:
     # Check cache
     img_hash = _compute_image_hash(image)
     if img_hash:
@@ -757,6 +768,12 @@ def ocr_fallback(*, image: str, provider: str) -> Dict[str, Any]:
 
 def ocr_question_cards(*, image: str, provider: str) -> Dict[str, Any]:
     """OCR for progressive disclosure question cards (structured text, no grading)."""
+    return _coalesced_ocr(
+        "ocr_question_cards", _ocr_question_cards, image=image, provider=provider
+    )
+
+
+def _ocr_question_cards(*, image: str, provider: str) -> Dict[str, Any]:
     img_id = _compute_cache_id_fast(image)
     if img_id:
         cache = get_cache_store()
@@ -781,7 +798,10 @@ def ocr_question_cards(*, image: str, provider: str) -> Dict[str, Any]:
     client = VisionClient()
     try:
         result = client.analyze(
-            images=[ref], prompt=QUESTION_CARDS_OCR_PROMPT, provider=vision_provider
+            images=[ref],
+            prompt=QUESTION_CARDS_OCR_PROMPT,
+            provider=vision_provider,
+            cache_site="ocr_question_cards",
         )
     except Exception as e:
         return _annotate_tool_signals(
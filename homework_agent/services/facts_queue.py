@@ -15,9 +15,11 @@ import os
 import time
 import logging
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Optional
 
+from homework_agent.services.job_queue import ReliableQueue
 from homework_agent.utils.observability import log_event
+from homework_agent.utils.redis_pool import get_redis, get_redis_or_raise
 from homework_agent.utils.settings import get_settings
 
 logger = logging.getLogger(__name__)
@@ -65,24 +67,13 @@ def _require_redis_enabled() -> bool:
 
 
 def get_redis_client() -> Optional["redis.Redis"]:
-    if redis is None:
-        if _require_redis_enabled():
-            raise RuntimeError("REQUIRE_REDIS=1 but redis package not installed")
-        return None
-    redis_url = os.getenv("REDIS_URL")
-    if not redis_url:
-        if _require_redis_enabled():
-            raise RuntimeError("REQUIRE_REDIS=1 but REDIS_URL is not set")
-        return None
-    try:
-        client = redis.Redis.from_url(redis_url)
-        client.ping()
-        return client
-    except Exception as e:  # pragma: no cover
-        if _require_redis_enabled():
-            raise RuntimeError(f"REQUIRE_REDIS=1 but Redis ping failed: {e}")
-        logger.warning("Redis unavailable for facts queue: %s", e)
-        return None
+    """Shared pooled client (see utils/redis_pool); None when Redis is not usable."""
+    if _require_redis_enabled():
+        try:
+            return get_redis_or_raise()
+        except RuntimeError as e:
+            raise RuntimeError(f"REQUIRE_REDIS=1 but {e}")
+    return get_redis()
 
 
 def queue_key() -> str:
@@ -91,6 +82,10 @@ def queue_key() -> str:
     return f"{prefix}{getattr(settings, 'facts_queue_name', 'facts:queue')}"
 
 
+def job_queue(client: Any) -> ReliableQueue:
+    return ReliableQueue(client, queue_key())
+
+
 def enqueue_facts_job(
     *,
     submission_id: str,
@@ -118,7 +113,7 @@ def enqueue_facts_job(
         request_id=str(request_id).strip() or None,
         enqueued_at=time.time(),
     )
-    client.lpush(queue_key(), job.to_json())
+    job_queue(client).push(job.to_json())
     log_event(
         logger,
         "facts_enqueued",
@@ -10,13 +10,32 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 import time
 import logging
+import weakref
 from dataclasses import dataclass
 from typing import Any, Optional
 
-from homework_agent.utils.cache import get_cache_store
+from homework_agent.services.job_events import (
+    publish_job_progress,
+    publish_job_progress_async,
+)
+from homework_agent.services.job_queue import FairQueue
+from homework_agent.services.job_state import (
+    read_job,
+    read_job_meta,
+    read_job_meta_async,
+    write_job,
+    write_job_async,
+)
+from homework_agent.utils.cache import get_async_cache_store, get_cache_store
 from homework_agent.utils.observability import log_event
+from homework_agent.utils.redis_pool import (
+    get_async_redis,
+    get_redis,
+    get_redis_or_raise,
+)
 from homework_agent.utils.settings import get_settings
 
 logger = logging.getLogger(__name__)
@@ -35,6 +54,7 @@ class GradeJob:
     user_id: str
     provider: str
     enqueued_at: float
+    lane: str = ""
 
     def to_json(self) -> str:
         return json.dumps(
@@ -45,6 +65,7 @@ class GradeJob:
                 "user_id": self.user_id,
                 "provider": self.provider,
                 "enqueued_at": self.enqueued_at,
+                "lane": self.lane,
             },
             ensure_ascii=False,
         )
@@ -59,6 +80,7 @@ class GradeJob:
             user_id=str(obj.get("user_id") or ""),
             provider=str(obj.get("provider") or ""),
             enqueued_at=float(obj.get("enqueued_at") or time.time()),
+            lane=str(obj.get("lane") or ""),
         )
 
 
@@ -67,24 +89,13 @@ def _require_redis_enabled() -> bool:
 
 
 def get_redis_client() -> Optional["redis.Redis"]:
-    if redis is None:
-        if _require_redis_enabled():
-            raise RuntimeError("REQUIRE_REDIS=1 but redis package not installed")
-        return None
-    redis_url = os.getenv("REDIS_URL")
-    if not redis_url:
-        if _require_redis_enabled():
-            raise RuntimeError("REQUIRE_REDIS=1 but REDIS_URL is not set")
-        return None
-    try:
-        client = redis.Redis.from_url(redis_url)
-        client.ping()
-        return client
-    except Exception as e:  # pragma: no cover
-        if _require_redis_enabled():
-            raise RuntimeError(f"REQUIRE_REDIS=1 but Redis ping failed: {e}")
-        logger.warning("Redis unavailable for grade queue: %s", e)
-        return None
+    """Shared pooled client (see utils/redis_pool); None when Redis is not usable."""
+    if _require_redis_enabled():
+        try:
+            return get_redis_or_raise()
+        except RuntimeError as e:
+            raise RuntimeError(f"REQUIRE_REDIS=1 but {e}")
+    return get_redis()
 
 
 def queue_key() -> str:
@@ -93,6 +104,61 @@ def queue_key() -> str:
     return f"{prefix}{getattr(settings, 'grade_queue_name', 'grade:queue')}"
 
 
+def queue_lanes() -> dict[str, int]:
+    """Parse `GRADE_QUEUE_LANES` ("interactive:4,bulk:1") into ordered lane weights."""
+    settings = get_settings()
+    raw = str(getattr(settings, "grade_queue_lanes", "") or "")
+    lanes: dict[str, int] = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition(":")
+        name = name.strip()
+        if not name:
+            continue
+        try:
+            lanes[name] = max(1, int(weight.strip() or 1))
+        except ValueError:
+            lanes[name] = 1
+    return lanes or {"interactive": 4, "bulk": 1}
+
+
+def pick_lane(total_pages: int) -> str:
+    settings = get_settings()
+    lanes = list(queue_lanes())
+    try:
+        max_pages = int(getattr(settings, "grade_queue_interactive_max_pages", 3))
+    except Exception:
+        max_pages = 3
+    if "bulk" in lanes and int(total_pages or 0) > max_pages:
+        return "bulk"
+    return "interactive" if "interactive" in lanes else lanes[0]
+
+
+_QUEUES_LOCK = threading.Lock()
+_QUEUES: "weakref.WeakKeyDictionary[Any, dict[tuple, FairQueue]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def job_queue(client: Any) -> FairQueue:
+    """
+    One FairQueue per (client, key, lanes): building it registers seven Lua scripts, which
+    enqueue/status paths would otherwise repeat on every call.
+    """
+    lanes = queue_lanes()
+    fair = bool(getattr(get_settings(), "grade_queue_fair_enqueue", False))
+    cache_key = (queue_key(), tuple(lanes.items()), fair)
+    with _QUEUES_LOCK:
+        try:
+            per_client = _QUEUES.setdefault(client, {})
+        except TypeError:  # client not weak-referenceable: don't cache
+            return FairQueue(client, cache_key[0], lanes=lanes, fair_enqueue=fair)
+        queue = per_client.get(cache_key)
+        if queue is None:
+            queue = FairQueue(client, cache_key[0], lanes=lanes, fair_enqueue=fair)
+            per_client[cache_key] = queue
+        return queue
+
+
 def save_job_request(job_id: str, payload: dict[str, Any], *, ttl_seconds: int) -> None:
     if not job_id:
         return
@@ -100,6 +166,16 @@ def save_job_request(job_id: str, payload: dict[str, Any], *, ttl_seconds: int)
     cache.set(f"jobreq:{job_id}", payload, ttl_seconds=ttl_seconds)
 
 
+async def save_job_request_async(
+    job_id: str, payload: dict[str, Any], *, ttl_seconds: int
+) -> None:
+    if not job_id:
+        return
+    await get_async_cache_store().set(
+        f"jobreq:{job_id}", payload, ttl_seconds=ttl_seconds
+    )
+
+
 def load_job_request(job_id: str) -> Optional[dict[str, Any]]:
     if not job_id:
         return None
@@ -116,8 +192,93 @@ def set_job_status(
 ) -> None:
     if not job_id:
         return
-    cache = get_cache_store()
-    cache.set(f"job:{job_id}", payload, ttl_seconds=ttl_seconds)
+    write_job(job_id, payload, ttl_seconds=ttl_seconds)
+    publish_job_progress(job_id, payload, ttl_seconds=ttl_seconds)
+
+
+async def set_job_status_async(
+    job_id: str,
+    payload: dict[str, Any],
+    *,
+    ttl_seconds: int,
+) -> None:
+    if not job_id:
+        return
+    await write_job_async(job_id, payload, ttl_seconds=ttl_seconds)
+    await publish_job_progress_async(job_id, payload, ttl_seconds=ttl_seconds)
+
+
+def get_job_status(job_id: str) -> Optional[dict[str, Any]]:
+    """Full job payload (request/result/pages/cards reassembled from segments)."""
+    return read_job(job_id)
+
+
+def get_job_summary(job_id: str) -> Optional[dict[str, Any]]:
+    """Status/progress/ownership fields only; cheap enough for per-request checks."""
+    return read_job_meta(job_id)
+
+
+async def get_job_summary_async(job_id: str) -> Optional[dict[str, Any]]:
+    return await read_job_meta_async(job_id)
+
+
+@dataclass(frozen=True)
+class _GradeEnqueue:
+    """Records written by one enqueue: request payload, initial status, queue entry."""
+
+    job_request: dict[str, Any]
+    status: dict[str, Any]
+    job: GradeJob
+    cost: int
+
+
+def _prepare_grade_enqueue(
+    *,
+    job_id: str,
+    grade_request: dict[str, Any],
+    provider: str,
+    request_id: Optional[str],
+    session_id: str,
+    user_id: str,
+    grade_image_input_variant: Optional[str],
+    idempotency_key: Optional[str],
+    lane: Optional[str],
+) -> _GradeEnqueue:
+    images = grade_request.get("images") if isinstance(grade_request, dict) else None
+    total_pages = len(images) if isinstance(images, list) else 0
+    lane = str(lane or "").strip()
+    if lane not in queue_lanes():
+        lane = pick_lane(total_pages)
+    return _GradeEnqueue(
+        job_request={
+            "grade_request": grade_request,
+            "provider": str(provider or "").strip(),
+            "grade_image_input_variant": str(grade_image_input_variant or "").strip()
+            or None,
+            "idempotency_key": str(idempotency_key or "").strip() or None,
+        },
+        status={
+            "user_id": str(user_id),
+            "status": "processing",
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "request": grade_request,
+            "result": None,
+            "total_pages": int(total_pages) if total_pages else None,
+            "done_pages": 0 if total_pages else None,
+            "page_summaries": [] if total_pages else None,
+            "question_cards": [] if total_pages else None,
+        },
+        job=GradeJob(
+            job_id=job_id,
+            request_id=str(request_id).strip() or None,
+            session_id=str(session_id),
+            user_id=str(user_id),
+            provider=str(provider),
+            enqueued_at=time.time(),
+            lane=lane,
+        ),
+        cost=max(1, total_pages),
+    )
 
 
 def enqueue_grade_job(
@@ -131,6 +292,7 @@ def enqueue_grade_job(
     ttl_seconds: int,
     grade_image_input_variant: Optional[str] = None,
     idempotency_key: Optional[str] = None,
+    lane: Optional[str] = None,
 ) -> bool:
     """
     Enqueue a grade job. Returns True if queued, False if Redis is unavailable.
@@ -139,6 +301,8 @@ def enqueue_grade_job(
     - Uses shared cache keys for API/worker consistency:
       - job:{job_id}  (status/result/error)
       - jobreq:{job_id} (request payload)
+    - With `GRADE_QUEUE_FAIR_ENQUEUE=1` scheduling is fair per user; `lane` defaults to
+      interactive/bulk by page count (pass "bulk" for backfills).
     """
     client = get_redis_client()
     if client is None:
@@ -153,44 +317,79 @@ def enqueue_grade_job(
         )
         return False
 
-    save_job_request(
-        job_id,
-        {
-            "grade_request": grade_request,
-            "provider": str(provider or "").strip(),
-            "grade_image_input_variant": str(grade_image_input_variant or "").strip()
-            or None,
-            "idempotency_key": str(idempotency_key or "").strip() or None,
-        },
-        ttl_seconds=ttl_seconds,
+    plan = _prepare_grade_enqueue(
+        job_id=job_id,
+        grade_request=grade_request,
+        provider=provider,
+        request_id=request_id,
+        session_id=session_id,
+        user_id=user_id,
+        grade_image_input_variant=grade_image_input_variant,
+        idempotency_key=idempotency_key,
+        lane=lane,
     )
-    images = grade_request.get("images") if isinstance(grade_request, dict) else None
-    total_pages = len(images) if isinstance(images, list) else 0
-    set_job_status(
-        job_id,
-        {
-            "user_id": str(user_id),
-            "status": "processing",
-            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
-            "request": grade_request,
-            "result": None,
-            "total_pages": int(total_pages) if total_pages else None,
-            "done_pages": 0 if total_pages else None,
-            "page_summaries": [] if total_pages else None,
-            "question_cards": [] if total_pages else None,
-        },
-        ttl_seconds=ttl_seconds,
+    save_job_request(job_id, plan.job_request, ttl_seconds=ttl_seconds)
+    set_job_status(job_id, plan.status, ttl_seconds=ttl_seconds)
+    job_queue(client).push(
+        plan.job.to_json(), tenant=str(user_id), lane=plan.job.lane, cost=plan.cost
     )
-
-    job = GradeJob(
+    log_event(
+        logger,
+        "grade_enqueued",
+        request_id=request_id,
+        session_id=session_id,
         job_id=job_id,
-        request_id=str(request_id).strip() or None,
-        session_id=str(session_id),
-        user_id=str(user_id),
         provider=str(provider),
-        enqueued_at=time.time(),
+        lane=plan.job.lane,
+    )
+    return True
+
+
+async def enqueue_grade_job_async(
+    *,
+    job_id: str,
+    grade_request: dict[str, Any],
+    provider: str,
+    request_id: Optional[str],
+    session_id: str,
+    user_id: str,
+    ttl_seconds: int,
+    grade_image_input_variant: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+    lane: Optional[str] = None,
+) -> bool:
+    """`enqueue_grade_job` on the shared `redis.asyncio` pool (for API handlers)."""
+    client = get_async_redis()
+    if client is None:
+        if _require_redis_enabled():
+            raise RuntimeError("REQUIRE_REDIS=1 but REDIS_URL is not set")
+        log_event(
+            logger,
+            "grade_enqueue_skipped",
+            level="warning",
+            request_id=request_id,
+            session_id=session_id,
+            reason="redis_unavailable",
+            job_id=job_id,
+        )
+        return False
+
+    plan = _prepare_grade_enqueue(
+        job_id=job_id,
+        grade_request=grade_request,
+        provider=provider,
+        request_id=request_id,
+        session_id=session_id,
+        user_id=user_id,
+        grade_image_input_variant=grade_image_input_variant,
+        idempotency_key=idempotency_key,
+        lane=lane,
+    )
+    await save_job_request_async(job_id, plan.job_request, ttl_seconds=ttl_seconds)
+    await set_job_status_async(job_id, plan.status, ttl_seconds=ttl_seconds)
+    await job_queue(client).push_async(
+        plan.job.to_json(), tenant=str(user_id), lane=plan.job.lane, cost=plan.cost
     )
-    client.lpush(queue_key(), job.to_json())
     log_event(
         logger,
         "grade_enqueued",
@@ -198,5 +397,6 @@ def enqueue_grade_job(
         session_id=session_id,
         job_id=job_id,
         provider=str(provider),
+        lane=plan.job.lane,
     )
     return True
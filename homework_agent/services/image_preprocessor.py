@@ -4,7 +4,7 @@ import base64
 import logging
 from typing import Optional
 
-from homework_agent.utils.url_image_helpers import _safe_fetch_public_url_bytes
+from homework_agent.utils.image_blob_cache import fetch_image_bytes
 
 try:
     import numpy as np
@@ -66,10 +66,9 @@ def preprocess_image_url(
     if not url:
         return None
     try:
-        fetched = _safe_fetch_public_url_bytes(
+        fetched = fetch_image_bytes(
             url,
             timeout_seconds=float(timeout_seconds),
-            max_redirects=3,
             max_bytes=int(max_bytes),
         )
         if not fetched:
@@ -97,10 +96,9 @@ def preprocess_image_url_to_data_uri(
     if not url:
         return None
     try:
-        fetched = _safe_fetch_public_url_bytes(
+        fetched = fetch_image_bytes(
             url,
             timeout_seconds=float(timeout_seconds),
-            max_redirects=3,
             max_bytes=int(max_bytes),
         )
         if not fetched:
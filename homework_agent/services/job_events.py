@@ -0,0 +1,371 @@
+"""
+Per-job progress events (push-based alternative to polling `GET /jobs/{job_id}`).
+
+Producers (grade worker / API / review cards worker) append small deltas to a per-job log;
+`GET /jobs/{job_id}/events` streams them over SSE and resumes from `Last-Event-ID`.
+
+Storage:
+- Redis available (shared cache is `RedisCache`): a capped Redis stream `jobev:{job_id}` on the
+  cache client, so event ids are stream ids and replay/resume is native (`XRANGE`/`XREAD`).
+  SSE subscribers wait with `XREAD BLOCK`, so an idle stream costs no Redis round trips.
+- Otherwise: a process-local log (dev/in-memory mode, where grading runs in the API process).
+
+Event types:
+- `status`: {status, done_pages, total_pages, elapsed_ms, error}
+- `page`:   one new page summary
+- `card`:   one new/changed question card
+- `done`:   terminal status reached; clients fetch the full result once via `GET /jobs/{job_id}`
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from homework_agent.utils.cache import (
+    AsyncRedisCache,
+    RedisCache,
+    _json_default,
+    get_async_cache_store,
+    get_cache_store,
+)
+from homework_agent.utils.observability import log_event
+from homework_agent.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"done", "failed"}
+
+JobEvent = Tuple[str, str, Dict[str, Any]]  # (event_id, event, data)
+
+_LOCK = threading.Lock()
+# Local fallback log: job_id -> list of events (bounded per job and in number of jobs).
+_LOCAL_LOG: "OrderedDict[str, List[JobEvent]]" = OrderedDict()
+_LOCAL_SEQ = 0
+_LOCAL_MAX_JOBS = 256
+# What this process already published per job, so `publish_job_progress` only emits deltas.
+_PUBLISHED: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_PUBLISHED_MAX_JOBS = 1024
+
+
+def _enabled() -> bool:
+    return bool(getattr(get_settings(), "job_events_enabled", True))
+
+
+def _maxlen() -> int:
+    try:
+        return max(50, int(getattr(get_settings(), "job_events_maxlen", 500) or 500))
+    except Exception:
+        return 500
+
+
+def _stream(job_id: str) -> Optional[Tuple[Any, str]]:
+    store = get_cache_store()
+    if isinstance(store, RedisCache):
+        return store.client, store._k(f"jobev:{job_id}")
+    return None
+
+
+def _decode(v: Any) -> str:
+    return v.decode("utf-8") if isinstance(v, (bytes, bytearray)) else str(v)
+
+
+def _local_id() -> str:
+    global _LOCAL_SEQ
+    _LOCAL_SEQ += 1
+    return f"{int(time.time() * 1000)}-{_LOCAL_SEQ}"
+
+
+def _id_key(event_id: str) -> Tuple[int, int]:
+    ms, _, seq = str(event_id or "0-0").partition("-")
+    try:
+        return int(ms), int(seq or 0)
+    except ValueError:
+        return 0, 0
+
+
+def _log_publish_failed(job_id: str, event: str, e: Exception) -> None:
+    log_event(
+        logger,
+        "job_event_publish_failed",
+        level="warning",
+        job_id=job_id,
+        event=event,
+        error_type=e.__class__.__name__,
+        error=str(e),
+    )
+
+
+def _append_local(job_id: str, event: str, body: str) -> str:
+    with _LOCK:
+        event_id = _local_id()
+        log = _LOCAL_LOG.setdefault(job_id, [])
+        _LOCAL_LOG.move_to_end(job_id)
+        log.append((event_id, event, json.loads(body)))
+        del log[: max(0, len(log) - _maxlen())]
+        while len(_LOCAL_LOG) > _LOCAL_MAX_JOBS:
+            _LOCAL_LOG.popitem(last=False)
+    return event_id
+
+
+def publish_job_event(
+    job_id: str, event: str, data: Dict[str, Any], *, ttl_seconds: int
+) -> Optional[str]:
+    """Append one event to the job's log. Best-effort: never raises."""
+    if not job_id or not _enabled():
+        return None
+    body = json.dumps(data or {}, ensure_ascii=False, default=_json_default)
+    try:
+        target = _stream(job_id)
+        if target is not None:
+            client, key = target
+            pipe = client.pipeline(transaction=False)
+            pipe.xadd(
+                key, {"event": event, "data": body}, maxlen=_maxlen(), approximate=True
+            )
+            pipe.expire(key, int(ttl_seconds))
+            event_id, _ = pipe.execute()
+            return _decode(event_id)
+        return _append_local(job_id, event, body)
+    except Exception as e:
+        _log_publish_failed(job_id, event, e)
+        return None
+
+
+async def publish_job_event_async(
+    job_id: str, event: str, data: Dict[str, Any], *, ttl_seconds: int
+) -> Optional[str]:
+    if not job_id or not _enabled():
+        return None
+    body = json.dumps(data or {}, ensure_ascii=False, default=_json_default)
+    try:
+        target = _async_stream(job_id)
+        if target is not None:
+            client, key = target
+            pipe = client.pipeline(transaction=False)
+            pipe.xadd(
+                key, {"event": event, "data": body}, maxlen=_maxlen(), approximate=True
+            )
+            pipe.expire(key, int(ttl_seconds))
+            event_id, _ = await pipe.execute()
+            return _decode(event_id)
+        return _append_local(job_id, event, body)
+    except Exception as e:
+        _log_publish_failed(job_id, event, e)
+        return None
+
+
+def _async_stream(job_id: str) -> Optional[Tuple[Any, str]]:
+    store = get_async_cache_store()
+    if isinstance(store, AsyncRedisCache):
+        return store.client, store._k(f"jobev:{job_id}")
+    return None
+
+
+def _xrange_start(after: Optional[str]) -> str:
+    after = str(after or "").strip() or "0"
+    return "-" if after == "0" else f"({after}"
+
+
+def _rows_to_events(rows: Any) -> List[JobEvent]:
+    out: List[JobEvent] = []
+    for event_id, fields in rows or []:
+        fields = {_decode(k): _decode(v) for k, v in (fields or {}).items()}
+        try:
+            data = json.loads(fields.get("data") or "{}")
+        except Exception:
+            data = {}
+        out.append((_decode(event_id), fields.get("event") or "message", data))
+    return out
+
+
+def _local_events(job_id: str, after: Optional[str], count: int) -> List[JobEvent]:
+    after_key = _id_key(str(after or "").strip() or "0")
+    with _LOCK:
+        log = list(_LOCAL_LOG.get(job_id) or [])
+    return [e for e in log if _id_key(e[0]) > after_key][: int(count)]
+
+
+def _local_latest(job_id: str) -> str:
+    with _LOCK:
+        log = _LOCAL_LOG.get(job_id) or []
+        return log[-1][0] if log else "0"
+
+
+def read_job_events(
+    job_id: str, *, after: Optional[str] = None, count: int = 100
+) -> List[JobEvent]:
+    """Events strictly after `after` (None/"0" = from the beginning of the retained log)."""
+    target = _stream(job_id)
+    if target is None:
+        return _local_events(job_id, after, count)
+    client, key = target
+    return _rows_to_events(
+        client.xrange(key, min=_xrange_start(after), max="+", count=int(count))
+    )
+
+
+async def read_job_events_async(
+    job_id: str, *, after: Optional[str] = None, count: int = 100
+) -> List[JobEvent]:
+    target = _async_stream(job_id)
+    if target is None:
+        return _local_events(job_id, after, count)
+    client, key = target
+    return _rows_to_events(
+        await client.xrange(key, min=_xrange_start(after), max="+", count=int(count))
+    )
+
+
+def _xread_rows(resp: Any) -> Any:
+    # RESP2: [[stream, rows]]; RESP3: {stream: [rows]}.
+    if isinstance(resp, dict):
+        streams = list(resp.values())
+        return streams[0][0] if streams and streams[0] else []
+    return resp[0][1] if resp else []
+
+
+async def wait_job_events_async(
+    job_id: str,
+    *,
+    after: Optional[str] = None,
+    block_ms: int = 0,
+    poll_ms: int = 250,
+    count: int = 100,
+) -> List[JobEvent]:
+    """
+    Events after `after`, waiting up to `block_ms` for the first one.
+
+    Redis: one `XREAD BLOCK` (woken by the producer's `XADD`); errors propagate so the caller
+    can fall back to polling. Local log or `block_ms=0`: one read, then a `poll_ms` sleep when
+    there is nothing new.
+    """
+    target = _async_stream(job_id)
+    if target is not None and block_ms > 0:
+        client, key = target
+        after = str(after or "").strip() or "0"
+        resp = await client.xread({key: after}, count=int(count), block=int(block_ms))
+        return _rows_to_events(_xread_rows(resp))
+    events = await read_job_events_async(job_id, after=after, count=count)
+    if not events:
+        await asyncio.sleep(max(0.05, poll_ms / 1000))
+    return events
+
+
+def latest_job_event_id(job_id: str) -> str:
+    """Id of the newest retained event ("0" if none): subscribe from here after a snapshot."""
+    target = _stream(job_id)
+    if target is None:
+        return _local_latest(job_id)
+    client, key = target
+    rows = client.xrevrange(key, max="+", min="-", count=1) or []
+    return _decode(rows[0][0]) if rows else "0"
+
+
+async def latest_job_event_id_async(job_id: str) -> str:
+    target = _async_stream(job_id)
+    if target is None:
+        return _local_latest(job_id)
+    client, key = target
+    rows = await client.xrevrange(key, max="+", min="-", count=1) or []
+    return _decode(rows[0][0]) if rows else "0"
+
+
+def _card_fingerprint(card: Dict[str, Any]) -> str:
+    return json.dumps(card, sort_keys=True, ensure_ascii=False, default=_json_default)
+
+
+def _progress_events(
+    job_id: str, payload: Dict[str, Any]
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Derive deltas from a full job payload (as written by `set_job_status`).
+
+    Only pages/cards this process has not published yet (or that changed) are emitted, so the
+    grade worker can keep writing full snapshots while subscribers receive small events.
+    """
+    status = str(payload.get("status") or "")
+    with _LOCK:
+        seen = _PUBLISHED.get(job_id)
+        if seen is None or status in {"queued", "processing"}:
+            seen = {"pages": set(), "cards": {}, "status": None}
+            _PUBLISHED[job_id] = seen
+        _PUBLISHED.move_to_end(job_id)
+        while len(_PUBLISHED) > _PUBLISHED_MAX_JOBS:
+            _PUBLISHED.popitem(last=False)
+
+        new_pages: List[Dict[str, Any]] = []
+        for s in payload.get("page_summaries") or []:
+            if not isinstance(s, dict) or s.get("page_index") is None:
+                continue
+            idx = int(s.get("page_index"))
+            if idx not in seen["pages"]:
+                seen["pages"].add(idx)
+                new_pages.append(s)
+
+        changed_cards: List[Dict[str, Any]] = []
+        for c in payload.get("question_cards") or []:
+            if not isinstance(c, dict) or not c.get("item_id"):
+                continue
+            fp = _card_fingerprint(c)
+            if seen["cards"].get(str(c["item_id"])) != fp:
+                seen["cards"][str(c["item_id"])] = fp
+                changed_cards.append(c)
+
+        status_view = {
+            "status": status or None,
+            "done_pages": payload.get("done_pages"),
+            "total_pages": payload.get("total_pages"),
+            "elapsed_ms": payload.get("elapsed_ms"),
+            "error": payload.get("error"),
+        }
+        status_changed = seen["status"] != status_view
+        seen["status"] = status_view
+        if status in TERMINAL_STATUSES:
+            _PUBLISHED.pop(job_id, None)
+
+    events: List[Tuple[str, Dict[str, Any]]] = [("page", s) for s in new_pages]
+    events.extend(("card", c) for c in changed_cards)
+    if status_changed:
+        events.append(("status", status_view))
+    if status in TERMINAL_STATUSES:
+        events.append(
+            (
+                "done",
+                {"status": status, "review_pending": count_pending_reviews(payload)},
+            )
+        )
+    return events
+
+
+def publish_job_progress(
+    job_id: str, payload: Dict[str, Any], *, ttl_seconds: int
+) -> None:
+    """Publish the deltas between this process's last view of the job and `payload`."""
+    if not job_id or not isinstance(payload, dict) or not _enabled():
+        return
+    for event, data in _progress_events(job_id, payload):
+        publish_job_event(job_id, event, data, ttl_seconds=ttl_seconds)
+
+
+async def publish_job_progress_async(
+    job_id: str, payload: Dict[str, Any], *, ttl_seconds: int
+) -> None:
+    if not job_id or not isinstance(payload, dict) or not _enabled():
+        return
+    for event, data in _progress_events(job_id, payload):
+        await publish_job_event_async(job_id, event, data, ttl_seconds=ttl_seconds)
+
+
+def count_pending_reviews(job: Dict[str, Any]) -> int:
+    cards = job.get("question_cards") if isinstance(job, dict) else None
+    return sum(
+        1
+        for c in cards or []
+        if isinstance(c, dict) and c.get("card_state") == "review_pending"
+    )
@@ -0,0 +1,637 @@
+"""
+Reliable Redis job queue (lease-based) shared by all list-backed workers.
+
+Why:
+- Plain `LPUSH` + `BRPOP` loses a job when the worker dies mid-job (KEDA scale-down, OOM),
+  which forces the user to re-submit and pay for a second round of LLM calls.
+
+How:
+- Producers still `LPUSH` onto the pending list (`{queue}`), so list-length based scalers keep working.
+- Consumers `BLMOVE`/`LMOVE` items into `{queue}:processing` and record a lease deadline in the
+  `{queue}:leases` ZSET (Redis server time + visibility timeout).
+- A `LeaseKeeper` thread heartbeats leases of in-flight items; `ack()` removes them when done.
+- Any consumer periodically reclaims expired leases back to the pending list; items reclaimed more
+  than `max_deliveries` times are parked in `{queue}:dead` instead of looping forever.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Iterable, List, Optional, Tuple
+
+from homework_agent.utils.metrics import inc_counter
+from homework_agent.utils.observability import log_event
+from homework_agent.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+# KEYS: pending, processing, leases | ARGV: max_items, visibility_seconds
+_POP_BATCH_LUA = """
+local t = redis.call('TIME')
+local deadline = tonumber(t[1]) + tonumber(ARGV[2])
+local out = {}
+for i = 1, tonumber(ARGV[1]) do
+  local v = redis.call('LMOVE', KEYS[1], KEYS[2], 'RIGHT', 'LEFT')
+  if not v then break end
+  redis.call('ZADD', KEYS[3], deadline, v)
+  out[#out + 1] = v
+end
+return out
+"""
+
+# KEYS: leases | ARGV: visibility_seconds, 'XX'|'NX', item...  -> 1/0 per item
+_LEASE_LUA = """
+local t = redis.call('TIME')
+local deadline = tonumber(t[1]) + tonumber(ARGV[1])
+local out = {}
+for i = 3, #ARGV do
+  out[#out + 1] = redis.call('ZADD', KEYS[1], ARGV[2], 'CH', deadline, ARGV[i])
+end
+return out
+"""
+
+# KEYS: pending, processing, leases | ARGV: item
+_RELEASE_LUA = """
+local n = redis.call('LREM', KEYS[2], 1, ARGV[1])
+redis.call('ZREM', KEYS[3], ARGV[1])
+if n > 0 then redis.call('RPUSH', KEYS[1], ARGV[1]) end
+return n
+"""
+
+# KEYS: pending, processing, leases, deliveries, dead
+# ARGV: visibility_seconds, max_deliveries, limit, marker ('' unless the queue uses markers)
+_RECLAIM_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1])
+-- Orphans: moved to processing but never leased (consumer died between BLMOVE and ZADD).
+local items = redis.call('LRANGE', KEYS[2], 0, -1)
+for _, v in ipairs(items) do
+  if not redis.call('ZSCORE', KEYS[3], v) then
+    redis.call('ZADD', KEYS[3], now + tonumber(ARGV[1]), v)
+  end
+end
+local expired = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now, 'LIMIT', 0, tonumber(ARGV[3]))
+local requeued, dead = 0, 0
+for _, v in ipairs(expired) do
+  redis.call('ZREM', KEYS[3], v)
+  local removed = redis.call('LREM', KEYS[2], 1, v) > 0
+  if removed and v == ARGV[4] then
+    -- Dispatch marker of a consumer that died mid-claim: restore it, it is not a job.
+    redis.call('RPUSH', KEYS[1], v)
+  elseif removed then
+    local n = redis.call('HINCRBY', KEYS[4], v, 1)
+    if n >= tonumber(ARGV[2]) then
+      redis.call('HDEL', KEYS[4], v)
+      redis.call('LPUSH', KEYS[5], v)
+      dead = dead + 1
+    else
+      redis.call('RPUSH', KEYS[1], v)
+      requeued = requeued + 1
+    end
+  end
+end
+return {requeued, dead}
+"""
+
+
+def _decode(raw: Any) -> str:
+    return raw.decode("utf-8") if isinstance(raw, (bytes, bytearray)) else str(raw)
+
+
+class ReliableQueue:
+    def __init__(
+        self,
+        client: Any,
+        key: str,
+        *,
+        visibility_timeout_seconds: Optional[float] = None,
+        max_deliveries: Optional[int] = None,
+        reclaim_interval_seconds: Optional[float] = None,
+    ) -> None:
+        settings = get_settings()
+        self.client = client
+        self.key = str(key)
+        self.processing_key = f"{self.key}:processing"
+        self.leases_key = f"{self.key}:leases"
+        self.deliveries_key = f"{self.key}:deliveries"
+        self.dead_key = f"{self.key}:dead"
+        self.visibility_timeout_seconds = max(
+            5,
+            int(
+                visibility_timeout_seconds
+                or getattr(settings, "job_queue_visibility_timeout_seconds", 120)
+                or 120
+            ),
+        )
+        self.max_deliveries = max(
+            1,
+            int(
+                max_deliveries or getattr(settings, "job_queue_max_deliveries", 3) or 3
+            ),
+        )
+        self.reclaim_interval_seconds = float(
+            reclaim_interval_seconds
+            if reclaim_interval_seconds is not None
+            else max(1.0, self.visibility_timeout_seconds / 4)
+        )
+        self._last_reclaim = 0.0
+        self.marker = ""
+        self._pop_batch = client.register_script(_POP_BATCH_LUA)
+        self._lease = client.register_script(_LEASE_LUA)
+        self._release = client.register_script(_RELEASE_LUA)
+        self._reclaim = client.register_script(_RECLAIM_LUA)
+
+    def push(
+        self,
+        raw: str,
+        *,
+        tenant: str = "",
+        lane: Optional[str] = None,
+        cost: int = 1,
+    ) -> None:
+        """Append a job. Routing hints (tenant/lane/cost) only matter for `FairQueue`."""
+        self._push(raw, tenant=tenant, lane=lane, cost=cost)
+
+    async def push_async(
+        self,
+        raw: str,
+        *,
+        tenant: str = "",
+        lane: Optional[str] = None,
+        cost: int = 1,
+    ) -> None:
+        """`push` for queues built on a `redis.asyncio` client (API handlers)."""
+        await self._push(raw, tenant=tenant, lane=lane, cost=cost)
+
+    def _push(self, raw: str, *, tenant: str, lane: Optional[str], cost: int) -> Any:
+        # Returns the client's result: a value for sync clients, an awaitable for async ones.
+        return self.client.lpush(self.key, raw)
+
+    def pop_batch(self, max_items: int, *, timeout_seconds: float = 2.0) -> List[str]:
+        """
+        Lease up to `max_items` jobs. Blocks up to `timeout_seconds` only when the queue is empty.
+        Callers must `ack()` (done) or `release()` (give back) every returned item.
+        """
+        max_items = max(1, int(max_items))
+        self.maybe_reclaim()
+        got = self._lease_available(max_items)
+        if got or timeout_seconds <= 0:
+            return got
+        first = self.client.blmove(
+            self.key, self.processing_key, timeout_seconds, "RIGHT", "LEFT"
+        )
+        if first is None:
+            return []
+        got = self._lease_moved(_decode(first))
+        if max_items > len(got):
+            got.extend(self._lease_available(max_items - len(got)))
+        return got
+
+    def _lease_available(self, max_items: int) -> List[str]:
+        out = self._pop_batch(
+            keys=[self.key, self.processing_key, self.leases_key],
+            args=[max_items, self.visibility_timeout_seconds],
+        )
+        return [_decode(v) for v in out or []]
+
+    def _lease_moved(self, raw: str) -> List[str]:
+        """Lease an item that `BLMOVE` already placed on the processing list."""
+        self.extend([raw], create=True)
+        return [raw]
+
+    def extend(self, items: Iterable[str], *, create: bool = False) -> List[str]:
+        """Push lease deadlines forward; returns items whose lease was already lost."""
+        items = [str(i) for i in items or []]
+        if not items:
+            return []
+        flags = self._lease(
+            keys=[self.leases_key],
+            args=[self.visibility_timeout_seconds, "NX" if create else "XX", *items],
+        )
+        if create:
+            return []
+        # ZADD XX CH returns 0 both for "missing" and "unchanged score"; confirm the former.
+        maybe_lost = [i for i, ok in zip(items, flags or []) if not int(ok or 0)]
+        if not maybe_lost:
+            return []
+        pipe = self.client.pipeline(transaction=False)
+        for i in maybe_lost:
+            pipe.zscore(self.leases_key, i)
+        return [i for i, score in zip(maybe_lost, pipe.execute()) if score is None]
+
+    def ack(self, raw: str) -> None:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.lrem(self.processing_key, 1, raw)
+        pipe.zrem(self.leases_key, raw)
+        pipe.hdel(self.deliveries_key, raw)
+        pipe.execute()
+
+    def release(self, raw: str) -> bool:
+        """Give a leased item back to the head of the pending list (not counted as a failure)."""
+        n = self._release(
+            keys=[self.key, self.processing_key, self.leases_key], args=[raw]
+        )
+        return bool(int(n or 0))
+
+    def reclaim_expired(self, *, limit: int = 100) -> Tuple[int, int]:
+        requeued, dead = self._reclaim(
+            keys=[
+                self.key,
+                self.processing_key,
+                self.leases_key,
+                self.deliveries_key,
+                self.dead_key,
+            ],
+            args=[
+                self.visibility_timeout_seconds,
+                self.max_deliveries,
+                int(limit),
+                self.marker,
+            ],
+        )
+        requeued, dead = int(requeued or 0), int(dead or 0)
+        if requeued or dead:
+            inc_counter(
+                "job_queue_reclaimed_total", labels={"queue": self.key}, value=requeued
+            )
+            inc_counter(
+                "job_queue_dead_lettered_total", labels={"queue": self.key}, value=dead
+            )
+            log_event(
+                logger,
+                "job_queue_reclaimed",
+                level="warning",
+                queue=self.key,
+                requeued=requeued,
+                dead_lettered=dead,
+            )
+        return requeued, dead
+
+    def maybe_reclaim(self) -> None:
+        now = time.monotonic()
+        if now - self._last_reclaim < self.reclaim_interval_seconds:
+            return
+        self._last_reclaim = now
+        try:
+            self.reclaim_expired()
+        except Exception as e:
+            log_event(
+                logger,
+                "job_queue_reclaim_failed",
+                level="warning",
+                queue=self.key,
+                error_type=e.__class__.__name__,
+                error=str(e),
+            )
+
+    def stats(self) -> dict[str, int]:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.llen(self.key)
+        pipe.llen(self.processing_key)
+        pipe.llen(self.dead_key)
+        pending, processing, dead = pipe.execute()
+        return {
+            "pending": int(pending or 0),
+            "processing": int(processing or 0),
+            "dead": int(dead or 0),
+        }
+
+    def lease_keeper(self) -> "LeaseKeeper":
+        return LeaseKeeper(self)
+
+
+# Deficit-round-robin pick shared by the fair-queue scripts.
+# KEYS[4] = scheduler state hash | ARGV: ..., [3] marker, [4] key prefix, [5] nlanes,
+# then (lane, quantum) pairs. Sub-queue items are "{cost}|{raw}".
+_FAIR_PICK_LUA = """
+local marker, prefix, nl = ARGV[3], ARGV[4], tonumber(ARGV[5])
+local lanes, quanta = {}, {}
+for i = 1, nl do
+  lanes[i] = ARGV[4 + 2 * i]
+  quanta[i] = tonumber(ARGV[5 + 2 * i])
+end
+
+local function pick()
+  local cursor = tonumber(redis.call('HGET', KEYS[4], 'cursor') or '1') or 1
+  if cursor > nl then cursor = 1 end
+  local fresh = redis.call('HGET', KEYS[4], 'fresh') ~= '0'
+  for _ = 1, 128 * nl do
+    local lane = lanes[cursor]
+    local ring = prefix .. lane
+    local dkey = 'deficit:' .. lane
+    local tenant = redis.call('LINDEX', ring, -1)
+    if not tenant then
+      -- Idle lanes do not bank credit.
+      redis.call('HSET', KEYS[4], dkey, 0)
+      cursor = cursor % nl + 1
+      fresh = true
+    else
+      local deficit = tonumber(redis.call('HGET', KEYS[4], dkey) or '0') or 0
+      if fresh then
+        deficit = deficit + quanta[cursor]
+        fresh = false
+      end
+      local sub = ring .. ':t:' .. tenant
+      local head = redis.call('LINDEX', sub, -1)
+      if not head then
+        redis.call('RPOP', ring)
+        redis.call('HSET', KEYS[4], dkey, deficit)
+      else
+        local sep = string.find(head, '|', 1, true)
+        local cost = tonumber(string.sub(head, 1, sep - 1)) or 1
+        if deficit >= cost then
+          redis.call('RPOP', sub)
+          -- Round-robin tenants inside the lane: served tenant goes to the back.
+          redis.call('RPOP', ring)
+          if redis.call('LLEN', sub) > 0 then
+            redis.call('LPUSH', ring, tenant)
+          end
+          redis.call('HSET', KEYS[4], dkey, deficit - cost, 'cursor', cursor, 'fresh', '0')
+          return string.sub(head, sep + 1)
+        end
+        redis.call('HSET', KEYS[4], dkey, deficit)
+        cursor = cursor % nl + 1
+        fresh = true
+      end
+    end
+  end
+  redis.call('HSET', KEYS[4], 'cursor', cursor, 'fresh', fresh and '1' or '0')
+  return false
+end
+
+local function lease(v, deadline)
+  redis.call('LPUSH', KEYS[2], v)
+  redis.call('ZADD', KEYS[3], deadline, v)
+end
+"""
+
+# KEYS: pending, processing, leases, sched | ARGV: max_items, visibility_seconds, <pick args>
+_FAIR_POP_BATCH_LUA = _FAIR_PICK_LUA + """
+local t = redis.call('TIME')
+local deadline = tonumber(t[1]) + tonumber(ARGV[2])
+local out = {}
+for _ = 1, tonumber(ARGV[1]) do
+  local v = redis.call('RPOP', KEYS[1])
+  if not v then break end
+  if v == marker then
+    v = pick()
+    if not v then
+      redis.call('RPUSH', KEYS[1], marker)
+      break
+    end
+  end
+  -- Anything else on the pending list is a redelivered/released job: serve it first.
+  lease(v, deadline)
+  out[#out + 1] = v
+end
+return out
+"""
+
+# KEYS: pending, processing, leases, sched | ARGV: moved item, visibility_seconds, <pick args>
+_FAIR_CLAIM_LUA = _FAIR_PICK_LUA + """
+local t = redis.call('TIME')
+local deadline = tonumber(t[1]) + tonumber(ARGV[2])
+local v = ARGV[1]
+if v ~= marker then
+  redis.call('ZADD', KEYS[3], 'NX', deadline, v)
+  return {v}
+end
+redis.call('LREM', KEYS[2], 1, marker)
+local picked = pick()
+if not picked then
+  redis.call('RPUSH', KEYS[1], marker)
+  return {}
+end
+lease(picked, deadline)
+return {picked}
+"""
+
+# KEYS: pending, ring, sub | ARGV: marker, tenant, item
+_FAIR_PUSH_LUA = """
+redis.call('LPUSH', KEYS[3], ARGV[3])
+if redis.call('LLEN', KEYS[3]) == 1 then
+  redis.call('LPUSH', KEYS[2], ARGV[2])
+end
+redis.call('LPUSH', KEYS[1], ARGV[1])
+"""
+
+
+class FairQueue(ReliableQueue):
+    """
+    Reliable queue with per-tenant sub-queues and weighted lanes.
+
+    - `push(raw, tenant=..., lane=..., cost=...)` appends to `{queue}:lane:{lane}:t:{tenant}` and
+      puts one dispatch marker on the pending list, so `LLEN {queue}` still equals the number of
+      pending jobs (KEDA) and blocking consumers still wake up on `BLMOVE {queue}`.
+    - Dequeue turns a marker into a job: lanes are served by deficit round robin (quantum = lane
+      weight, cost = job cost, e.g. pages), tenants inside a lane round robin. A burst from one
+      user therefore only delays that user's own later jobs.
+    - Leasing/ack/reclaim are inherited: redelivered jobs go back onto the pending list as-is and
+      are served before any new marker.
+    - Rollout: with `fair_enqueue=False` (`GRADE_QUEUE_FAIR_ENQUEUE=0`) `push` is a plain `LPUSH`
+      of the job, which workers that predate markers can still decode; new workers serve such
+      items like redeliveries. Enable it only once every consumer of the queue is upgraded, or an
+      old worker pops a marker, drops it, and the job it stood for is stranded in its sub-queue.
+    """
+
+    MARKER = "__fair__"
+    MAX_COST = 32
+
+    def __init__(
+        self,
+        client: Any,
+        key: str,
+        *,
+        lanes: dict[str, int],
+        fair_enqueue: Optional[bool] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(client, key, **kwargs)
+        if not lanes:
+            raise ValueError("FairQueue requires at least one lane")
+        if fair_enqueue is None:
+            fair_enqueue = bool(
+                getattr(get_settings(), "grade_queue_fair_enqueue", False)
+            )
+        self.fair_enqueue = bool(fair_enqueue)
+        self.lanes = {str(k): max(1, int(v)) for k, v in lanes.items()}
+        self.default_lane = next(iter(self.lanes))
+        self.marker = self.MARKER
+        self.lane_prefix = f"{self.key}:lane:"
+        self.sched_key = f"{self.key}:sched"
+        self._fair_pop = client.register_script(_FAIR_POP_BATCH_LUA)
+        self._fair_claim = client.register_script(_FAIR_CLAIM_LUA)
+        self._fair_push = client.register_script(_FAIR_PUSH_LUA)
+
+    def _lane(self, lane: Optional[str]) -> str:
+        lane = str(lane or "").strip()
+        return lane if lane in self.lanes else self.default_lane
+
+    def _pick_args(self) -> List[Any]:
+        args: List[Any] = [self.marker, self.lane_prefix, len(self.lanes)]
+        for lane, weight in self.lanes.items():
+            args.extend([lane, weight])
+        return args
+
+    def _push(self, raw: str, *, tenant: str, lane: Optional[str], cost: int) -> Any:
+        if not self.fair_enqueue:
+            return super()._push(raw, tenant=tenant, lane=lane, cost=cost)
+        lane = self._lane(lane)
+        tenant = str(tenant or "").strip() or "_"
+        cost = max(1, min(int(cost or 1), self.MAX_COST))
+        ring = f"{self.lane_prefix}{lane}"
+        return self._fair_push(
+            keys=[self.key, ring, f"{ring}:t:{tenant}"],
+            args=[self.marker, tenant, f"{cost}|{raw}"],
+        )
+
+    def _lease_available(self, max_items: int) -> List[str]:
+        out = self._fair_pop(
+            keys=[self.key, self.processing_key, self.leases_key, self.sched_key],
+            args=[max_items, self.visibility_timeout_seconds, *self._pick_args()],
+        )
+        return [_decode(v) for v in out or []]
+
+    def _lease_moved(self, raw: str) -> List[str]:
+        out = self._fair_claim(
+            keys=[self.key, self.processing_key, self.leases_key, self.sched_key],
+            args=[raw, self.visibility_timeout_seconds, *self._pick_args()],
+        )
+        return [_decode(v) for v in out or []]
+
+    def lane_stats(self) -> dict[str, int]:
+        """Active tenants per lane (tenants with at least one pending job)."""
+        pipe = self.client.pipeline(transaction=False)
+        for lane in self.lanes:
+            pipe.llen(f"{self.lane_prefix}{lane}")
+        return {lane: int(n or 0) for lane, n in zip(self.lanes, pipe.execute())}
+
+
+class LeaseKeeper:
+    """
+    Heartbeat leases of in-flight items from a background thread.
+
+    Usage (sync worker):
+        with job_queue.lease_keeper() as leases:
+            batch = job_queue.pop_batch(n)
+            leases.track(batch)
+            for raw in batch:
+                try: ...
+                finally: leases.ack(raw)
+
+    Items still tracked when the block exits (e.g. stop requested mid-batch) are released back
+    to the pending list so another worker picks them up immediately.
+    """
+
+    def __init__(self, queue: ReliableQueue) -> None:
+        self.queue = queue
+        self.interval_seconds = max(1.0, queue.visibility_timeout_seconds / 3)
+        self._items: set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "LeaseKeeper":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release_all()
+        self.stop()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name=f"lease-keeper:{self.queue.key}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def track(self, items: Iterable[str]) -> None:
+        with self._lock:
+            self._items.update(str(i) for i in items or [])
+
+    def ack(self, raw: str) -> None:
+        with self._lock:
+            self._items.discard(raw)
+        try:
+            self.queue.ack(raw)
+        except Exception as e:
+            # Worst case the lease expires and the job is redelivered (at-least-once).
+            log_event(
+                logger,
+                "job_queue_ack_failed",
+                level="warning",
+                queue=self.queue.key,
+                error_type=e.__class__.__name__,
+                error=str(e),
+            )
+
+    def release_all(self) -> int:
+        with self._lock:
+            items = list(self._items)
+            self._items.clear()
+        released = 0
+        for raw in items:
+            try:
+                released += int(self.queue.release(raw))
+            except Exception:
+                continue
+        if released:
+            log_event(
+                logger, "job_queue_released", queue=self.queue.key, released=released
+            )
+        return released
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            with self._lock:
+                items = list(self._items)
+            if not items:
+                continue
+            try:
+                lost = self.queue.extend(items)
+            except Exception as e:
+                log_event(
+                    logger,
+                    "job_queue_heartbeat_failed",
+                    level="warning",
+                    queue=self.queue.key,
+                    error_type=e.__class__.__name__,
+                    error=str(e),
+                )
+                continue
+            if lost:
+                inc_counter(
+                    "job_queue_lease_lost_total",
+                    labels={"queue": self.queue.key},
+                    value=len(lost),
+                )
+                log_event(
+                    logger,
+                    "job_queue_lease_lost",
+                    level="warning",
+                    queue=self.queue.key,
+                    items=len(lost),
+                )
+
+
+def dequeue_batch_size() -> int:
+    settings = get_settings()
+    try:
+        return max(1, int(getattr(settings, "job_queue_batch_size", 1) or 1))
+    except Exception:
+        return 1
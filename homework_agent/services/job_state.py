@@ -0,0 +1,339 @@
+"""
+Segmented job state for async grade jobs.
+
+Why:
+- Progress ticks used to rewrite one `job:{job_id}` JSON holding the original request, all
+  page summaries and all question cards, so per-job write volume grew ~quadratically with pages/cards.
+
+Layout (all through the shared cache, so Redis and in-memory behave the same):
+- `job:{job_id}`              small meta: status/progress fields + segment index (`segments: 2`)
+- `job:{job_id}:request`      original request (written once)
+- `job:{job_id}:result`       final result (written once)
+- `job:{job_id}:page:{i}`     one page summary per completed page (append-only)
+- `job:{job_id}:cards:{i}`    question cards of page i
+
+`write_job()` still accepts a full payload, but only writes segments whose content changed since
+this process last wrote them; `read_job()` reassembles the legacy shape, and `read_job_meta()` is a
+single small GET for status/ownership checks. Legacy single-key payloads remain readable.
+
+Rollout: pods from before this layout read `job:{job_id}` as the full payload. While
+`JOB_STATE_LEGACY_MIRROR=1` (default for this release) the terminal write of a job also copies
+result/page_summaries/question_cards into meta, so old pods serve finished jobs and old review
+workers find the cards; progress ticks stay small (old pods see counters only mid-job) and the
+request is never mirrored (old workers read it from `jobreq:{job_id}`). Readers here ignore the
+mirrored copy. Set it to 0 once every API/worker pod runs the segmented layout.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from homework_agent.utils.cache import (
+    _json_default,
+    get_async_cache_store,
+    get_cache_store,
+)
+from homework_agent.utils.settings import get_settings
+
+LAYOUT_VERSION = 2
+JOB_SEGMENTS = ("request", "result", "page_summaries", "question_cards")
+_SEGMENTED_FIELDS = set(JOB_SEGMENTS)
+_INTERNAL_FIELDS = {
+    "segments",
+    "page_indexes",
+    "card_pages",
+    "has_request",
+    "has_result",
+}
+_META_ONLY = _INTERNAL_FIELDS | _SEGMENTED_FIELDS
+# What pods from before the segmented layout read from `job:{job_id}` once a job is finished.
+_MIRRORED_FIELDS = ("result", "page_summaries", "question_cards")
+_NO_PAGE = "x"
+_FINAL_STATUSES = {"done", "failed"}
+
+_LOCK = threading.Lock()
+# job_id -> {cache key: content digest} of what this process last wrote.
+_WRITTEN: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+_WRITTEN_MAX_JOBS = 1024
+
+
+def _digest(value: Any) -> str:
+    raw = json.dumps(value, sort_keys=True, ensure_ascii=False, default=_json_default)
+    return hashlib.sha1(raw.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+def _legacy_mirror() -> bool:
+    return bool(getattr(get_settings(), "job_state_legacy_mirror", False))
+
+
+def _card_page(card: Dict[str, Any]) -> str:
+    try:
+        return str(int(card.get("page_index")))
+    except Exception:
+        return _NO_PAGE
+
+
+def _page_sort_key(page: str) -> int:
+    return 10**9 if page == _NO_PAGE else int(page)
+
+
+def _split(job_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a full job payload to {cache key: value}; meta is last so readers see complete segments."""
+    segments: Dict[str, Any] = {}
+    meta = {k: v for k, v in payload.items() if k not in _SEGMENTED_FIELDS}
+    meta["segments"] = LAYOUT_VERSION
+
+    meta["has_request"] = payload.get("request") is not None
+    if meta["has_request"]:
+        segments[f"job:{job_id}:request"] = payload["request"]
+    meta["has_result"] = payload.get("result") is not None
+    if meta["has_result"]:
+        segments[f"job:{job_id}:result"] = payload["result"]
+
+    summaries = payload.get("page_summaries")
+    if isinstance(summaries, list):
+        indexes: List[int] = []
+        for s in summaries:
+            if isinstance(s, dict) and s.get("page_index") is not None:
+                idx = int(s["page_index"])
+                indexes.append(idx)
+                segments[f"job:{job_id}:page:{idx}"] = s
+        meta["page_indexes"] = indexes
+    else:
+        meta["page_indexes"] = None
+
+    cards = payload.get("question_cards")
+    if isinstance(cards, list):
+        by_page: Dict[str, List[Dict[str, Any]]] = {}
+        for c in cards:
+            if isinstance(c, dict):
+                by_page.setdefault(_card_page(c), []).append(c)
+        for page, page_cards in by_page.items():
+            segments[f"job:{job_id}:cards:{page}"] = page_cards
+        meta["card_pages"] = sorted(by_page, key=_page_sort_key)
+    else:
+        meta["card_pages"] = None
+
+    if _legacy_mirror() and str(payload.get("status") or "") in _FINAL_STATUSES:
+        # Old pods read this key as the whole job: give them the outcome, once.
+        meta.update({k: payload.get(k) for k in _MIRRORED_FIELDS})
+    segments[f"job:{job_id}"] = meta
+    return segments
+
+
+def _written(job_id: str) -> Dict[str, str]:
+    with _LOCK:
+        seen = _WRITTEN.get(job_id)
+        if seen is None:
+            seen = {}
+            _WRITTEN[job_id] = seen
+        _WRITTEN.move_to_end(job_id)
+        while len(_WRITTEN) > _WRITTEN_MAX_JOBS:
+            _WRITTEN.popitem(last=False)
+        return seen
+
+
+def _pending_writes(job_id: str, payload: Dict[str, Any]) -> List[Tuple[str, Any, str]]:
+    """(key, value, digest) of the segments `write_job` has to write for this payload."""
+    seen = _written(job_id)
+    # Terminal writes rewrite every segment once so they all share the final TTL.
+    final = str(payload.get("status") or "") in _FINAL_STATUSES
+    out: List[Tuple[str, Any, str]] = []
+    for key, value in _split(job_id, payload).items():
+        digest = _digest(value)
+        # Meta is small (mirroring only grows the terminal write) and carries the TTL refresh.
+        if not final and key != f"job:{job_id}" and seen.get(key) == digest:
+            continue
+        out.append((key, value, digest))
+    return out
+
+
+def write_job(job_id: str, payload: Dict[str, Any], *, ttl_seconds: int) -> int:
+    """Persist a full job payload, writing only changed segments. Returns keys written."""
+    if not job_id or not isinstance(payload, dict):
+        return 0
+    cache = get_cache_store()
+    writes = _pending_writes(job_id, payload)
+    seen = _written(job_id)
+    for key, value, digest in writes:
+        cache.set(key, value, ttl_seconds=ttl_seconds)
+        seen[key] = digest
+    return len(writes)
+
+
+async def write_job_async(
+    job_id: str, payload: Dict[str, Any], *, ttl_seconds: int
+) -> int:
+    if not job_id or not isinstance(payload, dict):
+        return 0
+    cache = get_async_cache_store()
+    writes = _pending_writes(job_id, payload)
+    seen = _written(job_id)
+    # Segments first, meta (last in `writes`) after them: readers never see a dangling index.
+    await asyncio.gather(
+        *(cache.set(k, v, ttl_seconds=ttl_seconds) for k, v, _ in writes[:-1])
+    )
+    if writes:
+        key, value, _ = writes[-1]
+        await cache.set(key, value, ttl_seconds=ttl_seconds)
+    for key, _, digest in writes:
+        seen[key] = digest
+    return len(writes)
+
+
+def _public_meta(meta: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(meta, dict):
+        return None
+    if meta.get("segments") != LAYOUT_VERSION:
+        return meta
+    return {k: v for k, v in meta.items() if k not in _META_ONLY}
+
+
+def read_job_meta(job_id: str) -> Optional[Dict[str, Any]]:
+    """Status/progress fields only (one small GET); legacy payloads are returned as-is."""
+    if not job_id:
+        return None
+    return _public_meta(get_cache_store().get(f"job:{job_id}"))
+
+
+async def read_job_meta_async(job_id: str) -> Optional[Dict[str, Any]]:
+    if not job_id:
+        return None
+    return _public_meta(await get_async_cache_store().get(f"job:{job_id}"))
+
+
+def _segment_keys(job_id: str, meta: Dict[str, Any], include: set) -> List[str]:
+    keys: List[str] = []
+    if "request" in include and meta.get("has_request"):
+        keys.append(f"job:{job_id}:request")
+    if "result" in include and meta.get("has_result"):
+        keys.append(f"job:{job_id}:result")
+    if "page_summaries" in include:
+        keys.extend(f"job:{job_id}:page:{i}" for i in meta.get("page_indexes") or [])
+    if "question_cards" in include:
+        keys.extend(f"job:{job_id}:cards:{p}" for p in meta.get("card_pages") or [])
+    return keys
+
+
+def _assemble(
+    job_id: str, meta: Dict[str, Any], include: set, values: Dict[str, Any]
+) -> Dict[str, Any]:
+    out = {k: v for k, v in meta.items() if k not in _META_ONLY}
+    if "request" in include:
+        out["request"] = values.get(f"job:{job_id}:request")
+    if "result" in include:
+        out["result"] = values.get(f"job:{job_id}:result")
+    if "page_summaries" in include:
+        indexes = meta.get("page_indexes")
+        if isinstance(indexes, list):
+            pages = [values.get(f"job:{job_id}:page:{i}") for i in indexes]
+            out["page_summaries"] = [p for p in pages if isinstance(p, dict)]
+        else:
+            out["page_summaries"] = None
+    if "question_cards" in include:
+        card_pages = meta.get("card_pages")
+        if isinstance(card_pages, list):
+            cards: List[Dict[str, Any]] = []
+            for page in card_pages:
+                seg = values.get(f"job:{job_id}:cards:{page}")
+                cards.extend(c for c in seg or [] if isinstance(c, dict))
+            out["question_cards"] = cards
+        else:
+            out["question_cards"] = None
+    return out
+
+
+def read_job(
+    job_id: str,
+    *,
+    include: Iterable[str] = JOB_SEGMENTS,
+) -> Optional[Dict[str, Any]]:
+    """Reassemble the legacy job shape, fetching only the segments in `include`."""
+    if not job_id:
+        return None
+    cache = get_cache_store()
+    meta = cache.get(f"job:{job_id}")
+    if not isinstance(meta, dict):
+        return None
+    if meta.get("segments") != LAYOUT_VERSION:
+        return meta
+    include = set(include)
+    keys = _segment_keys(job_id, meta, include)
+    return _assemble(job_id, meta, include, cache.get_many(keys))
+
+
+async def read_job_async(
+    job_id: str,
+    *,
+    include: Iterable[str] = JOB_SEGMENTS,
+) -> Optional[Dict[str, Any]]:
+    if not job_id:
+        return None
+    cache = get_async_cache_store()
+    meta = await cache.get(f"job:{job_id}")
+    if not isinstance(meta, dict):
+        return None
+    if meta.get("segments") != LAYOUT_VERSION:
+        return meta
+    include = set(include)
+    keys = _segment_keys(job_id, meta, include)
+    values = await asyncio.gather(*(cache.get(k) for k in keys))
+    return _assemble(job_id, meta, include, dict(zip(keys, values)))
+
+
+def _patch_mirrored_card(
+    meta: Dict[str, Any], item_id: str, merged: Dict[str, Any]
+) -> None:
+    cards = meta.get("question_cards")
+    for i, c in enumerate(cards if isinstance(cards, list) else []):
+        if isinstance(c, dict) and str(c.get("item_id") or "").strip() == item_id:
+            cards[i] = merged
+            return
+
+
+def update_job_card(
+    job_id: str, item_id: str, patch: Dict[str, Any], *, ttl_seconds: int
+) -> Optional[Dict[str, Any]]:
+    """
+    Merge `patch` into one question card, rewriting only that card's page segment.
+    Returns the merged card, or None when the job/card is not found.
+    """
+    cache = get_cache_store()
+    meta = cache.get(f"job:{job_id}")
+    if not isinstance(meta, dict):
+        return None
+    patch = {k: v for k, v in (patch or {}).items() if v is not None}
+    now = datetime.now().isoformat()
+
+    if meta.get("segments") != LAYOUT_VERSION:
+        # Legacy single-key payload.
+        cards = meta.get("question_cards")
+        for i, c in enumerate(cards if isinstance(cards, list) else []):
+            if isinstance(c, dict) and str(c.get("item_id") or "").strip() == item_id:
+                merged = {**c, **patch}
+                cards[i] = merged
+                meta["updated_at"] = now
+                cache.set(f"job:{job_id}", meta, ttl_seconds=ttl_seconds)
+                return merged
+        return None
+
+    for page in meta.get("card_pages") or []:
+        key = f"job:{job_id}:cards:{page}"
+        seg = cache.get(key)
+        for i, c in enumerate(seg if isinstance(seg, list) else []):
+            if isinstance(c, dict) and str(c.get("item_id") or "").strip() == item_id:
+                merged = {**c, **patch}
+                seg[i] = merged
+                cache.set(key, seg, ttl_seconds=ttl_seconds)
+                _written(job_id)[key] = _digest(seg)
+                _patch_mirrored_card(meta, item_id, merged)
+                meta["updated_at"] = now
+                cache.set(f"job:{job_id}", meta, ttl_seconds=ttl_seconds)
+                return merged
+    return None
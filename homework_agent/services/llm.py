@@ -6,17 +6,28 @@ LLM Client - 文本推理客户端
 - 数学/英语批改和苏格拉底辅导提示词
 - 结构化JSON输出
 - 批处理支持
+- AsyncLLMClient：基于 AsyncOpenAI 的原生异步调用（autonomous agent 全链路使用）
 """
 
+import asyncio
 import json
-import re
 import logging
 import time
-from typing import Optional, List, Dict, Any, Iterable
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
 from pydantic import BaseModel, Field
 from pydantic.config import ConfigDict
 
-from openai import OpenAI, APIConnectionError, APITimeoutError
+from openai import AsyncOpenAI, OpenAI, APIConnectionError, APITimeoutError
 import httpx
 from tenacity import (
     retry,
@@ -33,6 +44,21 @@ from homework_agent.core.prompts import (
     SOCRATIC_TUTOR_SYSTEM_PROMPT,
 )
 from homework_agent.models.schemas import Subject, SimilarityMode, Severity, ImageRef
+from homework_agent.utils.json_repair import extract_json_object
+from homework_agent.utils.llm_clients import get_async_openai_client, get_openai_client
+from homework_agent.utils.llm_hedge import (
+    hedged_call,
+    hedged_call_async,
+    hedged_stream,
+    secondary_provider,
+)
+from homework_agent.utils.llm_cache import (
+    lookup_response,
+    lookup_response_async,
+    response_cache_key,
+    store_response,
+    store_response_async,
+)
 from homework_agent.utils.settings import get_settings
 from homework_agent.utils.observability import log_event, trace_span
 from homework_agent.core.tools import get_default_tool_registry, load_default_tools
@@ -40,144 +66,6 @@ from homework_agent.core.tools import get_default_tool_registry, load_default_to
 logger = logging.getLogger(__name__)
 
 
-def _extract_first_json_object(text: str) -> Optional[str]:
-    if not text:
-        return None
-    s = str(text)
-    start = s.find("{")
-    if start < 0:
-        return None
-    depth = 0
-    in_str = False
-    esc = False
-    for i in range(start, len(s)):
-        ch = s[i]
-        if in_str:
-            if esc:
-                esc = False
-            elif ch == "\\":
-                esc = True
-            elif ch == '"':
-                in_str = False
-            continue
-        if ch == '"':
-            in_str = True
-            continue
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return s[start : i + 1]
-    return None
-
-
-def _repair_json_text(text: str) -> Optional[str]:
-    """
-    Attempt to repair malformed JSON from LLM output.
-
-    Handles common issues:
-    - Trailing commas before } or ]
-    - Missing commas between elements (e.g., }{, ][, "...", etc.)
-    - Leading/trailing prose around JSON block
-    """
-    if not text:
-        return None
-    s = str(text)
-    block = _extract_first_json_object(s)
-    if not block:
-        start = s.find("{")
-        end = s.rfind("}")
-        if start >= 0 and end > start:
-            block = s[start : end + 1]
-        elif start >= 0:
-            # Truncated JSON - no closing brace found, extract from start to end
-            block = s[start:]
-        else:
-            return None
-
-    # Step 1: Remove trailing commas before closing braces/brackets.
-    cleaned = re.sub(r",\s*([}\]])", r"\1", block)
-
-    # Step 2: Insert missing commas between elements.
-    # Pattern: `}` followed by whitespace/newline then `{` or `"` (next element)
-    cleaned = re.sub(r"}\s*\n\s*{", r"},\n{", cleaned)
-    cleaned = re.sub(r"}\s*\n\s*\"", r"},\n\"", cleaned)
-    # Pattern: `]` followed by whitespace/newline then `{` or `[` (next element in array context)
-    cleaned = re.sub(r"]\s*\n\s*\[", r"],\n[", cleaned)
-    cleaned = re.sub(
-        r"]\s*\n\s*{", r"},\n{", cleaned
-    )  # Note: this might be inside an array of objects
-    # Pattern: closing quote of value, newline, then opening quote of key (missing comma)
-    # e.g., "value"\n"key" -> "value",\n"key"
-    # Be careful: only match when it looks like end-of-value followed by new key
-    cleaned = re.sub(r'"\s*\n\s*"([^"]+)":', r'",\n"\1":', cleaned)
-
-    # Step 3: Try to fix unterminated strings by attempting suffix repairs
-    # Count unbalanced quotes, braces, brackets
-    try:
-        import json
-
-        json.loads(cleaned)
-        return cleaned  # Already valid
-    except Exception:
-        pass
-
-    # Step 3b: Escape control characters that might be in unterminated strings
-    # This helps when LLM output is truncated mid-string
-    def escape_control_chars(s: str) -> str:
-        # Escape newlines and tabs that aren't already escaped
-        result = []
-        i = 0
-        while i < len(s):
-            c = s[i]
-            if c == "\\" and i + 1 < len(s):
-                # Already escaped, keep as is
-                result.append(s[i : i + 2])
-                i += 2
-            elif c == "\n":
-                result.append("\\n")
-                i += 1
-            elif c == "\r":
-                result.append("\\r")
-                i += 1
-            elif c == "\t":
-                result.append("\\t")
-                i += 1
-            else:
-                result.append(c)
-                i += 1
-        return "".join(result)
-
-    cleaned_escaped = escape_control_chars(cleaned)
-
-    # Try common suffix repairs for truncated output
-    suffixes_to_try = [
-        '"}]}',  # Close string, close array, close object
-        '"}]',  # Close string, close array
-        '"]}',  # Close string, close array, close object
-        '"}',  # Close string, close object
-        '"]',  # Close string, close array
-        '"',  # Just close string
-        "}]}",  # Close array, close object
-        "}]",  # Close array
-        "]}",  # Close array, close object
-        "}",  # Close object
-        "]",  # Close array
-    ]
-
-    for suffix in suffixes_to_try:
-        try:
-            import json
-
-            json.loads(cleaned_escaped + suffix)
-            return cleaned_escaped + suffix
-        except Exception:
-            continue
-
-    return cleaned
-
-
 def _log_retry(op: str, retry_state):
     provider = retry_state.kwargs.get("provider", "unknown")
     model = None
@@ -266,8 +154,303 @@ class ReportResult(BaseModel):
     summary_json: Dict[str, Any] = Field(default_factory=dict, description="结构化摘要")
 
 
-class LLMClient:
-    """LLM客户端，支持国内模型"""
+def _chat_messages(system_prompt: Optional[str], prompt: str) -> List[Dict[str, Any]]:
+    messages: List[Dict[str, Any]] = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def _chat_result(response: Any) -> LLMResult:
+    return LLMResult(
+        text=response.choices[0].message.content,
+        raw=response.to_dict(),
+        usage={
+            "prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
+            "completion_tokens": getattr(response.usage, "completion_tokens", 0),
+            "total_tokens": getattr(response.usage, "total_tokens", 0),
+        },
+    )
+
+
+def _without_sampling(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    # Older SDKs may not support some params.
+    out = dict(kwargs)
+    out.pop("max_output_tokens", None)
+    out.pop("temperature", None)
+    return out
+
+
+def _ark_text_request(
+    *,
+    model: str,
+    system_prompt: Optional[str],
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "instructions": str(system_prompt or "").strip(),
+        "input": [
+            {
+                "role": "user",
+                "content": [{"type": "input_text", "text": str(prompt or "")}],
+            }
+        ],
+        "temperature": float(temperature),
+        "max_output_tokens": int(max_tokens),
+    }
+
+
+def _ark_vision_kwargs(
+    *,
+    model: str,
+    system_prompt: str,
+    content_blocks: List[Dict[str, Any]],
+    tools: Optional[List[Dict[str, Any]]],
+    out_tokens: int,
+    temperature: Any,
+    settings: Any,
+) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {
+        "model": model,
+        "instructions": system_prompt,
+        "input": [{"role": "user", "content": content_blocks}],
+    }
+    if tools:
+        kwargs["tools"] = tools
+    if (
+        isinstance(out_tokens, int)
+        and out_tokens > 0
+        and bool(getattr(settings, "ark_responses_enable_output_cap", False))
+    ):
+        kwargs["max_output_tokens"] = int(out_tokens)
+    if isinstance(temperature, (int, float)):
+        kwargs["temperature"] = float(temperature)
+    return kwargs
+
+
+def _responses_output_text(resp_obj: Any, *, reasoning_fallback: bool = False) -> str:
+    """Text of an Ark Responses result (`output_text`, else joined output_text parts)."""
+    try:
+        ot = getattr(resp_obj, "output_text", None)
+        if isinstance(ot, str) and ot.strip():
+            return ot.strip()
+    except Exception:
+        pass
+    parts: List[str] = []
+    try:
+        for item in getattr(resp_obj, "output", []) or []:
+            for c in getattr(item, "content", []) or []:
+                if getattr(c, "type", None) == "output_text":
+                    txt = getattr(c, "text", "")
+                    if isinstance(txt, str) and txt.strip():
+                        parts.append(txt)
+    except Exception:
+        parts = []
+    if parts or not reasoning_fallback:
+        return "\n".join(parts).strip()
+    # If the model returned only "reasoning" (no message), surface summary_text as a best-effort fallback.
+    summaries: List[str] = []
+    try:
+        for item in getattr(resp_obj, "output", []) or []:
+            if getattr(item, "type", None) != "reasoning":
+                continue
+            for s in getattr(item, "summary", []) or []:
+                st = None
+                try:
+                    st = getattr(s, "text", None)
+                except Exception:
+                    st = None
+                if st is None and isinstance(s, dict):
+                    st = s.get("text")
+                if isinstance(st, str) and st.strip():
+                    summaries.append(st)
+    except Exception:
+        summaries = []
+    return "\n".join(summaries).strip()
+
+
+def _response_id(resp: Any, resp_dict: Dict[str, Any]) -> Optional[str]:
+    try:
+        rid = str(getattr(resp, "id", None) or resp_dict.get("id") or "").strip()
+    except Exception:
+        return None
+    return rid or None
+
+
+def _responses_result(resp: Any) -> LLMResult:
+    """LLMResult for a text-only Ark Responses call (usage mapped to chat-style names)."""
+    resp_dict = resp.to_dict()
+    u = resp_dict.get("usage") or {}
+    usage_norm: Dict[str, Any] = {}
+    if isinstance(u, dict):
+        usage_norm.update(u)
+        usage_norm.setdefault("prompt_tokens", u.get("input_tokens"))
+        usage_norm.setdefault("completion_tokens", u.get("output_tokens"))
+        usage_norm.setdefault("total_tokens", u.get("total_tokens"))
+    return LLMResult(
+        text=_responses_output_text(resp),
+        raw=resp_dict,
+        usage=usage_norm or (u if isinstance(u, dict) else None),
+        response_id=_response_id(resp, resp_dict),
+    )
+
+
+def _reasoning_retry_cap(
+    resp_dict: Dict[str, Any], text_out: str, max_tokens: int
+) -> Optional[int]:
+    """Higher output cap when the whole budget went to reasoning and no message came out."""
+    usage = resp_dict.get("usage") or {}
+    out_used = int(usage.get("output_tokens") or 0)
+    out_details = usage.get("output_tokens_details") or {}
+    reasoning_used = int(out_details.get("reasoning_tokens") or 0)
+    if (
+        not text_out
+        and out_used > 0
+        and out_used == int(max_tokens)
+        and reasoning_used == out_used
+    ):
+        retry_cap = min(max(int(max_tokens) * 3, 12000), 24000)
+        if retry_cap > int(max_tokens):
+            return retry_cap
+    return None
+
+
+def _ark_vision_result(
+    resp: Any, resp_dict: Dict[str, Any], text_out: str
+) -> LLMResult:
+    usage = resp_dict.get("usage")
+    return LLMResult(
+        text=str(text_out or ""),
+        raw=resp_dict,
+        response_id=_response_id(resp, resp_dict),
+        usage=(
+            {
+                **usage,
+                "prompt_tokens": usage.get("input_tokens"),
+                "completion_tokens": usage.get("output_tokens"),
+                "total_tokens": usage.get("total_tokens"),
+            }
+            if isinstance(usage, dict)
+            else None
+        ),
+    )
+
+
+def _stream_event_parts(event: Any) -> tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """(text delta, usage) of one chat.completions stream chunk."""
+    usage_out: Optional[Dict[str, Any]] = None
+    usage = getattr(event, "usage", None)
+    if isinstance(usage, dict):
+        usage_out = usage
+    elif usage is not None:
+        try:
+            # openai python may expose usage as a pydantic-like object
+            usage_out = dict(usage)
+        except Exception:
+            usage_out = None
+    choice = (getattr(event, "choices", None) or [None])[0]
+    delta = getattr(choice, "delta", None)
+    return getattr(delta, "content", None), usage_out
+
+
+def _usage_event(usage_out: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "event": "llm_usage",
+        "data": {
+            "prompt_tokens": int(usage_out.get("prompt_tokens") or 0),
+            "completion_tokens": int(usage_out.get("completion_tokens") or 0),
+            "total_tokens": int(usage_out.get("total_tokens") or 0),
+        },
+    }
+
+
+def _succeeded(result: LLMResult) -> bool:
+    raw = result.raw if isinstance(result.raw, dict) else {}
+    return bool(str(result.text or "").strip()) and "error" not in raw
+
+
+def _cacheable(result: LLMResult) -> bool:
+    # A hedged answer came from the other provider: not what the cache key describes.
+    raw = result.raw if isinstance(result.raw, dict) else {}
+    return _succeeded(result) and "hedge_provider" not in raw
+
+
+def _hedge_failed(result: LLMResult) -> bool:
+    return not _succeeded(result)
+
+
+def _mark_hedged(result: LLMResult, provider: str, primary: str) -> LLMResult:
+    if provider != primary and isinstance(result, LLMResult):
+        result.raw = {**(result.raw or {}), "hedge_provider": provider}
+    return result
+
+
+def _hedged_llm_call(
+    hedge_site: Optional[str],
+    provider: str,
+    fn: Callable[..., LLMResult],
+    **kwargs: Any,
+) -> LLMResult:
+    """`fn(provider=..., **kwargs)`, hedged to the other provider when `hedge_site` is enabled."""
+    return hedged_call(
+        hedge_site,
+        provider,
+        lambda p: _mark_hedged(fn(provider=p, **kwargs), p, provider),
+        is_failure=_hedge_failed,
+    )
+
+
+async def _hedged_llm_call_async(
+    hedge_site: Optional[str],
+    provider: str,
+    fn: Callable[..., Awaitable[LLMResult]],
+    **kwargs: Any,
+) -> LLMResult:
+    async def _call(p: str) -> LLMResult:
+        return _mark_hedged(await fn(provider=p, **kwargs), p, provider)
+
+    return await hedged_call_async(
+        hedge_site, provider, _call, is_failure=_hedge_failed
+    )
+
+
+def _cached_llm_call(
+    site: Optional[str], key: Optional[str], compute: Callable[[], LLMResult]
+) -> LLMResult:
+    """Serve `compute()` from the response cache when `key` is set (site enabled)."""
+    if not site or not key:
+        return compute()
+    cached = lookup_response(site, key)
+    if cached is not None:
+        return LLMResult.model_validate(cached)
+    result = compute()
+    if _cacheable(result):
+        store_response(site, key, result.model_dump(mode="json"))
+    return result
+
+
+async def _cached_llm_call_async(
+    site: Optional[str],
+    key: Optional[str],
+    compute: Callable[[], Awaitable[LLMResult]],
+) -> LLMResult:
+    if not site or not key:
+        return await compute()
+    cached = await lookup_response_async(site, key)
+    if cached is not None:
+        return LLMResult.model_validate(cached)
+    result = await compute()
+    if _cacheable(result):
+        await store_response_async(site, key, result.model_dump(mode="json"))
+    return result
+
+
+class _LLMClientBase:
+    """LLMClient / AsyncLLMClient 共享的 provider 配置与请求/响应辅助方法"""
 
     def __init__(self):
         """初始化LLM客户端"""
@@ -385,35 +568,109 @@ class LLMClient:
             out = out[:5]
         return out
 
-    def _get_client(self, provider: str = "silicon") -> OpenAI:
-        """获取OpenAI兼容客户端"""
-        allowed = {"silicon", "ark", "openai"}
-        if provider not in allowed:
-            raise ValueError(f"Unsupported provider: {provider}")
+    def _silicon_vision_request(
+        self, system_prompt: str, user_prompt: str, images: List["ImageRef"]
+    ) -> tuple[str, List[Dict[str, Any]]]:
+        model = self.silicon_vision_model or self.silicon_model
+        content_blocks = [
+            {"type": "text", "text": user_prompt}
+        ] + self._image_blocks_from_refs(images, "silicon")
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": content_blocks},
+        ]
+        return model, messages
+
+    def _ark_vision_request(
+        self, user_prompt: str, images: List["ImageRef"], *, use_tools: bool, settings
+    ) -> tuple[str, List[Dict[str, Any]], Optional[List[Dict[str, Any]]]]:
+        model = self.ark_vision_model or self.ark_model
+        content_blocks: List[Dict[str, Any]] = [
+            {"type": "input_text", "text": user_prompt}
+        ]
+        content_blocks += self._image_blocks_from_refs(images, "ark")
+        tools = None
+        if use_tools and bool(getattr(settings, "ark_image_process_enabled", False)):
+            tools = [{"type": "image_process"}]
+        return model, content_blocks, tools
+
+    def _text_cache_key(
+        self,
+        cache_site: Optional[str],
+        prompt: str,
+        system_prompt: Optional[str],
+        provider: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> Optional[str]:
+        return response_cache_key(
+            cache_site,
+            provider=provider,
+            model=self.silicon_model if provider == "silicon" else self.ark_model,
+            messages=[system_prompt or "", prompt or ""],
+            params={"max_tokens": int(max_tokens), "temperature": float(temperature)},
+        )
+
+    def _vision_cache_key(
+        self,
+        cache_site: Optional[str],
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        images: List["ImageRef"],
+        provider: str,
+        max_tokens: int,
+        temperature: float,
+        use_tools: bool,
+    ) -> Optional[str]:
+        model = (
+            (self.silicon_vision_model or self.silicon_model)
+            if provider == "silicon"
+            else (self.ark_vision_model or self.ark_model)
+        )
+        return response_cache_key(
+            cache_site,
+            provider=provider,
+            model=model,
+            messages=[system_prompt or "", user_prompt or ""],
+            images=images,
+            params={
+                "max_tokens": int(max_tokens),
+                "temperature": float(temperature),
+                "use_tools": bool(use_tools),
+            },
+        )
+
+    def _client_config(self, provider: str) -> tuple[Optional[str], str, float]:
+        """(base_url, api_key, timeout) for an OpenAI-compatible provider."""
         if provider == "silicon":
             if not self.silicon_api_key:
                 raise ValueError("SILICON_API_KEY not configured")
-            return OpenAI(
-                base_url=self.silicon_base_url,
-                api_key=self.silicon_api_key,
-                timeout=float(self.timeout_seconds),
+            return (
+                self.silicon_base_url,
+                self.silicon_api_key,
+                float(self.timeout_seconds),
             )
-        elif provider == "ark":
+        if provider == "ark":
             if not self.ark_api_key:
                 raise ValueError("ARK_API_KEY not configured")
-            return OpenAI(
-                base_url=self.ark_base_url,
-                api_key=self.ark_api_key,
-                timeout=float(self.timeout_seconds),
-            )
-        elif provider == "openai":
+            return self.ark_base_url, self.ark_api_key, float(self.timeout_seconds)
+        if provider == "openai":
             if not self.openai_api_key:
                 raise ValueError("OPENAI_API_KEY not configured")
-            return OpenAI(
-                base_url=self.openai_base_url, api_key=self.openai_api_key, timeout=60.0
-            )
-        else:
-            raise ValueError(f"Unsupported provider: {provider}")
+            return self.openai_base_url, self.openai_api_key, 60.0
+        raise ValueError(f"Unsupported provider: {provider}")
+
+    def _hedge_site(self, site: Optional[str], provider: str) -> Optional[str]:
+        """`site` when the other provider is configured to take a hedged request."""
+        other = secondary_provider(provider)
+        if not site or other is None:
+            return None
+        try:
+            self._client_config(other)
+        except ValueError:
+            return None
+        return site
 
     def _parse_tool_arguments(self, raw_args: Any) -> Dict[str, Any]:
         if raw_args is None:
@@ -424,12 +681,9 @@ class LLMClient:
         try:
             return json.loads(raw)
         except Exception:
-            repaired = _repair_json_text(raw)
-            if repaired:
-                try:
-                    return json.loads(repaired)
-                except Exception:
-                    return {}
+            repaired = extract_json_object(raw, site="tool_arguments")
+            if repaired is not None:
+                return repaired
         return {}
 
     def _tool_call_payload(self, call: Any) -> Dict[str, Any]:
@@ -446,6 +700,87 @@ class LLMClient:
                 },
             }
 
+    def _assistant_tool_message(
+        self, msg: Any, tool_calls: List[Any]
+    ) -> Dict[str, Any]:
+        return {
+            "role": "assistant",
+            "content": msg.content or "",
+            "tool_calls": [self._tool_call_payload(c) for c in tool_calls],
+        }
+
+    def _execute_tool_call(
+        self,
+        registry: Any,
+        call: Any,
+        *,
+        provider: str,
+        model: str,
+        progress_cb: Optional[Any] = None,
+    ) -> Dict[str, Any]:
+        """Run one model-requested tool call; returns the `role=tool` reply message."""
+        fn = getattr(call, "function", None)
+        name = getattr(fn, "name", None) or ""
+        raw_args = getattr(fn, "arguments", None)
+        args = self._parse_tool_arguments(raw_args)
+        log_event(
+            logger,
+            "tool_call_start",
+            provider=provider,
+            model=model,
+            tool=name,
+        )
+        t0 = time.monotonic()
+        try:
+            if progress_cb:
+                progress_cb(
+                    {
+                        "tool": name,
+                        "status": "running",
+                    }
+                )
+            result = registry.call(name, args, progress_cb=progress_cb)
+            elapsed_ms = int((time.monotonic() - t0) * 1000)
+            log_event(
+                logger,
+                "tool_call_done",
+                provider=provider,
+                model=model,
+                tool=name,
+                elapsed_ms=elapsed_ms,
+            )
+        except Exception as e:
+            elapsed_ms = int((time.monotonic() - t0) * 1000)
+            log_event(
+                logger,
+                "tool_call_error",
+                level="warning",
+                provider=provider,
+                model=model,
+                tool=name,
+                error_type=e.__class__.__name__,
+                error=str(e),
+                elapsed_ms=elapsed_ms,
+            )
+            result = {"status": "error", "message": str(e)}
+
+        return {
+            "role": "tool",
+            "tool_call_id": getattr(call, "id", None),
+            "content": json.dumps(result, ensure_ascii=False),
+        }
+
+
+class LLMClient(_LLMClientBase):
+    """LLM客户端，支持国内模型"""
+
+    def _get_client(self, provider: str = "silicon") -> OpenAI:
+        """获取OpenAI兼容客户端（进程内按 provider/base_url/timeout 复用连接池）"""
+        base_url, api_key, timeout = self._client_config(provider)
+        return get_openai_client(
+            provider, base_url=base_url, api_key=api_key, timeout=timeout
+        )
+
     def _run_tool_loop(
         self,
         *,
@@ -478,65 +813,16 @@ class LLMClient:
             if not tool_calls:
                 return messages, msg.content or ""
 
-            messages.append(
-                {
-                    "role": "assistant",
-                    "content": msg.content or "",
-                    "tool_calls": [self._tool_call_payload(c) for c in tool_calls],
-                }
-            )
+            messages.append(self._assistant_tool_message(msg, tool_calls))
             for call in tool_calls:
-                fn = getattr(call, "function", None)
-                name = getattr(fn, "name", None) or ""
-                raw_args = getattr(fn, "arguments", None)
-                args = self._parse_tool_arguments(raw_args)
-                log_event(
-                    logger,
-                    "tool_call_start",
-                    provider=provider,
-                    model=model,
-                    tool=name,
-                )
-                t0 = time.monotonic()
-                try:
-                    if progress_cb:
-                        progress_cb(
-                            {
-                                "tool": name,
-                                "status": "running",
-                            }
-                        )
-                    result = registry.call(name, args, progress_cb=progress_cb)
-                    elapsed_ms = int((time.monotonic() - t0) * 1000)
-                    log_event(
-                        logger,
-                        "tool_call_done",
-                        provider=provider,
-                        model=model,
-                        tool=name,
-                        elapsed_ms=elapsed_ms,
-                    )
-                except Exception as e:
-                    elapsed_ms = int((time.monotonic() - t0) * 1000)
-                    log_event(
-                        logger,
-                        "tool_call_error",
-                        level="warning",
+                messages.append(
+                    self._execute_tool_call(
+                        registry,
+                        call,
                         provider=provider,
                         model=model,
-                        tool=name,
-                        error_type=e.__class__.__name__,
-                        error=str(e),
-                        elapsed_ms=elapsed_ms,
+                        progress_cb=progress_cb,
                     )
-                    result = {"status": "error", "message": str(e)}
-
-                messages.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": getattr(call, "id", None),
-                        "content": json.dumps(result, ensure_ascii=False),
-                    }
                 )
             steps += 1
         return messages, None
@@ -698,10 +984,10 @@ class LLMClient:
                 )
                 return MathGradingResult(**result_data)
             except Exception as parse_err:
-                repaired = _repair_json_text(content or "")
-                if repaired:
+                repaired = extract_json_object(content, site="grade_math")
+                if repaired is not None:
                     try:
-                        result_data = json.loads(repaired)
+                        result_data = repaired
                         if "wrong_items" in result_data:
                             result_data["wrong_items"] = (
                                 self._normalize_math_wrong_items(
@@ -889,10 +1175,10 @@ class LLMClient:
                 )
                 return EnglishGradingResult(**result_data)
             except Exception as parse_err:
-                repaired = _repair_json_text(content or "")
-                if repaired:
+                repaired = extract_json_object(content, site="grade_english")
+                if repaired is not None:
                     try:
-                        result_data = json.loads(repaired)
+                        result_data = repaired
                         questions = result_data.get("questions")
                         if isinstance(questions, list):
                             for q in questions:
@@ -1212,11 +1498,39 @@ class LLMClient:
         model_override: Optional[str] = None,
         history: Optional[List[Dict[str, Any]]] = None,
         prompt_variant: Optional[str] = None,
+        hedge_site: Optional[str] = None,
     ) -> Iterable[Any]:
         """
         Stream 苏格拉底式辅导输出（同步生成器，供 SSE 透传）。
         - 仅产出文本增量，不返回结构化 status/interaction_count（调用方自行更新会话状态）。
+        - `hedge_site`：首个输出迟迟未到时对冲到另一供应商（指定 model_override 时不对冲）。
         """
+        kwargs: Dict[str, Any] = dict(
+            question=question,
+            wrong_item_context=wrong_item_context,
+            session_id=session_id,
+            interaction_count=interaction_count,
+            model_override=model_override,
+            history=history,
+            prompt_variant=prompt_variant,
+        )
+        site = None if model_override else self._hedge_site(hedge_site, provider)
+        yield from hedged_stream(
+            site, provider, lambda p: self._socratic_tutor_stream(provider=p, **kwargs)
+        )
+
+    def _socratic_tutor_stream(
+        self,
+        *,
+        question: str,
+        wrong_item_context: Optional[Dict[str, Any]],
+        session_id: Optional[str],
+        interaction_count: int,
+        provider: str,
+        model_override: Optional[str],
+        history: Optional[List[Dict[str, Any]]],
+        prompt_variant: Optional[str],
+    ) -> Iterator[Any]:
         client = self._get_client(provider)
 
         turn = interaction_count % 3
@@ -1388,33 +1702,23 @@ class LLMClient:
                 stream=True,
             )
         usage_out: Optional[Dict[str, Any]] = None
-        for event in stream:
-            try:
-                usage = getattr(event, "usage", None)
-                if isinstance(usage, dict):
-                    usage_out = usage
-                elif usage is not None:
-                    try:
-                        # openai python may expose usage as a pydantic-like object
-                        usage_out = dict(usage)
-                    except Exception:
-                        usage_out = usage_out
-                choice = (getattr(event, "choices", None) or [None])[0]
-                delta = getattr(choice, "delta", None)
-                text = getattr(delta, "content", None)
-                if text:
-                    yield text
-            except Exception:
-                continue
+        try:
+            for event in stream:
+                try:
+                    text, usage = _stream_event_parts(event)
+                    if usage is not None:
+                        usage_out = usage
+                    if text:
+                        yield text
+                except Exception:
+                    continue
+        finally:
+            # Closing early (client gone / lost a hedge) must abort the provider stream.
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
         if isinstance(usage_out, dict):
-            yield {
-                "event": "llm_usage",
-                "data": {
-                    "prompt_tokens": int(usage_out.get("prompt_tokens") or 0),
-                    "completion_tokens": int(usage_out.get("completion_tokens") or 0),
-                    "total_tokens": int(usage_out.get("total_tokens") or 0),
-                },
-            }
+            yield _usage_event(usage_out)
 
     @retry(
         retry=retry_if_exception_type(
@@ -1437,6 +1741,8 @@ class LLMClient:
         provider: str = "silicon",
         max_tokens: int = 1000,
         temperature: float = 0.7,
+        cache_site: Optional[str] = None,
+        hedge_site: Optional[str] = None,
     ) -> LLMResult:
         """
         通用文本生成
@@ -1447,10 +1753,38 @@ class LLMClient:
             provider: 模型提供商
             max_tokens: 最大令牌数
             temperature: 温度参数
+            cache_site: 响应缓存调用点名称（需在 LLM_RESPONSE_CACHE_SITES 中启用）
+            hedge_site: 对冲请求调用点名称（需在 LLM_HEDGE_SITES 中启用，见 utils/llm_hedge）
 
         Returns:
             LLMResult: 包含文本和原始响应的结果
         """
+        cache_key = self._text_cache_key(
+            cache_site, prompt, system_prompt, provider, max_tokens, temperature
+        )
+        return _cached_llm_call(
+            cache_site,
+            cache_key,
+            partial(
+                _hedged_llm_call,
+                self._hedge_site(hedge_site, provider),
+                provider,
+                self._generate,
+                prompt=prompt,
+                system_prompt=system_prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            ),
+        )
+
+    def _generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        provider: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> LLMResult:
         client = self._get_client(provider)
 
         try:
@@ -1458,85 +1792,27 @@ class LLMClient:
             if provider == "ark":
                 # Prefer Responses API for Ark to keep behavior consistent with multimodal calls
                 # and to get a provider-side response_id for audit.
-                instructions = str(system_prompt or "").strip()
-                content_blocks = [{"type": "input_text", "text": str(prompt or "")}]
-                kwargs: Dict[str, Any] = {
-                    "model": model,
-                    "instructions": instructions,
-                    "input": [{"role": "user", "content": content_blocks}],
-                    "temperature": float(temperature),
-                    "max_output_tokens": int(max_tokens),
-                }
+                kwargs = _ark_text_request(
+                    model=model,
+                    system_prompt=system_prompt,
+                    prompt=prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
                 try:
                     resp = client.responses.create(**kwargs)
                 except TypeError:
                     # Older SDKs may not support some params.
-                    kwargs.pop("temperature", None)
-                    kwargs.pop("max_output_tokens", None)
-                    resp = client.responses.create(**kwargs)
-
-                resp_dict = resp.to_dict()
-                response_id = None
-                try:
-                    response_id = str(
-                        getattr(resp, "id", None) or resp_dict.get("id") or ""
-                    ).strip()
-                except Exception:
-                    response_id = None
-                response_id = response_id if response_id else None
-
-                text_out = getattr(resp, "output_text", None)
-                if not isinstance(text_out, str) or not text_out.strip():
-                    parts: List[str] = []
-                    try:
-                        for item in getattr(resp, "output", []) or []:
-                            for c in getattr(item, "content", []) or []:
-                                if getattr(c, "type", None) == "output_text":
-                                    txt = getattr(c, "text", "")
-                                    if isinstance(txt, str) and txt.strip():
-                                        parts.append(txt)
-                    except Exception:
-                        parts = []
-                    text_out = "\n".join(parts).strip()
-                if not isinstance(text_out, str):
-                    text_out = str(text_out or "")
-
-                u = resp_dict.get("usage") or {}
-                usage_norm: Dict[str, Any] = {}
-                if isinstance(u, dict):
-                    usage_norm.update(u)
-                    usage_norm.setdefault("prompt_tokens", u.get("input_tokens"))
-                    usage_norm.setdefault("completion_tokens", u.get("output_tokens"))
-                    usage_norm.setdefault("total_tokens", u.get("total_tokens"))
-                return LLMResult(
-                    text=str(text_out or ""),
-                    raw=resp_dict,
-                    usage=usage_norm or (u if isinstance(u, dict) else None),
-                    response_id=response_id,
-                )
+                    resp = client.responses.create(**_without_sampling(kwargs))
+                return _responses_result(resp)
 
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
             response = client.chat.completions.create(
                 model=model,
-                messages=messages,
+                messages=_chat_messages(system_prompt, prompt),
                 temperature=temperature,
                 max_tokens=max_tokens,
             )
-
-            return LLMResult(
-                text=response.choices[0].message.content,
-                raw=response.to_dict(),
-                usage={
-                    "prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
-                    "completion_tokens": getattr(
-                        response.usage, "completion_tokens", 0
-                    ),
-                    "total_tokens": getattr(response.usage, "total_tokens", 0),
-                },
-            )
+            return _chat_result(response)
 
         except (
             APIConnectionError,
@@ -1562,26 +1838,57 @@ class LLMClient:
         max_tokens: int = 1600,
         temperature: float = 0.2,
         use_tools: bool = False,
+        cache_site: Optional[str] = None,
+        hedge_site: Optional[str] = None,
     ) -> LLMResult:
         """
         Multimodal generation with images + text prompt.
         Uses chat.completions for SiliconFlow; Ark uses Responses API.
         Notes:
         - For Ark, we optionally enable built-in `image_process` via Responses `tools` when configured.
+        - `cache_site` opts this call into the response cache (utils/llm_cache).
+        - `hedge_site` opts this call into hedging to the other provider (utils/llm_hedge).
         """
+        kwargs: Dict[str, Any] = dict(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            images=images,
+            provider=provider,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            use_tools=use_tools,
+        )
+        return _cached_llm_call(
+            cache_site,
+            self._vision_cache_key(cache_site, **kwargs),
+            partial(
+                _hedged_llm_call,
+                self._hedge_site(hedge_site, provider),
+                kwargs.pop("provider"),
+                self._generate_with_images,
+                **kwargs,
+            ),
+        )
+
+    def _generate_with_images(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        images: List["ImageRef"],
+        provider: str,
+        max_tokens: int,
+        temperature: float,
+        use_tools: bool,
+    ) -> LLMResult:
         client = self._get_client(provider)
         use_tools = bool(use_tools)
         settings = get_settings()
 
         if provider == "silicon":
-            model = self.silicon_vision_model or self.silicon_model
-            content_blocks = [
-                {"type": "text", "text": user_prompt}
-            ] + self._image_blocks_from_refs(images, provider)
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": content_blocks},
-            ]
+            model, messages = self._silicon_vision_request(
+                system_prompt, user_prompt, images
+            )
             if use_tools:
                 messages, tool_content = self._run_tool_loop(
                     client=client,
@@ -1597,94 +1904,27 @@ class LLMClient:
                 temperature=temperature,
                 max_tokens=max_tokens,
             )
-            return LLMResult(
-                text=response.choices[0].message.content,
-                raw=response.to_dict(),
-                usage={
-                    "prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
-                    "completion_tokens": getattr(
-                        response.usage, "completion_tokens", 0
-                    ),
-                    "total_tokens": getattr(response.usage, "total_tokens", 0),
-                },
-            )
+            return _chat_result(response)
 
         if provider == "ark":
-            model = self.ark_vision_model or self.ark_model
-            content_blocks: List[Dict[str, Any]] = [
-                {"type": "input_text", "text": user_prompt}
-            ]
-            content_blocks += self._image_blocks_from_refs(images, provider)
-            tools = None
-            if use_tools and bool(
-                getattr(settings, "ark_image_process_enabled", False)
-            ):
-                tools = [{"type": "image_process"}]
-
-            def _extract_output_text(resp_obj: Any) -> str:
-                try:
-                    ot = getattr(resp_obj, "output_text", None)
-                    if isinstance(ot, str) and ot.strip():
-                        return ot.strip()
-                except Exception:
-                    pass
-                parts: List[str] = []
-                try:
-                    for item in getattr(resp_obj, "output", []) or []:
-                        for c in getattr(item, "content", []) or []:
-                            if getattr(c, "type", None) == "output_text":
-                                txt = getattr(c, "text", "")
-                                if isinstance(txt, str) and txt.strip():
-                                    parts.append(txt)
-                except Exception:
-                    parts = []
-                if parts:
-                    return "\n".join(parts).strip()
-                # If the model returned only "reasoning" (no message), surface summary_text as a best-effort fallback.
-                summaries: List[str] = []
-                try:
-                    for item in getattr(resp_obj, "output", []) or []:
-                        if getattr(item, "type", None) != "reasoning":
-                            continue
-                        for s in getattr(item, "summary", []) or []:
-                            st = None
-                            try:
-                                st = getattr(s, "text", None)
-                            except Exception:
-                                st = None
-                            if st is None and isinstance(s, dict):
-                                st = s.get("text")
-                            if isinstance(st, str) and st.strip():
-                                summaries.append(st)
-                except Exception:
-                    summaries = []
-                return "\n".join(summaries).strip()
+            model, content_blocks, tools = self._ark_vision_request(
+                user_prompt, images, use_tools=use_tools, settings=settings
+            )
 
             def _responses_create(*, with_tools: bool, out_tokens: int) -> Any:
-                base: Dict[str, Any] = {
-                    "model": model,
-                    "instructions": system_prompt,
-                    "input": [{"role": "user", "content": content_blocks}],
-                }
-                if with_tools and tools:
-                    base["tools"] = tools
-                kwargs: Dict[str, Any] = dict(base)
-                if (
-                    isinstance(out_tokens, int)
-                    and out_tokens > 0
-                    and bool(
-                        getattr(settings, "ark_responses_enable_output_cap", False)
-                    )
-                ):
-                    kwargs["max_output_tokens"] = int(out_tokens)
-                if isinstance(temperature, (int, float)):
-                    kwargs["temperature"] = float(temperature)
+                kwargs = _ark_vision_kwargs(
+                    model=model,
+                    system_prompt=system_prompt,
+                    content_blocks=content_blocks,
+                    tools=tools if with_tools else None,
+                    out_tokens=out_tokens,
+                    temperature=temperature,
+                    settings=settings,
+                )
                 try:
                     return client.responses.create(**kwargs)
                 except TypeError:
-                    kwargs.pop("max_output_tokens", None)
-                    kwargs.pop("temperature", None)
-                    return client.responses.create(**kwargs)
+                    return client.responses.create(**_without_sampling(kwargs))
 
             # First attempt: use tools (if enabled).
             try:
@@ -1699,7 +1939,7 @@ class LLMClient:
                     raise
 
             resp_dict = resp.to_dict()
-            text_out = _extract_output_text(resp)
+            text_out = _responses_output_text(resp, reasoning_fallback=True)
 
             # If tool-enabled call returned no output_text (common with deep-thinking models), retry once without tools.
             if not text_out and tools:
@@ -1708,7 +1948,7 @@ class LLMClient:
                         with_tools=False, out_tokens=int(max_tokens)
                     )
                     resp_nt_dict = resp_nt.to_dict()
-                    text_nt = _extract_output_text(resp_nt)
+                    text_nt = _responses_output_text(resp_nt, reasoning_fallback=True)
                     if text_nt:
                         resp = resp_nt
                         resp_dict = resp_nt_dict
@@ -1720,60 +1960,20 @@ class LLMClient:
             # If the model spent the entire output budget on "reasoning" and produced no message, retry once with a higher cap.
             # This avoids a false "parse_failed" when the final output was never emitted.
             try:
-                usage = resp_dict.get("usage") or {}
-                out_used = int(usage.get("output_tokens") or 0)
-                out_details = usage.get("output_tokens_details") or {}
-                reasoning_used = int(out_details.get("reasoning_tokens") or 0)
-                if (
-                    not text_out
-                    and out_used > 0
-                    and out_used == int(max_tokens)
-                    and reasoning_used == out_used
-                ):
-                    retry_cap = min(max(int(max_tokens) * 3, 12000), 24000)
-                    if retry_cap > int(max_tokens):
-                        # Prefer retrying without tools for stability; tools can be re-enabled via feature flag later.
-                        resp2 = _responses_create(
-                            with_tools=False, out_tokens=retry_cap
-                        )
-                        resp2_dict = resp2.to_dict()
-                        text2 = _extract_output_text(resp2)
-                        if text2:
-                            resp = resp2
-                            resp_dict = resp2_dict
-                            text_out = text2
+                retry_cap = _reasoning_retry_cap(resp_dict, text_out, max_tokens)
+                if retry_cap:
+                    # Prefer retrying without tools for stability; tools can be re-enabled via feature flag later.
+                    resp2 = _responses_create(with_tools=False, out_tokens=retry_cap)
+                    resp2_dict = resp2.to_dict()
+                    text2 = _responses_output_text(resp2, reasoning_fallback=True)
+                    if text2:
+                        resp = resp2
+                        resp_dict = resp2_dict
+                        text_out = text2
             except Exception:
                 pass
 
-            response_id = None
-            try:
-                response_id = str(
-                    getattr(resp, "id", None) or resp_dict.get("id") or ""
-                )
-            except Exception:
-                response_id = None
-            response_id = response_id if (response_id and response_id.strip()) else None
-            return LLMResult(
-                text=str(text_out or ""),
-                raw=resp_dict,
-                response_id=response_id,
-                usage=(
-                    {
-                        **(resp_dict.get("usage") or {}),
-                        "prompt_tokens": (resp_dict.get("usage") or {}).get(
-                            "input_tokens"
-                        ),
-                        "completion_tokens": (resp_dict.get("usage") or {}).get(
-                            "output_tokens"
-                        ),
-                        "total_tokens": (resp_dict.get("usage") or {}).get(
-                            "total_tokens"
-                        ),
-                    }
-                    if isinstance(resp_dict.get("usage"), dict)
-                    else None
-                ),
-            )
+            return _ark_vision_result(resp, resp_dict, text_out)
 
         raise ValueError(f"Unsupported provider for generate_with_images: {provider}")
 
@@ -1846,10 +2046,10 @@ class LLMClient:
                 data = json.loads(content)
                 return ReportResult(**data)
             except Exception as e:
-                repaired = _repair_json_text(content or "")
-                if repaired:
+                repaired = extract_json_object(content, site="report")
+                if repaired is not None:
                     try:
-                        data = json.loads(repaired)
+                        data = repaired
                         return ReportResult(**data)
                     except Exception:
                         pass
@@ -1878,3 +2078,484 @@ class LLMClient:
                 narrative_md=f"# Report Generation Error\n\n{e}",
                 summary_json={"error": str(e)},
             )
+
+
+class AsyncLLMClient(_LLMClientBase):
+    """
+    Native asyncio twin of `LLMClient` (generate / generate_with_images / streaming) on
+    `AsyncOpenAI`, for async callers such as the autonomous grading agents: an in-flight call
+    holds no executor thread, so one worker loop can keep many LLM calls open at once.
+    Same provider config, request shapes and `LLMResult` as the sync client.
+    """
+
+    def _get_client(self, provider: str = "silicon") -> AsyncOpenAI:
+        base_url, api_key, timeout = self._client_config(provider)
+        return get_async_openai_client(
+            provider, base_url=base_url, api_key=api_key, timeout=timeout
+        )
+
+    async def _run_tool_loop(
+        self,
+        *,
+        client: AsyncOpenAI,
+        messages: List[Dict[str, Any]],
+        provider: str,
+        model: str,
+        progress_cb: Optional[Any] = None,
+    ) -> tuple[List[Dict[str, Any]], Optional[str]]:
+        if not self.tool_calling_enabled:
+            return messages, None
+
+        registry = get_default_tool_registry()
+        tools = registry.openai_tools()
+        if not tools:
+            return messages, None
+
+        steps = 0
+        while steps < self.max_tool_calls:
+            response = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                tools=tools,
+                tool_choice=self.tool_choice,
+                temperature=0.2,
+                max_tokens=800,
+            )
+            msg = response.choices[0].message
+            tool_calls = getattr(msg, "tool_calls", None) or []
+            if not tool_calls:
+                return messages, msg.content or ""
+
+            messages.append(self._assistant_tool_message(msg, tool_calls))
+            for call in tool_calls:
+                # Tools are sync (image slicing, sympy, ...): keep them off the event loop.
+                messages.append(
+                    await asyncio.to_thread(
+                        self._execute_tool_call,
+                        registry,
+                        call,
+                        provider=provider,
+                        model=model,
+                        progress_cb=progress_cb,
+                    )
+                )
+            steps += 1
+        return messages, None
+
+    @trace_span("llm.generate_async")
+    @retry(
+        retry=retry_if_exception_type(
+            (
+                APIConnectionError,
+                APITimeoutError,
+                httpx.ReadTimeout,
+                httpx.ConnectTimeout,
+            )
+        ),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        stop=stop_after_attempt(3),
+        before_sleep=partial(_log_retry, "generate"),
+        reraise=True,
+    )
+    async def generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        provider: str = "silicon",
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        cache_site: Optional[str] = None,
+        hedge_site: Optional[str] = None,
+    ) -> LLMResult:
+        """通用文本生成（异步），语义同 `LLMClient.generate`。"""
+        cache_key = self._text_cache_key(
+            cache_site, prompt, system_prompt, provider, max_tokens, temperature
+        )
+        return await _cached_llm_call_async(
+            cache_site,
+            cache_key,
+            partial(
+                _hedged_llm_call_async,
+                self._hedge_site(hedge_site, provider),
+                provider,
+                self._generate,
+                prompt=prompt,
+                system_prompt=system_prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            ),
+        )
+
+    async def _generate(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        provider: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> LLMResult:
+        client = self._get_client(provider)
+
+        try:
+            model = self.silicon_model if provider == "silicon" else self.ark_model
+            if provider == "ark":
+                kwargs = _ark_text_request(
+                    model=model,
+                    system_prompt=system_prompt,
+                    prompt=prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+                try:
+                    resp = await client.responses.create(**kwargs)
+                except TypeError:
+                    resp = await client.responses.create(**_without_sampling(kwargs))
+                return _responses_result(resp)
+
+            response = await client.chat.completions.create(
+                model=model,
+                messages=_chat_messages(system_prompt, prompt),
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+            return _chat_result(response)
+
+        except (
+            APIConnectionError,
+            APITimeoutError,
+            httpx.ReadTimeout,
+            httpx.ConnectTimeout,
+        ) as e:
+            raise e
+        except Exception as e:
+            logger.error(f"LLM generation failed: {str(e)}")
+            return LLMResult(
+                text=f"生成失败: {str(e)}",
+                raw={"error": str(e)},
+            )
+
+    @trace_span("llm.generate_with_images_async")
+    async def generate_with_images(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        images: List["ImageRef"],
+        provider: str = "silicon",
+        max_tokens: int = 1600,
+        temperature: float = 0.2,
+        use_tools: bool = False,
+        cache_site: Optional[str] = None,
+        hedge_site: Optional[str] = None,
+    ) -> LLMResult:
+        """Multimodal generation (async), same semantics as `LLMClient.generate_with_images`."""
+        kwargs: Dict[str, Any] = dict(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            images=images,
+            provider=provider,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            use_tools=use_tools,
+        )
+        return await _cached_llm_call_async(
+            cache_site,
+            self._vision_cache_key(cache_site, **kwargs),
+            partial(
+                _hedged_llm_call_async,
+                self._hedge_site(hedge_site, provider),
+                kwargs.pop("provider"),
+                self._generate_with_images,
+                **kwargs,
+            ),
+        )
+
+    async def _generate_with_images(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        images: List["ImageRef"],
+        provider: str,
+        max_tokens: int,
+        temperature: float,
+        use_tools: bool,
+    ) -> LLMResult:
+        client = self._get_client(provider)
+        use_tools = bool(use_tools)
+        settings = get_settings()
+
+        if provider == "silicon":
+            model, messages = self._silicon_vision_request(
+                system_prompt, user_prompt, images
+            )
+            if use_tools:
+                messages, tool_content = await self._run_tool_loop(
+                    client=client,
+                    messages=messages,
+                    provider=provider,
+                    model=model,
+                )
+                if tool_content is not None:
+                    return LLMResult(text=tool_content, raw={})
+            response = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+            return _chat_result(response)
+
+        if provider == "ark":
+            model, content_blocks, tools = self._ark_vision_request(
+                user_prompt, images, use_tools=use_tools, settings=settings
+            )
+
+            async def _responses_create(*, with_tools: bool, out_tokens: int) -> Any:
+                kwargs = _ark_vision_kwargs(
+                    model=model,
+                    system_prompt=system_prompt,
+                    content_blocks=content_blocks,
+                    tools=tools if with_tools else None,
+                    out_tokens=out_tokens,
+                    temperature=temperature,
+                    settings=settings,
+                )
+                try:
+                    return await client.responses.create(**kwargs)
+                except TypeError:
+                    return await client.responses.create(**_without_sampling(kwargs))
+
+            try:
+                resp = await _responses_create(
+                    with_tools=True, out_tokens=int(max_tokens)
+                )
+            except Exception:
+                if tools:
+                    resp = await _responses_create(
+                        with_tools=False, out_tokens=int(max_tokens)
+                    )
+                else:
+                    raise
+
+            resp_dict = resp.to_dict()
+            text_out = _responses_output_text(resp, reasoning_fallback=True)
+
+            if not text_out and tools:
+                try:
+                    resp_nt = await _responses_create(
+                        with_tools=False, out_tokens=int(max_tokens)
+                    )
+                    resp_nt_dict = resp_nt.to_dict()
+                    text_nt = _responses_output_text(resp_nt, reasoning_fallback=True)
+                    if text_nt:
+                        resp = resp_nt
+                        resp_dict = resp_nt_dict
+                        text_out = text_nt
+                        resp_dict.setdefault("meta", {})["ark_tools_fallback"] = True
+                except Exception:
+                    pass
+
+            try:
+                retry_cap = _reasoning_retry_cap(resp_dict, text_out, max_tokens)
+                if retry_cap:
+                    resp2 = await _responses_create(
+                        with_tools=False, out_tokens=retry_cap
+                    )
+                    resp2_dict = resp2.to_dict()
+                    text2 = _responses_output_text(resp2, reasoning_fallback=True)
+                    if text2:
+                        resp = resp2
+                        resp_dict = resp2_dict
+                        text_out = text2
+            except Exception:
+                pass
+
+            return _ark_vision_result(resp, resp_dict, text_out)
+
+        raise ValueError(f"Unsupported provider for generate_with_images: {provider}")
+
+    @trace_span("llm.generate_stream_async")
+    async def generate_stream(
+        self,
+        *,
+        prompt: str,
+        on_delta: Callable[[str], Any],
+        system_prompt: Optional[str] = None,
+        images: Optional[List["ImageRef"]] = None,
+        provider: str = "silicon",
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+    ) -> LLMResult:
+        """
+        `generate` / `generate_with_images` (without tools) in stream mode: each text delta is
+        passed to `on_delta` as it arrives (awaited when it returns an awaitable) and the same
+        `LLMResult` is returned once the stream ends.
+
+        Not cached, hedged or retried here: a retry would replay deltas into `on_delta`, so the
+        caller owns retries (and must reset any incremental state per attempt).
+        """
+        client = self._get_client(provider)
+        parts: List[str] = []
+
+        async def _emit(text: Any) -> None:
+            if not isinstance(text, str) or not text:
+                return
+            parts.append(text)
+            out = on_delta(text)
+            if asyncio.iscoroutine(out) or isinstance(out, asyncio.Future):
+                await out
+
+        if provider == "ark":
+            settings = get_settings()
+            if images:
+                model, content_blocks, _ = self._ark_vision_request(
+                    prompt, images, use_tools=False, settings=settings
+                )
+                kwargs = _ark_vision_kwargs(
+                    model=model,
+                    system_prompt=str(system_prompt or ""),
+                    content_blocks=content_blocks,
+                    tools=None,
+                    out_tokens=int(max_tokens),
+                    temperature=temperature,
+                    settings=settings,
+                )
+            else:
+                kwargs = _ark_text_request(
+                    model=self.ark_model,
+                    system_prompt=system_prompt,
+                    prompt=prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+            try:
+                stream = await client.responses.create(**kwargs, stream=True)
+            except TypeError:
+                stream = await client.responses.create(
+                    **_without_sampling(kwargs), stream=True
+                )
+            final: Any = None
+            async for event in stream:
+                etype = str(getattr(event, "type", "") or "")
+                if etype == "response.output_text.delta":
+                    await _emit(getattr(event, "delta", None))
+                elif etype == "response.completed":
+                    final = getattr(event, "response", None)
+            if final is None:
+                return LLMResult(text="".join(parts), raw={})
+            result = _responses_result(final)
+            if not result.text:
+                result.text = "".join(parts)
+            return result
+
+        if provider == "silicon":
+            if images:
+                model, messages = self._silicon_vision_request(
+                    str(system_prompt or ""), prompt, images
+                )
+            else:
+                model = self.silicon_model
+                messages = _chat_messages(system_prompt, prompt)
+            try:
+                stream = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream_options={"include_usage": True},
+                    stream=True,
+                )
+            except TypeError:
+                # Older openai client may not support stream_options.
+                stream = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                )
+            usage_out: Optional[Dict[str, Any]] = None
+            async for event in stream:
+                text, usage = _stream_event_parts(event)
+                if usage is not None:
+                    usage_out = usage
+                await _emit(text)
+            return LLMResult(
+                text="".join(parts),
+                raw={},
+                usage=_usage_event(usage_out)["data"] if usage_out else None,
+            )
+
+        raise ValueError(f"Unsupported provider for generate_stream: {provider}")
+
+    async def stream(
+        self,
+        *,
+        messages: List[Dict[str, Any]],
+        provider: str = "silicon",
+        model: Optional[str] = None,
+        max_tokens: int = 2200,
+        temperature: float = 0.4,
+        use_tools: bool = False,
+    ) -> AsyncIterator[Any]:
+        """
+        Stream a chat completion: yields text deltas, then one `{"event": "llm_usage", ...}`
+        dict when the provider reports usage (same event shapes as `socratic_tutor_stream`).
+        With `use_tools`, the tool loop runs first and its progress is yielded as
+        `{"event": "tool_progress", ...}` dicts.
+        """
+        client = self._get_client(provider)
+        model = model or (
+            self.silicon_model if provider == "silicon" else self.ark_model
+        )
+        messages = list(messages)
+        if use_tools:
+            tool_events: List[Dict[str, Any]] = []
+
+            def _progress_cb(payload: Dict[str, Any]) -> None:
+                tool_events.append({"event": "tool_progress", "data": payload})
+
+            messages, tool_content = await self._run_tool_loop(
+                client=client,
+                messages=messages,
+                provider=provider,
+                model=model,
+                progress_cb=_progress_cb,
+            )
+            for evt in tool_events:
+                yield evt
+            if tool_content is not None:
+                yield tool_content
+                return
+
+        try:
+            stream = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream_options={"include_usage": True},
+                stream=True,
+            )
+        except TypeError:
+            # Older openai client may not support stream_options.
+            stream = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+        usage_out: Optional[Dict[str, Any]] = None
+        async for event in stream:
+            try:
+                text, usage = _stream_event_parts(event)
+                if usage is not None:
+                    usage_out = usage
+                if text:
+                    yield text
+            except Exception:
+                continue
+        if isinstance(usage_out, dict):
+            yield _usage_event(usage_out)
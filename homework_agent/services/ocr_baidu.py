@@ -8,24 +8,195 @@ Implements:
 
 This module is intentionally tolerant to response schema differences:
 we keep raw response and provide best-effort extraction helpers.
+
+Connections and token:
+- Sync calls share one pooled `httpx.Client` per process (plus a `trust_env=False` one for
+  image downloads / signed BOS result URLs); async calls share one `httpx.AsyncClient` per
+  event loop (`BAIDU_OCR_HTTP_MAX_CONNECTIONS`). Nothing opens a client per request.
+- The access_token is cached per process and in Redis (`baidu_ocr:token:<hash>`, expiring with
+  the token), and refreshed under `single_flight`, so the fleet refreshes it once instead of
+  every new client instance doing its own OAuth round trip.
+
+Batches (`recognize_many_async` / `start_batch`):
+- All pages are submitted up front, then every pending task is queried in the same round.
+  The first round waits about as long as recent tasks took (EWMA); after that the interval
+  starts at `poll_interval_seconds` and grows by `BAIDU_OCR_POLL_BACKOFF` while nothing
+  finishes (up to `BAIDU_OCR_POLL_MAX_INTERVAL_SECONDS`), resetting when a task completes.
+- Batch submits go through the same `single_flight("baidu_ocr_submit", [submit_url, url])`
+  identity as `submit`, so a page already being submitted elsewhere (API qindex, worker, other
+  pods) shares that task instead of paying for a second one. Polling stays batched: a shared
+  task id may be queried by both sides, which costs queries, not OCR tasks.
+- `start_batch` runs the batch on a shared background event loop and returns one Future per
+  page that resolves as soon as that page's task finishes.
+- /metrics: `baidu_ocr_token_total{source=local|redis|refresh}`,
+  `baidu_ocr_batch_pages_total{status}`.
 """
 
 from __future__ import annotations
 
+import asyncio
 import base64
+import contextvars
+import hashlib
+import json
 import logging
+import os
+import threading
 import time
+import weakref
+from concurrent.futures import Future
 from urllib.parse import urlparse
-from dataclasses import dataclass
-from typing import Any, Dict, Optional, List
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional, List, Sequence, Tuple, Union
 
 import httpx
 
 from homework_agent.utils.settings import get_settings
+from homework_agent.utils.metrics import inc_counter
 from homework_agent.utils.observability import log_event, redact_url
+from homework_agent.utils.provider_limits import provider_quota, provider_quota_async
+from homework_agent.utils.redis_pool import get_redis
+from homework_agent.utils.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 
+_ACCESS_CACHE_PREFIX = "baidu_ocr:token:"
+_TOKEN_MARGIN_SECONDS = 60.0
+
+_HTTP_LOCK = threading.Lock()
+_HTTP: Dict[bool, httpx.Client] = {}
+_HTTP_PID = os.getpid()
+_ASYNC_HTTP: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[bool, httpx.AsyncClient]]" = (weakref.WeakKeyDictionary())
+_TOKENS: Dict[str, Tuple[str, float]] = (
+    {}
+)  # token cache key -> (token, expires_at epoch)
+
+_LOOP_LOCK = threading.Lock()
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_PID = 0
+# Running `start_batch` tasks: the loop only keeps weak references to tasks.
+_BATCH_TASKS: "set[asyncio.Task[None]]" = set()
+
+# Recent submit->done durations, used to time the first poll of a batch.
+_DURATION_EWMA: Optional[float] = None
+
+
+def _limits() -> httpx.Limits:
+    max_conn = max(1, int(get_settings().baidu_ocr_http_max_connections))
+    return httpx.Limits(max_connections=max_conn, max_keepalive_connections=max_conn)
+
+
+def _http(*, direct: bool = False) -> httpx.Client:
+    """
+    Shared sync client. `direct=True` is for public image / signed result URLs: it does not
+    inherit local proxy settings (which may break localhost/public fetches on macOS).
+    """
+    global _HTTP_PID
+    with _HTTP_LOCK:
+        if _HTTP_PID != os.getpid():  # never share sockets with a forked parent
+            _HTTP.clear()
+            _HTTP_PID = os.getpid()
+        client = _HTTP.get(direct)
+        if client is None or client.is_closed:
+            client = httpx.Client(
+                limits=_limits(), follow_redirects=direct, trust_env=not direct
+            )
+            _HTTP[direct] = client
+        return client
+
+
+def _async_http(*, direct: bool = False) -> httpx.AsyncClient:
+    """Shared async client per event loop (async connections are bound to their loop)."""
+    loop = asyncio.get_running_loop()
+    clients = _ASYNC_HTTP.setdefault(loop, {})
+    client = clients.get(direct)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=_limits(), follow_redirects=direct, trust_env=not direct
+        )
+        clients[direct] = client
+    return client
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Process-wide event loop thread that runs `start_batch` batches."""
+    global _LOOP, _LOOP_PID
+    with _LOOP_LOCK:
+        if _LOOP is None or _LOOP_PID != os.getpid() or _LOOP.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="baidu-ocr-loop", daemon=True
+            ).start()
+            _LOOP, _LOOP_PID = loop, os.getpid()
+        return _LOOP
+
+
+def _task_id_of(data: Dict[str, Any]) -> Optional[str]:
+    task_id = (
+        data.get("task_id")
+        or data.get("taskId")
+        or (data.get("result") or {}).get("task_id")
+        or (data.get("data") or {}).get("task_id")
+    )
+    return str(task_id) if task_id else None
+
+
+def _status_of(data: Dict[str, Any]) -> Optional[str]:
+    """Return `"done"` / `"failed"` once the task is finished, None while it is still running."""
+    status = (
+        (data.get("status") or "")
+        or (data.get("result") or {}).get("status")
+        or (data.get("data") or {}).get("status")
+        or ""
+    )
+    status = str(status).lower()
+
+    # Heuristics
+    if any(
+        k in status for k in ("done", "success", "finished", "complete", "completed")
+    ):
+        return "done"
+    if any(k in status for k in ("fail", "failed", "error")):
+        return "failed"
+    return None
+
+
+def _file_name_for(image_url: Optional[str]) -> str:
+    # Per Baidu PaddleOCR-VL doc: body must include `file_name` with a suffix.
+    if image_url:
+        try:
+            path = urlparse(image_url).path or ""
+            name = path.rsplit("/", 1)[-1].strip()
+            if name and "." in name:
+                return name[:128]
+        except Exception as e:
+            log_event(
+                logger,
+                "baidu_ocr_infer_filename_failed",
+                level="warning",
+                image_url=redact_url(image_url),
+                error_type=e.__class__.__name__,
+                error=str(e),
+            )
+    # Fallback: Baidu requires a suffix; use jpg by default.
+    return "document.jpg"
+
+
+def _record_duration(seconds: float) -> None:
+    global _DURATION_EWMA
+    prev = _DURATION_EWMA
+    _DURATION_EWMA = seconds if prev is None else 0.7 * prev + 0.3 * seconds
+
+
+def reset_baidu_ocr_state() -> None:
+    """Forget cached tokens, pooled clients and timing history (tests)."""
+    global _DURATION_EWMA
+    with _HTTP_LOCK:
+        _HTTP.clear()
+        _TOKENS.clear()
+    _ASYNC_HTTP.clear()
+    _DURATION_EWMA = None
+
 
 @dataclass
 class BaiduOCRTaskResult:
@@ -46,35 +217,85 @@ class BaiduPaddleOCRVLClient:
         self.poll_interval_seconds = settings.baidu_ocr_poll_interval_seconds
         self.poll_max_seconds = settings.baidu_ocr_poll_max_seconds
 
-        self._token: Optional[str] = None
-        self._token_expires_at: float = 0.0
-
     def is_configured(self) -> bool:
         return bool(self.api_key and self.secret_key)
 
+    def _token_cache_key(self) -> str:
+        raw = f"{self.oauth_url}|{self.api_key or ''}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+    def _cached_token(self, key: str, *, use_redis: bool = True) -> Optional[str]:
+        hit = _TOKENS.get(key)
+        if hit and time.time() < hit[1] - 30:
+            inc_counter("baidu_ocr_token_total", labels={"source": "local"})
+            return hit[0]
+        client = get_redis() if use_redis else None
+        if client is None:
+            return None
+        try:
+            raw = client.get(f"{_ACCESS_CACHE_PREFIX}{key}")
+            data = json.loads(raw) if raw else None
+        except Exception as e:
+            logger.debug(f"baidu_ocr token cache read failed: {e}")
+            return None
+        if not isinstance(data, dict) or not data.get("token"):
+            return None
+        token, expires_at = str(data["token"]), float(data.get("expires_at") or 0)
+        if time.time() >= expires_at - 30:
+            return None
+        _TOKENS[key] = (token, expires_at)
+        inc_counter("baidu_ocr_token_total", labels={"source": "redis"})
+        return token
+
     def _get_access_token(self) -> str:
-        now = time.time()
-        if self._token and now < self._token_expires_at - 30:
-            return self._token
+        key = self._token_cache_key()
+        token = self._cached_token(key)
+        if token:
+            return token
         if not self.api_key or not self.secret_key:
             raise RuntimeError("BAIDU_OCR_API_KEY/BAIDU_OCR_SECRET_KEY not configured")
+        token, expires_at = single_flight(
+            "baidu_ocr_token",
+            [key],
+            lambda: self._refresh_token(key),
+            encode=list,
+            decode=tuple,
+        )
+        _TOKENS[key] = (token, float(expires_at))
+        return token
 
+    def _refresh_token(self, key: str) -> Tuple[str, float]:
+        # Another process may have refreshed while we waited for leadership.
+        token = self._cached_token(key)
+        if token:
+            return token, _TOKENS[key][1]
         t0 = time.monotonic()
+        now = time.time()
         params = {
             "grant_type": "client_credentials",
             "client_id": self.api_key,
             "client_secret": self.secret_key,
         }
-        with httpx.Client(timeout=self.timeout_seconds) as client:
-            resp = client.get(self.oauth_url, params=params)
-            resp.raise_for_status()
-            data = resp.json()
+        resp = _http().get(self.oauth_url, params=params, timeout=self.timeout_seconds)
+        resp.raise_for_status()
+        data = resp.json()
         token = data.get("access_token")
         expires_in = float(data.get("expires_in") or 0)
         if not token:
             raise RuntimeError(f"Failed to get Baidu access_token: {data}")
-        self._token = token
-        self._token_expires_at = now + max(expires_in, 0)
+        expires_at = now + max(expires_in, 0)
+        inc_counter("baidu_ocr_token_total", labels={"source": "refresh"})
+        client = get_redis()
+        ttl = int(expires_in - _TOKEN_MARGIN_SECONDS)
+        if client is not None and ttl > 0:
+            try:
+                client.set(
+                    f"{_ACCESS_CACHE_PREFIX}{key}",
+                    json.dumps({"token": token, "expires_at": expires_at}),
+                    ex=ttl,
+                )
+            except Exception as e:
+                logger.debug(f"baidu_ocr token cache write failed: {e}")
         log_event(
             logger,
             "baidu_ocr_token_refreshed",
@@ -82,7 +303,14 @@ class BaiduPaddleOCRVLClient:
             expires_in=int(expires_in) if expires_in else None,
             elapsed_ms=int((time.monotonic() - t0) * 1000),
         )
-        return token
+        return token, expires_at
+
+    async def _get_access_token_async(self) -> str:
+        token = self._cached_token(self._token_cache_key(), use_redis=False)
+        if token:
+            return token
+        # Rare (token lives ~30 days): reuse the Redis + single-flight path off the loop.
+        return await asyncio.to_thread(self._get_access_token)
 
     def submit(
         self, *, image_url: Optional[str] = None, image_bytes: Optional[bytes] = None
@@ -90,8 +318,22 @@ class BaiduPaddleOCRVLClient:
         """
         Submit an OCR/layout task. Prefer `image_url` (public https).
         Fallback to base64 if URL is rejected.
-        Returns task_id (string).
+        Returns task_id (string). Concurrent submits of the same image share one task.
         """
+        image_id = (
+            hashlib.sha256(image_bytes).hexdigest()
+            if image_bytes
+            else str(image_url or "")
+        )
+        return single_flight(
+            "baidu_ocr_submit",
+            [self.submit_url, image_id],
+            lambda: self._submit(image_url=image_url, image_bytes=image_bytes),
+        )
+
+    def _submit(
+        self, *, image_url: Optional[str] = None, image_bytes: Optional[bytes] = None
+    ) -> str:
         token = self._get_access_token()
         url = f"{self.submit_url}?access_token={token}"
         endpoint_for_log = redact_url(url)
@@ -99,31 +341,12 @@ class BaiduPaddleOCRVLClient:
         # Per Baidu PaddleOCR-VL doc:
         # - Content-Type: application/x-www-form-urlencoded
         # - Body must include `file_name` (required) and one of `file_url` / `file_data`.
-        def _infer_file_name() -> str:
-            if image_url:
-                try:
-                    path = urlparse(image_url).path or ""
-                    name = path.rsplit("/", 1)[-1].strip()
-                    if name and "." in name:
-                        return name[:128]
-                except Exception as e:
-                    log_event(
-                        logger,
-                        "baidu_ocr_infer_filename_failed",
-                        level="warning",
-                        image_url=redact_url(image_url),
-                        error_type=e.__class__.__name__,
-                        error=str(e),
-                    )
-            # Fallback: Baidu requires a suffix; use jpg by default.
-            return "document.jpg"
-
-        file_name = _infer_file_name()
+        file_name = _file_name_for(image_url)
 
         def _post(payload: Dict[str, Any]) -> Dict[str, Any]:
-            t0 = time.monotonic()
-            with httpx.Client(timeout=self.timeout_seconds) as client:
-                resp = client.post(url, data=payload)
+            with provider_quota("baidu_ocr"):
+                t0 = time.monotonic()
+                resp = _http().post(url, data=payload, timeout=self.timeout_seconds)
                 resp.raise_for_status()
                 data = resp.json()
             log_event(
@@ -155,21 +378,16 @@ class BaiduPaddleOCRVLClient:
                     raise RuntimeError(
                         f"{last.get('error_code')}: {last.get('error_msg')}"
                     )
-                task_id = (
-                    last.get("task_id")
-                    or last.get("taskId")
-                    or (last.get("result") or {}).get("task_id")
-                    or (last.get("data") or {}).get("task_id")
-                )
+                task_id = _task_id_of(last)
                 if task_id:
                     log_event(
                         logger,
                         "baidu_ocr_submit_ok",
                         endpoint=endpoint_for_log,
                         mode="file_url",
-                        task_id=str(task_id),
+                        task_id=task_id,
                     )
-                    return str(task_id)
+                    return task_id
             except Exception as e:
                 log_event(
                     logger,
@@ -184,14 +402,9 @@ class BaiduPaddleOCRVLClient:
         # 2) Base64 fallback
         if image_bytes is None and image_url:
             try:
-                # For downloading public images (e.g., Supabase public URL) we should not inherit
-                # local proxy settings which may break localhost/public fetches on macOS.
-                with httpx.Client(
-                    timeout=self.timeout_seconds, follow_redirects=True, trust_env=False
-                ) as client:
-                    r = client.get(image_url)
-                    r.raise_for_status()
-                    image_bytes = r.content
+                r = _http(direct=True).get(image_url, timeout=self.timeout_seconds)
+                r.raise_for_status()
+                image_bytes = r.content
             except Exception as e:
                 raise RuntimeError(
                     f"Baidu OCR submit failed (cannot download url for base64 fallback): {e}"
@@ -211,38 +424,37 @@ class BaiduPaddleOCRVLClient:
             last = _post({"file_data": b64, "file_name": file_name})
             if last.get("error_code"):
                 raise RuntimeError(f"Baidu OCR submit failed: {last}")
-            task_id = (
-                last.get("task_id")
-                or last.get("taskId")
-                or (last.get("result") or {}).get("task_id")
-                or (last.get("data") or {}).get("task_id")
-            )
+            task_id = _task_id_of(last)
             if task_id:
                 log_event(
                     logger,
                     "baidu_ocr_submit_ok",
                     endpoint=endpoint_for_log,
                     mode="file_data",
-                    task_id=str(task_id),
+                    task_id=task_id,
                 )
-                return str(task_id)
+                return task_id
 
         raise RuntimeError(f"Baidu OCR submit failed: {last}")
 
     def query(self, task_id: str) -> Dict[str, Any]:
         token = self._get_access_token()
         url = f"{self.query_url}?access_token={token}"
-        endpoint_for_log = redact_url(url)
         payload = {"task_id": task_id}
-        t0 = time.monotonic()
-        with httpx.Client(timeout=self.timeout_seconds) as client:
-            resp = client.post(url, data=payload)
+        with provider_quota("baidu_ocr"):
+            t0 = time.monotonic()
+            resp = _http().post(url, data=payload, timeout=self.timeout_seconds)
             resp.raise_for_status()
             data = resp.json()
+        self._log_query(url, task_id, data, t0)
+        return data
+
+    @staticmethod
+    def _log_query(url: str, task_id: str, data: Dict[str, Any], t0: float) -> None:
         log_event(
             logger,
             "baidu_ocr_query_http",
-            endpoint=endpoint_for_log,
+            endpoint=redact_url(url),
             task_id=str(task_id),
             status=str(
                 (data.get("status") or (data.get("result") or {}).get("status") or "")
@@ -251,13 +463,22 @@ class BaiduPaddleOCRVLClient:
             elapsed_ms=int((time.monotonic() - t0) * 1000),
             error_code=data.get("error_code"),
         )
-        return data
 
     def wait(self, task_id: str) -> BaiduOCRTaskResult:
         """
         Poll query endpoint until status indicates completion/failed or timeout.
         This is best-effort: schema varies; we look for common fields.
+        Concurrent waits on the same task share one polling loop.
         """
+        return single_flight(
+            "baidu_ocr_wait",
+            [self.query_url, task_id],
+            lambda: self._wait(task_id),
+            encode=asdict,
+            decode=lambda d: BaiduOCRTaskResult(**d),
+        )
+
+    def _wait(self, task_id: str) -> BaiduOCRTaskResult:
         start = time.time()
         t0 = time.monotonic()
         polls = 0
@@ -265,19 +486,9 @@ class BaiduPaddleOCRVLClient:
         while True:
             last = self.query(task_id)
             polls += 1
-            status = (
-                (last.get("status") or "")
-                or (last.get("result") or {}).get("status")
-                or (last.get("data") or {}).get("status")
-                or ""
-            )
-            status = str(status).lower()
-
-            # Heuristics
-            if any(
-                k in status
-                for k in ("done", "success", "finished", "complete", "completed")
-            ):
+            status = _status_of(last)
+            if status == "done":
+                _record_duration(time.monotonic() - t0)
                 log_event(
                     logger,
                     "baidu_ocr_wait_done",
@@ -287,7 +498,7 @@ class BaiduPaddleOCRVLClient:
                     elapsed_ms=int((time.monotonic() - t0) * 1000),
                 )
                 return BaiduOCRTaskResult(task_id=str(task_id), status="done", raw=last)
-            if any(k in status for k in ("fail", "failed", "error")):
+            if status == "failed":
                 log_event(
                     logger,
                     "baidu_ocr_wait_done",
@@ -316,6 +527,251 @@ class BaiduPaddleOCRVLClient:
 
             time.sleep(self.poll_interval_seconds)
 
+    async def submit_async(self, *, image_url: str) -> str:
+        """
+        Async `submit` (URL-first, base64 fallback) on the loop's pooled client. Coalesced with
+        `submit` of the same url: the single-flight wait runs in a worker thread, and the
+        leader's upload runs back on this loop.
+        """
+        loop = asyncio.get_running_loop()
+
+        def _lead() -> str:
+            return asyncio.run_coroutine_threadsafe(
+                self._submit_async(image_url=image_url), loop
+            ).result()
+
+        return await asyncio.to_thread(
+            single_flight,
+            "baidu_ocr_submit",
+            [self.submit_url, str(image_url or "")],
+            _lead,
+        )
+
+    async def _submit_async(self, *, image_url: str) -> str:
+        token = await self._get_access_token_async()
+        url = f"{self.submit_url}?access_token={token}"
+        endpoint_for_log = redact_url(url)
+        file_name = _file_name_for(image_url)
+
+        async def _post(payload: Dict[str, Any]) -> Dict[str, Any]:
+            async with provider_quota_async("baidu_ocr"):
+                t0 = time.monotonic()
+                resp = await _async_http().post(
+                    url, data=payload, timeout=self.timeout_seconds
+                )
+                resp.raise_for_status()
+                data = resp.json()
+            log_event(
+                logger,
+                "baidu_ocr_submit_http",
+                endpoint=endpoint_for_log,
+                mode="file_url" if "file_url" in payload else "file_data",
+                elapsed_ms=int((time.monotonic() - t0) * 1000),
+                error_code=data.get("error_code"),
+            )
+            return data
+
+        last: Dict[str, Any] = {}
+        try:
+            last = await _post({"file_url": image_url, "file_name": file_name})
+            if last.get("error_code"):
+                raise RuntimeError(f"{last.get('error_code')}: {last.get('error_msg')}")
+            task_id = _task_id_of(last)
+            if task_id:
+                return task_id
+        except Exception as e:
+            log_event(
+                logger,
+                "baidu_ocr_submit_fallback",
+                endpoint=endpoint_for_log,
+                reason=f"{e.__class__.__name__}: {e}",
+                image_url=redact_url(image_url),
+            )
+
+        try:
+            r = await _async_http(direct=True).get(
+                image_url, timeout=self.timeout_seconds
+            )
+            r.raise_for_status()
+        except Exception as e:
+            raise RuntimeError(
+                f"Baidu OCR submit failed (cannot download url for base64 fallback): {e}"
+            ) from e
+        b64 = base64.b64encode(r.content).decode("utf-8")
+        last = await _post({"file_data": b64, "file_name": file_name})
+        if last.get("error_code"):
+            raise RuntimeError(f"Baidu OCR submit failed: {last}")
+        task_id = _task_id_of(last)
+        if task_id:
+            return task_id
+        raise RuntimeError(f"Baidu OCR submit failed: {last}")
+
+    async def query_async(self, task_id: str) -> Dict[str, Any]:
+        token = await self._get_access_token_async()
+        url = f"{self.query_url}?access_token={token}"
+        async with provider_quota_async("baidu_ocr"):
+            t0 = time.monotonic()
+            resp = await _async_http().post(
+                url, data={"task_id": task_id}, timeout=self.timeout_seconds
+            )
+            resp.raise_for_status()
+            data = resp.json()
+        self._log_query(url, task_id, data, t0)
+        return data
+
+    async def recognize_many_async(
+        self,
+        image_urls: Sequence[str],
+        *,
+        on_result: Optional[
+            Callable[[int, Union[BaiduOCRTaskResult, Exception]], None]
+        ] = None,
+    ) -> List[Union[BaiduOCRTaskResult, Exception]]:
+        """
+        Submit every page up front, then poll all pending tasks together until each is
+        done/failed/timeout. Returns one item per url (in order): the task result, or the
+        exception that stopped its submit. `on_result(index, item)` fires as each page finishes.
+        """
+        t0 = time.monotonic()
+        out: List[Union[BaiduOCRTaskResult, Exception, None]] = [None] * len(image_urls)
+
+        def _finish(i: int, item: Union[BaiduOCRTaskResult, Exception]) -> None:
+            out[i] = item
+            status = item.status if isinstance(item, BaiduOCRTaskResult) else "error"
+            inc_counter("baidu_ocr_batch_pages_total", labels={"status": status})
+            if on_result is not None:
+                try:
+                    on_result(i, item)
+                except Exception as e:
+                    logger.debug(f"baidu_ocr on_result callback failed: {e}")
+
+        submitted = await asyncio.gather(
+            *(self.submit_async(image_url=u) for u in image_urls),
+            return_exceptions=True,
+        )
+        pending: Dict[int, str] = {}
+        for i, res in enumerate(submitted):
+            if isinstance(res, Exception):
+                _finish(i, res)
+            elif isinstance(res, BaseException):
+                raise res
+            else:
+                pending[i] = res
+        t_submitted = time.monotonic()
+
+        settings = get_settings()
+        base = max(0.1, float(self.poll_interval_seconds))
+        max_interval = max(base, float(settings.baidu_ocr_poll_max_interval_seconds))
+        backoff = max(1.0, float(settings.baidu_ocr_poll_backoff))
+        # First round: about when recent tasks finished (no wasted early queries).
+        interval = (
+            min(max(base, _DURATION_EWMA * 0.9), max_interval)
+            if _DURATION_EWMA
+            else base
+        )
+        deadline = t_submitted + float(self.poll_max_seconds)
+        last: Dict[int, Dict[str, Any]] = {}
+        rounds = 0
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                for i, task_id in pending.items():
+                    _finish(
+                        i,
+                        BaiduOCRTaskResult(
+                            task_id=task_id, status="timeout", raw=last.get(i, {})
+                        ),
+                    )
+                break
+            await asyncio.sleep(min(interval, remaining))
+            rounds += 1
+            batch = list(pending.items())
+            answers = await asyncio.gather(
+                *(self.query_async(task_id) for _, task_id in batch),
+                return_exceptions=True,
+            )
+            progressed = False
+            for (i, task_id), raw in zip(batch, answers):
+                if isinstance(raw, BaseException):
+                    if not isinstance(raw, Exception):
+                        raise raw
+                    # Transient query errors: keep polling until the deadline.
+                    log_event(
+                        logger,
+                        "baidu_ocr_query_failed",
+                        level="warning",
+                        task_id=task_id,
+                        error_type=raw.__class__.__name__,
+                        error=str(raw),
+                    )
+                    continue
+                last[i] = raw
+                status = _status_of(raw)
+                if status is None:
+                    continue
+                if status == "done":
+                    _record_duration(time.monotonic() - t_submitted)
+                del pending[i]
+                progressed = True
+                _finish(i, BaiduOCRTaskResult(task_id=task_id, status=status, raw=raw))
+            interval = base if progressed else min(max_interval, interval * backoff)
+
+        log_event(
+            logger,
+            "baidu_ocr_batch_done",
+            pages=len(image_urls),
+            rounds=rounds,
+            statuses=[
+                r.status if isinstance(r, BaiduOCRTaskResult) else "error" for r in out
+            ],
+            elapsed_ms=int((time.monotonic() - t0) * 1000),
+        )
+        return out  # type: ignore[return-value]
+
+    def start_batch(
+        self, image_urls: Sequence[str]
+    ) -> List["Future[BaiduOCRTaskResult]"]:
+        """
+        Run `recognize_many_async` on the shared background loop from sync code. Each page's
+        Future resolves as soon as its task finishes (submit errors are set as exceptions).
+        """
+        futures: List["Future[BaiduOCRTaskResult]"] = [Future() for _ in image_urls]
+        if not futures:
+            return futures
+
+        def _resolve(i: int, item: Union[BaiduOCRTaskResult, Exception]) -> None:
+            if futures[i].done():
+                return
+            if isinstance(item, Exception):
+                futures[i].set_exception(item)
+            else:
+                futures[i].set_result(item)
+
+        async def _run() -> None:
+            try:
+                await self.recognize_many_async(list(image_urls), on_result=_resolve)
+            except BaseException as e:
+                err = (
+                    e
+                    if isinstance(e, Exception)
+                    else RuntimeError(str(e) or "cancelled")
+                )
+                for f in futures:
+                    if not f.done():
+                        f.set_exception(err)
+                if not isinstance(e, Exception):
+                    raise
+
+        def _spawn() -> None:
+            task = loop.create_task(_run())
+            _BATCH_TASKS.add(task)
+            task.add_done_callback(_BATCH_TASKS.discard)
+
+        loop = _background_loop()
+        # Carry the caller's context (request/session ids in logs) into the batch task.
+        loop.call_soon_threadsafe(_spawn, context=contextvars.copy_context())
+        return futures
+
     @staticmethod
     def _fetch_parse_result_json(
         parse_result_url: str, *, timeout_seconds: float
@@ -325,12 +781,9 @@ class BaiduPaddleOCRVLClient:
         try:
             # parse_result_url is a signed BOS URL with limited lifetime.
             t0 = time.monotonic()
-            with httpx.Client(
-                timeout=timeout_seconds, follow_redirects=True, trust_env=False
-            ) as client:
-                resp = client.get(parse_result_url)
-                resp.raise_for_status()
-                data = resp.json()
+            resp = _http(direct=True).get(parse_result_url, timeout=timeout_seconds)
+            resp.raise_for_status()
+            data = resp.json()
             log_event(
                 logger,
                 "baidu_ocr_parse_result_fetched",
@@ -12,9 +12,7 @@ Notes:
 from __future__ import annotations
 
 import base64
-import json
 import logging
-import re
 import time
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
@@ -22,6 +20,8 @@ from typing import Any, Dict, List, Optional, Tuple
 import httpx
 from openai import OpenAI
 
+from homework_agent.utils.json_repair import extract_json_object
+from homework_agent.utils.llm_clients import get_openai_client
 from homework_agent.utils.settings import get_settings
 from homework_agent.utils.observability import log_event, redact_url
 
@@ -35,36 +35,6 @@ class SiliconFlowOCRResult:
     blocks: List[Dict[str, Any]]
 
 
-def _extract_json_object(text: str) -> Optional[Dict[str, Any]]:
-    """
-    Extract the first JSON object from a model response.
-    Handles common wrappers like ```json ... ``` or leading/trailing prose.
-    """
-    if not text:
-        return None
-    s = str(text).strip()
-    if not s:
-        return None
-
-    # Strip code fences
-    # - handle leading fences
-    s = re.sub(r"^```(?:json)?\\s*", "", s, flags=re.IGNORECASE)
-    # - handle trailing fences
-    s = re.sub(r"\\s*```\\s*$", "", s)
-
-    # Find a JSON object boundaries (best-effort)
-    start = s.find("{")
-    end = s.rfind("}")
-    if start < 0 or end <= start:
-        return None
-    candidate = s[start : end + 1].strip()
-    try:
-        obj = json.loads(candidate)
-        return obj if isinstance(obj, dict) else None
-    except Exception:
-        return None
-
-
 def _as_data_uri(url: str, *, timeout_seconds: float) -> Optional[str]:
     """Download image bytes and convert to a data URI for image_url input."""
     if not url:
@@ -110,7 +80,8 @@ class SiliconFlowDeepSeekOCRClient:
         return bool(self.api_key and self.base_url and self.model)
 
     def _build_client(self) -> OpenAI:
-        return OpenAI(
+        return get_openai_client(
+            "silicon",
             base_url=self.base_url,
             api_key=self.api_key,
             timeout=float(self.timeout_seconds),
@@ -215,7 +186,7 @@ class SiliconFlowDeepSeekOCRClient:
         text, raw = _call(image_url)
 
         # If parsing fails, try data-URI fallback (avoids server-side URL fetch).
-        obj = _extract_json_object(text)
+        obj = extract_json_object(text, site="silicon_ocr")
         if obj is None:
             log_event(
                 logger,
@@ -237,7 +208,7 @@ class SiliconFlowDeepSeekOCRClient:
                     image_url=redact_url(image_url),
                 )
                 text, raw = _call(data_uri)
-                obj = _extract_json_object(text)
+                obj = extract_json_object(text, site="silicon_ocr")
                 if obj is None:
                     log_event(
                         logger,
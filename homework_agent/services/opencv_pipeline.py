@@ -5,7 +5,7 @@ import logging
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
-from homework_agent.utils.url_image_helpers import _safe_fetch_public_url_bytes
+from homework_agent.utils.image_blob_cache import ImageBlob, get_image_blob
 
 try:
     import numpy as np
@@ -40,21 +40,16 @@ def _strip_data_uri(data: str) -> str:
     return data
 
 
-def _load_image_bytes(
+def _load_image_blob(
     ref: ImageRef, *, timeout_seconds: float, max_bytes: int
-) -> Optional[bytes]:
+) -> Optional[ImageBlob]:
     if ref.url:
         try:
-            fetched = _safe_fetch_public_url_bytes(
+            return get_image_blob(
                 str(ref.url),
                 timeout_seconds=float(timeout_seconds),
-                max_redirects=3,
                 max_bytes=int(max_bytes),
             )
-            if not fetched:
-                return None
-            data, _ct = fetched
-            return data or None
         except Exception:
             return None
     if ref.base64:
@@ -63,12 +58,19 @@ def _load_image_bytes(
             data = base64.b64decode(raw.encode("ascii"))
             if not data or len(data) > max_bytes:
                 return None
-            return data
+            return ImageBlob.from_bytes(data)
         except Exception:
             return None
     return None
 
 
+def _load_image_bytes(
+    ref: ImageRef, *, timeout_seconds: float, max_bytes: int
+) -> Optional[bytes]:
+    blob = _load_image_blob(ref, timeout_seconds=timeout_seconds, max_bytes=max_bytes)
+    return blob.data if blob else None
+
+
 def _encode_jpeg(img: Any, *, quality: int = 90) -> Optional[bytes]:
     try:
         ok, encoded = cv2.imencode(
@@ -167,13 +169,14 @@ def run_opencv_pipeline(ref: ImageRef) -> Optional[OpenCVSliceResult]:
     if not _CV_AVAILABLE:
         return None
 
-    raw = _load_image_bytes(ref, timeout_seconds=timeout_s, max_bytes=max_bytes)
-    if not raw:
+    blob = _load_image_blob(ref, timeout_seconds=timeout_s, max_bytes=max_bytes)
+    if not blob:
         return None
+    raw = blob.data
 
     try:
-        buf = np.frombuffer(raw, dtype=np.uint8)
-        img = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+        # Shared read-only view: every step below writes to new arrays.
+        img = blob.cv2()
         if img is None:
             return None
     except Exception:
@@ -231,7 +234,11 @@ def upload_slices(
     if slices.page_bytes:
         try:
             out["page_url"] = storage.upload_bytes(
-                slices.page_bytes, mime_type="image/jpeg", suffix=".jpg", prefix=prefix
+                slices.page_bytes,
+                mime_type="image/jpeg",
+                suffix=".jpg",
+                prefix=prefix,
+                content_addressed=True,
             )
         except Exception as e:
             logger.debug(f"upload page slice failed: {e}")
@@ -242,6 +249,7 @@ def upload_slices(
                 mime_type="image/jpeg",
                 suffix=".jpg",
                 prefix=prefix,
+                content_addressed=True,
             )
         except Exception as e:
             logger.debug(f"upload figure slice failed: {e}")
@@ -252,6 +260,7 @@ def upload_slices(
                 mime_type="image/jpeg",
                 suffix=".jpg",
                 prefix=prefix,
+                content_addressed=True,
             )
         except Exception as e:
             logger.debug(f"upload question slice failed: {e}")
@@ -21,18 +21,19 @@ from __future__ import annotations
 
 import base64
 import io
-import json
 import logging
-import re
 import time
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from typing import Any, Dict, List, Optional
 
 from openai import OpenAI
 from PIL import Image
 
+from homework_agent.utils.json_repair import parse_json_object
+from homework_agent.utils.llm_clients import get_openai_client
 from homework_agent.utils.observability import log_event, redact_url
 from homework_agent.utils.settings import get_settings
+from homework_agent.utils.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 
@@ -47,69 +48,19 @@ class QIndexLocateResult:
 
 
 def _extract_json(text: str) -> Optional[Dict[str, Any]]:
-    if not text:
+    if not text or not str(text).strip():
         return None
-    s = str(text).strip()
-    if not s:
-        return None
-
-    # Strip code fences
-    s = re.sub(r"^```(?:json)?\\s*", "", s, flags=re.IGNORECASE)
-    s = re.sub(r"\\s*```\\s*$", "", s)
-
-    # Robust extraction: find the first balanced JSON object, tolerate extra prose/trailing junk.
-    def _balanced_objects(src: str):
-        in_str = False
-        esc = False
-        depth = 0
-        start_idx = None
-        for i, ch in enumerate(src):
-            if in_str:
-                if esc:
-                    esc = False
-                elif ch == "\\":
-                    esc = True
-                elif ch == '"':
-                    in_str = False
-                continue
-            if ch == '"':
-                in_str = True
-                continue
-            if ch == "{":
-                if depth == 0:
-                    start_idx = i
-                depth += 1
-                continue
-            if ch == "}":
-                if depth > 0:
-                    depth -= 1
-                    if depth == 0 and start_idx is not None:
-                        yield src[start_idx : i + 1]
-                        start_idx = None
-                continue
-
-    candidates = 0
-    last_err: Optional[str] = None
-    for candidate in _balanced_objects(s):
-        candidates += 1
-        try:
-            obj = json.loads(candidate)
-            if isinstance(obj, dict):
-                return obj
-        except Exception as e:
-            last_err = f"{e.__class__.__name__}: {e}"
-            continue
-    if last_err:
+    parsed = parse_json_object(text, site="qindex_locator")
+    if parsed.value is None and parsed.repairs:
         log_event(
             logger,
             "qindex_locator_parse_failed",
             level="warning",
-            text_len=len(s),
-            candidates=candidates,
+            text_len=len(str(text)),
             error_type="json_parse_failed",
-            error=last_err,
+            repairs=parsed.repairs,
         )
-    return None
+    return parsed.value
 
 
 def _to_float(x: Any) -> Optional[float]:
@@ -265,12 +216,14 @@ class SiliconFlowQIndexLocator:
 
     def _client(self) -> OpenAI:
         if self._provider() == "ark":
-            return OpenAI(
+            return get_openai_client(
+                "ark",
                 base_url=self.ark_base_url,
                 api_key=self.ark_api_key,
                 timeout=float(self.timeout_seconds),
             )
-        return OpenAI(
+        return get_openai_client(
+            "silicon",
             base_url=self.silicon_base_url,
             api_key=self.silicon_api_key,
             timeout=float(self.timeout_seconds),
@@ -310,6 +263,29 @@ class SiliconFlowQIndexLocator:
 
     def locate(
         self, *, image_url: str, only_question_numbers: Optional[List[str]] = None
+    ) -> QIndexLocateResult:
+        """Locate question regions; concurrent identical requests share one call."""
+        if not self.is_configured() or not image_url:
+            return self._locate(
+                image_url=image_url, only_question_numbers=only_question_numbers
+            )
+        return single_flight(
+            "qindex_locate",
+            [
+                self._provider(),
+                self.model,
+                image_url,
+                sorted(str(x) for x in only_question_numbers or []),
+            ],
+            lambda: self._locate(
+                image_url=image_url, only_question_numbers=only_question_numbers
+            ),
+            encode=asdict,
+            decode=lambda d: QIndexLocateResult(**d),
+        )
+
+    def _locate(
+        self, *, image_url: str, only_question_numbers: Optional[List[str]] = None
     ) -> QIndexLocateResult:
         if not self.is_configured():
             raise RuntimeError(
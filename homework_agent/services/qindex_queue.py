@@ -15,9 +15,11 @@ import logging
 from dataclasses import dataclass
 from typing import Any, Optional
 
+from homework_agent.services.job_queue import ReliableQueue
 from homework_agent.utils.settings import get_settings
 from homework_agent.utils.observability import log_event, redact_url
 from homework_agent.utils.cache import get_cache_store
+from homework_agent.utils.redis_pool import get_redis
 
 logger = logging.getLogger(__name__)
 
@@ -63,18 +65,8 @@ class QIndexJob:
 
 
 def get_redis_client() -> Optional["redis.Redis"]:
-    if redis is None:
-        return None
-    redis_url = os.getenv("REDIS_URL")
-    if not redis_url:
-        return None
-    try:
-        client = redis.Redis.from_url(redis_url)
-        client.ping()
-        return client
-    except Exception as e:  # pragma: no cover
-        logger.warning("Redis unavailable for qindex queue: %s", e)
-        return None
+    """Shared pooled client (see utils/redis_pool); None when Redis is not usable."""
+    return get_redis()
 
 
 def queue_key() -> str:
@@ -83,6 +75,10 @@ def queue_key() -> str:
     return f"{prefix}{settings.qindex_queue_name}"
 
 
+def job_queue(client: Any) -> ReliableQueue:
+    return ReliableQueue(client, queue_key())
+
+
 def enqueue_qindex_job(
     session_id: str,
     page_urls: list[str],
@@ -108,7 +104,7 @@ def enqueue_qindex_job(
         question_numbers=[str(q) for q in (question_numbers or []) if str(q).strip()],
         enqueued_at=time.time(),
     )
-    client.lpush(queue_key(), job.to_json())
+    job_queue(client).push(job.to_json())
     log_event(
         logger,
         "qindex_enqueued",
@@ -4,7 +4,7 @@ Review cards queue abstraction (Redis-backed).
 Purpose:
 - Implement Layer 3 "Review Cards" without blocking /grade completion.
 - Grade worker enqueues review tasks for visually risky items.
-- Review worker consumes tasks and updates `job:{job_id}.question_cards[]`.
+- Review worker consumes tasks and updates the job's question cards (see `services/job_state.py`).
 """
 
 from __future__ import annotations
@@ -14,10 +14,12 @@ import os
 import time
 import logging
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Optional
 
+from homework_agent.services.job_queue import ReliableQueue
 from homework_agent.utils.settings import get_settings
 from homework_agent.utils.observability import log_event
+from homework_agent.utils.redis_pool import get_redis
 
 logger = logging.getLogger(__name__)
 
@@ -93,18 +95,8 @@ class ReviewCardJob:
 
 
 def get_redis_client() -> Optional["redis.Redis"]:
-    if redis is None:
-        return None
-    redis_url = os.getenv("REDIS_URL")
-    if not redis_url:
-        return None
-    try:
-        client = redis.Redis.from_url(redis_url)
-        client.ping()
-        return client
-    except Exception as e:  # pragma: no cover
-        logger.warning("Redis unavailable for review cards queue: %s", e)
-        return None
+    """Shared pooled client (see utils/redis_pool); None when Redis is not usable."""
+    return get_redis()
 
 
 def queue_key() -> str:
@@ -114,6 +106,10 @@ def queue_key() -> str:
     return f"{prefix}{name}"
 
 
+def job_queue(client: Any) -> ReliableQueue:
+    return ReliableQueue(client, queue_key())
+
+
 def _lock_key(*, job_id: str, item_id: str) -> str:
     prefix = os.getenv("CACHE_PREFIX", "")
     return f"{prefix}review_cards:lock:{job_id}:{item_id}"
@@ -176,7 +172,7 @@ def enqueue_review_card_job(
         attempt=int(attempt),
         enqueued_at=time.time(),
     )
-    client.lpush(queue_key(), job.to_json())
+    job_queue(client).push(job.to_json())
     log_event(
         logger,
         "review_cards_enqueued",
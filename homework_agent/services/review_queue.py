@@ -9,6 +9,7 @@ from typing import Any, Dict, List, Optional
 
 from homework_agent.utils.cache import BaseCache, get_cache_store
 from homework_agent.utils.observability import log_event
+from homework_agent.utils.redis_pool import get_redis
 from homework_agent.security.safety import (
     redact_url_query_params,
     sanitize_text_for_log,
@@ -82,18 +83,8 @@ def _sanitize_urls(urls: List[str]) -> List[str]:
 
 
 def _get_redis_client() -> Optional["redis.Redis"]:
-    if redis is None:
-        return None
-    redis_url = os.getenv("REDIS_URL")
-    if not redis_url:
-        return None
-    try:
-        client = redis.Redis.from_url(redis_url)
-        client.ping()
-        return client
-    except Exception as e:  # pragma: no cover
-        logger.warning("Redis unavailable for review queue: %s", e)
-        return None
+    """Shared pooled client (see utils/redis_pool); None when Redis is not usable."""
+    return get_redis()
 
 
 def _queue_key() -> str:
@@ -216,11 +207,17 @@ def list_review_items(
         except Exception:
             ids = []
 
+    # One MGET for every candidate instead of a GET per id.
+    keys = [_item_key(str(item_id or "").strip()) for item_id in ids]
+    try:
+        found = cache.get_many(keys)
+    except Exception:
+        found = {}
     out: List[Dict[str, Any]] = []
-    for item_id in ids:
+    for key in keys:
         if len(out) >= limit:
             break
-        obj = get_review_item(item_id, cache_store=cache)
+        obj = found.get(key)
         if not isinstance(obj, dict):
             continue
         if want and str(obj.get("status") or "").strip().lower() != want:
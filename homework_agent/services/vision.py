@@ -26,6 +26,12 @@ from tenacity import (
 
 from homework_agent.models.schemas import ImageRef, VisionProvider
 from homework_agent.services.image_preprocessor import maybe_preprocess_for_vision
+from homework_agent.utils.llm_cache import (
+    lookup_response,
+    response_cache_key,
+    store_response,
+)
+from homework_agent.utils.llm_clients import get_openai_client
 from homework_agent.utils.observability import trace_span
 from homework_agent.utils.url_image_helpers import _is_public_url
 from homework_agent.utils.settings import get_settings
@@ -80,9 +86,14 @@ class VisionClient:
             getattr(settings, "max_upload_image_bytes", 5 * 1024 * 1024)
         )
 
-    def _build_openai_client(self, base_url: str, api_key: str) -> OpenAI:
-        return OpenAI(
-            base_url=base_url, api_key=api_key, timeout=float(self.timeout_seconds)
+    def _build_openai_client(
+        self, provider: str, base_url: str, api_key: str
+    ) -> OpenAI:
+        return get_openai_client(
+            provider,
+            base_url=base_url,
+            api_key=api_key,
+            timeout=float(self.timeout_seconds),
         )
 
     def _strip_base64_prefix(self, data: str) -> str:
@@ -153,17 +164,44 @@ class VisionClient:
         images: List[ImageRef],
         prompt: Optional[str] = None,
         provider: VisionProvider = VisionProvider.DOUBAO,
+        cache_site: Optional[str] = None,
     ) -> VisionResult:
         """Call selected vision provider and return text output + raw response.
 
         This is a minimal wrapper; downstream parsing (OCR/region) is up to caller.
+        `cache_site` opts the call into the response cache (utils/llm_cache).
         """
-
+        cache_key = response_cache_key(
+            cache_site,
+            provider=provider,
+            model=(
+                self.silicon_model
+                if provider == VisionProvider.QWEN3
+                else self.ark_model
+            ),
+            messages=[prompt or ""],
+            images=images,
+        )
+        if cache_site and cache_key:
+            cached = lookup_response(cache_site, cache_key)
+            if cached is not None:
+                return VisionResult.model_validate(cached)
+        result = self._analyze(images, prompt, provider)
+        if cache_site and cache_key and str(result.text or "").strip():
+            store_response(cache_site, cache_key, result.model_dump(mode="json"))
+        return result
+
+    def _analyze(
+        self,
+        images: List[ImageRef],
+        prompt: Optional[str],
+        provider: VisionProvider,
+    ) -> VisionResult:
         if provider == VisionProvider.QWEN3:
             if not self.silicon_api_key:
                 raise RuntimeError("SILICON_API_KEY not configured")
             client = self._build_openai_client(
-                self.silicon_base_url, self.silicon_api_key
+                "silicon", self.silicon_base_url, self.silicon_api_key
             )
             messages = [
                 {
@@ -182,7 +220,9 @@ class VisionClient:
         if provider == VisionProvider.DOUBAO:
             if not self.ark_api_key:
                 raise RuntimeError("ARK_API_KEY not configured")
-            client = self._build_openai_client(self.ark_base_url, self.ark_api_key)
+            client = self._build_openai_client(
+                "ark", self.ark_base_url, self.ark_api_key
+            )
             blocks = self._image_content_blocks(images, provider)
             content_blocks = []
             if prompt:
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import json
 import logging
 import re
 from dataclasses import dataclass
@@ -14,6 +13,7 @@ from homework_agent.services.vision_prompts import (
     PLUGIN_PROMPTS,
     STUB_SCENES,
 )
+from homework_agent.utils.json_repair import parse_json_object
 from homework_agent.utils.url_image_helpers import _download_as_data_uri
 
 logger = logging.getLogger(__name__)
@@ -321,38 +321,6 @@ def select_vfe_images(*, focus_question: Dict[str, Any]) -> VFEImageSelection:
     return VFEImageSelection(image_urls=[], image_source="none")
 
 
-def _extract_first_json_object(text: str) -> Optional[str]:
-    if not text:
-        return None
-    s = str(text)
-    start = s.find("{")
-    if start < 0:
-        return None
-    depth = 0
-    in_str = False
-    esc = False
-    for i in range(start, len(s)):
-        ch = s[i]
-        if in_str:
-            if esc:
-                esc = False
-            elif ch == "\\":
-                esc = True
-            elif ch == '"':
-                in_str = False
-            continue
-        if ch == '"':
-            in_str = True
-            continue
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return s[start : i + 1]
-    return None
-
-
 _REASONING_BANNED = (
     "同位角",
     "内错角",
@@ -667,23 +635,17 @@ def extract_visual_facts(
             images.append(ImageRef(url=u))
 
     client = VisionClient()
-    res = client.analyze(images=images, prompt=prompt, provider=provider)
+    res = client.analyze(
+        images=images, prompt=prompt, provider=provider, cache_site="visual_facts"
+    )
     raw = (getattr(res, "text", None) or "").strip()
     if not raw:
         return None, False, raw
 
-    repaired = False
-    try:
-        obj = json.loads(raw)
-    except Exception:
-        block = _extract_first_json_object(raw)
-        if not block:
-            return None, False, raw
-        repaired = True
-        try:
-            obj = json.loads(block)
-        except Exception:
-            return None, repaired, raw
+    parsed = parse_json_object(raw, site="visual_facts")
+    obj, repaired = parsed.value, parsed.repaired
+    if obj is None:
+        return None, repaired, raw
 
     facts = _normalize_visual_facts_obj(obj, scene_type)
     if not facts:
@@ -703,20 +665,9 @@ def parse_visual_facts_map(
     if not raw_json:
         return {}, False
 
-    repaired = False
-    try:
-        obj = json.loads(raw_json)
-    except Exception:
-        block = _extract_first_json_object(raw_json)
-        if not block:
-            return {}, False
-        repaired = True
-        try:
-            obj = json.loads(block)
-        except Exception:
-            return {}, repaired
-
-    if not isinstance(obj, dict):
+    parsed = parse_json_object(raw_json, site="visual_facts_map")
+    obj, repaired = parsed.value, parsed.repaired
+    if obj is None:
         return {}, repaired
 
     # Accept either {"questions": {...}} or {"visual_facts": {...}} or a single VisualFacts object.
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 import time
 from dataclasses import dataclass
@@ -14,8 +13,9 @@ from homework_agent.core.prompts import (
     VISION_GRADE_SYSTEM_PROMPT_ENGLISH,
 )
 from homework_agent.models.schemas import Subject, ImageRef
-from homework_agent.services.llm import LLMClient, _repair_json_text
+from homework_agent.services.llm import LLMClient
 from homework_agent.services.opencv_pipeline import run_opencv_pipeline, upload_slices
+from homework_agent.utils.json_repair import parse_json_object
 from homework_agent.utils.settings import get_settings
 from homework_agent.utils.observability import log_event, log_llm_usage, trace_span
 from homework_agent.utils.versioning import stable_json_hash, stable_text_hash
@@ -75,19 +75,13 @@ def _select_prompt(subject: Subject) -> str:
 def _parse_unified_json(text: str) -> Optional[UnifiedGradePayload]:
     if not text:
         return None
-    raw = str(text)
+    data = parse_json_object(text, site="unified_grade_llm_repair").value
+    if data is None:
+        return None
     try:
-        data = json.loads(raw)
         return UnifiedGradePayload.model_validate(data)
     except Exception:
-        repaired = _repair_json_text(raw)
-        if not repaired:
-            return None
-        try:
-            data = json.loads(repaired)
-            return UnifiedGradePayload.model_validate(data)
-        except Exception:
-            return None
+        return None
 
 
 def _repair_with_llm(
@@ -104,7 +98,11 @@ def _repair_with_llm(
         f"原始内容：\n{raw_text}\n"
     )
     resp = llm.generate(
-        prompt=prompt, provider=provider, max_tokens=max_tokens, temperature=0.0
+        prompt=prompt,
+        provider=provider,
+        max_tokens=max_tokens,
+        temperature=0.0,
+        cache_site="json_repair",
     )
     return _parse_unified_json(resp.text or "")
 
@@ -239,6 +237,8 @@ async def run_unified_grade_agent(
             max_tokens=max_tokens,
             temperature=0.2,
             use_tools=True,
+            cache_site="unified_grade",
+            hedge_site="unified_grade",
         )
 
     llm_start = time.monotonic()
@@ -296,20 +296,14 @@ async def run_unified_grade_agent(
     repaired_json = False
     payload: Optional[UnifiedGradePayload] = None
     raw = str(getattr(res, "text", "") or "")
-    try:
-        data = json.loads(raw)
-        payload = UnifiedGradePayload.model_validate(data)
-        parse_path = "json"
-    except Exception:
-        repaired = _repair_json_text(raw)
-        if repaired:
-            try:
-                data = json.loads(repaired)
-                payload = UnifiedGradePayload.model_validate(data)
-                parse_path = "repair"
-                repaired_json = True
-            except Exception:
-                payload = None
+    parsed = parse_json_object(raw, site="unified_grade")
+    if parsed.value is not None:
+        try:
+            payload = UnifiedGradePayload.model_validate(parsed.value)
+            parse_path = "repair" if parsed.repaired else "json"
+            repaired_json = parsed.repaired
+        except Exception:
+            payload = None
 
     attempts_left = repair_attempts
     while payload is None and attempts_left > 0:
@@ -332,6 +326,7 @@ async def run_unified_grade_agent(
         session_id=session_id,
         parse_path=parse_path,
         repaired_json=repaired_json,
+        json_repairs=parsed.repairs,
         attempts_used=int(repair_attempts - attempts_left),
     )
 
@@ -27,6 +27,16 @@ def _reset_settings_cache() -> None:
     get_settings.cache_clear()
 
 
+@pytest.fixture(autouse=True)
+def _reset_image_blob_cache() -> None:
+    # Downloaded images are cached per process; tests fake different bytes for the same URL.
+    from homework_agent.utils.image_blob_cache import reset_image_blob_cache
+
+    reset_image_blob_cache()
+    yield
+    reset_image_blob_cache()
+
+
 @pytest.fixture(autouse=True)
 def _set_test_env(monkeypatch: pytest.MonkeyPatch) -> None:
     """
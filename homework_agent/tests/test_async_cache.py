@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+import uuid
+
+import pytest
+
+from homework_agent.services.job_state import (
+    read_job,
+    read_job_async,
+    read_job_meta_async,
+    write_job_async,
+)
+from homework_agent.utils.cache import (
+    AsyncCacheAdapter,
+    AsyncRedisCache,
+    NearCache,
+    get_async_cache_store,
+    get_cache_store,
+)
+
+
+def test_async_store_shares_the_in_memory_store(monkeypatch) -> None:
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    store = get_async_cache_store()
+    assert isinstance(store, AsyncCacheAdapter)
+    assert store.sync is get_cache_store()
+
+    async def _run():
+        await store.set("sess:async", {"v": 1}, ttl_seconds=60)
+        assert get_cache_store().get("sess:async") == {"v": 1}
+        get_cache_store().set("sess:async", {"v": 2}, ttl_seconds=60)
+        assert await store.get("sess:async") == {"v": 2}
+        await store.delete("sess:async")
+        return await store.get("sess:async")
+
+    assert asyncio.run(_run()) is None
+
+
+def test_write_job_async_is_readable_by_sync_and_async_readers(monkeypatch) -> None:
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    job_id = f"job_{uuid.uuid4().hex[:10]}"
+    payload = {
+        "user_id": "u1",
+        "status": "running",
+        "request": {"images": ["a", "b"]},
+        "page_summaries": [{"page_index": 1}, {"page_index": 0}],
+        "question_cards": [{"item_id": "p1:q:1", "page_index": 0}],
+    }
+
+    async def _run():
+        written = await write_job_async(job_id, payload, ttl_seconds=60)
+        # Unchanged segments are skipped; meta is always rewritten.
+        again = await write_job_async(job_id, payload, ttl_seconds=60)
+        return (
+            written,
+            again,
+            await read_job_async(job_id),
+            await read_job_meta_async(job_id),
+        )
+
+    written, again, full, meta = asyncio.run(_run())
+    assert written == 5 and again == 1
+    assert full == read_job(job_id)
+    assert [s["page_index"] for s in full["page_summaries"]] == [1, 0]
+    assert meta["status"] == "running" and "request" not in meta
+
+
+def _redis_url() -> str:
+    try:
+        import redis  # type: ignore
+        import redis.asyncio  # type: ignore  # noqa: F401
+    except Exception:  # pragma: no cover
+        return ""
+    url = str(os.getenv("REDIS_URL") or "").strip()
+    if not url:
+        return ""
+    try:
+        redis.Redis.from_url(url).ping()
+        return url
+    except Exception:
+        return ""
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.mark.integration
+def test_async_redis_cache_shares_near_cache_invalidation() -> None:
+    url = _redis_url()
+    if not url:
+        pytest.skip("Redis unavailable (set REDIS_URL to run this integration test)")
+    prefix = f"test:{uuid.uuid4().hex[:8]}:"
+    a = NearCache(url, prefix=prefix, ttl_seconds=60)
+    b = NearCache(url, prefix=prefix, ttl_seconds=60)
+    a.get("sess:warmup")
+    b.get("sess:warmup")
+    assert _wait_for(lambda: a._listening and b._listening)
+    try:
+        b.set("sess:s1", {"v": 1}, ttl_seconds=60)
+        assert b.get("sess:s1") == {"v": 1}
+        assert b.local.get("sess:s1") == {"v": 1}
+
+        async def _run():
+            store = AsyncRedisCache(a)
+            await store.set("sess:s1", {"v": 2}, ttl_seconds=60)
+            await store.set("job:j1", {"status": "running"}, ttl_seconds=60)
+            return await store.get("sess:s1"), await store.get("job:j1")
+
+        assert asyncio.run(_run()) == ({"v": 2}, {"status": "running"})
+        # The async write published on the shared channel: B's local copy is dropped.
+        assert _wait_for(lambda: b.local.get("sess:s1") is None)
+        assert b.get("sess:s1") == {"v": 2}
+        assert a.get("job:j1") == {"status": "running"}
+    finally:
+        keys = list(a.client.scan_iter(match=f"{prefix}*"))
+        if keys:
+            a.client.delete(*keys)
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from homework_agent.services.llm import AsyncLLMClient, LLMResult
+from homework_agent.utils import llm_clients
+
+
+def _completion(content: str) -> dict:
+    return {
+        "id": "cmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "m",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }
+        ],
+        "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+    }
+
+
+def _chunk(delta: dict, usage=None) -> bytes:
+    body = {
+        "id": "cmpl-1",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "m",
+        "choices": [{"index": 0, "delta": delta}] if delta else [],
+        "usage": usage,
+    }
+    return f"data: {json.dumps(body)}\n\n".encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay_s = 0.0
+
+    def do_POST(self) -> None:
+        req = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if _Handler.delay_s:
+            time.sleep(_Handler.delay_s)
+        if req.get("stream"):
+            body = b"".join(
+                [
+                    _chunk({"role": "assistant", "content": "你"}),
+                    _chunk({"content": "好"}),
+                    _chunk(
+                        {},
+                        usage={
+                            "prompt_tokens": 3,
+                            "completion_tokens": 2,
+                            "total_tokens": 5,
+                        },
+                    ),
+                    b"data: [DONE]\n\n",
+                ]
+            )
+            ctype = "text/event-stream"
+        else:
+            prompt = req["messages"][-1]["content"]
+            body = json.dumps(_completion(f"echo:{prompt}")).encode("utf-8")
+            ctype = "application/json"
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+@pytest.fixture()
+def llm(monkeypatch):
+    server = _Server(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("SILICON_API_KEY", "sk-silicon")
+    monkeypatch.setenv("SILICON_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    llm_clients.reset_llm_clients()
+    yield AsyncLLMClient()
+    llm_clients.reset_llm_clients()
+    _Handler.delay_s = 0.0
+    server.shutdown()
+    server.server_close()
+
+
+def test_generate_overlaps_calls_on_one_event_loop(llm) -> None:
+    _Handler.delay_s = 0.25
+
+    async def _run():
+        t0 = time.monotonic()
+        results = await asyncio.gather(
+            *(
+                llm.generate(f"q{i}", system_prompt="s", max_tokens=10)
+                for i in range(40)
+            )
+        )
+        return results, time.monotonic() - t0
+
+    results, elapsed = asyncio.run(_run())
+    assert [r.text for r in results] == [f"echo:q{i}" for i in range(40)]
+    assert results[0].usage["total_tokens"] == 4
+    # 40 x 0.25s of provider latency overlap on the loop; thread offloading would be capped
+    # by the default executor (min(32, cpus + 4) workers).
+    assert elapsed < 1.5
+
+
+def test_stream_yields_deltas_then_usage(llm) -> None:
+    async def _run():
+        return [
+            chunk
+            async for chunk in llm.stream(messages=[{"role": "user", "content": "hi"}])
+        ]
+
+    out = asyncio.run(_run())
+    assert out[:2] == ["你", "好"]
+    assert out[2] == {
+        "event": "llm_usage",
+        "data": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+    }
+
+
+def test_generate_stream_hands_deltas_to_callback(llm) -> None:
+    seen = []
+
+    async def _on_delta(delta: str) -> None:
+        seen.append(delta)
+
+    res = asyncio.run(llm.generate_stream(prompt="hi", on_delta=_on_delta))
+    assert seen == ["你", "好"]
+    assert res.text == "你好"
+    assert res.usage == {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}
+
+
+class _ToolCallingCompletions:
+    def __init__(self) -> None:
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if len(self.calls) == 1:
+            call = SimpleNamespace(
+                id="call_1",
+                type="function",
+                function=SimpleNamespace(name="math_verify", arguments='{"x": 1}'),
+                model_dump=lambda: {
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {"name": "math_verify", "arguments": '{"x": 1}'},
+                },
+            )
+            msg = SimpleNamespace(content="", tool_calls=[call])
+        else:
+            msg = SimpleNamespace(content="final", tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=msg)])
+
+
+def test_generate_with_images_runs_async_tool_loop(monkeypatch) -> None:
+    from homework_agent.models.schemas import ImageRef
+
+    completions = _ToolCallingCompletions()
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    registry = SimpleNamespace(
+        openai_tools=lambda: [{"type": "function", "function": {"name": "t"}}],
+        call=lambda name, args, progress_cb=None: {"status": "ok", "name": name},
+    )
+    monkeypatch.setattr(
+        "homework_agent.services.llm.get_default_tool_registry", lambda: registry
+    )
+    llm = AsyncLLMClient()
+    llm.tool_calling_enabled = True
+    monkeypatch.setattr(llm, "_get_client", lambda provider="silicon": fake_client)
+
+    result = asyncio.run(
+        llm.generate_with_images(
+            system_prompt="s",
+            user_prompt="u",
+            images=[ImageRef(url="https://example.com/a.jpg")],
+            provider="silicon",
+            use_tools=True,
+        )
+    )
+    assert isinstance(result, LLMResult) and result.text == "final"
+    tool_reply = completions.calls[1]["messages"][-1]
+    assert tool_reply["role"] == "tool" and tool_reply["tool_call_id"] == "call_1"
+    assert json.loads(tool_reply["content"]) == {"status": "ok", "name": "math_verify"}
@@ -1,6 +1,5 @@
 import asyncio
 import json
-import time
 from types import SimpleNamespace
 
 
@@ -13,7 +12,7 @@ from homework_agent.services.autonomous_agent import (
 )
 from homework_agent.models.schemas import Subject
 from homework_agent.services.autonomous_tools import math_verify
-from homework_agent.services.llm import LLMClient
+from homework_agent.services.llm import AsyncLLMClient
 
 
 def _run(coro):
@@ -65,11 +64,13 @@ def test_planner_parses_json(monkeypatch):
         "action": "execute_tools",
     }
 
-    def _fake_generate(*args, **kwargs):
+    async def _fake_generate(*args, **kwargs):
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    monkeypatch.setattr(LLMClient, "generate", _fake_generate)
-    planner = PlannerAgent(llm=LLMClient(), provider="ark", max_tokens=200, timeout_s=5)
+    monkeypatch.setattr(AsyncLLMClient, "generate", _fake_generate)
+    planner = PlannerAgent(
+        llm=AsyncLLMClient(), provider="ark", max_tokens=200, timeout_s=5
+    )
     state = SessionState(session_id="s", image_urls=["u"])
     result = _run(planner.run(state))
     assert result.plan
@@ -80,14 +81,16 @@ def test_planner_rate_limit_backoff(monkeypatch):
     payload = {"thoughts": "t", "plan": [], "action": "execute_tools"}
     calls = {"n": 0}
 
-    def _fake_generate(*args, **kwargs):
+    async def _fake_generate(*args, **kwargs):
         calls["n"] += 1
         if calls["n"] == 1:
             raise Exception("429 rate limit")
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    monkeypatch.setattr(LLMClient, "generate", _fake_generate)
-    planner = PlannerAgent(llm=LLMClient(), provider="ark", max_tokens=200, timeout_s=5)
+    monkeypatch.setattr(AsyncLLMClient, "generate", _fake_generate)
+    planner = PlannerAgent(
+        llm=AsyncLLMClient(), provider="ark", max_tokens=200, timeout_s=5
+    )
     state = SessionState(session_id="s", image_urls=["u"])
     result = _run(planner.run(state))
     assert result.action == "execute_tools"
@@ -97,13 +100,13 @@ def test_planner_rate_limit_backoff(monkeypatch):
 def test_planner_timeout(monkeypatch):
     payload = {"thoughts": "t", "plan": [], "action": "execute_tools"}
 
-    def _fake_generate(*args, **kwargs):
-        time.sleep(0.2)
+    async def _fake_generate(*args, **kwargs):
+        await asyncio.sleep(0.2)
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    monkeypatch.setattr(LLMClient, "generate", _fake_generate)
+    monkeypatch.setattr(AsyncLLMClient, "generate", _fake_generate)
     planner = PlannerAgent(
-        llm=LLMClient(), provider="ark", max_tokens=200, timeout_s=0.01
+        llm=AsyncLLMClient(), provider="ark", max_tokens=200, timeout_s=0.01
     )
     state = SessionState(session_id="s", image_urls=["u"])
     result = _run(planner.run(state))
@@ -112,12 +115,12 @@ def test_planner_timeout(monkeypatch):
 
 
 def test_reflector_parse_failure(monkeypatch):
-    def _fake_generate(*args, **kwargs):
+    async def _fake_generate(*args, **kwargs):
         return SimpleNamespace(text="not-json")
 
-    monkeypatch.setattr(LLMClient, "generate", _fake_generate)
+    monkeypatch.setattr(AsyncLLMClient, "generate", _fake_generate)
     reflector = ReflectorAgent(
-        llm=LLMClient(), provider="ark", max_tokens=200, timeout_s=5
+        llm=AsyncLLMClient(), provider="ark", max_tokens=200, timeout_s=5
     )
     state = SessionState(session_id="s", image_urls=["u"])
     result = _run(reflector.run(state, plan=[]))
@@ -161,17 +164,19 @@ def test_executor_fallbacks_to_ocr(monkeypatch):
 
 
 def test_aggregator_parse_failure(monkeypatch):
-    def _fake_generate_with_images(*args, **kwargs):
+    async def _fake_generate_with_images(*args, **kwargs):
         return SimpleNamespace(text="not-json")
 
-    monkeypatch.setattr(LLMClient, "generate_with_images", _fake_generate_with_images)
+    monkeypatch.setattr(
+        AsyncLLMClient, "generate_with_images", _fake_generate_with_images
+    )
     state = SessionState(
         session_id="s",
         image_urls=["http://example.com/image.jpg"],
         slice_urls={"figure": [], "question": []},
     )
     agg = AggregatorAgent(
-        llm=LLMClient(),
+        llm=AsyncLLMClient(),
         provider="ark",
         subject=Subject.MATH,
         max_tokens=200,
@@ -182,6 +187,37 @@ def test_aggregator_parse_failure(monkeypatch):
     assert result.reason == "parse_failed"
 
 
+def test_aggregator_retries_truncated_output_with_higher_cap(monkeypatch):
+    item = {"question_number": "1", "verdict": "correct", "judgment_basis": ["ok"]}
+    done = {"status": "done", "results": [item, dict(item, question_number="2")]}
+    # Cut off inside the second result: it must not pass as graded.
+    truncated = json.dumps(done)[:-40]
+    caps = []
+
+    async def _fake_generate_with_images(*args, **kwargs):
+        caps.append(kwargs["max_tokens"])
+        return SimpleNamespace(text=truncated if len(caps) == 1 else json.dumps(done))
+
+    monkeypatch.setattr(
+        AsyncLLMClient, "generate_with_images", _fake_generate_with_images
+    )
+    state = SessionState(
+        session_id="s",
+        image_urls=["http://example.com/image.jpg"],
+        slice_urls={"figure": [], "question": []},
+    )
+    agg = AggregatorAgent(
+        llm=AsyncLLMClient(),
+        provider="ark",
+        subject=Subject.MATH,
+        max_tokens=200,
+        timeout_s=5,
+    )
+    result = _run(agg.run(state))
+    assert caps == [200, 12000]
+    assert [r["question_number"] for r in result.results] == ["1", "2"]
+
+
 def test_aggregator_visual_risk_triggers_image_tools_without_slices(monkeypatch):
     from homework_agent.services import autonomous_agent as aa
 
@@ -191,7 +227,7 @@ def test_aggregator_visual_risk_triggers_image_tools_without_slices(monkeypatch)
 
     calls = {"n": 0, "use_tools": None, "image_count": None}
 
-    def _fake_generate_with_images(*args, **kwargs):
+    async def _fake_generate_with_images(*args, **kwargs):
         calls["n"] += 1
         calls["use_tools"] = bool(kwargs.get("use_tools"))
         calls["image_count"] = len(kwargs.get("images") or [])
@@ -210,7 +246,9 @@ def test_aggregator_visual_risk_triggers_image_tools_without_slices(monkeypatch)
             response_id="resp_test",
         )
 
-    monkeypatch.setattr(LLMClient, "generate_with_images", _fake_generate_with_images)
+    monkeypatch.setattr(
+        AsyncLLMClient, "generate_with_images", _fake_generate_with_images
+    )
 
     state = SessionState(
         session_id="s",
@@ -220,7 +258,7 @@ def test_aggregator_visual_risk_triggers_image_tools_without_slices(monkeypatch)
         preprocess_meta={"mode": "qindex_only"},
     )
     agg = AggregatorAgent(
-        llm=LLMClient(),
+        llm=AsyncLLMClient(),
         provider="ark",
         subject=Subject.MATH,
         max_tokens=200,
@@ -247,7 +285,7 @@ def test_aggregator_includes_original_when_slices_present(monkeypatch):
 
     calls = {"image_count": None, "has_url": False, "has_data": False}
 
-    def _fake_generate_with_images(*args, **kwargs):
+    async def _fake_generate_with_images(*args, **kwargs):
         images = kwargs.get("images") or []
         calls["image_count"] = len(images)
         calls["has_url"] = any(getattr(i, "url", None) for i in images)
@@ -267,7 +305,9 @@ def test_aggregator_includes_original_when_slices_present(monkeypatch):
             response_id="resp_test",
         )
 
-    monkeypatch.setattr(LLMClient, "generate_with_images", _fake_generate_with_images)
+    monkeypatch.setattr(
+        AsyncLLMClient, "generate_with_images", _fake_generate_with_images
+    )
 
     state = SessionState(
         session_id="s",
@@ -277,7 +317,7 @@ def test_aggregator_includes_original_when_slices_present(monkeypatch):
         preprocess_meta={"mode": "full"},
     )
     agg = AggregatorAgent(
-        llm=LLMClient(),
+        llm=AsyncLLMClient(),
         provider="ark",
         subject=Subject.MATH,
         max_tokens=200,
@@ -298,11 +338,13 @@ def test_planner_forced_strategy_on_diagram_roi_not_found(monkeypatch):
         "action": "execute_tools",
     }
 
-    def _fake_generate(*args, **kwargs):
+    async def _fake_generate(*args, **kwargs):
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    monkeypatch.setattr(LLMClient, "generate", _fake_generate)
-    planner = PlannerAgent(llm=LLMClient(), provider="ark", max_tokens=200, timeout_s=5)
+    monkeypatch.setattr(AsyncLLMClient, "generate", _fake_generate)
+    planner = PlannerAgent(
+        llm=AsyncLLMClient(), provider="ark", max_tokens=200, timeout_s=5
+    )
     state = SessionState(
         session_id="s",
         image_urls=["u"],
@@ -329,11 +371,13 @@ def test_planner_forced_strategy_allows_vlm_locator_on_full_mode(monkeypatch):
         "action": "execute_tools",
     }
 
-    def _fake_generate(*args, **kwargs):
+    async def _fake_generate(*args, **kwargs):
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    monkeypatch.setattr(LLMClient, "generate", _fake_generate)
-    planner = PlannerAgent(llm=LLMClient(), provider="ark", max_tokens=200, timeout_s=5)
+    monkeypatch.setattr(AsyncLLMClient, "generate", _fake_generate)
+    planner = PlannerAgent(
+        llm=AsyncLLMClient(), provider="ark", max_tokens=200, timeout_s=5
+    )
     state = SessionState(
         session_id="s",
         image_urls=["u"],
@@ -360,15 +404,17 @@ def test_planner_respects_slice_failed_cache(monkeypatch):
         "action": "execute_tools",
     }
 
-    def _fake_generate(*args, **kwargs):
+    async def _fake_generate(*args, **kwargs):
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    monkeypatch.setattr(LLMClient, "generate", _fake_generate)
+    monkeypatch.setattr(AsyncLLMClient, "generate", _fake_generate)
     monkeypatch.setattr(
         "homework_agent.services.autonomous_agent._compute_image_hash",
         lambda *_: "hash",
     )
-    planner = PlannerAgent(llm=LLMClient(), provider="ark", max_tokens=200, timeout_s=5)
+    planner = PlannerAgent(
+        llm=AsyncLLMClient(), provider="ark", max_tokens=200, timeout_s=5
+    )
     state = SessionState(
         session_id="s",
         image_urls=["u"],
@@ -429,13 +475,13 @@ def test_executor_vision_roi_detect_success(monkeypatch):
 
 
 def test_reflector_assessment_only_no_boost(monkeypatch):
-    def _fake_generate(*args, **kwargs):
+    async def _fake_generate(*args, **kwargs):
         payload = {"pass": False, "issues": [], "confidence": 0.65, "suggestion": ""}
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    monkeypatch.setattr(LLMClient, "generate", _fake_generate)
+    monkeypatch.setattr(AsyncLLMClient, "generate", _fake_generate)
     reflector = ReflectorAgent(
-        llm=LLMClient(), provider="ark", max_tokens=200, timeout_s=5
+        llm=AsyncLLMClient(), provider="ark", max_tokens=200, timeout_s=5
     )
     state = SessionState(
         session_id="s",
@@ -455,7 +501,7 @@ def test_aggregator_fallback_to_original_when_no_figure(monkeypatch):
 
     captured = {}
 
-    def _fake_generate_with_images(self, **kwargs):
+    async def _fake_generate_with_images(self, **kwargs):
         captured["images"] = kwargs.get("images") or []
         payload = {
             "ocr_text": "ocr",
@@ -486,7 +532,10 @@ def test_aggregator_fallback_to_original_when_no_figure(monkeypatch):
         lambda url, max_side=1280: (f"compressed:{url}", {}),
     )
     monkeypatch.setattr(
-        LLMClient, "generate_with_images", _fake_generate_with_images, raising=False
+        AsyncLLMClient,
+        "generate_with_images",
+        _fake_generate_with_images,
+        raising=False,
     )
     state = SessionState(
         session_id="s",
@@ -494,7 +543,7 @@ def test_aggregator_fallback_to_original_when_no_figure(monkeypatch):
         slice_urls={"figure": [], "question": []},
     )
     agg = AggregatorAgent(
-        llm=LLMClient(),
+        llm=AsyncLLMClient(),
         provider="ark",
         subject=Subject.MATH,
         max_tokens=200,
@@ -513,7 +562,7 @@ def test_aggregator_fallback_to_original_when_figure_too_small(monkeypatch):
 
     captured = {}
 
-    def _fake_generate_with_images(self, **kwargs):
+    async def _fake_generate_with_images(self, **kwargs):
         captured["images"] = kwargs.get("images") or []
         payload = {
             "ocr_text": "ocr",
@@ -544,7 +593,10 @@ def test_aggregator_fallback_to_original_when_figure_too_small(monkeypatch):
         lambda url, max_side=1280: (f"compressed:{url}", {}),
     )
     monkeypatch.setattr(
-        LLMClient, "generate_with_images", _fake_generate_with_images, raising=False
+        AsyncLLMClient,
+        "generate_with_images",
+        _fake_generate_with_images,
+        raising=False,
     )
     state = SessionState(
         session_id="s",
@@ -553,7 +605,7 @@ def test_aggregator_fallback_to_original_when_figure_too_small(monkeypatch):
         preprocess_meta={"figure_too_small": True},
     )
     agg = AggregatorAgent(
-        llm=LLMClient(),
+        llm=AsyncLLMClient(),
         provider="ark",
         subject=Subject.MATH,
         max_tokens=200,
@@ -565,3 +617,81 @@ def test_aggregator_fallback_to_original_when_figure_too_small(monkeypatch):
     assert (
         str(captured["images"][0].url) == "compressed:http://example.com/original.jpg"
     )
+
+
+def test_aggregator_streams_results_to_callback(monkeypatch):
+    doc = json.dumps(
+        {
+            "status": "done",
+            "ocr_text": "ocr",
+            "results": [
+                {"question_number": "1", "verdict": "wrong"},
+                {"question_number": "2", "verdict": "correct"},
+            ],
+            "summary": "ok",
+            "warnings": [],
+        },
+        ensure_ascii=False,
+    )
+    seen = []
+    before_last_chunk = []
+
+    async def _fake_generate_stream(self, *, prompt, on_delta, **kwargs):
+        chunks = [doc[i : i + 5] for i in range(0, len(doc), 5)]
+        for chunk in chunks[:-1]:
+            await on_delta(chunk)
+        before_last_chunk.append(len(seen))
+        await on_delta(chunks[-1])
+        return SimpleNamespace(text=doc, usage={"total_tokens": 10})
+
+    monkeypatch.setattr(AsyncLLMClient, "generate_stream", _fake_generate_stream)
+    state = SessionState(
+        session_id="s",
+        image_urls=["data:image/jpeg;base64,Zm9v"],
+        slice_urls={"figure": [], "question": []},
+        ocr_text="1+1=3",
+        preprocess_meta={"mode": "qindex_only"},
+    )
+    agg = AggregatorAgent(
+        llm=AsyncLLMClient(),
+        provider="silicon",
+        subject=Subject.MATH,
+        max_tokens=200,
+        timeout_s=5,
+    )
+    result = _run(agg.run(state, on_result=seen.append))
+    assert result.status == "done" and len(result.results) == 2
+    # Both verdicts were handed out before the document was complete.
+    assert before_last_chunk == [2]
+    assert [(r["question_number"], r["verdict"]) for r in seen] == [
+        ("1", "incorrect"),
+        ("2", "correct"),
+    ]
+    assert seen[0]["judgment_basis"]
+    assert "llm_aggregate_first_result_ms" in state.partial_results["timings_ms"]
+
+
+def test_aggregator_stream_failure_falls_back_to_batch_call(monkeypatch):
+    async def _broken_stream(self, **kwargs):
+        raise RuntimeError("stream unsupported")
+
+    async def _fake_generate(self, **kwargs):
+        return SimpleNamespace(text=json.dumps({"status": "done", "results": []}))
+
+    monkeypatch.setattr(AsyncLLMClient, "generate_stream", _broken_stream)
+    monkeypatch.setattr(AsyncLLMClient, "generate", _fake_generate)
+    state = SessionState(
+        session_id="s",
+        image_urls=["data:image/jpeg;base64,Zm9v"],
+        slice_urls={"figure": [], "question": []},
+        ocr_text="ocr",
+        preprocess_meta={"mode": "qindex_only"},
+    )
+    agg = AggregatorAgent(
+        llm=AsyncLLMClient(),
+        provider="silicon",
+        subject=Subject.MATH,
+        max_tokens=200,
+        timeout_s=5,
+    )
+    assert _run(agg.run(state, on_result=lambda item: None)).status == "done"
@@ -30,13 +30,14 @@ def test_autonomous_agent_e2e_happy_path(monkeypatch):
 
     monkeypatch.setattr(PreprocessingPipeline, "process_image", _fake_process_image)
 
-    def _fake_generate(
+    async def _fake_generate(
         self,
         prompt=None,
         system_prompt=None,
         provider=None,
         max_tokens=None,
         temperature=None,
+        hedge_site=None,
     ):
         if system_prompt and "Planning Agent" in system_prompt:
             payload = {"thoughts": "ok", "plan": [], "action": "execute_tools"}
@@ -44,7 +45,7 @@ def test_autonomous_agent_e2e_happy_path(monkeypatch):
             payload = {"pass": True, "issues": [], "confidence": 0.95, "suggestion": ""}
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    def _fake_generate_with_images(
+    async def _fake_generate_with_images(
         self,
         system_prompt=None,
         user_prompt=None,
@@ -53,6 +54,7 @@ def test_autonomous_agent_e2e_happy_path(monkeypatch):
         max_tokens=None,
         temperature=None,
         use_tools=False,
+        hedge_site=None,
     ):
         payload = {
             "ocr_text": "Q1",
@@ -77,9 +79,12 @@ def test_autonomous_agent_e2e_happy_path(monkeypatch):
         }
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    monkeypatch.setattr(aa.LLMClient, "generate", _fake_generate, raising=False)
+    monkeypatch.setattr(aa.AsyncLLMClient, "generate", _fake_generate, raising=False)
     monkeypatch.setattr(
-        aa.LLMClient, "generate_with_images", _fake_generate_with_images, raising=False
+        aa.AsyncLLMClient,
+        "generate_with_images",
+        _fake_generate_with_images,
+        raising=False,
     )
 
     result = _run(
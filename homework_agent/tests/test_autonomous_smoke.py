@@ -61,15 +61,18 @@ def test_autonomous_agent_smoke_full_loop(monkeypatch):
 
     # Track LLM calls for verification
     calls = {"planner": 0, "reflector": 0, "aggregator": 0}
+    hedge_sites: list[str] = []
 
-    def _fake_generate(
+    async def _fake_generate(
         self,
         prompt=None,
         system_prompt=None,
         provider=None,
         max_tokens=None,
         temperature=None,
+        hedge_site=None,
     ):
+        hedge_sites.append(hedge_site)
         if system_prompt and "Planning Agent" in system_prompt:
             calls["planner"] += 1
             payload = {
@@ -84,7 +87,7 @@ def test_autonomous_agent_smoke_full_loop(monkeypatch):
             payload = {"pass": True, "issues": [], "confidence": 0.95, "suggestion": ""}
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    def _fake_generate_with_images(
+    async def _fake_generate_with_images(
         self,
         system_prompt=None,
         user_prompt=None,
@@ -93,7 +96,9 @@ def test_autonomous_agent_smoke_full_loop(monkeypatch):
         max_tokens=None,
         temperature=None,
         use_tools=False,
+        hedge_site=None,
     ):
+        hedge_sites.append(hedge_site)
         calls["aggregator"] += 1
         payload = {
             "ocr_text": "1+1=2",
@@ -118,9 +123,12 @@ def test_autonomous_agent_smoke_full_loop(monkeypatch):
         }
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    monkeypatch.setattr(aa.LLMClient, "generate", _fake_generate, raising=False)
+    monkeypatch.setattr(aa.AsyncLLMClient, "generate", _fake_generate, raising=False)
     monkeypatch.setattr(
-        aa.LLMClient, "generate_with_images", _fake_generate_with_images, raising=False
+        aa.AsyncLLMClient,
+        "generate_with_images",
+        _fake_generate_with_images,
+        raising=False,
     )
 
     start = time.monotonic()
@@ -150,6 +158,8 @@ def test_autonomous_agent_smoke_full_loop(monkeypatch):
     assert (
         calls["aggregator"] == 1
     ), f"Aggregator called {calls['aggregator']} times, expected 1"
+    # Every grading step opts into cross-provider hedging (enabled via LLM_HEDGE_SITES).
+    assert sorted(hedge_sites) == ["agent_aggregate", "agent_plan", "agent_reflect"]
 
     # Smoke test should complete quickly (avoid flakiness from thread scheduling).
     assert elapsed < 5.0, f"Smoke test took {elapsed:.2f}s, expected < 5s"
@@ -174,13 +184,14 @@ def test_autonomous_agent_loop_exit_by_confidence(monkeypatch):
 
     iteration_count = {"n": 0}
 
-    def _fake_generate(
+    async def _fake_generate(
         self,
         prompt=None,
         system_prompt=None,
         provider=None,
         max_tokens=None,
         temperature=None,
+        hedge_site=None,
     ):
         if system_prompt and "Planning Agent" in system_prompt:
             payload = {"thoughts": "ok", "plan": [], "action": "execute_tools"}
@@ -192,7 +203,7 @@ def test_autonomous_agent_loop_exit_by_confidence(monkeypatch):
             payload = {"pass": True, "issues": [], "confidence": 0.95, "suggestion": ""}
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    def _fake_generate_with_images(self, **kwargs):
+    async def _fake_generate_with_images(self, **kwargs):
         payload = {
             "ocr_text": "test",
             "results": [
@@ -216,9 +227,12 @@ def test_autonomous_agent_loop_exit_by_confidence(monkeypatch):
         }
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    monkeypatch.setattr(aa.LLMClient, "generate", _fake_generate, raising=False)
+    monkeypatch.setattr(aa.AsyncLLMClient, "generate", _fake_generate, raising=False)
     monkeypatch.setattr(
-        aa.LLMClient, "generate_with_images", _fake_generate_with_images, raising=False
+        aa.AsyncLLMClient,
+        "generate_with_images",
+        _fake_generate_with_images,
+        raising=False,
     )
 
     result = _run(
@@ -255,13 +269,14 @@ def test_autonomous_agent_loop_exit_by_max_iterations(monkeypatch):
 
     iteration_count = {"n": 0}
 
-    def _fake_generate(
+    async def _fake_generate(
         self,
         prompt=None,
         system_prompt=None,
         provider=None,
         max_tokens=None,
         temperature=None,
+        hedge_site=None,
     ):
         if system_prompt and "Planning Agent" in system_prompt:
             payload = {"thoughts": "ok", "plan": [], "action": "execute_tools"}
@@ -278,7 +293,7 @@ def test_autonomous_agent_loop_exit_by_max_iterations(monkeypatch):
             payload = {"pass": True, "issues": [], "confidence": 0.95, "suggestion": ""}
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    def _fake_generate_with_images(self, **kwargs):
+    async def _fake_generate_with_images(self, **kwargs):
         payload = {
             "ocr_text": "test",
             "results": [
@@ -302,9 +317,12 @@ def test_autonomous_agent_loop_exit_by_max_iterations(monkeypatch):
         }
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    monkeypatch.setattr(aa.LLMClient, "generate", _fake_generate, raising=False)
+    monkeypatch.setattr(aa.AsyncLLMClient, "generate", _fake_generate, raising=False)
     monkeypatch.setattr(
-        aa.LLMClient, "generate_with_images", _fake_generate_with_images, raising=False
+        aa.AsyncLLMClient,
+        "generate_with_images",
+        _fake_generate_with_images,
+        raising=False,
     )
 
     result = _run(
@@ -347,13 +365,14 @@ def test_autonomous_agent_reflection_replan(monkeypatch):
 
     planner_inputs = []
 
-    def _fake_generate(
+    async def _fake_generate(
         self,
         prompt=None,
         system_prompt=None,
         provider=None,
         max_tokens=None,
         temperature=None,
+        hedge_site=None,
     ):
         if system_prompt and "Planning Agent" in system_prompt:
             # Capture prompt to verify reflection_result is included
@@ -380,7 +399,7 @@ def test_autonomous_agent_reflection_replan(monkeypatch):
             payload = {"pass": True, "issues": [], "confidence": 0.95, "suggestion": ""}
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    def _fake_generate_with_images(self, **kwargs):
+    async def _fake_generate_with_images(self, **kwargs):
         payload = {
             "ocr_text": "test",
             "results": [
@@ -404,9 +423,12 @@ def test_autonomous_agent_reflection_replan(monkeypatch):
         }
         return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
 
-    monkeypatch.setattr(aa.LLMClient, "generate", _fake_generate, raising=False)
+    monkeypatch.setattr(aa.AsyncLLMClient, "generate", _fake_generate, raising=False)
     monkeypatch.setattr(
-        aa.LLMClient, "generate_with_images", _fake_generate_with_images, raising=False
+        aa.AsyncLLMClient,
+        "generate_with_images",
+        _fake_generate_with_images,
+        raising=False,
     )
 
     result = _run(
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+
+import pytest
+
+from homework_agent.utils import cache_codec
+from homework_agent.utils.cache import _json_default
+from homework_agent.utils.cache_codec import (
+    COMPRESS_NONE,
+    COMPRESS_ZLIB,
+    FORMAT_JSON,
+    FORMAT_ORJSON,
+    MAGIC,
+    CacheCodec,
+    key_family,
+)
+from homework_agent.utils.metrics import render_prometheus
+from homework_agent.utils.settings import get_settings
+
+_VALUE = {
+    "session_id": "s1",
+    "history": [{"role": "user", "content": "第1题怎么做？"}] * 50,
+    "at": datetime(2024, 1, 2, 3, 4, 5),
+    "n": 2**70,
+}
+
+
+def _codecs():
+    out = [
+        CacheCodec(format=FORMAT_JSON, compression=COMPRESS_NONE),
+        CacheCodec(format=FORMAT_JSON, compression=COMPRESS_ZLIB),
+    ]
+    if cache_codec.orjson is not None:
+        out.append(CacheCodec(format=FORMAT_ORJSON, compression=COMPRESS_ZLIB))
+    if cache_codec.zstandard is not None:
+        out.append(
+            CacheCodec(format=FORMAT_ORJSON, compression=cache_codec.COMPRESS_ZSTD)
+        )
+    return out
+
+
+@pytest.mark.parametrize("codec", _codecs())
+def test_codec_round_trips_and_reads_legacy_json(codec: CacheCodec) -> None:
+    codec.default = _json_default
+    data = codec.encode("sess:s1", _VALUE)
+    assert data[0] == MAGIC
+    decoded = codec.decode("sess:s1", data)
+    assert decoded["history"] == _VALUE["history"]
+    assert decoded["at"] == "2024-01-02T03:04:05"
+    assert int(decoded["n"]) == 2**70
+
+    legacy = json.dumps({"v": 1}, ensure_ascii=False)
+    assert codec.decode("sess:s1", legacy.encode("utf-8")) == {"v": 1}
+    assert codec.decode("sess:s1", legacy) == {"v": 1}
+
+
+def test_codec_compresses_only_above_threshold() -> None:
+    codec = CacheCodec(compression=COMPRESS_ZLIB, compress_min_bytes=1024)
+    small = codec.encode("qbank:s1", {"q": "1"})
+    assert small[3] == COMPRESS_NONE
+    large = codec.encode("qbank:s1", {"q": "1" * 10000})
+    assert large[3] == COMPRESS_ZLIB
+    assert len(large) < 10000
+
+    text = render_prometheus()
+    assert 'cache_bytes_written_total{family="qbank"}' in text
+    assert 'cache_raw_bytes_written_total{family="qbank"}' in text
+    assert 'cache_value_bytes_bucket{family="qbank",le="256.0"}' in text
+
+
+def test_legacy_codec_writes_plain_json_and_rejects_unknown_versions() -> None:
+    codec = CacheCodec(format=None, compression=COMPRESS_ZLIB, compress_min_bytes=0)
+    data = codec.encode("job:1", {"status": "done"})
+    assert json.loads(data) == {"status": "done"}
+
+    with pytest.raises(ValueError):
+        codec.decode("job:1", bytes((MAGIC, 99, FORMAT_JSON, COMPRESS_NONE)) + b"{}")
+    assert key_family("job:1:page:0") == "job"
+    assert key_family("nocolon") == "other"
+
+
+def test_from_settings_falls_back_when_backend_missing(monkeypatch) -> None:
+    monkeypatch.setattr(cache_codec, "msgpack", None)
+    monkeypatch.setattr(cache_codec, "lz4_frame", None)
+    monkeypatch.setenv("CACHE_CODEC", "msgpack")
+    monkeypatch.setenv("CACHE_COMPRESSION", "lz4")
+    codec = CacheCodec.from_settings()
+    assert codec.format == FORMAT_JSON
+    assert codec.compression == COMPRESS_ZLIB
+
+    monkeypatch.setenv("CACHE_CODEC", "legacy")
+    monkeypatch.setenv("CACHE_COMPRESSION", "none")
+    get_settings.cache_clear()
+    codec = CacheCodec.from_settings()
+    assert codec.format is None and codec.compression == COMPRESS_NONE
+
+
+def test_from_settings_defaults_to_legacy_for_mixed_fleets(monkeypatch) -> None:
+    monkeypatch.delenv("CACHE_CODEC", raising=False)
+    codec = CacheCodec.from_settings()
+    assert codec.format is None
+    assert codec.encode("job:1", {"a": 1})[0] != MAGIC
@@ -13,3 +13,102 @@ def test_get_cache_store_inmemory_is_singleton_for_same_env(monkeypatch) -> None
     b = get_cache_store()
     assert a is b
     assert isinstance(a, InMemoryCache)
+
+
+def test_inmemory_cache_evicts_least_recently_used() -> None:
+    cache = InMemoryCache(max_entries=2, sweep_interval_seconds=0)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["entries"] == 2
+
+
+def test_inmemory_cache_enforces_byte_budget() -> None:
+    cache = InMemoryCache(max_bytes=100, sweep_interval_seconds=0)
+    cache.set("a", "x" * 40)
+    cache.set("b", "y" * 40)
+    cache.set("c", "z" * 40)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] <= 100
+    # A single value larger than the budget is not stored at all.
+    cache.set("huge", "h" * 500)
+    assert cache.get("huge") is None
+
+
+def test_inmemory_cache_sweep_removes_expired_and_counts(monkeypatch) -> None:
+    from homework_agent.utils import cache as cache_mod
+    from homework_agent.utils.metrics import render_prometheus
+
+    now = [1000.0]
+    monkeypatch.setattr(cache_mod.time, "monotonic", lambda: now[0])
+    cache = InMemoryCache(sweep_interval_seconds=0)
+    cache.set("short", 1, ttl_seconds=5)
+    cache.set("long", 2, ttl_seconds=60)
+    cache.set("forever", 3)
+
+    now[0] += 10
+    assert cache.sweep_expired() == 1
+    assert cache.stats()["entries"] == 2
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+
+    text = render_prometheus()
+    assert 'cache_memory_evictions_total{reason="expired"}' in text
+    assert "cache_memory_hits_total" in text
+    assert "cache_memory_misses_total" in text
+
+
+def test_inmemory_get_many_set_many_and_pipeline() -> None:
+    import pytest
+
+    cache = InMemoryCache(sweep_interval_seconds=0)
+    cache.set_many({"a": 1, "b": {"x": 2}}, ttl_seconds=60)
+    assert cache.get_many(["a", "b", "missing"]) == {"a": 1, "b": {"x": 2}}
+    assert cache.get_many([]) == {}
+
+    with cache.pipeline() as pipe:
+        pipe.set("c", 3)
+        pipe.delete("a")
+        # Nothing is applied until the block exits.
+        assert cache.get("c") is None
+    assert cache.get_many(["a", "c"]) == {"c": 3}
+
+    with pytest.raises(RuntimeError):
+        with cache.pipeline() as pipe:
+            pipe.set("d", 4)
+            raise RuntimeError("abort")
+    assert cache.get("d") is None
+
+    with pytest.raises(TypeError):
+        with cache.pipeline() as pipe:
+            pipe.get("c")
+
+
+def test_session_state_reads_and_pipelined_writes(monkeypatch) -> None:
+    from homework_agent.api import session as session_api
+
+    calls = []
+    real_get_many = session_api.cache_store.get_many
+    monkeypatch.setattr(
+        session_api.cache_store,
+        "get_many",
+        lambda keys: calls.append(list(keys)) or real_get_many(keys),
+    )
+    sid = "sess_state_batch"
+    with session_api.session_pipeline() as pipe:
+        session_api.save_session(sid, {"history": []}, cache=pipe)
+        session_api.save_mistakes(sid, [{"reason": "r"}], cache=pipe)
+        session_api.save_question_bank(sid, {"questions": {"1": {}}}, cache=pipe)
+        session_api.save_grade_progress(sid, "done", "ok", cache=pipe)
+
+    state = session_api.get_session_state(sid)
+    assert len(calls) == 1
+    assert state["session"]["history"] == []
+    assert state["mistakes"][0]["item_id"] == "item-0"
+    assert state["qbank"] == {"questions": {"1": {}}}
+    assert state["qindex"] is None
+    assert session_api.get_grade_progress(sid)["stage"] == "done"
+    assert session_api.get_session_state("", ("qbank",)) == {"qbank": None}
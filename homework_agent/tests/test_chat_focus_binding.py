@@ -5,7 +5,7 @@ from homework_agent.api.chat import _ChatAbort
 from homework_agent.models.schemas import ChatRequest, Subject
 
 
-def _stub_qbank(monkeypatch: pytest.MonkeyPatch):
+def _stub_qbank(monkeypatch: pytest.MonkeyPatch, mistakes=None):
     qbank = {
         "questions": {
             "20": {
@@ -17,6 +17,12 @@ def _stub_qbank(monkeypatch: pytest.MonkeyPatch):
     }
     monkeypatch.setattr(chat_stages, "get_question_bank", lambda session_id: qbank)
     monkeypatch.setattr(chat_stages, "get_question_index", lambda session_id: None)
+    state = {"qbank": qbank, "qindex": None, "mistakes": mistakes}
+    monkeypatch.setattr(
+        chat_stages,
+        "get_session_state",
+        lambda session_id, parts: {p: state[p] for p in parts},
+    )
     monkeypatch.setattr(
         chat_stages, "save_question_bank", lambda session_id, qbank_now: None
     )
@@ -81,13 +87,9 @@ def test_focus_switch_without_target_prompts_user(monkeypatch: pytest.MonkeyPatc
 
 
 def test_focus_bound_from_context_item_ids(monkeypatch: pytest.MonkeyPatch):
-    _stub_qbank(monkeypatch)
-    monkeypatch.setattr(
-        chat_stages,
-        "get_mistakes",
-        lambda session_id: [
-            {"item_id": "p1:q:20", "question_number": "20", "page_index": 0}
-        ],
+    _stub_qbank(
+        monkeypatch,
+        mistakes=[{"item_id": "p1:q:20", "question_number": "20", "page_index": 0}],
     )
     session_data = {
         "history": [],
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from homework_agent.services import grade_queue
+from homework_agent.services.grade_queue import GradeJob, pick_lane, queue_lanes
+
+
+def test_queue_lanes_parses_weights_in_order(monkeypatch) -> None:
+    monkeypatch.setenv("GRADE_QUEUE_LANES", "interactive:5, bulk:2,backfill:x")
+    grade_queue.get_settings.cache_clear()
+    try:
+        assert queue_lanes() == {"interactive": 5, "bulk": 2, "backfill": 1}
+    finally:
+        grade_queue.get_settings.cache_clear()
+
+
+def test_pick_lane_routes_large_jobs_to_bulk(monkeypatch) -> None:
+    monkeypatch.setenv("GRADE_QUEUE_INTERACTIVE_MAX_PAGES", "2")
+    grade_queue.get_settings.cache_clear()
+    try:
+        assert pick_lane(1) == "interactive"
+        assert pick_lane(2) == "interactive"
+        assert pick_lane(4) == "bulk"
+    finally:
+        grade_queue.get_settings.cache_clear()
+
+
+def test_grade_job_lane_round_trips_and_defaults_empty() -> None:
+    job = GradeJob(
+        job_id="j",
+        request_id=None,
+        session_id="s",
+        user_id="u",
+        provider="ark",
+        enqueued_at=1.0,
+        lane="bulk",
+    )
+    assert GradeJob.from_json(job.to_json()).lane == "bulk"
+    assert GradeJob.from_json('{"job_id": "old"}').lane == ""
+
+
+class _ScriptClient:
+    def __init__(self) -> None:
+        self.registered = 0
+
+    def register_script(self, script):  # noqa: ARG002
+        self.registered += 1
+        return lambda *a, **k: None
+
+
+def test_job_queue_is_built_once_per_client() -> None:
+    client = _ScriptClient()
+    first = grade_queue.job_queue(client)
+    registered = client.registered
+    assert grade_queue.job_queue(client) is first
+    assert client.registered == registered
+    assert grade_queue.job_queue(_ScriptClient()) is not first
+
+
+class _PushClient(_ScriptClient):
+    def __init__(self) -> None:
+        super().__init__()
+        self.lpushed: list[tuple[str, str]] = []
+        self.scripted: list[dict] = []
+
+    def register_script(self, script):  # noqa: ARG002
+        self.registered += 1
+        return lambda **k: self.scripted.append(k)
+
+    def lpush(self, key, raw):
+        self.lpushed.append((key, raw))
+
+
+def test_job_queue_keeps_plain_enqueue_until_fair_enqueue_enabled(monkeypatch) -> None:
+    monkeypatch.delenv("GRADE_QUEUE_FAIR_ENQUEUE", raising=False)
+    grade_queue.get_settings.cache_clear()
+    client = _PushClient()
+    grade_queue.job_queue(client).push('{"job_id": "j1"}', tenant="u", lane="bulk")
+    # Workers that predate dispatch markers can still decode what is on the list.
+    assert client.lpushed == [(grade_queue.queue_key(), '{"job_id": "j1"}')]
+    assert client.scripted == []
+
+    monkeypatch.setenv("GRADE_QUEUE_FAIR_ENQUEUE", "1")
+    grade_queue.get_settings.cache_clear()
+    try:
+        grade_queue.job_queue(client).push('{"job_id": "j2"}', tenant="u", lane="bulk")
+    finally:
+        grade_queue.get_settings.cache_clear()
+    assert len(client.lpushed) == 1
+    assert client.scripted[-1]["args"] == ["__fair__", "u", '1|{"job_id": "j2"}']
@@ -7,6 +7,7 @@ import pytest
 
 from homework_agent.services.grade_queue import (
     enqueue_grade_job,
+    get_job_status,
     load_job_request,
     queue_key,
 )
@@ -85,9 +86,10 @@ def test_grade_queue_enqueues_and_persists_job_payload(monkeypatch) -> None:
         assert stored_req.get("grade_image_input_variant") == "data_url_first_page"
 
         # Job status persisted.
-        job_obj = cache.get(f"job:{job_id}")
+        job_obj = get_job_status(job_id)
         assert isinstance(job_obj, dict)
         assert job_obj.get("status") in {"processing", "running", "done", "failed"}
+        assert job_obj.get("request") == grade_request
     finally:
         try:
             client.delete(qk)
@@ -95,6 +97,7 @@ def test_grade_queue_enqueues_and_persists_job_payload(monkeypatch) -> None:
             pass
         try:
             cache.delete(f"job:{job_id}")
+            cache.delete(f"job:{job_id}:request")
             cache.delete(f"jobreq:{job_id}")
         except Exception:
             pass
@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import threading
+
+from homework_agent.services.grade_queue import GradeJob
+from homework_agent.workers import grade_worker
+
+
+class _FakeLeases:
+    def __init__(self) -> None:
+        self.tracked: set[str] = set()
+        self.acked: list[str] = []
+        self.released: list[str] = []
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def track(self, items) -> None:
+        self.tracked.update(items)
+
+    def ack(self, raw: str) -> None:
+        self.tracked.discard(raw)
+        self.acked.append(raw)
+
+    def release_all(self) -> int:
+        self.released.extend(self.tracked)
+        self.tracked.clear()
+        return len(self.released)
+
+
+class _FakeJobQueue:
+    def __init__(
+        self,
+        jobs: list[GradeJob],
+        stopper: grade_worker._Stopper,
+        *,
+        stop_after: int | None = None,
+    ) -> None:
+        self._items = [j.to_json() for j in jobs]
+        self._stopper = stopper
+        self._stop_after = stop_after
+        self._lock = threading.Lock()
+        self.leases = _FakeLeases()
+        self.pops = 0
+        self.batch_sizes: list[int] = []
+
+    def lease_keeper(self) -> _FakeLeases:
+        return self.leases
+
+    def pop_batch(self, max_items: int, *, timeout_seconds: float = 2.0) -> list[str]:
+        with self._lock:
+            if not self._items:
+                # Queue drained: simulate SIGTERM so the loop stops and drains.
+                self._stopper.stop = True
+                return []
+            self.batch_sizes.append(max_items)
+            batch = self._items[:max_items]
+            del self._items[:max_items]
+            self.pops += len(batch)
+            if self._stop_after is not None and self.pops >= self._stop_after:
+                self._stopper.stop = True
+            return batch
+
+
+def _job(i: int) -> GradeJob:
+    return GradeJob(
+        job_id=f"job_{i}",
+        request_id=f"req_{i}",
+        session_id=f"sess_{i}",
+        user_id="user_x",
+        provider="ark",
+        enqueued_at=0.0,
+    )
+
+
+def test_serve_runs_jobs_concurrently_up_to_slot_limit(monkeypatch) -> None:
+    state = {"running": 0, "peak": 0, "done": []}
+
+    async def _fake_process_job(job: GradeJob, *, ttl_seconds: int) -> None:
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(0.05)
+        state["running"] -= 1
+        state["done"].append(job.job_id)
+
+    monkeypatch.setattr(grade_worker, "_process_job", _fake_process_job)
+
+    stopper = grade_worker._Stopper()
+    queue = _FakeJobQueue([_job(i) for i in range(7)], stopper)
+    asyncio.run(
+        grade_worker._serve(queue, ttl_seconds=60, stopper=stopper, concurrency=3)
+    )
+
+    assert sorted(state["done"]) == sorted(f"job_{i}" for i in range(7))
+    assert state["peak"] == 3
+    assert state["running"] == 0
+    # Every job is acked once it finished; nothing is left leased.
+    assert len(queue.leases.acked) == 7
+    assert not queue.leases.tracked
+
+
+def test_serve_drains_in_flight_jobs_after_stop(monkeypatch) -> None:
+    done: list[str] = []
+    stopper = grade_worker._Stopper()
+
+    async def _fake_process_job(job: GradeJob, *, ttl_seconds: int) -> None:
+        await asyncio.sleep(0.05)
+        done.append(job.job_id)
+
+    monkeypatch.setattr(grade_worker, "_process_job", _fake_process_job)
+
+    queue = _FakeJobQueue([_job(i) for i in range(5)], stopper, stop_after=2)
+    asyncio.run(
+        grade_worker._serve(queue, ttl_seconds=60, stopper=stopper, concurrency=4)
+    )
+
+    # Stop flips after the second pop: nothing else is popped, started jobs still finish.
+    assert queue.pops == 2
+    assert sorted(done) == ["job_0", "job_1"]
+    assert len(queue.leases.acked) == 2
+
+
+def test_serve_leases_batches_sized_to_free_slots(monkeypatch) -> None:
+    done: list[str] = []
+    stopper = grade_worker._Stopper()
+
+    async def _fake_process_job(job: GradeJob, *, ttl_seconds: int) -> None:
+        await asyncio.sleep(0.02)
+        done.append(job.job_id)
+
+    monkeypatch.setattr(grade_worker, "_process_job", _fake_process_job)
+
+    queue = _FakeJobQueue([_job(i) for i in range(6)], stopper)
+    queue._items.insert(3, "not json")
+    asyncio.run(
+        grade_worker._serve(
+            queue, ttl_seconds=60, stopper=stopper, concurrency=3, batch_size=8
+        )
+    )
+
+    assert queue.batch_sizes[0] == 3
+    assert max(queue.batch_sizes) <= 3
+    assert sorted(done) == sorted(f"job_{i}" for i in range(6))
+    # The undecodable payload is dropped (acked), not redelivered forever.
+    assert "not json" in queue.leases.acked
+    assert not queue.leases.released
+
+
+def test_process_job_skips_redelivered_terminal_job(monkeypatch) -> None:
+    monkeypatch.setattr(
+        grade_worker, "get_job_summary", lambda job_id: {"status": "done"}
+    )
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("terminal job must not be regraded")
+
+    monkeypatch.setattr(grade_worker, "load_job_request", _fail)
+    monkeypatch.setattr(grade_worker, "set_job_status", _fail)
+    asyncio.run(grade_worker._process_job(_job(1), ttl_seconds=60))
+
+
+def test_worker_concurrency_reads_setting(monkeypatch) -> None:
+    monkeypatch.setenv("GRADE_WORKER_CONCURRENCY", "6")
+    assert grade_worker._worker_concurrency() == 6
+    grade_worker.get_settings.cache_clear()
+    monkeypatch.setenv("GRADE_WORKER_CONCURRENCY", "0")
+    assert grade_worker._worker_concurrency() == 1
+
+
+class _FakePageResult:
+    def __init__(self, page_no: int) -> None:
+        self.wrong_items = [
+            {"question_number": "1", "reason": f"wrong on page {page_no}"}
+        ]
+        self.questions = [
+            {"question_number": "1", "verdict": "incorrect", "student_answer": "x"},
+            {"question_number": "2", "verdict": "correct", "student_answer": "y"},
+        ]
+        self.warnings = [f"warn_p{page_no}"]
+        self.vision_raw_text = f"page {page_no} text"
+
+
+def test_multi_page_job_merges_out_of_order_pages_by_index(monkeypatch) -> None:
+    from homework_agent.services.grade_queue import get_job_status, save_job_request
+
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setenv("GRADE_PAGE_CONCURRENCY", "3")
+    monkeypatch.setenv("GRADE_REVIEW_CARDS_ENABLED", "0")
+
+    finish_order: list[int] = []
+    published_done: list[list[int]] = []
+    # Page 1 is slowest, page 3 fastest: completion order is 3, 2, 1.
+    delays = {
+        "https://example.com/p1.jpg": 0.09,
+        "https://example.com/p2.jpg": 0.05,
+        "https://example.com/p3.jpg": 0.01,
+    }
+
+    async def _fake_perform_grading(req, provider, *, meta_out=None, **kwargs):
+        url = str(req.images[0].url)
+        await asyncio.sleep(delays[url])
+        page_no = int(url[-5])
+        finish_order.append(page_no)
+        if meta_out is not None:
+            meta_out["llm_usage"] = {"prompt_tokens": 10, "completion_tokens": 2}
+        return _FakePageResult(page_no)
+
+    real_set_job_status = grade_worker.set_job_status
+
+    def _spy_set_job_status(job_id, payload, *, ttl_seconds):
+        summaries = payload.get("page_summaries") or []
+        published_done.append([int(s["page_index"]) for s in summaries])
+        real_set_job_status(job_id, payload, ttl_seconds=ttl_seconds)
+
+    monkeypatch.setattr(grade_worker, "perform_grading", _fake_perform_grading)
+    monkeypatch.setattr(grade_worker, "ocr_question_cards", lambda **kw: {})
+    monkeypatch.setattr(grade_worker, "set_job_status", _spy_set_job_status)
+
+    job = GradeJob(
+        job_id="job_pages",
+        request_id="req_pages",
+        session_id="sess_pages",
+        user_id="user_x",
+        provider="ark",
+        enqueued_at=0.0,
+    )
+    save_job_request(
+        job.job_id,
+        {
+            "grade_request": {
+                "images": [{"url": u} for u in delays],
+                "subject": "math",
+                "session_id": "sess_pages",
+                "vision_provider": "doubao",
+            },
+            "provider": "ark",
+        },
+        ttl_seconds=60,
+    )
+    asyncio.run(grade_worker._process_job(job, ttl_seconds=60))
+
+    assert finish_order == [3, 2, 1]
+    # Partial publishes show out-of-order completion, always sorted by page index.
+    assert published_done.index([2]) < published_done.index([1, 2])
+    assert published_done.index([1, 2]) < published_done.index([0, 1, 2])
+
+    final = get_job_status("job_pages")
+    assert final["status"] == "done"
+    assert final["done_pages"] == 3
+    assert [s["page_index"] for s in final["page_summaries"]] == [0, 1, 2]
+    result = final["result"]
+    assert [w["page_index"] for w in result["wrong_items"]] == [0, 1, 2]
+    assert result["warnings"] == ["warn_p1", "warn_p2", "warn_p3"]
+    cards = [c["item_id"] for c in final["question_cards"]]
+    assert cards == ["p1:q:1", "p1:q:2", "p2:q:1", "p2:q:2", "p3:q:1", "p3:q:2"]
+
+    from homework_agent.api.session import get_question_bank
+
+    bank = get_question_bank("sess_pages")
+    # Collision suffixes are assigned in page order, not completion order.
+    assert {"1", "2", "1@p2", "2@p2", "1@p3", "2@p3"} <= set(bank["questions"])
+    assert bank["questions"]["1"]["page_index"] == 0
+    assert bank["vision_raw_text"].startswith("### Page 1")
+
+
+def test_streamed_results_publish_verdict_cards_before_page_finishes(
+    monkeypatch,
+) -> None:
+    from homework_agent.services.grade_queue import get_job_status, save_job_request
+
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setenv("GRADE_REVIEW_CARDS_ENABLED", "0")
+    published_cards: list[list[tuple]] = []
+
+    async def _fake_perform_grading(req, provider, *, on_result=None, **kwargs):
+        page_no = int(str(req.images[0].url)[-5])
+        await on_result({"question_number": "1", "verdict": "incorrect"})
+        await asyncio.sleep(0.02)
+        return _FakePageResult(page_no)
+
+    real_set_job_status = grade_worker.set_job_status
+
+    def _spy_set_job_status(job_id, payload, *, ttl_seconds):
+        published_cards.append(
+            [
+                (c["item_id"], c["card_state"], c.get("verdict"))
+                for c in payload.get("question_cards") or []
+            ]
+        )
+        real_set_job_status(job_id, payload, ttl_seconds=ttl_seconds)
+
+    monkeypatch.setattr(grade_worker, "perform_grading", _fake_perform_grading)
+    monkeypatch.setattr(grade_worker, "ocr_question_cards", lambda **kw: {})
+    monkeypatch.setattr(grade_worker, "set_job_status", _spy_set_job_status)
+
+    job = GradeJob(
+        job_id="job_stream",
+        request_id="req_stream",
+        session_id="sess_stream",
+        user_id="user_x",
+        provider="ark",
+        enqueued_at=0.0,
+    )
+    save_job_request(
+        job.job_id,
+        {
+            "grade_request": {
+                "images": [{"url": "https://example.com/p1.jpg"}],
+                "subject": "math",
+                "session_id": "sess_stream",
+                "vision_provider": "doubao",
+            },
+            "provider": "ark",
+        },
+        ttl_seconds=60,
+    )
+    asyncio.run(grade_worker._process_job(job, ttl_seconds=60))
+
+    assert [("p1:q:1", "verdict_ready", "incorrect")] in published_cards
+    final = get_job_status("job_stream")
+    assert final["status"] == "done"
+    assert [c["item_id"] for c in final["question_cards"]] == ["p1:q:1", "p1:q:2"]
+
+    # Multi-page: a streamed card shows up while its page is still running.
+    published_cards.clear()
+    job = dataclasses.replace(job, job_id="job_stream_pages")
+    save_job_request(
+        job.job_id,
+        {
+            "grade_request": {
+                "images": [
+                    {"url": "https://example.com/p1.jpg"},
+                    {"url": "https://example.com/p2.jpg"},
+                ],
+                "subject": "math",
+                "session_id": "sess_stream",
+                "vision_provider": "doubao",
+            },
+            "provider": "ark",
+        },
+        ttl_seconds=60,
+    )
+    asyncio.run(grade_worker._process_job(job, ttl_seconds=60))
+    assert any(
+        ("p2:q:1", "verdict_ready", "incorrect") in cards
+        and not any(c[0] == "p2:q:2" for c in cards)
+        for cards in published_cards
+    )
+    final = get_job_status("job_stream_pages")
+    assert len(final["question_cards"]) == 4
@@ -0,0 +1,157 @@
+import hashlib
+import io
+import threading
+import time
+
+import pytest
+
+from homework_agent.utils import image_blob_cache as ibc
+from homework_agent.utils.image_blob_cache import ImageBlobCache
+
+
+class _Fetcher:
+    def __init__(self, payloads, delay: float = 0.0):
+        self.payloads = payloads
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, url):
+        self.calls.append(url)
+        if self.delay:
+            time.sleep(self.delay)
+        data = self.payloads.get(url)
+        return (data, "image/jpeg") if data is not None else None
+
+
+def test_each_url_is_fetched_once_and_content_is_shared():
+    cache = ImageBlobCache(max_bytes=1024)
+    fetch = _Fetcher({"https://a/1.jpg": b"page", "https://b/1.jpg": b"page"})
+
+    first = cache.get("https://a/1.jpg", fetch)
+    again = cache.get("https://a/1.jpg", fetch)
+    other = cache.get("https://b/1.jpg", fetch)
+
+    assert first is again
+    assert first.sha256 == hashlib.sha256(b"page").hexdigest()
+    assert fetch.calls == ["https://a/1.jpg", "https://b/1.jpg"]
+    # Same content under two URLs is stored once.
+    assert other.sha256 == first.sha256
+    assert cache.bytes == len(b"page")
+
+
+def test_lru_evicts_by_bytes_and_url_ttl_expires():
+    cache = ImageBlobCache(max_bytes=10, url_ttl_seconds=3600)
+    fetch = _Fetcher({"u1": b"aaaaaa", "u2": b"bbbbbb"})
+    cache.get("u1", fetch)
+    cache.get("u2", fetch)
+    assert cache.bytes == 6
+    cache.get("u1", fetch)
+    assert fetch.calls == ["u1", "u2", "u1"]
+
+    expiring = ImageBlobCache(max_bytes=100, url_ttl_seconds=0)
+    fetch = _Fetcher({"u": b"x"})
+    expiring.get("u", fetch)
+    time.sleep(0.01)
+    expiring.get("u", fetch)
+    assert fetch.calls == ["u", "u"]
+
+
+def test_concurrent_misses_share_one_download():
+    cache = ImageBlobCache(max_bytes=1024)
+    fetch = _Fetcher({"u": b"img"}, delay=0.05)
+    out = []
+    threads = [
+        threading.Thread(target=lambda: out.append(cache.get("u", fetch)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(fetch.calls) == 1
+    assert {b.data for b in out} == {b"img"}
+
+
+def test_failed_fetch_is_not_cached():
+    cache = ImageBlobCache(max_bytes=1024)
+    fetch = _Fetcher({})
+    assert cache.get("u", fetch) is None
+    assert cache.get("u", fetch) is None
+    assert fetch.calls == ["u", "u"]
+
+
+def test_disabled_cache_always_fetches():
+    cache = ImageBlobCache(max_bytes=0)
+    fetch = _Fetcher({"u": b"img"})
+    assert cache.get("u", fetch).data == b"img"
+    assert cache.get("u", fetch).data == b"img"
+    assert len(fetch.calls) == 2
+
+
+def test_disk_tier_survives_a_new_process_cache(tmp_path):
+    fetch = _Fetcher({"u": b"img-bytes"})
+    ImageBlobCache(max_bytes=1024, disk_dir=str(tmp_path)).get("u", fetch)
+
+    fresh = ImageBlobCache(max_bytes=1024, disk_dir=str(tmp_path))
+    blob = fresh.get("u", fetch)
+    assert blob.data == b"img-bytes"
+    assert fetch.calls == ["u"]
+
+
+def test_disk_tier_prunes_oldest_blobs(tmp_path):
+    cache = ImageBlobCache(max_bytes=1024, disk_dir=str(tmp_path), disk_max_bytes=10)
+    fetch = _Fetcher({"u1": b"123456", "u2": b"abcdef"})
+    cache.get("u1", fetch)
+    time.sleep(0.01)
+    cache.get("u2", fetch)
+    blobs = list((tmp_path / "blobs").iterdir())
+    assert [p.name for p in blobs] == [hashlib.sha256(b"abcdef").hexdigest()]
+
+
+def test_get_image_blob_enforces_max_bytes_on_hits(monkeypatch):
+    monkeypatch.setenv("IMAGE_BLOB_CACHE_MAX_BYTES", "1024")
+    fetch = _Fetcher({"u": b"0123456789"})
+    assert ibc.get_image_blob("u", max_bytes=None, fetch=fetch) is not None
+    assert ibc.get_image_blob("u", max_bytes=5, fetch=fetch) is None
+    assert fetch.calls == ["u"]
+
+
+def test_decoded_pil_view_is_shared(monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    monkeypatch.setenv("IMAGE_BLOB_CACHE_MAX_BYTES", "1048576")
+    buf = io.BytesIO()
+    Image.new("L", (8, 4)).save(buf, format="PNG")
+    fetch = _Fetcher({"u": buf.getvalue()})
+
+    first = ibc.get_image_blob("u", fetch=fetch).pil()
+    second = ibc.get_image_blob("u", fetch=fetch).pil()
+    assert first is second
+    assert first.mode == "RGB"
+    assert first.size == (8, 4)
+
+
+def test_custom_fetches_are_never_served_to_public_callers(monkeypatch, tmp_path):
+    monkeypatch.setenv("IMAGE_BLOB_CACHE_MAX_BYTES", "1024")
+    monkeypatch.setenv("IMAGE_BLOB_CACHE_DIR", str(tmp_path))
+    url = "https://attacker.example/redirects-to-metadata"
+    internal = _Fetcher({url: b"internal-secret"})
+    assert ibc.get_image_blob(url, fetch=internal, policy="layout").data == (
+        b"internal-secret"
+    )
+
+    from homework_agent.utils import url_image_helpers
+
+    safe_calls = []
+
+    def _refuse(u, **kwargs):
+        safe_calls.append(u)
+        return None
+
+    monkeypatch.setattr(url_image_helpers, "_safe_fetch_public_url_bytes", _refuse)
+    # Neither the memory nor the disk tier hands the unchecked bytes to the public path.
+    assert ibc.fetch_image_bytes(url) is None
+    ibc.reset_image_blob_cache()
+    assert ibc.fetch_image_bytes(url) is None
+    assert safe_calls == [url, url]
+    assert ibc.get_image_blob(url, fetch=internal, policy="layout") is not None
+    assert internal.calls == [url]
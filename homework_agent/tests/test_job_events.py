@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+
+from fastapi.testclient import TestClient
+
+from homework_agent.main import create_app
+from homework_agent.services import job_events
+from homework_agent.services.grade_queue import set_job_status
+from homework_agent.services.job_events import publish_job_progress, read_job_events
+
+client = TestClient(create_app())
+
+
+def _job_id() -> str:
+    return f"job_{uuid.uuid4().hex[:10]}"
+
+
+def _parse_sse(text: str) -> list[tuple[str, dict, str | None]]:
+    out = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if ": " in line
+        )
+        out.append((fields["event"], json.loads(fields["data"]), fields.get("id")))
+    return out
+
+
+def _running(done_pages: int, cards: list[dict]) -> dict:
+    return {
+        "user_id": "u1",
+        "status": "running",
+        "total_pages": 2,
+        "done_pages": done_pages,
+        "page_summaries": [{"page_index": i} for i in range(done_pages)],
+        "question_cards": cards,
+    }
+
+
+def test_publish_job_progress_emits_only_deltas(monkeypatch) -> None:
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    job_id = _job_id()
+    card = {"item_id": "p1:q:1", "card_state": "placeholder"}
+
+    publish_job_progress(job_id, _running(1, [card]), ttl_seconds=60)
+    first = [e for _, e, _ in read_job_events(job_id)]
+    assert first == ["page", "card", "status"]
+
+    # Same snapshot again: nothing new to say.
+    publish_job_progress(job_id, _running(1, [card]), ttl_seconds=60)
+    assert len(read_job_events(job_id)) == 3
+
+    graded = {"item_id": "p1:q:1", "card_state": "verdict_ready"}
+    publish_job_progress(job_id, _running(2, [graded]), ttl_seconds=60)
+    tail = read_job_events(job_id)[3:]
+    assert [e for _, e, _ in tail] == ["page", "card", "status"]
+    assert tail[0][2] == {"page_index": 1}
+    assert tail[2][2]["done_pages"] == 2
+
+
+def test_job_events_stream_resumes_from_last_event_id(monkeypatch) -> None:
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    job_id = _job_id()
+    set_job_status(job_id, {"user_id": "u1", "status": "processing"}, ttl_seconds=60)
+    set_job_status(job_id, _running(1, []), ttl_seconds=60)
+    resume_from = read_job_events(job_id)[-1][0]
+    done = dict(_running(2, []), status="done")
+    set_job_status(job_id, done, ttl_seconds=60)
+
+    resp = client.get(
+        f"/api/v1/jobs/{job_id}/events",
+        headers={"X-User-Id": "u1", "Last-Event-ID": resume_from},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(resp.text)
+    assert [e for e, _, _ in events] == ["page", "status", "done"]
+    assert events[0][1] == {"page_index": 1}
+    assert all(eid for _, _, eid in events)
+
+
+def test_job_events_fresh_connect_on_finished_job_sends_snapshot_and_closes(
+    monkeypatch,
+) -> None:
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    job_id = _job_id()
+    set_job_status(
+        job_id,
+        dict(_running(2, []), status="done", request={"images": ["big"]}),
+        ttl_seconds=60,
+    )
+
+    resp = client.get(f"/api/v1/jobs/{job_id}/events", headers={"X-User-Id": "u1"})
+    events = _parse_sse(resp.text)
+    assert [e for e, _, _ in events] == ["snapshot"]
+    snapshot = events[0][1]
+    assert snapshot["status"] == "done"
+    assert snapshot["done_pages"] == 2
+    assert "request" not in snapshot
+
+    other = client.get(f"/api/v1/jobs/{job_id}/events", headers={"X-User-Id": "u2"})
+    assert other.status_code == 404
+
+
+def test_job_events_resume_after_done_closes_stream(monkeypatch) -> None:
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    job_id = _job_id()
+    set_job_status(job_id, _running(1, []), ttl_seconds=60)
+    set_job_status(job_id, dict(_running(2, []), status="done"), ttl_seconds=60)
+    last = read_job_events(job_id)[-1]
+    assert last[1] == "done"
+
+    resp = client.get(
+        f"/api/v1/jobs/{job_id}/events",
+        headers={"X-User-Id": "u1", "Last-Event-ID": last[0]},
+    )
+    assert resp.status_code == 200
+    # Nothing after `done` to replay: the stream closes instead of idling on heartbeats.
+    assert resp.text.strip() == ""
+
+
+class _BlockingStreamClient:
+    def __init__(self, rows=None, error: Exception | None = None) -> None:
+        self.rows = rows or []
+        self.error = error
+        self.calls: list[tuple[dict, int, int]] = []
+
+    async def xread(self, streams, count=None, block=None):
+        self.calls.append((streams, count, block))
+        if self.error is not None:
+            raise self.error
+        return [[b"jobev:x", self.rows]] if self.rows else []
+
+
+def test_wait_job_events_uses_blocking_xread(monkeypatch) -> None:
+    fake = _BlockingStreamClient(
+        rows=[(b"5-0", {b"event": b"page", b"data": b'{"page_index": 0}'})]
+    )
+    monkeypatch.setattr(
+        job_events, "_async_stream", lambda job_id: (fake, f"jobev:{job_id}")
+    )
+
+    events = asyncio.run(
+        job_events.wait_job_events_async("j1", after="4-0", block_ms=1000)
+    )
+    assert events == [("5-0", "page", {"page_index": 0})]
+    assert fake.calls == [({"jobev:j1": "4-0"}, 100, 1000)]
+
+
+def test_job_events_stream_falls_back_to_polling_when_xread_fails(
+    monkeypatch,
+) -> None:
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    job_id = _job_id()
+    set_job_status(job_id, _running(1, []), ttl_seconds=60)
+    resume_from = read_job_events(job_id)[-1][0]
+    set_job_status(job_id, dict(_running(2, []), status="done"), ttl_seconds=60)
+
+    fake = _BlockingStreamClient(error=ConnectionError("Too many connections"))
+    monkeypatch.setattr(job_events, "_async_stream", lambda jid: (fake, jid))
+
+    async def _poll(jid, *, after=None, count=100):
+        return job_events._local_events(jid, after, count)
+
+    # The polling fallback reads the same log (here: the process-local one).
+    monkeypatch.setattr(job_events, "read_job_events_async", _poll)
+
+    resp = client.get(
+        f"/api/v1/jobs/{job_id}/events",
+        headers={"X-User-Id": "u1", "Last-Event-ID": resume_from},
+    )
+    assert len(fake.calls) == 1
+    assert [e for e, _, _ in _parse_sse(resp.text)] == ["page", "status", "done"]
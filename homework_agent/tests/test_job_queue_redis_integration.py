@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import os
+import uuid
+
+import pytest
+
+from homework_agent.services.job_queue import FairQueue, ReliableQueue
+
+pytestmark = pytest.mark.integration
+
+
+def _redis_client():
+    try:
+        import redis  # type: ignore
+    except Exception:  # pragma: no cover
+        return None
+    url = str(os.getenv("REDIS_URL") or "").strip()
+    if not url:
+        return None
+    try:
+        client = redis.Redis.from_url(url)
+        client.ping()
+        return client
+    except Exception:
+        return None
+
+
+@pytest.fixture()
+def queue():
+    client = _redis_client()
+    if client is None:
+        pytest.skip("Redis unavailable (set REDIS_URL to run this integration test)")
+    q = ReliableQueue(
+        client,
+        f"test:{uuid.uuid4().hex[:8]}:jobs",
+        visibility_timeout_seconds=30,
+        max_deliveries=2,
+    )
+    try:
+        yield q
+    finally:
+        client.delete(
+            q.key, q.processing_key, q.leases_key, q.deliveries_key, q.dead_key
+        )
+
+
+def _expire_all_leases(q: ReliableQueue) -> None:
+    for raw in q.client.zrange(q.leases_key, 0, -1):
+        q.client.zadd(q.leases_key, {raw: 0})
+
+
+def test_pop_batch_leases_in_fifo_order_and_ack_clears_state(queue) -> None:
+    for i in range(5):
+        queue.push(f"job_{i}")
+
+    batch = queue.pop_batch(3, timeout_seconds=0)
+    assert batch == ["job_0", "job_1", "job_2"]
+    assert queue.stats() == {"pending": 2, "processing": 3, "dead": 0}
+    assert queue.client.zcard(queue.leases_key) == 3
+
+    for raw in batch:
+        queue.ack(raw)
+    assert queue.stats() == {"pending": 2, "processing": 0, "dead": 0}
+    assert queue.client.zcard(queue.leases_key) == 0
+
+
+def test_blocking_pop_leases_first_item(queue) -> None:
+    assert queue.pop_batch(2, timeout_seconds=0) == []
+    queue.push("job_a")
+    assert queue.pop_batch(2, timeout_seconds=1) == ["job_a"]
+    assert queue.client.zscore(queue.leases_key, "job_a") is not None
+
+
+def test_expired_lease_is_redelivered_then_dead_lettered(queue) -> None:
+    queue.push("job_x")
+    queue.push("job_y")
+    assert queue.pop_batch(1, timeout_seconds=0) == ["job_x"]
+
+    # Worker "died" without ack: the job goes back ahead of job_y.
+    _expire_all_leases(queue)
+    assert queue.reclaim_expired() == (1, 0)
+    assert queue.pop_batch(1, timeout_seconds=0) == ["job_x"]
+
+    _expire_all_leases(queue)
+    assert queue.reclaim_expired() == (0, 1)
+    assert queue.client.lrange(queue.dead_key, 0, -1) == [b"job_x"]
+    assert queue.pop_batch(1, timeout_seconds=0) == ["job_y"]
+
+
+def test_extend_reports_lost_leases_and_release_requeues(queue) -> None:
+    queue.push("job_1")
+    queue.push("job_2")
+    batch = queue.pop_batch(2, timeout_seconds=0)
+
+    queue.client.zrem(queue.leases_key, "job_2")
+    assert queue.extend(batch) == ["job_2"]
+
+    assert queue.release("job_1") is True
+    assert queue.pop_batch(1, timeout_seconds=0) == ["job_1"]
+
+
+def test_reclaim_leases_orphaned_processing_items(queue) -> None:
+    # Simulates a consumer dying between BLMOVE and writing the lease.
+    queue.client.lpush(queue.processing_key, "job_orphan")
+    assert queue.reclaim_expired() == (0, 0)
+    assert queue.client.zscore(queue.leases_key, "job_orphan") is not None
+
+
+def test_lease_keeper_releases_unstarted_items_on_exit(queue) -> None:
+    for i in range(3):
+        queue.push(f"job_{i}")
+    with queue.lease_keeper() as leases:
+        batch = queue.pop_batch(3, timeout_seconds=0)
+        leases.track(batch)
+        leases.ack(batch[0])
+    assert queue.stats() == {"pending": 2, "processing": 0, "dead": 0}
+    assert sorted(queue.pop_batch(2, timeout_seconds=0)) == ["job_1", "job_2"]
+
+
+@pytest.fixture()
+def fair_queue():
+    client = _redis_client()
+    if client is None:
+        pytest.skip("Redis unavailable (set REDIS_URL to run this integration test)")
+    key = f"test:{uuid.uuid4().hex[:8]}:grade"
+    q = FairQueue(
+        client,
+        key,
+        lanes={"interactive": 4, "bulk": 1},
+        fair_enqueue=True,
+        visibility_timeout_seconds=30,
+    )
+    try:
+        yield q
+    finally:
+        keys = list(client.scan_iter(match=f"{key}*"))
+        if keys:
+            client.delete(*keys)
+
+
+def _drain(q: FairQueue, n: int) -> list[str]:
+    out: list[str] = []
+    while len(out) < n:
+        batch = q.pop_batch(1, timeout_seconds=0)
+        if not batch:
+            break
+        out.extend(batch)
+        q.ack(batch[0])
+    return out
+
+
+def test_fair_queue_round_robins_users_within_a_lane(fair_queue) -> None:
+    for i in range(5):
+        fair_queue.push(f"a{i}", tenant="user_a", lane="bulk", cost=1)
+    fair_queue.push("b0", tenant="user_b", lane="bulk", cost=1)
+    fair_queue.push("c0", tenant="user_c", lane="bulk", cost=1)
+
+    # Pending length still counts jobs (KEDA list scaler).
+    assert fair_queue.stats()["pending"] == 7
+    order = _drain(fair_queue, 7)
+    assert order[:3] == ["a0", "b0", "c0"]
+    assert order[3:] == ["a1", "a2", "a3", "a4"]
+
+
+def test_fair_queue_weights_lanes_by_cost(fair_queue) -> None:
+    for i in range(4):
+        fair_queue.push(f"bulk{i}", tenant="parent", lane="bulk", cost=4)
+    for i in range(8):
+        fair_queue.push(f"int{i}", tenant=f"u{i}", lane="interactive", cost=1)
+
+    order = _drain(fair_queue, 12)
+    assert sorted(order) == sorted(
+        [f"bulk{i}" for i in range(4)] + [f"int{i}" for i in range(8)]
+    )
+    # Interactive work (quantum 4 per round) is not stuck behind 4-page bulk jobs.
+    assert order[:4] == ["int0", "int1", "int2", "int3"]
+    assert order.index("int7") < order.index("bulk2")
+
+
+def test_fair_queue_blocking_pop_claims_marker_and_redelivers_first(
+    fair_queue,
+) -> None:
+    fair_queue.push("x0", tenant="user_x", lane="interactive")
+    fair_queue.push("x1", tenant="user_x", lane="interactive")
+    # Same move BLMOVE does in `pop_batch` when the queue was empty, then the claim step.
+    assert fair_queue._lease_moved(
+        fair_queue.client.lmove(
+            fair_queue.key, fair_queue.processing_key, "RIGHT", "LEFT"
+        ).decode("utf-8")
+    ) == ["x0"]
+    assert fair_queue.client.lrange(fair_queue.processing_key, 0, -1) == [b"x0"]
+
+    # Released job goes back ahead of the user's remaining sub-queue.
+    fair_queue.push("y0", tenant="user_y", lane="interactive")
+    assert fair_queue.release("x0") is True
+    assert _drain(fair_queue, 3) == ["x0", "x1", "y0"]
+    assert fair_queue.stats() == {"pending": 0, "processing": 0, "dead": 0}
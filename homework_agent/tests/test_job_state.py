@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import uuid
+
+from homework_agent.services.job_state import (
+    read_job,
+    read_job_meta,
+    update_job_card,
+    write_job,
+)
+from homework_agent.utils.cache import get_cache_store
+from homework_agent.utils.settings import get_settings
+
+
+class _RecordingCache:
+    def __init__(self, inner) -> None:
+        self.inner = inner
+        self.writes: list[str] = []
+        self.reads = 0
+
+    def get(self, key):
+        self.reads += 1
+        return self.inner.get(key)
+
+    def get_many(self, keys):
+        self.reads += 1
+        return self.inner.get_many(keys)
+
+    def set(self, key, value, ttl_seconds=None):
+        self.writes.append(key)
+        return self.inner.set(key, value, ttl_seconds=ttl_seconds)
+
+
+def _job_id() -> str:
+    return f"job_{uuid.uuid4().hex[:10]}"
+
+
+def _payload(done_pages: int, *, status: str = "running") -> dict:
+    return {
+        "user_id": "u1",
+        "status": status,
+        "total_pages": 3,
+        "done_pages": done_pages,
+        "request": {"images": ["a", "b", "c"]},
+        "result": None,
+        "page_summaries": [{"page_index": i} for i in range(done_pages)],
+        "question_cards": [
+            {"item_id": f"p{i + 1}:q:1", "page_index": i, "card_state": "placeholder"}
+            for i in range(done_pages)
+        ],
+    }
+
+
+def test_write_job_only_rewrites_changed_segments(monkeypatch) -> None:
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    cache = _RecordingCache(get_cache_store())
+    monkeypatch.setattr(
+        "homework_agent.services.job_state.get_cache_store", lambda: cache
+    )
+    job_id = _job_id()
+
+    write_job(job_id, _payload(1), ttl_seconds=60)
+    assert sorted(cache.writes) == sorted(
+        [
+            f"job:{job_id}",
+            f"job:{job_id}:request",
+            f"job:{job_id}:page:0",
+            f"job:{job_id}:cards:0",
+        ]
+    )
+
+    # Second page: only the new page/cards segments and the status record.
+    cache.writes.clear()
+    write_job(job_id, _payload(2), ttl_seconds=60)
+    assert sorted(cache.writes) == sorted(
+        [f"job:{job_id}", f"job:{job_id}:page:1", f"job:{job_id}:cards:1"]
+    )
+
+    cache.reads = 0
+    full = read_job(job_id)
+    # Meta, then every segment in one MGET.
+    assert cache.reads == 2
+    assert full["done_pages"] == 2
+    assert full["request"] == {"images": ["a", "b", "c"]}
+    assert [s["page_index"] for s in full["page_summaries"]] == [0, 1]
+    assert [c["item_id"] for c in full["question_cards"]] == ["p1:q:1", "p2:q:1"]
+
+    meta = read_job_meta(job_id)
+    assert meta["status"] == "running"
+    assert "request" not in meta and "question_cards" not in meta
+    assert "segments" not in meta
+
+
+def test_update_job_card_touches_one_page_segment(monkeypatch) -> None:
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    cache = _RecordingCache(get_cache_store())
+    monkeypatch.setattr(
+        "homework_agent.services.job_state.get_cache_store", lambda: cache
+    )
+    job_id = _job_id()
+    write_job(job_id, _payload(3, status="done"), ttl_seconds=60)
+
+    cache.writes.clear()
+    merged = update_job_card(
+        job_id, "p2:q:1", {"card_state": "review_ready"}, ttl_seconds=60
+    )
+    assert merged["card_state"] == "review_ready"
+    assert sorted(cache.writes) == sorted([f"job:{job_id}", f"job:{job_id}:cards:1"])
+    states = [c["card_state"] for c in read_job(job_id)["question_cards"]]
+    assert states == ["placeholder", "review_ready", "placeholder"]
+    assert update_job_card(job_id, "missing", {}, ttl_seconds=60) is None
+
+
+def test_legacy_single_key_payload_is_still_readable(monkeypatch) -> None:
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    job_id = _job_id()
+    legacy = {
+        "user_id": "u1",
+        "status": "done",
+        "result": {"summary": "ok"},
+        "question_cards": [{"item_id": "p1:q:1", "card_state": "review_pending"}],
+    }
+    get_cache_store().set(f"job:{job_id}", legacy, ttl_seconds=60)
+
+    assert read_job(job_id) == legacy
+    assert read_job_meta(job_id)["status"] == "done"
+    update_job_card(job_id, "p1:q:1", {"card_state": "review_ready"}, ttl_seconds=60)
+    assert read_job(job_id)["question_cards"][0]["card_state"] == "review_ready"
+
+
+def test_legacy_mirror_copies_outcome_into_job_key_on_terminal_write(
+    monkeypatch,
+) -> None:
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setenv("JOB_STATE_LEGACY_MIRROR", "1")
+    get_settings.cache_clear()
+    job_id = _job_id()
+    write_job(job_id, _payload(1), ttl_seconds=60)
+    # Progress ticks keep meta small even while mirroring.
+    raw = get_cache_store().get(f"job:{job_id}")
+    assert not {"request", "page_summaries", "question_cards"} & set(raw)
+
+    write_job(job_id, _payload(2, status="done"), ttl_seconds=60)
+    update_job_card(job_id, "p2:q:1", {"card_state": "review_ready"}, ttl_seconds=60)
+
+    # What a pod from before the segmented layout would read.
+    raw = get_cache_store().get(f"job:{job_id}")
+    assert "request" not in raw
+    assert raw["page_summaries"] == [{"page_index": 0}, {"page_index": 1}]
+    assert [c["card_state"] for c in raw["question_cards"]] == [
+        "placeholder",
+        "review_ready",
+    ]
+    assert "question_cards" not in read_job_meta(job_id)
+    assert read_job(job_id)["question_cards"] == raw["question_cards"]
+
+    monkeypatch.setenv("JOB_STATE_LEGACY_MIRROR", "0")
+    get_settings.cache_clear()
+    job_id = _job_id()
+    write_job(job_id, _payload(1, status="done"), ttl_seconds=60)
+    assert "question_cards" not in get_cache_store().get(f"job:{job_id}")
+    get_settings.cache_clear()
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from homework_agent.utils.json_repair import (
+    extract_json_object,
+    parse_json_object,
+    repair_json_text,
+)
+from homework_agent.utils.metrics import render_prometheus
+
+
+def test_clean_json_takes_fast_path():
+    res = parse_json_object('{"a": 1, "b": [true, null]}')
+    assert res.value == {"a": 1, "b": [True, None]}
+    assert res.repairs == []
+    assert not res.repaired
+
+
+@pytest.mark.parametrize(
+    "raw, expected, repair",
+    [
+        ('好的，结果如下：\n{"a": 1}\n以上。', {"a": 1}, "prose_skipped"),
+        ('```json\n{"a": 1}\n```', {"a": 1}, "trailing_text"),
+        ('{"a": [1, 2,], "b": 3,}', {"a": [1, 2], "b": 3}, "trailing_comma"),
+        ('{"a": 1,, "b": 2}', {"a": 1, "b": 2}, "extra_comma"),
+        (
+            '{"q": [{"x": 1}\n{"x": 2}]\n"s": "ok"}',
+            {"q": [{"x": 1}, {"x": 2}], "s": "ok"},
+            "missing_comma",
+        ),
+        ('{"a" 1}', {"a": 1}, "missing_colon"),
+        ('{"a": , "b": }', {"a": None, "b": None}, "missing_value"),
+        (
+            '{"a": "line1\nline2\tend"}',
+            {"a": "line1\nline2\tend"},
+            "control_char_escaped",
+        ),
+        ('{"a": "\\(x^2\\)"}', {"a": "\\(x^2\\)"}, "invalid_escape"),
+        (
+            '{"a": "他说"对"了", "b": 1}',
+            {"a": '他说"对"了', "b": 1},
+            "inner_quote_escaped",
+        ),
+        ('{"a": True, "b": None}', {"a": True, "b": None}, "python_literal"),
+        ('{"a": [1, 2}', {"a": [1, 2]}, "mismatched_close"),
+    ],
+)
+def test_repairs_are_applied_and_reported(raw, expected, repair):
+    res = parse_json_object(raw)
+    assert res.value == expected
+    assert repair in res.repairs
+    assert json.loads(res.text) == expected
+
+
+def test_truncated_output_drops_the_cut_off_element():
+    raw = '{"results": [{"q": "1", "verdict": "correct"}, {"q": "2", "verdict": "inc'
+    res = parse_json_object(raw)
+    # `"inc"` must not pass as a verdict: the partial second result is dropped whole.
+    assert res.value == {"results": [{"q": "1", "verdict": "correct"}]}
+    assert "truncated" in res.repairs
+
+
+def test_truncated_member_is_dropped_and_complete_members_kept():
+    assert parse_json_object('{"a": 1, "b": {"c": 2, "d": "x').value == {
+        "a": 1,
+        "b": {"c": 2},
+    }
+    assert parse_json_object('{"a": true, "n": 0.9').value == {"a": True}
+    assert parse_json_object('{"a": [1, 2], "ver').value == {"a": [1, 2]}
+
+
+def test_every_prefix_of_a_document_parses():
+    doc = json.dumps(
+        {
+            "results": [
+                {"q": str(i), "s": 'a"b\\c', "n": [1, 2.5, None]} for i in range(3)
+            ]
+        }
+    )
+    for k in range(1, len(doc) + 1):
+        assert parse_json_object(doc[:k]).ok, doc[:k]
+
+
+def test_unusable_text_returns_none():
+    assert extract_json_object("") is None
+    assert extract_json_object(None) is None
+    assert extract_json_object("no json here") is None
+    assert repair_json_text("[1, 2, 3]") is None
+
+
+def test_site_records_outcome_metrics():
+    parse_json_object('{"a": 1}', site="t_json_repair")
+    parse_json_object('{"a": 1,}', site="t_json_repair")
+    parse_json_object("nothing", site="t_json_repair")
+    text = render_prometheus()
+    assert 'json_parse_total{outcome="clean",site="t_json_repair"}' in text
+    assert 'json_parse_total{outcome="repaired",site="t_json_repair"}' in text
+    assert 'json_parse_total{outcome="failed",site="t_json_repair"}' in text
+    assert 'json_repair_total{repair="trailing_comma",site="t_json_repair"}' in text
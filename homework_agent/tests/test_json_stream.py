@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import json
+import random
+
+from homework_agent.utils.json_stream import StreamingArrayItems
+
+_DOC = (
+    "```json\n"
+    + json.dumps(
+        {
+            "status": "done",
+            "ocr_text": 'decoy: "results": [{"question_number": "x"}] \\',
+            "results": [
+                {"question_number": "1", "verdict": "correct", "reason": 'a}]"\\'},
+                {"question_number": "2", "steps": [{"k": [1, {"n": 2}]}]},
+                3,
+            ],
+            "warnings": [{"not": "watched"}],
+            "questions": [{"question_number": "3"}],
+        },
+        ensure_ascii=False,
+    )
+    + "\n```"
+)
+
+
+def _feed_in_chunks(doc: str, rng: random.Random) -> list:
+    parser = StreamingArrayItems()
+    out, i = [], 0
+    while i < len(doc):
+        step = rng.randint(1, 7)
+        out.extend(parser.feed(doc[i : i + step]))
+        i += step
+    assert parser.done
+    return out
+
+
+def test_elements_are_emitted_for_any_chunking() -> None:
+    rng = random.Random(7)
+    for _ in range(100):
+        items = _feed_in_chunks(_DOC, rng)
+        assert [it["question_number"] for it in items] == ["1", "2", "3"]
+        assert items[0]["reason"] == 'a}]"\\'
+
+
+def test_element_is_emitted_as_soon_as_it_closes() -> None:
+    parser = StreamingArrayItems(("results",))
+    assert parser.feed('{"results": [{"question_number": "1"') == []
+    assert parser.feed("}, {") == [{"question_number": "1"}]
+    assert parser.feed('"question_number": "2"}]') == [{"question_number": "2"}]
+    assert parser.feed(', "summary": "ok"}') == []
+    assert parser.done and parser.items_emitted == 2
+
+
+def test_unparseable_element_is_skipped() -> None:
+    parser = StreamingArrayItems(("results",))
+    assert parser.feed('{"results": [{"a": 1,}, {"a": 2}]}') == [{"a": 2}]
+    assert parser.items_skipped == 1
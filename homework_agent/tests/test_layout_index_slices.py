@@ -0,0 +1,112 @@
+import io
+import threading
+import time
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from homework_agent.core import layout_index as li  # noqa: E402
+from homework_agent.core.layout_index import QuestionLayout  # noqa: E402
+
+
+class _SlowStorage:
+    def __init__(self, delay: float, fail_on_width: int = -1):
+        self.delay = delay
+        self.fail_on_width = fail_on_width
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def upload_bytes(self, data, *, mime_type, suffix, prefix, content_addressed=False):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            img = Image.open(io.BytesIO(data))
+            if img.size[0] == self.fail_on_width:
+                raise RuntimeError("upload boom")
+            return f"https://cdn.example/{prefix}{img.size[0]}x{img.size[1]}.jpg"
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _layouts():
+    return {
+        "1": QuestionLayout(
+            "1",
+            bboxes_norm=[[0.0, 0.0, 0.5, 0.5], [0.0, 0.5, 1.0, 0.75]],
+            slice_image_urls=[],
+        ),
+        "2": QuestionLayout(
+            "2", bboxes_norm=[[0.0, 0.5, 0.5, 1.0]], slice_image_urls=[]
+        ),
+        "3": QuestionLayout(
+            "3", bboxes_norm=[[0.5, 0.5, 1.0, 1.0]], slice_image_urls=[]
+        ),
+        "4": QuestionLayout("4", bboxes_norm=[], slice_image_urls=[]),
+    }
+
+
+def test_slices_upload_concurrently_and_keep_bbox_order(monkeypatch):
+    storage = _SlowStorage(delay=0.1)
+    monkeypatch.setattr(li, "get_storage_client", lambda: storage)
+    monkeypatch.setattr(li, "download_image", lambda url: Image.new("RGB", (200, 100)))
+
+    started = time.monotonic()
+    out = li.crop_and_upload_slices(
+        page_image_url="https://example.com/p.jpg", layouts=_layouts(), prefix="s/"
+    )
+    elapsed = time.monotonic() - started
+
+    assert storage.peak > 1
+    assert elapsed < 0.35  # 4 uploads of 0.1s, overlapped
+    assert out["1"].slice_image_urls == [
+        "https://cdn.example/s/100x50.jpg",
+        "https://cdn.example/s/50x100.jpg",
+    ]
+    assert out["1"].slice_sizes_px == [
+        {"width": 100, "height": 50},
+        {"width": 50, "height": 100},
+    ]
+    assert out["4"].slice_image_urls == []
+    assert out["4"].warnings == []
+
+
+def test_failed_slice_only_affects_its_question(monkeypatch):
+    storage = _SlowStorage(delay=0.0, fail_on_width=50)
+    monkeypatch.setattr(li, "get_storage_client", lambda: storage)
+    monkeypatch.setattr(li, "download_image", lambda url: Image.new("RGB", (200, 100)))
+    layouts = {
+        "1": QuestionLayout(
+            "1", bboxes_norm=[[0.5, 0.0, 1.0, 0.25]], slice_image_urls=[]
+        ),
+        "2": QuestionLayout(
+            "2", bboxes_norm=[[0.0, 0.0, 0.5, 0.5]], slice_image_urls=[]
+        ),
+    }
+
+    out = li.crop_and_upload_slices(
+        page_image_url="https://example.com/p.jpg", layouts=layouts
+    )
+
+    assert out["1"].slice_image_urls == []
+    assert out["1"].warnings == ["切片上传失败：upload boom", "切片生成失败，改用整页"]
+    assert out["2"].slice_image_urls and out["2"].warnings == []
+
+
+def test_only_question_numbers_skips_cropping(monkeypatch):
+    storage = _SlowStorage(delay=0.0)
+    monkeypatch.setattr(li, "get_storage_client", lambda: storage)
+    monkeypatch.setattr(li, "download_image", lambda url: Image.new("RGB", (200, 100)))
+
+    out = li.crop_and_upload_slices(
+        page_image_url="https://example.com/p.jpg",
+        layouts=_layouts(),
+        only_question_numbers={"2"},
+    )
+    assert out["2"].slice_image_urls
+    assert out["1"].slice_image_urls == []
+    assert out["1"].warnings == []
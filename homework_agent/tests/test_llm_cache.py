@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import uuid
+
+import pytest
+
+from homework_agent.models.schemas import ImageRef
+from homework_agent.services.llm import AsyncLLMClient, LLMClient, LLMResult
+from homework_agent.utils import llm_cache
+from homework_agent.utils.metrics import render_prometheus
+
+
+@pytest.fixture()
+def site(monkeypatch):
+    name = f"t{uuid.uuid4().hex[:8]}"
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setenv("LLM_RESPONSE_CACHE_SITES", f"other,{name}")
+    return name
+
+
+def _key(site: str, **overrides):
+    kwargs = dict(
+        provider="ark",
+        model="doubao-x",
+        messages=["system", "请批改\n第1题  "],
+        images=[ImageRef(url="https://cdn.example.com/p/abc.jpg")],
+        params={"temperature": 0.0, "max_tokens": 100},
+    )
+    kwargs.update(overrides)
+    return llm_cache.response_cache_key(site, **kwargs)
+
+
+def test_key_covers_content_model_images_and_params(site) -> None:
+    base = _key(site)
+    assert base.startswith(f"llmresp:{site}:")
+    assert _key(site, messages=["system\r\n", "请批改\n第1题"]) == base
+    assert _key(site, messages=["system", "请批改第1题"]) != base
+    assert _key(site, model="doubao-y") != base
+    assert _key(site, params={"temperature": 0.2, "max_tokens": 100}) != base
+    assert _key(site, images=[ImageRef(url="https://cdn.example.com/p/x.jpg")]) != base
+    assert _key(site, prompt_version="v2") != base
+    assert _key("not_enabled") is None
+    assert (
+        llm_cache.response_cache_key(None, provider="ark", model="m", messages=[])
+        is None
+    )
+
+    png = base64.b64encode(b"\x89PNG-bytes").decode("ascii")
+    assert llm_cache.image_digest(
+        ImageRef(base64=f"data:image/png;base64,{png}")
+    ) == llm_cache.image_digest(f"data:image/jpeg;base64,{png}")
+
+
+def test_llm_client_generate_is_paid_once(site, monkeypatch) -> None:
+    calls = []
+
+    def _fake_generate(self, prompt, system_prompt, provider, max_tokens, temperature):
+        calls.append(prompt)
+        return LLMResult(
+            text='{"ok": true}', raw={"id": "r1"}, usage={"total_tokens": 42}
+        )
+
+    monkeypatch.setattr(LLMClient, "_generate", _fake_generate)
+    c = LLMClient()
+    first = c.generate("修复 JSON", provider="ark", temperature=0.0, cache_site=site)
+    second = c.generate("修复 JSON", provider="ark", temperature=0.0, cache_site=site)
+    assert calls == ["修复 JSON"]
+    assert second == first
+    # Not opted in: always calls the provider.
+    c.generate("修复 JSON", provider="ark", temperature=0.0)
+    assert len(calls) == 2
+
+    text = render_prometheus()
+    assert f'llm_response_cache_total{{outcome="hit",site="{site}"}} 1' in text
+    assert f'llm_response_cache_total{{outcome="miss",site="{site}"}} 1' in text
+    assert f'llm_response_cache_saved_tokens_total{{site="{site}"}} 42' in text
+
+
+def test_failed_and_oversized_results_are_not_cached(site, monkeypatch) -> None:
+    results = [
+        LLMResult(text="生成失败: boom", raw={"error": "boom"}),
+        LLMResult(text="x" * 5000, raw={}),
+        LLMResult(text="ok", raw={}),
+    ]
+    monkeypatch.setattr(LLMClient, "_generate", lambda self, *a, **k: results.pop(0))
+    monkeypatch.setenv("LLM_RESPONSE_CACHE_MAX_BYTES", "1024")
+    c = LLMClient()
+    assert c.generate("p", cache_site=site).raw == {"error": "boom"}
+    assert len(c.generate("p", cache_site=site).text) == 5000
+    assert c.generate("p", cache_site=site).text == "ok"
+    assert not results
+    assert c.generate("p", cache_site=site).text == "ok"
+    assert f'llm_response_cache_total{{outcome="skip",site="{site}"}} 1' in (
+        render_prometheus()
+    )
+
+
+def test_async_generate_with_images_shares_cache_with_sync_client(
+    site, monkeypatch
+) -> None:
+    calls = []
+
+    async def _fake_async(self, **kwargs):
+        calls.append(kwargs)
+        return LLMResult(text="async-result", raw={})
+
+    def _fake_sync(self, **kwargs):
+        raise AssertionError("should have been served from the cache")
+
+    monkeypatch.setattr(AsyncLLMClient, "_generate_with_images", _fake_async)
+    monkeypatch.setattr(LLMClient, "_generate_with_images", _fake_sync)
+    kwargs = dict(
+        system_prompt="s",
+        user_prompt="u",
+        images=[ImageRef(url="https://cdn.example.com/p/abc.jpg")],
+        provider="ark",
+        cache_site=site,
+    )
+
+    async def _run():
+        llm = AsyncLLMClient()
+        return (
+            await llm.generate_with_images(**kwargs),
+            await llm.generate_with_images(**kwargs),
+        )
+
+    a, b = asyncio.run(_run())
+    assert a.text == b.text == "async-result" and len(calls) == 1
+    assert LLMClient().generate_with_images(**kwargs).text == "async-result"
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from homework_agent.services.llm import LLMClient
+from homework_agent.utils import llm_clients
+from homework_agent.utils.metrics import render_prometheus
+
+_COMPLETION = {
+    "id": "cmpl-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "m",
+    "choices": [
+        {
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": "ok"},
+        }
+    ],
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = json.dumps(_COMPLETION).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture()
+def provider_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    llm_clients.reset_llm_clients()
+    yield f"http://127.0.0.1:{server.server_port}/v1"
+    llm_clients.reset_llm_clients()
+    server.shutdown()
+    server.server_close()
+
+
+def test_registry_reuses_client_and_keep_alive_connection(provider_url) -> None:
+    kwargs = {"base_url": provider_url, "api_key": "sk-test", "timeout": 5.0}
+    a = llm_clients.get_openai_client("regtest", **kwargs)
+    b = llm_clients.get_openai_client("regtest", **kwargs)
+    assert a is b
+    assert llm_clients.get_openai_client("regtest", **{**kwargs, "timeout": 9}) is not a
+    assert (
+        llm_clients.get_openai_client("regtest", **{**kwargs, "api_key": "sk-other"})
+        is not a
+    )
+
+    for _ in range(3):
+        resp = a.chat.completions.create(
+            model="m", messages=[{"role": "user", "content": "hi"}]
+        )
+        assert resp.choices[0].message.content == "ok"
+
+    assert llm_clients.pool_stats()["regtest"] == {"idle": 1, "active": 0}
+    text = render_prometheus()
+    assert "sk-test" not in text
+    assert 'llm_client_registry_total{outcome="hit",provider="regtest"} 1' in text
+    assert 'llm_http_connections_total{outcome="new",provider="regtest"} 1' in text
+    assert 'llm_http_connections_total{outcome="reused",provider="regtest"} 2' in text
+    assert 'llm_http_pool_connections{provider="regtest",state="idle"} 1' in text
+
+
+def test_llm_client_get_client_uses_registry(provider_url, monkeypatch) -> None:
+    monkeypatch.setenv("SILICON_API_KEY", "sk-silicon")
+    monkeypatch.setenv("SILICON_BASE_URL", provider_url)
+    c = LLMClient()
+    assert c._get_client("silicon") is c._get_client("silicon")
+    assert LLMClient()._get_client("silicon") is c._get_client("silicon")
+    with pytest.raises(ValueError):
+        c._get_client("nope")
+
+
+def test_http2_requires_h2(monkeypatch) -> None:
+    monkeypatch.setenv("LLM_HTTP2", "1")
+    monkeypatch.setattr(llm_clients, "_HAS_H2", False)
+    assert llm_clients._http2_enabled() is False
+    monkeypatch.setattr(llm_clients, "_HAS_H2", True)
+    assert llm_clients._http2_enabled() is True
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from homework_agent.services.llm import LLMClient, LLMResult
+from homework_agent.utils import llm_hedge
+from homework_agent.utils.metrics import render_prometheus
+from homework_agent.utils.settings import get_settings
+
+
+@pytest.fixture()
+def site(monkeypatch):
+    name = f"h{uuid.uuid4().hex[:8]}"
+    monkeypatch.setenv("LLM_HEDGE_SITES", f"other:0.5,{name}:1")
+    monkeypatch.setenv("LLM_HEDGE_DELAY_SECONDS", "0.1")
+    monkeypatch.setenv("LLM_HEDGE_MIN_DELAY_SECONDS", "0.01")
+    return name
+
+
+def _answer(provider: str, delays: dict, tokens: int = 10):
+    time.sleep(delays.get(provider, 0))
+    return SimpleNamespace(text=provider, usage={"total_tokens": tokens})
+
+
+def _failed(out) -> bool:
+    return not out.text
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_site_config_and_p90_delay(site, monkeypatch) -> None:
+    assert llm_hedge.site_budget(site) == 1.0
+    assert llm_hedge.site_budget("other") == 0.5
+    assert llm_hedge.site_budget("nope") is None
+    monkeypatch.setenv("LLM_HEDGE_SITES", "*:0.3")
+    get_settings.cache_clear()
+    assert llm_hedge.site_budget("anything") == 0.3
+
+    assert llm_hedge.hedge_delay(site, "ark") == 0.1  # too few samples
+    monkeypatch.setenv("LLM_HEDGE_DELAY_SECONDS", "10")
+    get_settings.cache_clear()
+    for i in range(1, 21):
+        llm_hedge.record_latency(site, "ark", i * 0.1)
+    assert llm_hedge.hedge_delay(site, "ark") == pytest.approx(1.9)
+    monkeypatch.setenv("LLM_HEDGE_DELAY_MULTIPLIER", "100")
+    get_settings.cache_clear()
+    assert llm_hedge.hedge_delay(site, "ark") == 10.0
+
+
+def test_fast_primary_is_not_hedged(site) -> None:
+    calls = []
+
+    def _call(p):
+        calls.append(p)
+        return _answer(p, {})
+
+    out = llm_hedge.hedged_call(site, "ark", _call, is_failure=_failed)
+    assert out.text == "ark" and calls == ["ark"]
+    assert f'llm_hedge_total{{outcome="not_needed",site="{site}"}} 1' in (
+        render_prometheus()
+    )
+
+
+def test_slow_primary_loses_to_secondary_and_spend_is_booked(site) -> None:
+    delays = {"ark": 0.5}
+    out = llm_hedge.hedged_call(
+        site, "ark", lambda p: _answer(p, delays, tokens=7), is_failure=_failed
+    )
+    assert out.text == "silicon"
+    booked = f'llm_hedge_extra_tokens_total{{provider="ark",site="{site}"}} 7'
+    assert _wait_for(lambda: booked in render_prometheus())
+    text = render_prometheus()
+    assert f'llm_hedge_total{{outcome="secondary_won",site="{site}"}} 1' in text
+    assert (
+        f'llm_hedge_extra_requests_total{{provider="silicon",site="{site}"}} 1' in text
+    )
+
+
+def test_failed_secondary_falls_back_to_primary(site) -> None:
+    def _call(p):
+        if p == "silicon":
+            raise RuntimeError("secondary down")
+        return _answer(p, {"ark": 0.3})
+
+    assert llm_hedge.hedged_call(site, "ark", _call, is_failure=_failed).text == "ark"
+
+
+def test_budget_limits_share_of_hedged_calls(site, monkeypatch) -> None:
+    monkeypatch.setenv("LLM_HEDGE_SITES", f"{site}:0.1")
+    winners = [
+        llm_hedge.hedged_call(
+            site, "ark", lambda p: _answer(p, {"ark": 0.2}), is_failure=_failed
+        ).text
+        for _ in range(3)
+    ]
+    assert winners == ["silicon", "ark", "ark"]
+    assert f'llm_hedge_total{{outcome="budget_exhausted",site="{site}"}} 2' in (
+        render_prometheus()
+    )
+
+
+def test_async_loser_is_cancelled(site) -> None:
+    cancelled = []
+
+    async def _call(p):
+        try:
+            await asyncio.sleep(1.0 if p == "ark" else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(p)
+            raise
+        return SimpleNamespace(text=p, usage=None)
+
+    async def _run():
+        out = await llm_hedge.hedged_call_async(site, "ark", _call, is_failure=_failed)
+        await asyncio.sleep(0)
+        return out
+
+    assert asyncio.run(_run()).text == "silicon"
+    assert cancelled == ["ark"]
+
+
+def test_stream_hedges_on_first_chunk_and_closes_loser(site) -> None:
+    closed = threading.Event()
+
+    def _stream(p):
+        try:
+            if p == "ark":
+                time.sleep(0.3)
+            for i in range(3):
+                yield f"{p}{i}"
+        finally:
+            if p == "ark":
+                closed.set()
+
+    out = list(llm_hedge.hedged_stream(site, "ark", _stream))
+    assert out == ["silicon0", "silicon1", "silicon2"]
+    assert closed.wait(2.0)
+
+
+def test_llm_client_generate_hedges_and_skips_cache(site, monkeypatch) -> None:
+    monkeypatch.setenv("LLM_RESPONSE_CACHE_SITES", site)
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    calls = []
+
+    def _fake_generate(self, prompt, system_prompt, provider, max_tokens, temperature):
+        calls.append(provider)
+        time.sleep(0.4 if provider == "silicon" else 0)
+        return LLMResult(text=f"{provider}:{prompt}", raw={})
+
+    monkeypatch.setattr(LLMClient, "_generate", _fake_generate)
+    c = LLMClient()
+    c.silicon_api_key = c.ark_api_key = "k"
+    first = c.generate("p", provider="silicon", cache_site=site, hedge_site=site)
+    assert first.text == "ark:p" and first.raw["hedge_provider"] == "ark"
+    # Not cached under the silicon key: the next call goes to the providers again.
+    c.generate("p", provider="silicon", cache_site=site)
+    assert calls.count("silicon") == 2
+
+    c.ark_api_key = ""
+    assert c._hedge_site(site, "silicon") is None
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import os
+import time
+import uuid
+
+import pytest
+
+from homework_agent.utils.cache import NearCache
+
+pytestmark = pytest.mark.integration
+
+
+def _redis_url() -> str:
+    try:
+        import redis  # type: ignore
+    except Exception:  # pragma: no cover
+        return ""
+    url = str(os.getenv("REDIS_URL") or "").strip()
+    if not url:
+        return ""
+    try:
+        redis.Redis.from_url(url).ping()
+        return url
+    except Exception:
+        return ""
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+@pytest.fixture()
+def near_pair():
+    url = _redis_url()
+    if not url:
+        pytest.skip("Redis unavailable (set REDIS_URL to run this integration test)")
+    prefix = f"test:{uuid.uuid4().hex[:8]}:"
+    a = NearCache(url, prefix=prefix, ttl_seconds=60)
+    b = NearCache(url, prefix=prefix, ttl_seconds=60)
+    a.get("sess:warmup")
+    b.get("sess:warmup")
+    assert _wait_for(lambda: a._listening and b._listening)
+    try:
+        yield a, b
+    finally:
+        keys = list(a.client.scan_iter(match=f"{prefix}*"))
+        if keys:
+            a.client.delete(*keys)
+
+
+def test_near_cache_serves_hot_keys_locally_and_returns_copies(near_pair) -> None:
+    a, _ = near_pair
+    a.set("sess:s1", {"history": [1]}, ttl_seconds=60)
+    first = a.get("sess:s1")
+    assert a.local.get("sess:s1") == {"history": [1]}
+
+    # Callers mutating what they got back must not corrupt the local copy.
+    first["history"].append(2)
+    assert a.get("sess:s1") == {"history": [1]}
+
+    # Non-hot keys always go to Redis.
+    a.set("job:j1", {"status": "running"}, ttl_seconds=60)
+    assert a.get("job:j1") == {"status": "running"}
+    assert a.local.get("job:j1") is None
+
+
+def test_near_cache_write_invalidates_other_instances(near_pair) -> None:
+    a, b = near_pair
+    a.set("qbank:s1", {"v": 1}, ttl_seconds=60)
+    assert b.get("qbank:s1") == {"v": 1}
+    assert b.local.get("qbank:s1") == {"v": 1}
+
+    a.set("qbank:s1", {"v": 2}, ttl_seconds=60)
+    assert _wait_for(lambda: b.local.get("qbank:s1") is None)
+    assert b.get("qbank:s1") == {"v": 2}
+
+    a.delete("qbank:s1")
+    assert _wait_for(lambda: b.get("qbank:s1") is None)
+
+
+def test_redis_cache_reads_legacy_json_and_writes_framed_values(near_pair) -> None:
+    a, b = near_pair
+    a.client.set(f"{a.prefix}qindex:s1", '{"questions": {"1": {}}}')
+    assert b.get("qindex:s1") == {"questions": {"1": {}}}
+
+    a.set("job:j2", {"status": "done", "blob": "x" * 10000}, ttl_seconds=60)
+    raw = a.client.get(f"{a.prefix}job:j2")
+    assert raw[0] == 0xA5 and len(raw) < 10000
+    assert b.get("job:j2")["blob"] == "x" * 10000
+
+
+def test_near_cache_batched_reads_and_pipelined_writes(near_pair) -> None:
+    a, b = near_pair
+    a.set_many({"sess:s2": {"v": 1}, "job:j3": {"status": "queued"}}, ttl_seconds=60)
+    assert b.get("sess:s2") == {"v": 1}  # now cached locally in B
+
+    got = b.get_many(["sess:s2", "job:j3", "qbank:missing"])
+    assert got == {"sess:s2": {"v": 1}, "job:j3": {"status": "queued"}}
+
+    with a.pipeline() as pipe:
+        pipe.set("sess:s2", {"v": 2}, ttl_seconds=60)
+        pipe.delete("job:j3")
+    assert _wait_for(lambda: b.local.get("sess:s2") is None)
+    assert b.get_many(["sess:s2", "job:j3"]) == {"sess:s2": {"v": 2}}
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from homework_agent.services import ocr_baidu
+from homework_agent.services.ocr_baidu import BaiduOCRTaskResult, BaiduPaddleOCRVLClient
+
+
+def _client(**overrides):
+    client = BaiduPaddleOCRVLClient.__new__(BaiduPaddleOCRVLClient)
+    client.api_key = "ak"
+    client.secret_key = "sk"
+    client.oauth_url = "https://oauth.example/token"
+    client.submit_url = "https://ocr.example/task"
+    client.query_url = "https://ocr.example/task/query"
+    client.timeout_seconds = 5
+    client.poll_interval_seconds = 0.01
+    client.poll_max_seconds = 2
+    for k, v in overrides.items():
+        setattr(client, k, v)
+    return client
+
+
+class _FakeTasks:
+    """Task for url i is done after (i + 1) queries; 'bad' urls fail to submit."""
+
+    def __init__(self, submit_delay: float = 0.0):
+        self.submitted = []
+        self.queries = []
+        self.submit_delay = submit_delay
+
+    async def submit_async(self, *, image_url):
+        await asyncio.sleep(self.submit_delay)
+        if "bad" in image_url:
+            raise RuntimeError("submit rejected")
+        self.submitted.append(image_url)
+        return f"t{image_url[-1]}"
+
+    async def query_async(self, task_id):
+        self.queries.append(task_id)
+        needed = int(task_id[1:]) + 1
+        if self.queries.count(task_id) >= needed:
+            return {"result": {"status": "success", "task_id": task_id}}
+        return {"result": {"status": "running"}}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_state(monkeypatch):
+    ocr_baidu.reset_baidu_ocr_state()
+    monkeypatch.setattr(ocr_baidu, "get_redis", lambda: None)
+    yield
+    ocr_baidu.reset_baidu_ocr_state()
+
+
+def _patch_tasks(monkeypatch, client, fake):
+    # Raw upload only: the batch still goes through the single-flight `submit_async`.
+    monkeypatch.setattr(client, "_submit_async", fake.submit_async)
+    monkeypatch.setattr(client, "query_async", fake.query_async)
+
+
+def test_batch_submits_everything_first_and_polls_pending_together(monkeypatch):
+    client = _client()
+    fake = _FakeTasks()
+    _patch_tasks(monkeypatch, client, fake)
+    finished = []
+    urls = ["https://img/0", "https://img/1", "https://img/2"]
+
+    out = asyncio.run(
+        client.recognize_many_async(urls, on_result=lambda i, r: finished.append(i))
+    )
+
+    assert sorted(fake.submitted) == urls
+    assert [r.status for r in out] == ["done", "done", "done"]
+    assert [r.task_id for r in out] == ["t0", "t1", "t2"]
+    assert finished == [0, 1, 2]
+    # Round 1 queries all three, round 2 the remaining two, round 3 the last one.
+    assert fake.queries == ["t0", "t1", "t2", "t1", "t2", "t2"]
+
+
+def test_submit_errors_are_returned_per_page(monkeypatch):
+    client = _client()
+    _patch_tasks(monkeypatch, client, _FakeTasks())
+
+    out = asyncio.run(client.recognize_many_async(["https://img/0", "https://bad/1"]))
+
+    assert isinstance(out[0], BaiduOCRTaskResult) and out[0].status == "done"
+    assert isinstance(out[1], RuntimeError)
+
+
+def test_pending_tasks_time_out_at_the_deadline(monkeypatch):
+    client = _client(poll_max_seconds=0.05)
+    fake = _FakeTasks()
+    _patch_tasks(monkeypatch, client, fake)
+
+    out = asyncio.run(client.recognize_many_async(["https://img/9"]))
+
+    assert out[0].status == "timeout"
+    assert out[0].raw == {"result": {"status": "running"}}
+
+
+def test_start_batch_resolves_each_page_future(monkeypatch):
+    client = _client()
+    _patch_tasks(monkeypatch, client, _FakeTasks())
+
+    futures = client.start_batch(["https://img/1", "https://bad/2"])
+
+    assert futures[0].result(timeout=5).status == "done"
+    with pytest.raises(RuntimeError):
+        futures[1].result(timeout=5)
+    # The loop only holds weak task references; the module keeps running batches alive.
+    deadline = time.monotonic() + 5
+    while ocr_baidu._BATCH_TASKS and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not ocr_baidu._BATCH_TASKS
+
+
+def test_batch_submit_is_coalesced_with_concurrent_submits(monkeypatch):
+    client = _client()
+    fake = _FakeTasks(submit_delay=0.05)
+    _patch_tasks(monkeypatch, client, fake)
+
+    out = asyncio.run(client.recognize_many_async(["https://img/1", "https://img/1"]))
+
+    # Same identity as the sync `submit`: one upstream task for the same page.
+    assert fake.submitted == ["https://img/1"]
+    assert [r.task_id for r in out] == ["t1", "t1"]
+
+
+class _Resp:
+    def __init__(self, data):
+        self._data = data
+
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return self._data
+
+
+class _FakeHTTP:
+    def __init__(self):
+        self.token_calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.token_calls += 1
+        return _Resp({"access_token": f"tok{self.token_calls}", "expires_in": 2592000})
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode("utf-8")
+
+
+def test_token_is_shared_across_instances_and_processes(monkeypatch):
+    http = _FakeHTTP()
+    redis = _FakeRedis()
+    monkeypatch.setattr(ocr_baidu, "_http", lambda direct=False: http)
+    monkeypatch.setattr(ocr_baidu, "get_redis", lambda: redis)
+
+    assert _client()._get_access_token() == "tok1"
+    assert _client()._get_access_token() == "tok1"  # new instance, process cache
+    assert http.token_calls == 1
+
+    ocr_baidu.reset_baidu_ocr_state()  # another worker: empty process cache
+    assert _client()._get_access_token() == "tok1"
+    assert http.token_calls == 1
+    stored = json.loads(next(iter(redis.data.values())))
+    assert stored["token"] == "tok1" and stored["expires_at"] > time.time()
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+from homework_agent.utils import llm_clients, provider_limits as pl
+from homework_agent.utils.metrics import render_prometheus
+from homework_agent.utils.redis_pool import get_redis
+from homework_agent.utils.settings import get_settings
+
+
+@pytest.fixture()
+def limits(monkeypatch):
+    monkeypatch.setattr(pl, "get_redis", lambda: None)
+    monkeypatch.setattr(pl, "get_async_redis", lambda: None)
+    pl.reset_provider_limits()
+
+    def _set(cfg: dict) -> None:
+        monkeypatch.setenv("PROVIDER_LIMITS_JSON", json.dumps(cfg))
+        get_settings.cache_clear()
+
+    yield _set
+    pl.reset_provider_limits()
+
+
+def test_unlisted_provider_is_not_limited(limits) -> None:
+    limits({"ark": {"rpm": 1}})
+    assert pl.limit_for("silicon") is None
+    assert not pl.has_limits("silicon") and pl.has_limits("ark")
+    for _ in range(5):
+        pl.acquire("silicon", max_wait_seconds=0).release()
+
+
+def test_model_specific_limit_wins(limits) -> None:
+    limits({"ark": {"rpm": 10}, "ark:doubao-x": {"max_inflight": 2}})
+    assert pl.limit_for("ark", "doubao-x").max_inflight == 2
+    assert pl.limit_for("ark", "doubao-y").rpm == 10
+
+
+def test_token_bucket_waits_until_refill_then_refunds_unused(limits) -> None:
+    name = f"p{uuid.uuid4().hex[:6]}"
+    limits({name: {"tpm": 600}})  # refills 10 tokens/s
+    pl.acquire(name, tokens=600).release()
+    with pytest.raises(pl.ProviderQuotaExceeded):
+        pl.acquire(name, tokens=5, max_wait_seconds=0.1)
+    t0 = time.monotonic()
+    permit = pl.acquire(name, tokens=5, max_wait_seconds=2)
+    assert 0.2 < time.monotonic() - t0 < 1.5
+    # Reserved 5, used 600: the bucket goes into debt and the next call must wait.
+    permit.release(used_tokens=600)
+    with pytest.raises(pl.ProviderQuotaExceeded):
+        pl.acquire(name, tokens=1, max_wait_seconds=0.2)
+
+    text = render_prometheus()
+    assert f'provider_quota_total{{outcome="rejected",provider="{name}"}} 2' in text
+    assert f'provider_quota_total{{outcome="waited",provider="{name}"}} 1' in text
+    assert f'provider_quota_wait_seconds_count{{provider="{name}"}}' in text
+
+
+def test_max_inflight_blocks_until_release(limits) -> None:
+    limits({"ocr": {"max_inflight": 1}})
+    first = pl.acquire("ocr")
+    with pytest.raises(pl.ProviderQuotaExceeded):
+        pl.acquire("ocr", max_wait_seconds=0.1)
+    threading.Timer(0.2, first.release).start()
+    with pl.provider_quota("ocr", max_wait_seconds=2):
+        pass
+    pl.acquire("ocr", max_wait_seconds=0).release()
+
+
+_COMPLETION = {
+    "id": "c",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "m",
+    "choices": [
+        {
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": "ok"},
+        }
+    ],
+    "usage": {"prompt_tokens": 7, "completion_tokens": 3, "total_tokens": 10},
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = 0
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        _Handler.hits += 1
+        body = json.dumps(_COMPLETION).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def test_transport_governs_calls_and_fails_fast_with_local_429(
+    limits, monkeypatch
+) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _Handler.hits = 0
+    llm_clients.reset_llm_clients()
+    monkeypatch.setenv("PROVIDER_QUOTA_MAX_WAIT_SECONDS", "0")
+    try:
+        limits({"qt:m": {"rpm": 2, "tpm": 100000, "max_inflight": 1}})
+        client = llm_clients.get_openai_client(
+            "qt",
+            base_url=f"http://127.0.0.1:{server.server_port}/v1",
+            api_key="k",
+            timeout=5,
+        )
+        for _ in range(2):
+            resp = client.chat.completions.create(
+                model="m", max_tokens=50, messages=[{"role": "user", "content": "hi"}]
+            )
+            assert resp.choices[0].message.content == "ok"
+        with pytest.raises(openai.RateLimitError):
+            client.chat.completions.create(
+                model="m", messages=[{"role": "user", "content": "hi"}]
+            )
+        assert _Handler.hits == 2
+        # In-flight slots were freed when each body was closed; usage (10) was refunded.
+        st = pl._LOCAL["qt:m"]
+        assert st.inflight == {} and st.tpm_level > 100000 - 25
+    finally:
+        llm_clients.reset_llm_clients()
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.integration
+def test_redis_buckets_are_shared_across_processes(monkeypatch) -> None:
+    url = str(os.getenv("REDIS_URL") or "").strip()
+    if not url or get_redis(url) is None:
+        pytest.skip("REDIS_URL not reachable")
+    name = f"p{uuid.uuid4().hex[:6]}"
+    monkeypatch.setenv("PROVIDER_LIMITS_JSON", json.dumps({name: {"rpm": 2}}))
+    get_settings.cache_clear()
+    pl.reset_provider_limits()
+    pl.acquire(name, max_wait_seconds=0).release()
+    # A second "process" with no local state still sees the shared bucket.
+    pl.reset_provider_limits()
+    assert pl.acquire(name, max_wait_seconds=0).backend == "redis"
+    with pytest.raises(pl.ProviderQuotaExceeded):
+        pl.acquire(name, max_wait_seconds=0)
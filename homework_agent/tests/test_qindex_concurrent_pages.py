@@ -0,0 +1,118 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from homework_agent.core import qindex
+
+
+class _FakePages:
+    """Page 0 is slowest, so pages finish in reverse order."""
+
+    def __init__(self, pages: int, unit: float = 0.05):
+        self.pages = pages
+        self.unit = unit
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, page_idx, page_url, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.unit * (self.pages - page_idx))
+        finally:
+            with self._lock:
+                self.active -= 1
+        entry = {"page_index": page_idx, "page_image_url": page_url}
+        questions = {"1": dict(entry), f"p{page_idx}": dict(entry)}
+        return questions, [f"page[{page_idx}]: w"]
+
+
+def _setup(
+    monkeypatch,
+    pages: int,
+    provider: str = "siliconflow_qwen3_vl",
+    page_concurrency: int = 4,
+) -> _FakePages:
+    fake = _FakePages(pages)
+    settings = SimpleNamespace(
+        ocr_provider=provider, qindex_page_concurrency=page_concurrency
+    )
+    monkeypatch.setattr(qindex, "get_settings", lambda: settings)
+    monkeypatch.setattr(qindex, "qindex_is_configured", lambda: (True, "ok"))
+    monkeypatch.setattr(qindex, "_index_page", fake)
+    return fake
+
+
+def test_pages_run_concurrently_and_merge_in_page_order(monkeypatch):
+    fake = _setup(monkeypatch, 3)
+    urls = [f"https://example.com/{i}.jpg" for i in range(3)]
+
+    started = time.monotonic()
+    out = qindex.build_question_index_for_pages(urls, session_id="s1")
+    elapsed = time.monotonic() - started
+
+    assert fake.peak == 3
+    assert elapsed < 0.25  # slowest page is 0.15s
+    assert [p["page_index"] for p in out["questions"]["1"]["pages"]] == [0, 1, 2]
+    assert list(out["questions"]) == ["1", "p0", "p1", "p2"]
+    assert out["warnings"] == ["page[0]: w", "page[1]: w", "page[2]: w"]
+
+
+def test_progress_publishes_partial_index_per_finished_page(monkeypatch):
+    _setup(monkeypatch, 3)
+    snapshots = []
+    urls = [f"https://example.com/{i}.jpg" for i in range(3)]
+
+    out = qindex.build_question_index_for_pages(urls, on_progress=snapshots.append)
+
+    assert len(snapshots) == 2  # the final index is returned, not published
+    first = snapshots[0]
+    assert [p["page_index"] for p in first["questions"]["1"]["pages"]] == [2]
+    assert first["warnings"][-1] == "qindex queued (partial 1/3 pages)"
+    assert "queued" not in " ".join(out["warnings"])
+
+
+def test_progress_errors_do_not_fail_the_build(monkeypatch):
+    _setup(monkeypatch, 2)
+
+    def _boom(partial):
+        raise RuntimeError("redis down")
+
+    out = qindex.build_question_index_for_pages(
+        ["https://example.com/0.jpg", "https://example.com/1.jpg"], on_progress=_boom
+    )
+    assert len(out["questions"]["1"]["pages"]) == 2
+
+
+def test_concurrency_limit_is_configurable(monkeypatch):
+    fake = _setup(monkeypatch, 3, page_concurrency=1)
+    qindex.build_question_index_for_pages(
+        [f"https://example.com/{i}.jpg" for i in range(3)]
+    )
+    assert fake.peak == 1
+
+
+def test_baidu_pages_share_one_up_front_batch(monkeypatch):
+    _setup(monkeypatch, 3, provider="baidu")
+    batches = []
+    seen = {}
+
+    def _start_batch(self, urls):
+        batches.append(list(urls))
+        return [f"task-{i}" for i in range(len(urls))]
+
+    def _index_page(page_idx, page_url, **kwargs):
+        seen[page_idx] = (kwargs["ocr_page_url"], kwargs["ocr_task"])
+        return {}, []
+
+    monkeypatch.setattr(qindex.BaiduPaddleOCRVLClient, "start_batch", _start_batch)
+    monkeypatch.setattr(qindex, "_index_page", _index_page)
+    monkeypatch.setattr(qindex, "maybe_preprocess_for_ocr", lambda url: None)
+    urls = [f"https://example.com/{i}.jpg" for i in range(3)]
+
+    qindex.build_question_index_for_pages(urls)
+
+    assert batches == [urls]
+    assert seen == {i: (urls[i], f"task-{i}") for i in range(3)}
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from homework_agent.utils import redis_pool
+from homework_agent.utils.metrics import render_prometheus
+
+
+class _FakePool:
+    def __init__(self) -> None:
+        self.max_connections = 8
+        self._in_use_connections = {"c1"}
+        self._available_connections = ["c2", "c3"]
+
+
+class _FakeClient:
+    created = 0
+    pings = 0
+    fail = False
+
+    def __init__(self, url: str, kwargs: dict) -> None:
+        self.url = url
+        self.kwargs = kwargs
+        self.connection_pool = _FakePool()
+        _FakeClient.created += 1
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs):
+        return cls(url, kwargs)
+
+    def ping(self) -> bool:
+        _FakeClient.pings += 1
+        if _FakeClient.fail:
+            raise ConnectionError("down")
+        return True
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture()
+def fake_redis(monkeypatch):
+    _FakeClient.created = _FakeClient.pings = 0
+    _FakeClient.fail = False
+    monkeypatch.setattr(redis_pool, "redis", SimpleNamespace(Redis=_FakeClient))
+    redis_pool.reset_redis_clients()
+    yield _FakeClient
+    redis_pool.reset_redis_clients()
+
+
+def test_get_redis_shares_one_pooled_client_and_pings_once(fake_redis) -> None:
+    url = "redis://:secret@cache.internal:6380/2"
+    a = redis_pool.get_redis(url)
+    b = redis_pool.get_redis(url)
+    assert a is b
+    assert fake_redis.created == 1 and fake_redis.pings == 1
+    assert a.kwargs["health_check_interval"] > 0
+
+    assert redis_pool.pool_stats()["sync|cache.internal:6380/2"] == {
+        "in_use": 1,
+        "idle": 2,
+        "max": 8,
+    }
+    text = render_prometheus()
+    assert "secret" not in text
+    assert (
+        'redis_pool_connections{kind="sync",state="idle",target="cache.internal:6380/2"} 2'
+        in text
+    )
+
+
+def test_get_redis_backs_off_after_failed_ping(fake_redis, monkeypatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr(redis_pool.time, "monotonic", lambda: now[0])
+    monkeypatch.setenv("REDIS_RETRY_BACKOFF_SECONDS", "5")
+    fake_redis.fail = True
+    url = "redis://127.0.0.1:6399/0"
+
+    assert redis_pool.get_redis(url) is None
+    assert redis_pool.get_redis(url) is None
+    assert fake_redis.pings == 1
+    with pytest.raises(RuntimeError):
+        redis_pool.get_redis_or_raise(url)
+
+    fake_redis.fail = False
+    now[0] += 6
+    assert redis_pool.get_redis(url) is not None
+    assert fake_redis.pings == 2
+
+
+def test_queue_modules_share_the_pooled_client(fake_redis, monkeypatch) -> None:
+    from homework_agent.services import (
+        facts_queue,
+        grade_queue,
+        qindex_queue,
+        review_cards_queue,
+        review_queue,
+    )
+
+    monkeypatch.setenv("REDIS_URL", "redis://127.0.0.1:6379/0")
+    monkeypatch.delenv("REQUIRE_REDIS", raising=False)
+    clients = {
+        grade_queue.get_redis_client(),
+        facts_queue.get_redis_client(),
+        qindex_queue.get_redis_client(),
+        review_cards_queue.get_redis_client(),
+        review_queue._get_redis_client(),
+    }
+    assert len(clients) == 1 and None not in clients
+    assert fake_redis.pings == 1
+
+    monkeypatch.delenv("REDIS_URL")
+    monkeypatch.setenv("REQUIRE_REDIS", "1")
+    with pytest.raises(RuntimeError, match="REQUIRE_REDIS=1 but REDIS_URL is not set"):
+        grade_queue.get_redis_client()
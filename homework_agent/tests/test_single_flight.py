@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from homework_agent.services import autonomous_tools
+from homework_agent.utils import single_flight as sf
+from homework_agent.utils.metrics import render_prometheus
+
+
+class _Redis:
+    """Minimal thread-safe stand-in for the GET/SET NX PX/DEL subset single_flight uses."""
+
+    def __init__(self) -> None:
+        self.data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self.data.get(key)
+
+    def set(self, key, value, nx=False, px=None, ex=None):
+        with self._lock:
+            if nx and key in self.data:
+                return None
+            self.data[key] = value
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self.data.pop(key, None)
+
+
+@pytest.fixture()
+def name():
+    return f"t{uuid.uuid4().hex[:8]}"
+
+
+def _slow(calls, value, delay=0.2):
+    def _fn():
+        calls.append(1)
+        time.sleep(delay)
+        return value
+
+    return _fn
+
+
+def test_concurrent_callers_in_one_process_share_one_call(name, monkeypatch) -> None:
+    monkeypatch.setattr(sf, "get_redis", lambda: None)
+    calls = []
+    fn = _slow(calls, {"text": "ok"})
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: sf.single_flight(name, ["k"], fn), range(8)))
+    assert len(calls) == 1
+    assert results == [{"text": "ok"}] * 8
+    assert sf.single_flight(name, ["k"], fn) == {"text": "ok"}
+    assert len(calls) == 2
+
+
+def test_waiter_in_another_process_reads_leader_result(name, monkeypatch) -> None:
+    redis = _Redis()
+    monkeypatch.setattr(sf, "get_redis", lambda: redis)
+    calls = []
+    leader = threading.Thread(
+        target=sf.single_flight, args=(name, ["k"], _slow(calls, [1, 2]))
+    )
+    leader.start()
+    time.sleep(0.05)
+    # Simulate a second process: its local registry does not know about the leader.
+    monkeypatch.setattr(sf, "_LOCAL", {})
+    assert sf.single_flight(name, ["k"], _slow(calls, "unused")) == [1, 2]
+    leader.join()
+    assert len(calls) == 1
+    assert not [k for k in redis.data if k.startswith("sf:lock:")]
+
+    text = render_prometheus()
+    assert f'single_flight_total{{name="{name}",outcome="leader"}} 1' in text
+    assert f'single_flight_total{{name="{name}",outcome="shared"}} 1' in text
+
+
+def test_leader_error_is_shared_and_unshareable_results_are_not_stored(
+    name, monkeypatch
+) -> None:
+    redis = _Redis()
+    monkeypatch.setattr(sf, "get_redis", lambda: redis)
+
+    def _boom():
+        raise RuntimeError("provider down")
+
+    with pytest.raises(RuntimeError, match="provider down"):
+        sf.single_flight(name, ["e"], _boom)
+    with pytest.raises(sf.SingleFlightError, match="provider down"):
+        sf.single_flight(name, ["e"], lambda: "unused")
+
+    bad = {"status": "error"}
+    ok = lambda r: r.get("status") == "ok"  # noqa: E731
+    assert sf.single_flight(name, ["s"], lambda: bad, share_if=ok) == bad
+    assert sf.single_flight(name, ["s"], lambda: {"status": "ok"}, share_if=ok) == {
+        "status": "ok"
+    }
+
+
+def test_redis_errors_fall_back_to_direct_call(name, monkeypatch) -> None:
+    class _Broken:
+        def get(self, key):
+            raise ConnectionError("down")
+
+    monkeypatch.setattr(sf, "get_redis", lambda: _Broken())
+    assert sf.single_flight(name, ["k"], lambda: 7) == 7
+    assert f'single_flight_total{{name="{name}",outcome="bypass"}} 1' in (
+        render_prometheus()
+    )
+
+
+def test_ocr_question_cards_coalesces_identical_requests(monkeypatch) -> None:
+    monkeypatch.setattr(sf, "get_redis", lambda: None)
+    calls = []
+
+    def _fake(*, image, provider):
+        calls.append(image)
+        time.sleep(0.2)
+        return {"status": "ok", "text": "1. x"}
+
+    monkeypatch.setattr(autonomous_tools, "_ocr_question_cards", _fake)
+    image = f"https://cdn.example.com/{uuid.uuid4().hex}.jpg"
+    with ThreadPoolExecutor(4) as pool:
+        results = list(
+            pool.map(
+                lambda _: autonomous_tools.ocr_question_cards(
+                    image=image, provider="ark"
+                ),
+                range(4),
+            )
+        )
+    assert len(calls) == 1
+    assert all(r["text"] == "1. x" for r in results)
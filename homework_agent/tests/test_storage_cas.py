@@ -0,0 +1,102 @@
+import hashlib
+
+import pytest
+
+from homework_agent.utils import storage_cas
+from homework_agent.utils.supabase_client import SupabaseStorageClient
+
+
+class _FakeBucket:
+    def __init__(self, existing=()):
+        self.objects = set(existing)
+        self.uploads = []
+
+    def upload(self, *, path, file, file_options):
+        self.uploads.append(path)
+        if path in self.objects:
+            raise Exception("The resource already exists (Duplicate)")
+        self.objects.add(path)
+
+    def get_public_url(self, path):
+        return f"https://cdn.example/{path}?"
+
+
+class _FakeStorage:
+    def __init__(self, bucket):
+        self.bucket = bucket
+
+    def from_(self, name):
+        return self.bucket
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode("utf-8")
+
+
+def _client(bucket):
+    client = SupabaseStorageClient.__new__(SupabaseStorageClient)
+    client.bucket = "homework-images"
+    client.client = type("C", (), {"storage": _FakeStorage(bucket)})()
+    return client
+
+
+@pytest.fixture(autouse=True)
+def _isolated_index(monkeypatch):
+    storage_cas.clear_local_index()
+    monkeypatch.setattr(storage_cas, "get_redis", lambda: None)
+    yield
+    storage_cas.clear_local_index()
+
+
+def test_same_bytes_upload_once_and_return_the_same_url():
+    bucket = _FakeBucket()
+    client = _client(bucket)
+    first = client.upload_bytes(b"crop", prefix="slices/", content_addressed=True)
+    second = client.upload_bytes(b"crop", prefix="slices/", content_addressed=True)
+    sha = hashlib.sha256(b"crop").hexdigest()
+    assert first == second == f"https://cdn.example/slices/{sha}.jpg"
+    assert bucket.uploads == [f"slices/{sha}.jpg"]
+
+
+def test_existing_unindexed_object_is_reused():
+    sha = hashlib.sha256(b"crop").hexdigest()
+    bucket = _FakeBucket(existing={f"slices/{sha}.jpg"})
+    url = _client(bucket).upload_bytes(
+        b"crop", prefix="slices/", content_addressed=True
+    )
+    assert url == f"https://cdn.example/slices/{sha}.jpg"
+
+
+def test_redis_index_is_shared_across_processes(monkeypatch):
+    redis = _FakeRedis()
+    monkeypatch.setattr(storage_cas, "get_redis", lambda: redis)
+    bucket = _FakeBucket()
+    _client(bucket).upload_bytes(b"crop", prefix="slices/", content_addressed=True)
+
+    storage_cas.clear_local_index()  # another worker: empty local index
+    _client(bucket).upload_bytes(b"crop", prefix="slices/", content_addressed=True)
+    assert len(bucket.uploads) == 1
+
+
+def test_other_upload_errors_propagate():
+    class _Broken(_FakeBucket):
+        def upload(self, *, path, file, file_options):
+            raise RuntimeError("network down")
+
+    with pytest.raises(RuntimeError):
+        _client(_Broken()).upload_bytes(b"crop", content_addressed=True)
+
+
+def test_default_mode_still_uses_unique_names():
+    bucket = _FakeBucket()
+    client = _client(bucket)
+    client.upload_bytes(b"crop", prefix="slices/")
+    client.upload_bytes(b"crop", prefix="slices/")
+    assert len(set(bucket.uploads)) == 2
@@ -22,7 +22,9 @@ def test_extract_visual_facts_repairs_wrapped_json(monkeypatch):
             self.text = text
 
     class DummyVisionClient:
-        def analyze(self, images, prompt=None, provider=VisionProvider.DOUBAO):
+        def analyze(
+            self, images, prompt=None, provider=VisionProvider.DOUBAO, cache_site=None
+        ):
             assert images  # built from URLs
             payload = {
                 "scene_type": "math.geometry_2d",
@@ -70,7 +72,9 @@ def test_extract_visual_facts_stub_scene_adds_warning(monkeypatch):
             self.text = text
 
     class DummyVisionClient:
-        def analyze(self, images, prompt=None, provider=VisionProvider.DOUBAO):
+        def analyze(
+            self, images, prompt=None, provider=VisionProvider.DOUBAO, cache_site=None
+        ):
             payload = {
                 "scene_type": "en.map_or_route",
                 "confidence": 0.0,
@@ -112,7 +116,9 @@ def test_extract_visual_facts_coerces_object_arrays(monkeypatch):
             self.text = text
 
     class DummyVisionClient:
-        def analyze(self, images, prompt=None, provider=VisionProvider.DOUBAO):
+        def analyze(
+            self, images, prompt=None, provider=VisionProvider.DOUBAO, cache_site=None
+        ):
             payload = {
                 "scene_type": "math.geometry_2d",
                 "confidence": 0.8,
@@ -1,17 +1,35 @@
 """
 Cache abstraction with optional Redis support.
-- If REDIS_URL is set and redis package is available, use Redis.
-- Otherwise fallback to in-memory cache (process-local, not for production).
+- If REDIS_URL is set and redis package is available, use Redis (fronted by an in-process
+  near-cache for hot keys, see `NearCache`).
+- Otherwise fallback to in-memory cache (process-local, bounded LRU; not for production).
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
-from datetime import datetime, timedelta
-from typing import Any, Optional, Tuple
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 import logging
 
+from homework_agent.utils.cache_codec import CacheCodec
+from homework_agent.utils.metrics import inc_counter
+from homework_agent.utils.settings import get_settings
+from homework_agent.utils.redis_pool import (
+    get_async_redis,
+    get_redis,
+    redis_asyncio,
+    redis_target,
+)
+
 try:
     import redis  # type: ignore
 except ImportError:
@@ -19,6 +37,7 @@ except ImportError:
 
 _CACHED_STORE: BaseCache | None = None
 _CACHED_STORE_CONFIG: tuple[str | None, str, bool, bool] | None = None
+_ASYNC_STORE: AsyncBaseCache | None = None
 
 
 def _json_default(obj: Any):
@@ -51,57 +70,503 @@ class BaseCache:
     def delete(self, key: str) -> None:
         raise NotImplementedError
 
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Values of the keys that exist (missing keys are omitted); one round trip on Redis."""
+        out: Dict[str, Any] = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                out[key] = value
+        return out
+
+    def set_many(
+        self, items: Dict[str, Any], ttl_seconds: Optional[int] = None
+    ) -> None:
+        for key, value in items.items():
+            self.set(key, value, ttl_seconds=ttl_seconds)
+
+    @contextmanager
+    def pipeline(self) -> Iterator["CachePipeline"]:
+        """
+        Buffer writes and apply them together when the block exits without an exception
+        (a MULTI/EXEC transaction on Redis). Reads are not buffered: read before the block.
+        """
+        pipe = CachePipeline()
+        yield pipe
+        self._apply(pipe.ops)
+
+    def _apply(
+        self, ops: List[Tuple[str, str, Any, Optional[int]]], transaction: bool = True
+    ) -> None:
+        for op, key, value, ttl_seconds in ops:
+            if op == "set":
+                self.set(key, value, ttl_seconds=ttl_seconds)
+            else:
+                self.delete(key)
+
+
+class CachePipeline(BaseCache):
+    """Write buffer handed out by `BaseCache.pipeline()`; accepted wherever a cache is."""
+
+    def __init__(self) -> None:
+        self.ops: List[Tuple[str, str, Any, Optional[int]]] = []
+
+    def get(self, key: str) -> Optional[Any]:
+        raise TypeError("cache pipelines only buffer writes; read before the pipeline")
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        self.ops.append(("set", key, value, ttl_seconds))
+
+    def delete(self, key: str) -> None:
+        self.ops.append(("delete", key, None, None))
+
+
+def _approx_size(value: Any) -> int:
+    """Serialized size (what Redis would store), used for the in-memory byte budget."""
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=_json_default))
+    except Exception:
+        return sys.getsizeof(value)
+
 
 class InMemoryCache(BaseCache):
-    def __init__(self):
-        self.store: dict[str, Tuple[Any, Optional[datetime]]] = {}
+    """
+    Process-local LRU cache (dev/tests, and the fallback when Redis is unavailable).
+
+    Bounded by entry count and approximate serialized bytes; expired entries are removed on
+    read and by a background sweep so idle keys don't pin memory until the process OOMs.
+    Limits of 0 disable the corresponding bound.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 10000,
+        max_bytes: int = 256 * 1024 * 1024,
+        sweep_interval_seconds: float = 60.0,
+        metric_name: str = "memory",
+    ):
+        # key -> (value, expires_at monotonic or None, approx bytes); order = LRU -> MRU.
+        self.store: "OrderedDict[str, Tuple[Any, Optional[float], int]]" = OrderedDict()
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self.sweep_interval_seconds = max(0.0, float(sweep_interval_seconds))
+        self.bytes = 0
+        self.metric_name = metric_name
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
 
     def get(self, key: str) -> Optional[Any]:
-        item = self.store.get(key)
-        if not item:
+        with self._lock:
+            item = self._live(key, time.monotonic())
+        if item is None:
+            inc_counter(f"cache_{self.metric_name}_misses_total")
             return None
-        value, expires_at = item
-        if expires_at and datetime.now() > expires_at:
-            self.delete(key)
+        inc_counter(f"cache_{self.metric_name}_hits_total")
+        return item[0]
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        misses = 0
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                item = self._live(key, now)
+                if item is None:
+                    misses += 1
+                else:
+                    out[key] = item[0]
+        if misses:
+            inc_counter(f"cache_{self.metric_name}_misses_total", value=misses)
+        if out:
+            inc_counter(f"cache_{self.metric_name}_hits_total", value=len(out))
+        return out
+
+    def _live(self, key: str, now: float) -> Optional[Tuple[Any, Optional[float], int]]:
+        """Entry for `key` unless missing/expired (caller holds the lock); marks it MRU."""
+        item = self.store.get(key)
+        if item is not None and item[1] is not None and now > item[1]:
+            self._drop(key)
             return None
-        return value
+        if item is not None:
+            self.store.move_to_end(key)
+        return item
 
     def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
-        expires_at = (
-            datetime.now() + timedelta(seconds=ttl_seconds) if ttl_seconds else None
-        )
-        self.store[key] = (value, expires_at)
+        self.put(key, value, ttl_seconds=ttl_seconds, size=_approx_size(value))
+
+    def put(
+        self, key: str, value: Any, *, ttl_seconds: Optional[float], size: int
+    ) -> None:
+        """`set` with a caller-known size (e.g. the raw bytes already read from Redis)."""
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds else None
+        evicted = 0
+        with self._lock:
+            self._drop(key)
+            if self.max_bytes and size > self.max_bytes:
+                inc_counter(
+                    f"cache_{self.metric_name}_evictions_total",
+                    labels={"reason": "oversize"},
+                )
+                return
+            self.store[key] = (value, expires_at, size)
+            self.bytes += size
+            while len(self.store) > 1 and (
+                (self.max_entries and len(self.store) > self.max_entries)
+                or (self.max_bytes and self.bytes > self.max_bytes)
+            ):
+                self._drop(next(iter(self.store)))
+                evicted += 1
+        if evicted:
+            inc_counter(
+                f"cache_{self.metric_name}_evictions_total",
+                labels={"reason": "lru"},
+                value=evicted,
+            )
+        self._ensure_sweeper()
 
     def delete(self, key: str) -> None:
-        self.store.pop(key, None)
+        with self._lock:
+            self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.store.clear()
+            self.bytes = 0
+
+    def _drop(self, key: str) -> None:
+        item = self.store.pop(key, None)
+        if item is not None:
+            self.bytes -= item[2]
+
+    def sweep_expired(self, limit: Optional[int] = None) -> int:
+        """Remove expired entries (at most `limit`); returns how many were removed."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, (_, exp, _) in self.store.items() if exp and now > exp]
+            if limit is not None:
+                expired = expired[: max(0, int(limit))]
+            for k in expired:
+                self._drop(k)
+        if expired:
+            inc_counter(
+                f"cache_{self.metric_name}_evictions_total",
+                labels={"reason": "expired"},
+                value=len(expired),
+            )
+        return len(expired)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self.store), "bytes": self.bytes}
+
+    def _ensure_sweeper(self) -> None:
+        # Started on first write so instances that are never used don't spawn a thread.
+        if not self.sweep_interval_seconds or self._sweeper is not None:
+            return
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(
+                target=_sweep_loop,
+                args=(weakref.ref(self), self.sweep_interval_seconds),
+                name="inmemory-cache-sweeper",
+                daemon=True,
+            )
+            self._sweeper.start()
+
+
+def _sweep_loop(ref: "weakref.ReferenceType[InMemoryCache]", interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        cache = ref()
+        if cache is None:
+            return
+        try:
+            cache.sweep_expired()
+        except Exception as e:
+            logging.warning("in-memory cache sweep failed: %s", e)
+        del cache
 
 
 class RedisCache(BaseCache):
-    def __init__(self, url: str, prefix: str = ""):
+    def __init__(
+        self, url: str, prefix: str = "", *, codec: Optional[CacheCodec] = None
+    ):
         if not redis:
             raise RuntimeError("redis package not installed")
-        self.client = redis.Redis.from_url(url)
+        self.url = url
+        # Shared process-wide pool (pinged once when first built, see utils/redis_pool).
+        self.client = get_redis(url)
+        if self.client is None:
+            raise RuntimeError(f"Redis unavailable ({redis_target(url)})")
         self.prefix = prefix
+        # Versioned binary/compressed values; legacy JSON text values still decode.
+        self.codec = codec or CacheCodec.from_settings(default=_json_default)
 
     def _k(self, key: str) -> str:
         return f"{self.prefix}{key}"
 
-    def get(self, key: str) -> Optional[Any]:
-        data = self.client.get(self._k(key))
+    def _decode(self, key: str, data: Any) -> Optional[Any]:
         if data is None:
             return None
         try:
-            return json.loads(data)
+            return self.codec.decode(key, data)
         except Exception:
             return None
 
+    def get(self, key: str) -> Optional[Any]:
+        return self._decode(key, self.client.get(self._k(key)))
+
     def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
-        data = json.dumps(value, ensure_ascii=False, default=_json_default)
+        data = self.codec.encode(key, value)
         self.client.set(self._k(key), data, ex=ttl_seconds)
 
     def delete(self, key: str) -> None:
         self.client.delete(self._k(key))
 
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        rows = self.client.mget([self._k(k) for k in keys])
+        out: Dict[str, Any] = {}
+        for key, data in zip(keys, rows):
+            value = self._decode(key, data)
+            if value is not None:
+                out[key] = value
+        return out
+
+    def set_many(
+        self, items: Dict[str, Any], ttl_seconds: Optional[int] = None
+    ) -> None:
+        self._apply(
+            [("set", k, v, ttl_seconds) for k, v in items.items()], transaction=False
+        )
+
+    def _apply(
+        self, ops: List[Tuple[str, str, Any, Optional[int]]], transaction: bool = True
+    ) -> None:
+        if not ops:
+            return
+        pipe = self.client.pipeline(transaction=transaction)
+        self._queue(pipe, ops)
+        pipe.execute()
+
+    def _queue(self, pipe: Any, ops: List[Tuple[str, str, Any, Optional[int]]]) -> None:
+        for op, key, value, ttl_seconds in ops:
+            if op == "set":
+                pipe.set(self._k(key), self.codec.encode(key, value), ex=ttl_seconds)
+            else:
+                pipe.delete(self._k(key))
+
+
+NEAR_CACHE_DEFAULT_PREFIXES = ("sess:", "qbank:", "qindex:", "jobreq:", "ocr_cache:")
+
+
+def _clone(value: Any) -> Any:
+    """Copy the mutable parts of a JSON value so callers can't mutate the near-cache entry."""
+    if isinstance(value, dict):
+        return {k: _clone(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_clone(v) for v in value]
+    return value
+
+
+class NearCache(RedisCache):
+    """
+    RedisCache with a short-lived in-process copy of hot keys (two-tier cache).
+
+    - Only keys under `hot_prefixes` are kept locally, for at most `ttl_seconds`.
+    - Writes/deletes through this class drop the local copy and publish the key on
+      `{prefix}cache:invalidate`; every instance listens and drops its copy.
+    - Redis keyspace notifications (`notify-keyspace-events` incl. `K$g`/`Kx`) are also honoured
+      when the server has them enabled, covering writes that bypass this class and expiries.
+    - While the invalidation listener is not connected, reads bypass the local tier.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        prefix: str = "",
+        *,
+        ttl_seconds: float = 5.0,
+        max_entries: int = 2048,
+        max_bytes: int = 64 * 1024 * 1024,
+        hot_prefixes: Tuple[str, ...] = NEAR_CACHE_DEFAULT_PREFIXES,
+    ):
+        super().__init__(url, prefix=prefix)
+        self.ttl_seconds = float(ttl_seconds)
+        self.hot_prefixes = tuple(p for p in hot_prefixes if p)
+        self.local = InMemoryCache(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            sweep_interval_seconds=max(30.0, self.ttl_seconds),
+            metric_name="near",
+        )
+        self.channel = self._k("cache:invalidate")
+        db = self.client.connection_pool.connection_kwargs.get("db", 0)
+        self._keyspace_prefix = f"__keyspace@{db}__:{self.prefix}"
+        self._listening = False
+        # Bumped on every invalidation: a read that raced with one must not repopulate.
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+
+    def _is_hot(self, key: str) -> bool:
+        return key.startswith(self.hot_prefixes)
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self._is_hot(key):
+            return super().get(key)
+        hit = self._local_get(key)
+        if hit is not None:
+            return _clone(hit)
+        epoch = self._epoch
+        data = self.client.get(self._k(key))
+        return self._local_fill(key, data, epoch)
+
+    def _local_get(self, key: str) -> Optional[Any]:
+        self._ensure_listener()
+        return self.local.get(key) if self._listening else None
+
+    def _local_fill(self, key: str, data: Any, epoch: int) -> Optional[Any]:
+        """Parse a value read from Redis and keep it locally unless invalidated meanwhile."""
+        value = self._decode(key, data)
+        if value is None:
+            return None
+        with self._lock:
+            if self._listening and epoch == self._epoch:
+                self.local.put(key, value, ttl_seconds=self.ttl_seconds, size=len(data))
+        return _clone(value)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        if not self._is_hot(key):
+            return super().set(key, value, ttl_seconds=ttl_seconds)
+        self._apply([("set", key, value, ttl_seconds)], transaction=False)
+
+    def delete(self, key: str) -> None:
+        if not self._is_hot(key):
+            return super().delete(key)
+        self._apply([("delete", key, None, None)], transaction=False)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        remote: List[str] = []
+        for key in dict.fromkeys(keys):
+            hit = self._local_get(key) if self._is_hot(key) else None
+            if hit is not None:
+                out[key] = _clone(hit)
+            else:
+                remote.append(key)
+        if remote:
+            epoch = self._epoch
+            rows = self.client.mget([self._k(k) for k in remote])
+            for key, data in zip(remote, rows):
+                if self._is_hot(key):
+                    value = self._local_fill(key, data, epoch)
+                else:
+                    value = self._decode(key, data)
+                if value is not None:
+                    out[key] = value
+        return out
+
+    def _apply(
+        self, ops: List[Tuple[str, str, Any, Optional[int]]], transaction: bool = True
+    ) -> None:
+        for _, key, _, _ in ops:
+            if self._is_hot(key):
+                self._invalidate_local(key)
+        super()._apply(ops, transaction=transaction)
+
+    def _queue(self, pipe: Any, ops: List[Tuple[str, str, Any, Optional[int]]]) -> None:
+        super()._queue(pipe, ops)
+        # Published in the same round trip so other instances drop their copies.
+        for key in dict.fromkeys(k for _, k, _, _ in ops if self._is_hot(k)):
+            pipe.publish(self.channel, key)
+
+    def _invalidate_local(self, key: Optional[str]) -> None:
+        with self._lock:
+            self._epoch += 1
+            if key is None:
+                self.local.clear()
+            else:
+                self.local.delete(key)
+
+    def _ensure_listener(self) -> None:
+        if self._listener is not None:
+            return
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(
+                target=self._listen_forever, name="near-cache-invalidation", daemon=True
+            )
+            self._listener.start()
+
+    def _on_message(self, msg: dict) -> None:
+        channel = _decode_str(msg.get("channel"))
+        if channel == self.channel:
+            self._invalidate_local(_decode_str(msg.get("data")))
+        elif channel.startswith(self._keyspace_prefix):
+            self._invalidate_local(channel[len(self._keyspace_prefix) :])
+
+    def _listen_forever(self) -> None:
+        backoff = 0.5
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                pubsub.psubscribe(
+                    *[f"{self._keyspace_prefix}{p}*" for p in self.hot_prefixes]
+                )
+                self._listening = True
+                backoff = 0.5
+                for msg in pubsub.listen():
+                    if msg and msg.get("type") in {"message", "pmessage"}:
+                        self._on_message(msg)
+            except Exception as e:
+                logging.warning("near cache invalidation listener failed: %s", e)
+            finally:
+                # Anything cached while we were deaf may be stale.
+                self._listening = False
+                self._invalidate_local(None)
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+
+def _decode_str(v: Any) -> str:
+    return v.decode("utf-8") if isinstance(v, (bytes, bytearray)) else str(v or "")
+
+
+def _new_inmemory_cache() -> InMemoryCache:
+    settings = get_settings()
+    return InMemoryCache(
+        max_entries=int(settings.cache_memory_max_entries),
+        max_bytes=int(settings.cache_memory_max_bytes),
+        sweep_interval_seconds=float(settings.cache_memory_sweep_interval_seconds),
+    )
+
+
+def _new_redis_cache(redis_url: str, prefix: str) -> RedisCache:
+    settings = get_settings()
+    ttl_seconds = float(settings.cache_near_ttl_seconds)
+    if not settings.cache_near_enabled or ttl_seconds <= 0:
+        return RedisCache(redis_url, prefix=prefix)
+    raw_prefixes = str(settings.cache_near_prefixes or "")
+    return NearCache(
+        redis_url,
+        prefix=prefix,
+        ttl_seconds=ttl_seconds,
+        max_entries=int(settings.cache_near_max_entries),
+        max_bytes=int(settings.cache_near_max_bytes),
+        hot_prefixes=tuple(p.strip() for p in raw_prefixes.split(",") if p.strip()),
+    )
+
 
 def get_cache_store() -> BaseCache:
     global _CACHED_STORE, _CACHED_STORE_CONFIG
@@ -119,8 +584,7 @@ def get_cache_store() -> BaseCache:
         return _CACHED_STORE
     if redis_url and redis:
         try:
-            cache = RedisCache(redis_url, prefix=prefix)
-            cache.client.ping()  # Verify connection immediately
+            cache = _new_redis_cache(redis_url, prefix)
             _CACHED_STORE = cache
             _CACHED_STORE_CONFIG = config
             return cache
@@ -131,7 +595,7 @@ def get_cache_store() -> BaseCache:
                 "Redis configured but unavailable (ping failed), falling back to in-memory cache: %s",
                 e,
             )
-            _CACHED_STORE = InMemoryCache()
+            _CACHED_STORE = _new_inmemory_cache()
             _CACHED_STORE_CONFIG = config
             return _CACHED_STORE
     if redis_url and not redis:
@@ -142,6 +606,122 @@ def get_cache_store() -> BaseCache:
         )
     if require_redis and not redis_url:
         raise RuntimeError("REQUIRE_REDIS=1 but REDIS_URL is not set")
-    _CACHED_STORE = InMemoryCache()
+    _CACHED_STORE = _new_inmemory_cache()
     _CACHED_STORE_CONFIG = config
     return _CACHED_STORE
+
+
+class AsyncBaseCache:
+    """Async counterpart of `BaseCache` for FastAPI handlers (no executor hop per call)."""
+
+    sync: BaseCache
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(
+        self, key: str, value: Any, ttl_seconds: Optional[int] = None
+    ) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class AsyncCacheAdapter(AsyncBaseCache):
+    """
+    Async view of a sync store. In-memory operations are plain dict work and run inline;
+    anything else (e.g. Redis without `redis.asyncio`) falls back to a worker thread.
+    """
+
+    def __init__(self, sync: BaseCache):
+        self.sync = sync
+        self._inline = isinstance(sync, InMemoryCache)
+
+    async def get(self, key: str) -> Optional[Any]:
+        if self._inline:
+            return self.sync.get(key)
+        return await asyncio.to_thread(self.sync.get, key)
+
+    async def set(
+        self, key: str, value: Any, ttl_seconds: Optional[int] = None
+    ) -> None:
+        if self._inline:
+            return self.sync.set(key, value, ttl_seconds=ttl_seconds)
+        await asyncio.to_thread(self.sync.set, key, value, ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        if self._inline:
+            return self.sync.delete(key)
+        await asyncio.to_thread(self.sync.delete, key)
+
+
+class AsyncRedisCache(AsyncBaseCache):
+    """
+    `redis.asyncio` twin of the process's `RedisCache`: same keys/prefix/encoding.
+    When the sync store is a `NearCache`, hot keys share its local tier and invalidation
+    channel, so sync and async callers in one process never see diverging values.
+    """
+
+    def __init__(self, sync: RedisCache):
+        self.sync = sync
+        self.prefix = sync.prefix
+        self.near = sync if isinstance(sync, NearCache) else None
+
+    @property
+    def client(self) -> Any:
+        return get_async_redis(self.sync.url)
+
+    def _k(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _near(self, key: str) -> Optional[NearCache]:
+        return self.near if self.near is not None and self.near._is_hot(key) else None
+
+    async def get(self, key: str) -> Optional[Any]:
+        near = self._near(key)
+        if near is None:
+            return self.sync._decode(key, await self.client.get(self._k(key)))
+        hit = near._local_get(key)
+        if hit is not None:
+            return _clone(hit)
+        epoch = near._epoch
+        data = await self.client.get(self._k(key))
+        return near._local_fill(key, data, epoch)
+
+    async def set(
+        self, key: str, value: Any, ttl_seconds: Optional[int] = None
+    ) -> None:
+        data = self.sync.codec.encode(key, value)
+        near = self._near(key)
+        if near is None:
+            await self.client.set(self._k(key), data, ex=ttl_seconds)
+            return
+        near._invalidate_local(key)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(self._k(key), data, ex=ttl_seconds)
+        pipe.publish(near.channel, key)
+        await pipe.execute()
+
+    async def delete(self, key: str) -> None:
+        near = self._near(key)
+        if near is None:
+            await self.client.delete(self._k(key))
+            return
+        near._invalidate_local(key)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.delete(self._k(key))
+        pipe.publish(near.channel, key)
+        await pipe.execute()
+
+
+def get_async_cache_store() -> AsyncBaseCache:
+    """Async view of `get_cache_store()` (same backing store, same keys)."""
+    global _ASYNC_STORE
+    store = get_cache_store()
+    if _ASYNC_STORE is None or _ASYNC_STORE.sync is not store:
+        if isinstance(store, RedisCache) and redis_asyncio is not None:
+            _ASYNC_STORE = AsyncRedisCache(store)
+        else:
+            _ASYNC_STORE = AsyncCacheAdapter(store)
+    return _ASYNC_STORE
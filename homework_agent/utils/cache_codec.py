@@ -0,0 +1,257 @@
+"""
+Value codec for Redis-backed cache entries.
+
+Why:
+- `RedisCache` used to store every value as `json.dumps(...)` text; sessions, question banks,
+  qindex maps and job results are large and were serialized/parsed in full on every access.
+
+Wire format (written by this module):
+    0xA5 | version | format id | compression id | body
+
+`0xA5` can never start a JSON document (it is not a valid leading UTF-8 byte), so values
+without the header are legacy JSON text and still decode. Formats and compressors are
+optional dependencies: `auto` picks the fastest installed one, and a value whose format or
+compressor is missing in this process fails to decode (treated as a cache miss), never crashes.
+
+Rollout: pods from before this module read framed values as cache misses, so `CACHE_CODEC`
+defaults to `legacy` (plain JSON, readable by every version) for this release. Every pod can
+decode framed values once it runs this code; switch to `auto` in the next release.
+
+Per key family (`sess`, `qbank`, `job`, ... = key up to the first `:`) the codec records
+stored vs. raw byte counters so Redis memory/bandwidth changes are visible in /metrics.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import zlib
+from typing import Any, Callable, Optional, Tuple
+
+from homework_agent.utils.metrics import inc_counter, observe_histogram
+from homework_agent.utils.settings import get_settings
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # optional
+
+try:
+    import msgpack  # type: ignore
+except ImportError:
+    msgpack = None  # optional
+
+try:
+    import zstandard  # type: ignore
+except ImportError:
+    zstandard = None  # optional
+
+try:
+    import lz4.frame as lz4_frame  # type: ignore
+except ImportError:
+    lz4_frame = None  # optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = 0xA5
+CODEC_VERSION = 1
+
+FORMAT_JSON = 1
+FORMAT_ORJSON = 2
+FORMAT_MSGPACK = 3
+_FORMAT_NAMES = {
+    "json": FORMAT_JSON,
+    "orjson": FORMAT_ORJSON,
+    "msgpack": FORMAT_MSGPACK,
+}
+
+COMPRESS_NONE = 0
+COMPRESS_ZLIB = 1
+COMPRESS_ZSTD = 2
+COMPRESS_LZ4 = 3
+_COMPRESS_NAMES = {
+    "none": COMPRESS_NONE,
+    "zlib": COMPRESS_ZLIB,
+    "zstd": COMPRESS_ZSTD,
+    "lz4": COMPRESS_LZ4,
+}
+
+_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def key_family(key: str) -> str:
+    """Metric label for a cache key: `sess:abc` -> `sess`, `job:1:page:0` -> `job`."""
+    head, sep, _ = str(key).partition(":")
+    return head if sep and head else "other"
+
+
+def _format_available(fmt: int) -> bool:
+    if fmt == FORMAT_ORJSON:
+        return orjson is not None
+    if fmt == FORMAT_MSGPACK:
+        return msgpack is not None
+    return fmt == FORMAT_JSON
+
+
+def _compression_available(comp: int) -> bool:
+    if comp == COMPRESS_ZSTD:
+        return zstandard is not None
+    if comp == COMPRESS_LZ4:
+        return lz4_frame is not None
+    return comp in {COMPRESS_NONE, COMPRESS_ZLIB}
+
+
+def _dumps(fmt: int, value: Any, default: Callable[[Any], Any]) -> bytes:
+    if fmt == FORMAT_ORJSON:
+        return orjson.dumps(value, default=default, option=orjson.OPT_NON_STR_KEYS)
+    if fmt == FORMAT_MSGPACK:
+        return msgpack.packb(value, default=default, use_bin_type=True)
+    return json.dumps(value, ensure_ascii=False, default=default).encode("utf-8")
+
+
+def _loads(fmt: int, body: bytes) -> Any:
+    if not _format_available(fmt):
+        raise ValueError(f"cache value format {fmt} not available in this process")
+    if fmt == FORMAT_ORJSON:
+        return orjson.loads(body)
+    if fmt == FORMAT_MSGPACK:
+        return msgpack.unpackb(body, raw=False, strict_map_key=False)
+    if fmt == FORMAT_JSON:
+        return json.loads(body)
+    raise ValueError(f"unknown cache value format: {fmt}")
+
+
+def _compressor(comp: int, level: int) -> Callable[[bytes], bytes]:
+    if comp == COMPRESS_ZSTD:
+        return zstandard.ZstdCompressor(level=level).compress
+    if comp == COMPRESS_LZ4:
+        return lambda b: lz4_frame.compress(b, compression_level=level)
+    return lambda b: zlib.compress(b, level)
+
+
+def _decompress(comp: int, body: bytes) -> bytes:
+    if comp == COMPRESS_NONE:
+        return body
+    if comp == COMPRESS_ZSTD:
+        if zstandard is None:
+            raise ValueError("zstd-compressed cache value but zstandard not installed")
+        return zstandard.ZstdDecompressor().decompress(body)
+    if comp == COMPRESS_LZ4:
+        if lz4_frame is None:
+            raise ValueError("lz4-compressed cache value but lz4 not installed")
+        return lz4_frame.decompress(body)
+    if comp == COMPRESS_ZLIB:
+        return zlib.decompress(body)
+    raise ValueError(f"unknown cache value compression: {comp}")
+
+
+def _pick_format(name: str) -> Optional[int]:
+    name = (name or "legacy").strip().lower()
+    if name == "legacy":
+        return None
+    if name == "auto":
+        for fmt in (FORMAT_ORJSON, FORMAT_JSON):
+            if _format_available(fmt):
+                return fmt
+    fmt = _FORMAT_NAMES.get(name)
+    if fmt is None or not _format_available(fmt):
+        logger.warning("CACHE_CODEC=%s unavailable; using json", name)
+        return FORMAT_JSON
+    return fmt
+
+
+def _pick_compression(name: str) -> int:
+    name = (name or "auto").strip().lower()
+    if name == "auto":
+        for comp in (COMPRESS_ZSTD, COMPRESS_LZ4, COMPRESS_ZLIB):
+            if _compression_available(comp):
+                return comp
+    comp = _COMPRESS_NAMES.get(name)
+    if comp is None or not _compression_available(comp):
+        logger.warning("CACHE_COMPRESSION=%s unavailable; using zlib", name)
+        return COMPRESS_ZLIB
+    return comp
+
+
+class CacheCodec:
+    """
+    Encode/decode cache values. `format=None` ("legacy") writes plain JSON text without a
+    header, which every process version can read (use it while rolling out a mixed fleet).
+    """
+
+    def __init__(
+        self,
+        *,
+        format: Optional[int] = FORMAT_JSON,
+        compression: int = COMPRESS_NONE,
+        compress_min_bytes: int = 4096,
+        level: int = 3,
+        default: Callable[[Any], Any] = str,
+    ):
+        self.format = format
+        self.default = default
+        self.compression = compression
+        self.compress_min_bytes = max(0, int(compress_min_bytes))
+        self._compress = (
+            _compressor(compression, level) if compression != COMPRESS_NONE else None
+        )
+
+    @classmethod
+    def from_settings(cls, *, default: Callable[[Any], Any] = str) -> "CacheCodec":
+        settings = get_settings()
+        return cls(
+            format=_pick_format(settings.cache_codec),
+            compression=_pick_compression(settings.cache_compression),
+            compress_min_bytes=int(settings.cache_compress_min_bytes),
+            default=default,
+        )
+
+    def _encode_body(self, value: Any) -> Tuple[int, bytes]:
+        fmt = self.format or FORMAT_JSON
+        try:
+            return fmt, _dumps(fmt, value, self.default)
+        except (TypeError, ValueError, OverflowError):
+            # e.g. ints beyond 64 bits: stdlib json accepts anything `default` can coerce.
+            return FORMAT_JSON, _dumps(FORMAT_JSON, value, self.default)
+
+    def encode(self, key: str, value: Any) -> bytes:
+        fmt, raw = self._encode_body(value)
+        if self.format is None:
+            data = raw
+        else:
+            comp, body = COMPRESS_NONE, raw
+            if self._compress is not None and len(raw) >= self.compress_min_bytes:
+                packed = self._compress(raw)
+                if len(packed) < len(raw):
+                    comp, body = self.compression, packed
+            data = bytes((MAGIC, CODEC_VERSION, fmt, comp)) + body
+        family = key_family(key)
+        inc_counter(
+            "cache_raw_bytes_written_total", labels={"family": family}, value=len(raw)
+        )
+        inc_counter(
+            "cache_bytes_written_total", labels={"family": family}, value=len(data)
+        )
+        observe_histogram(
+            "cache_value_bytes",
+            value=len(data),
+            buckets=_SIZE_BUCKETS,
+            labels={"family": family},
+        )
+        return data
+
+    def decode(self, key: str, data: Any) -> Any:
+        """Decode a stored value (framed or legacy JSON). Raises ValueError on corrupt data."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        inc_counter(
+            "cache_bytes_read_total",
+            labels={"family": key_family(key)},
+            value=len(data),
+        )
+        if not data or data[0] != MAGIC:
+            return json.loads(data)
+        if len(data) < 4 or data[1] != CODEC_VERSION:
+            raise ValueError(f"unsupported cache value header: {data[:4]!r}")
+        fmt, comp = data[2], data[3]
+        return _loads(fmt, _decompress(comp, bytes(data[4:])))
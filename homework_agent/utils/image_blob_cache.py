@@ -0,0 +1,434 @@
+"""
+Process-local, content-addressed cache of downloaded images (bytes + decoded views).
+
+Why:
+- One page image used to cross the network several times per job: qindex (page size), slice
+  cropping, autonomous-tool hashing/compression, the OpenCV pipeline and OCR preprocessing
+  each downloaded and decoded it on their own.
+
+How:
+- `get_image_blob(url)` -> `ImageBlob(data, content_type, sha256)` or None. URLs map to content
+  hashes (`IMAGE_BLOB_CACHE_URL_TTL_SECONDS`); blobs live once per hash in a byte-bounded LRU
+  (`IMAGE_BLOB_CACHE_MAX_BYTES`, 0 disables caching). Concurrent misses for the same URL wait
+  for the first download instead of starting their own.
+- Optional disk tier (`IMAGE_BLOB_CACHE_DIR`, bounded by `IMAGE_BLOB_CACHE_DISK_MAX_BYTES`,
+  oldest files pruned first) so restarted workers on the same host keep their warm pages.
+- `blob.pil()` / `blob.cv2()` hand out decoded views (PIL RGB / OpenCV BGR) shared by all
+  consumers of the same content, kept for the `IMAGE_BLOB_CACHE_MAX_DECODED` most recent
+  images. They are read-only: copy before mutating in place (the ndarray is non-writeable).
+- Callers keep their own fetcher semantics (SSRF-safe fetch by default, `fetch=` to override)
+  and size limits (`max_bytes`, checked on hits too). URL entries (memory and disk) are
+  partitioned by fetch `policy`: only the SSRF-safe default fetcher fills `public`, so bytes a
+  custom fetcher pulled from an arbitrary host are never served to public-URL callers.
+- /metrics: `image_blob_cache_total{outcome=hit|disk_hit|miss|shared|skip}` and
+  `image_blob_decode_total{kind,outcome=hit|miss}`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from homework_agent.utils.metrics import inc_counter
+from homework_agent.utils.settings import DEFAULT_MAX_UPLOAD_IMAGE_BYTES, get_settings
+
+logger = logging.getLogger(__name__)
+
+Fetcher = Callable[[str], Optional[Tuple[bytes, str]]]
+
+
+def _count(outcome: str) -> None:
+    inc_counter("image_blob_cache_total", labels={"outcome": outcome})
+
+
+@dataclass(frozen=True)
+class ImageBlob:
+    data: bytes
+    content_type: str
+    sha256: str
+
+    @classmethod
+    def from_bytes(cls, data: bytes, content_type: str = "image/jpeg") -> "ImageBlob":
+        """Blob for bytes already in hand (data URIs); decoded views are still shared."""
+        return cls(
+            data=data,
+            content_type=content_type or "image/jpeg",
+            sha256=hashlib.sha256(data).hexdigest(),
+        )
+
+    def pil(self) -> Any:
+        """Decoded RGB PIL image (shared; do not mutate in place)."""
+        return _decoded(self, "pil", _decode_pil)
+
+    def cv2(self) -> Any:
+        """Decoded BGR ndarray for OpenCV (shared, read-only); None if undecodable."""
+        return _decoded(self, "cv2", _decode_cv2)
+
+
+def _decode_pil(data: bytes) -> Any:
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(data))
+    return img.convert("RGB")
+
+
+def _decode_cv2(data: bytes) -> Any:
+    import cv2
+    import numpy as np
+
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is not None:
+        img.flags.writeable = False
+    return img
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.blob: Optional[ImageBlob] = None
+
+
+class ImageBlobCache:
+    """URL -> content hash index plus a byte-bounded LRU of blobs (and an optional disk tier)."""
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = 256 * 1024 * 1024,
+        url_ttl_seconds: float = 3600.0,
+        max_decoded: int = 4,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 2 * 1024 * 1024 * 1024,
+    ):
+        self.max_bytes = max(0, int(max_bytes))
+        self.url_ttl_seconds = max(0.0, float(url_ttl_seconds))
+        self.max_decoded = max(0, int(max_decoded))
+        self.disk_dir = disk_dir or None
+        self.disk_max_bytes = max(0, int(disk_max_bytes))
+        self.bytes = 0
+        # sha256 -> blob; order = LRU -> MRU.
+        self.blobs: "OrderedDict[str, ImageBlob]" = OrderedDict()
+        # "{policy}\n{url}" -> (sha256, expires_at monotonic)
+        self.urls: Dict[str, Tuple[str, float]] = {}
+        # (sha256, kind) -> decoded view; order = LRU -> MRU.
+        self.decoded: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None
+
+    @classmethod
+    def from_settings(cls) -> "ImageBlobCache":
+        settings = get_settings()
+        return cls(
+            max_bytes=int(settings.image_blob_cache_max_bytes),
+            url_ttl_seconds=int(settings.image_blob_cache_url_ttl_seconds),
+            max_decoded=int(settings.image_blob_cache_max_decoded),
+            disk_dir=str(settings.image_blob_cache_dir or "").strip() or None,
+            disk_max_bytes=int(settings.image_blob_cache_disk_max_bytes),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    # -- lookup -----------------------------------------------------------------------------
+
+    def get(self, url: str, fetch: Fetcher, *, policy: str = "") -> Optional[ImageBlob]:
+        """
+        Blob for `url`, fetched with `fetch` on a miss. `policy` names what `fetch` guarantees
+        (e.g. "public" = SSRF-checked); entries are only shared between callers of one policy.
+        """
+        if not self.enabled:
+            _count("skip")
+            fetched = fetch(url)
+            return ImageBlob.from_bytes(*fetched) if fetched else None
+        key = _entry_key(policy, url)
+        with self._lock:
+            blob = self._lookup(key)
+            if blob is not None:
+                _count("hit")
+                return blob
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.blob is not None:
+                _count("shared")
+                return flight.blob
+            # The leader failed; try ourselves rather than sharing its error.
+            fetched = fetch(url)
+            return self.put(url, *fetched, policy=policy) if fetched else None
+        try:
+            blob = self._disk_get(key)
+            if blob is not None:
+                _count("disk_hit")
+                self._remember(key, blob)
+            else:
+                _count("miss")
+                fetched = fetch(url)
+                blob = self.put(url, *fetched, policy=policy) if fetched else None
+            flight.blob = blob
+            return blob
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def put(
+        self, url: Optional[str], data: bytes, content_type: str, *, policy: str = ""
+    ) -> ImageBlob:
+        blob = ImageBlob.from_bytes(data, content_type)
+        if self.enabled:
+            key = _entry_key(policy, url) if url else None
+            self._remember(key, blob)
+            self._disk_put(key, blob)
+        return blob
+
+    def _lookup(self, key: str) -> Optional[ImageBlob]:
+        """Blob for the URL entry `key` when fresh and resident (caller holds the lock)."""
+        entry = self.urls.get(key)
+        if entry is None:
+            return None
+        sha, expires_at = entry
+        if time.monotonic() > expires_at:
+            self.urls.pop(key, None)
+            return None
+        blob = self.blobs.get(sha)
+        if blob is None:
+            self.urls.pop(key, None)
+            return None
+        self.blobs.move_to_end(sha)
+        return blob
+
+    def _remember(self, key: Optional[str], blob: ImageBlob) -> None:
+        size = len(blob.data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if blob.sha256 not in self.blobs:
+                self.blobs[blob.sha256] = blob
+                self.bytes += size
+            self.blobs.move_to_end(blob.sha256)
+            if key:
+                self.urls[key] = (blob.sha256, time.monotonic() + self.url_ttl_seconds)
+            while self.bytes > self.max_bytes and self.blobs:
+                sha, old = self.blobs.popitem(last=False)
+                self.bytes -= len(old.data)
+                for key in [k for k in self.decoded if k[0] == sha]:
+                    self.decoded.pop(key, None)
+            if len(self.urls) > 4 * max(1, len(self.blobs)):
+                self.urls = {u: e for u, e in self.urls.items() if e[0] in self.blobs}
+
+    # -- decoded views ----------------------------------------------------------------------
+
+    def decoded_view(
+        self, blob: ImageBlob, kind: str, decode: Callable[[bytes], Any]
+    ) -> Any:
+        key = (blob.sha256, kind)
+        with self._lock:
+            view = self.decoded.get(key)
+            if view is not None:
+                self.decoded.move_to_end(key)
+        if view is not None:
+            inc_counter(
+                "image_blob_decode_total", labels={"kind": kind, "outcome": "hit"}
+            )
+            return view
+        inc_counter("image_blob_decode_total", labels={"kind": kind, "outcome": "miss"})
+        view = decode(blob.data)
+        if view is None or not self.enabled or self.max_decoded <= 0:
+            return view
+        with self._lock:
+            self.decoded[key] = view
+            self.decoded.move_to_end(key)
+            while len(self.decoded) > self.max_decoded:
+                self.decoded.popitem(last=False)
+        return view
+
+    # -- disk tier --------------------------------------------------------------------------
+
+    def _disk_paths(self, key: str) -> Tuple[str, str]:
+        assert self.disk_dir
+        url_key = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, "urls", url_key), os.path.join(
+            self.disk_dir, "blobs"
+        )
+
+    def _disk_get(self, key: str) -> Optional[ImageBlob]:
+        if not self.disk_dir:
+            return None
+        try:
+            url_path, blob_dir = self._disk_paths(key)
+            if time.time() - os.path.getmtime(url_path) > self.url_ttl_seconds:
+                return None
+            with open(url_path, "r", encoding="utf-8") as f:
+                sha, _, content_type = f.read().partition("\n")
+            blob_path = os.path.join(blob_dir, sha)
+            with open(blob_path, "rb") as f:
+                data = f.read()
+            if hashlib.sha256(data).hexdigest() != sha:
+                return None
+            os.utime(blob_path)
+            return ImageBlob(
+                data=data, content_type=content_type or "image/jpeg", sha256=sha
+            )
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"image blob disk read failed: {e}")
+            return None
+
+    def _disk_put(self, key: Optional[str], blob: ImageBlob) -> None:
+        if not self.disk_dir or len(blob.data) > self.disk_max_bytes:
+            return
+        try:
+            blob_dir = os.path.join(self.disk_dir, "blobs")
+            blob_path = os.path.join(blob_dir, blob.sha256)
+            if not os.path.exists(blob_path):
+                os.makedirs(blob_dir, exist_ok=True)
+                _atomic_write(blob_path, blob.data)
+                self._disk_grow(len(blob.data))
+            if key:
+                url_path, _ = self._disk_paths(key)
+                os.makedirs(os.path.dirname(url_path), exist_ok=True)
+                _atomic_write(
+                    url_path, f"{blob.sha256}\n{blob.content_type}".encode("utf-8")
+                )
+        except Exception as e:
+            logger.debug(f"image blob disk write failed: {e}")
+
+    def _disk_grow(self, size: int) -> None:
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = _dir_size(os.path.join(self.disk_dir, "blobs"))
+            else:
+                self._disk_bytes += size
+            over = self._disk_bytes > self.disk_max_bytes
+        if over:
+            self._disk_prune()
+
+    def _disk_prune(self) -> None:
+        """Drop least recently used blob files until the tier is under 90% of its bound."""
+        blob_dir = os.path.join(self.disk_dir, "blobs")
+        files = []
+        for entry in os.scandir(blob_dir):
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(f[1] for f in files)
+        target = int(self.disk_max_bytes * 0.9)
+        for _mtime, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                continue
+        with self._lock:
+            self._disk_bytes = total
+
+
+def _entry_key(policy: str, url: str) -> str:
+    return f"{policy}\n{url}"
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for entry in os.scandir(path):
+        try:
+            total += entry.stat().st_size
+        except FileNotFoundError:
+            continue
+    return total
+
+
+_CACHE: Optional[ImageBlobCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_image_blob_cache() -> ImageBlobCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = ImageBlobCache.from_settings()
+    return _CACHE
+
+
+def reset_image_blob_cache() -> None:
+    """Drop the process cache (tests; next use rebuilds it from settings)."""
+    global _CACHE
+    with _CACHE_LOCK:
+        _CACHE = None
+
+
+def _decoded(blob: ImageBlob, kind: str, decode: Callable[[bytes], Any]) -> Any:
+    return get_image_blob_cache().decoded_view(blob, kind, decode)
+
+
+def get_image_blob(
+    url: str,
+    *,
+    timeout_seconds: float = 20.0,
+    max_bytes: Optional[int] = DEFAULT_MAX_UPLOAD_IMAGE_BYTES,
+    fetch: Optional[Fetcher] = None,
+    policy: str = "custom",
+) -> Optional[ImageBlob]:
+    """
+    Image bytes for `url`, downloaded at most once per process while cached.
+    Default fetcher is the SSRF-safe public fetch (policy "public"); a custom `fetch` caches
+    under `policy` and never sees, or fills, the public entries. `max_bytes` (None = no limit)
+    also applies to cached blobs.
+    """
+    if not url:
+        return None
+    if fetch is None:
+        policy = "public"
+        from homework_agent.utils.url_image_helpers import _safe_fetch_public_url_bytes
+
+        def fetch(u: str) -> Optional[Tuple[bytes, str]]:
+            return _safe_fetch_public_url_bytes(
+                u,
+                timeout_seconds=float(timeout_seconds),
+                max_redirects=3,
+                max_bytes=int(max_bytes or DEFAULT_MAX_UPLOAD_IMAGE_BYTES),
+            )
+
+    blob = get_image_blob_cache().get(str(url), fetch, policy=policy)
+    if blob is None or not blob.data:
+        return None
+    if max_bytes is not None and len(blob.data) > int(max_bytes):
+        return None
+    return blob
+
+
+def fetch_image_bytes(
+    url: str,
+    *,
+    timeout_seconds: float = 20.0,
+    max_bytes: int = DEFAULT_MAX_UPLOAD_IMAGE_BYTES,
+) -> Optional[Tuple[bytes, str]]:
+    """Cached drop-in for `_safe_fetch_public_url_bytes`: (bytes, content_type) or None."""
+    blob = get_image_blob(url, timeout_seconds=timeout_seconds, max_bytes=max_bytes)
+    if blob is None:
+        return None
+    return blob.data, blob.content_type
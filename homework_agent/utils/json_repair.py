@@ -0,0 +1,461 @@
+"""
+Tolerant JSON object extraction/repair for LLM output (shared by every provider path).
+
+Why:
+- Grading, tutoring, vision-facts and qindex outputs each had their own brace scanner plus a
+  stack of full-text regex passes; when those failed the unified grader paid for an extra
+  "fix this JSON" LLM call.
+
+How (`parse_json_object(text)`):
+- Fast path: `json.loads` on the whole text, then `raw_decode` at the first `{` (prose/fences).
+- Otherwise one left-to-right pass rewrites the first `{...}` candidate into valid JSON and
+  records what it changed (`JsonParseResult.repairs`):
+    prose_skipped / trailing_text   text before / after the root object
+    trailing_comma / extra_comma    commas before a closer or doubled commas (dropped)
+    missing_comma / missing_colon   inserted between adjacent values / after a key
+    missing_value                   `"key":}` (-> null)
+    control_char_escaped            raw newlines/tabs/... inside strings
+    invalid_escape                  `\\(` style backslashes (LaTeX) kept as literal backslashes
+    inner_quote_escaped             an unescaped `"` that does not end the string
+    python_literal                  True / False / None
+    junk_skipped                    characters that cannot start a JSON token
+    mismatched_close                `]` closing an object (or vice versa)
+    truncated                       input ends inside the object: the member / array element
+                                    being written (unterminated string, key without value,
+                                    trailing number, cut-off array element) is dropped and the
+                                    containers are closed, so clipped values never pass as data
+- Well-formed tokens in the expected position are consumed by one regex match each; only the
+  spots that need fixing go through the per-character handlers.
+- If a candidate still does not parse, the scan resumes after it (candidates never overlap),
+  so the total work stays linear in the text length.
+- With `site=...`, /metrics gets `json_parse_total{site,outcome=clean|repaired|failed}` and
+  `json_repair_total{site,repair}`.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from homework_agent.utils.metrics import inc_counter
+
+_STRING_SPECIAL = re.compile(r'["\\\x00-\x1f]')
+_CLEAN_STRING = re.compile(r'"(?:[^"\\\x00-\x1f]|\\["\\/bfnrt]|\\u[0-9a-fA-F]{4})*"')
+_CLEAN_TOKEN = re.compile(
+    r"[ \t\r\n]*(?:"
+    r'(?P<str>"(?:[^"\\\x00-\x1f]|\\["\\/bfnrt]|\\u[0-9a-fA-F]{4})*")'
+    r"|(?P<scalar>-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null)(?![\w.])"
+    r"|(?P<punct>[{}\[\],:]))"
+)
+_NON_WS = re.compile(r"[^ \t\r\n]")
+_WS = re.compile(r"[ \t\r\n]*")
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_WORD = re.compile(r"[A-Za-z_]+")
+_LITERALS = {
+    "true": "true",
+    "false": "false",
+    "null": "null",
+    "True": "true",
+    "False": "false",
+    "None": "null",
+}
+_VALID_ESCAPES = frozenset('"\\/bfnrt')
+_HEX4 = re.compile(r"[0-9a-fA-F]{4}")
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_MAX_CANDIDATES = 3
+_DECODER = json.JSONDecoder()
+
+# Frame states (what the container expects next).
+_KEY, _COLON, _VALUE, _COMMA = "key", "colon", "value", "comma"
+
+
+@dataclass
+class JsonParseResult:
+    value: Optional[Dict[str, Any]] = None
+    text: Optional[str] = None
+    repairs: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.value is not None
+
+    @property
+    def repaired(self) -> bool:
+        return bool(self.repairs)
+
+
+class _Rewriter:
+    """One candidate: rewrite `s[start:]` into JSON text, stopping where the root closes."""
+
+    def __init__(self, s: str, start: int) -> None:
+        self.s = s
+        self.pos = start
+        self.out: List[str] = []
+        self.repairs: List[str] = []
+        # Each frame: [closer, state, len(out) where its current element starts]
+        self.stack: List[List[Any]] = []
+        self.pending_comma = False
+        # The last value ran into the end of input (string without closing quote, number).
+        self.clipped = False
+
+    def _note(self, code: str) -> None:
+        if code not in self.repairs:
+            self.repairs.append(code)
+
+    def run(self) -> Tuple[str, int]:
+        s, n = self.s, len(self.s)
+        stack = self.stack
+        self._open("{", "}", _KEY)
+        self.pos += 1
+        while stack:
+            m = _CLEAN_TOKEN.match(s, self.pos)
+            if m is not None and self._fast_token(m):
+                continue
+            m = _NON_WS.search(s, self.pos)
+            if m is None:
+                self.pos = n
+                break
+            i = m.start()
+            ch = s[i]
+            self.pos = i + 1
+            if ch == '"':
+                self._string(i)
+            elif ch == "{":
+                self._before_value()
+                self._open("{", "}", _KEY)
+            elif ch == "[":
+                self._before_value()
+                self._open("[", "]", _VALUE)
+            elif ch in "}]":
+                self._close(ch)
+            elif ch == ",":
+                self._comma()
+            elif ch == ":":
+                self._colon()
+            else:
+                self._scalar(i)
+        if self.stack:
+            self._note("truncated")
+            self._drop_tail()
+        return "".join(self.out), self.pos
+
+    def _fast_token(self, m: "re.Match[str]") -> bool:
+        """Consume a well-formed token that fits the current state; False -> general path."""
+        frame = self.stack[-1]
+        closer, state, _ = frame
+        kind = m.lastgroup
+        tok = m.group(kind)
+        if kind == "punct" and tok in ",:}]":
+            if tok == ",":
+                if state != _COMMA or self.pending_comma:
+                    return False
+                self.pending_comma = True
+            elif tok == ":":
+                if state != _COLON:
+                    return False
+                self.out.append(":")
+                frame[1] = _VALUE
+            else:
+                empty = _KEY if closer == "}" else _VALUE
+                if tok != closer or self.pending_comma or state not in (_COMMA, empty):
+                    return False
+                self.out.append(tok)
+                self.stack.pop()
+                self._value_done()
+            self.pos = m.end()
+            return True
+        # A value or key starts: settle a pending comma first.
+        if state == _COMMA and self.pending_comma:
+            self.out.append(",")
+            self.pending_comma = False
+            frame[1] = state = _KEY if closer == "}" else _VALUE
+        if state == _KEY:
+            if kind != "str":
+                return False
+            self.out.append(tok)
+            frame[1] = _COLON
+        elif state != _VALUE:
+            return False
+        elif kind == "punct":
+            self._open(tok, "}" if tok == "{" else "]", _KEY if tok == "{" else _VALUE)
+        elif kind == "str" and not self._ends_string(m.end()):
+            return False
+        else:
+            self.out.append(tok)
+            frame[1] = _COMMA
+            if kind == "scalar" and tok[0] not in "tfn" and m.end() == len(self.s):
+                # A number running into the end of input may be cut short.
+                self.clipped = True
+            else:
+                frame[2] = len(self.out)
+        self.pos = m.end()
+        return True
+
+    # -- containers -------------------------------------------------------------------------
+
+    def _open(self, opener: str, closer: str, state: str) -> None:
+        self.out.append(opener)
+        self.stack.append([closer, state, len(self.out)])
+
+    def _close(self, ch: str) -> None:
+        if self.pending_comma:
+            self.pending_comma = False
+            self._note("trailing_comma")
+        if not any(frame[0] == ch for frame in self.stack):
+            self._note("junk_skipped")
+            return
+        while self.stack:
+            closer, state, _ = self.stack.pop()
+            if state == _COLON:
+                self.out.append(":null")
+                self._note("missing_value")
+            elif state == _VALUE and closer == "}":
+                self.out.append("null")
+                self._note("missing_value")
+            self.out.append(closer)
+            if closer == ch:
+                break
+            self._note("mismatched_close")
+            self._value_done()
+        self._value_done()
+
+    def _value_done(self) -> None:
+        if self.stack:
+            frame = self.stack[-1]
+            frame[1] = _COLON if frame[1] == _KEY else _COMMA
+            if frame[1] == _COMMA and not self.clipped:
+                frame[2] = len(self.out)
+
+    def _drop_tail(self) -> None:
+        """
+        Input ended inside the object: drop the element each open container was writing, then
+        close it. A cut-off container is kept as an object member (its complete members
+        survive) but dropped as an array element, since a partial record is not a record.
+        """
+        self.pending_comma = False
+        innermost = True
+        while self.stack:
+            closer, state, mark = self.stack.pop()
+            if innermost:
+                cut = state != _COMMA or self.clipped
+            else:
+                cut = closer == "]"
+            if cut:
+                del self.out[mark:]
+            self.out.append(closer)
+            innermost = False
+
+    def _before_value(self, *, is_string: bool = False) -> None:
+        """Fix up separators before a value (or an object key) starts."""
+        if not self.stack:
+            return
+        frame = self.stack[-1]
+        if frame[1] == _COMMA:
+            if self.pending_comma:
+                self.pending_comma = False
+            else:
+                self._note("missing_comma")
+            self.out.append(",")
+            frame[1] = _KEY if frame[0] == "}" else _VALUE
+        elif self.pending_comma:
+            self.pending_comma = False
+        if frame[1] == _COLON:
+            self._note("missing_colon")
+            self.out.append(":")
+            frame[1] = _VALUE
+        if frame[1] == _KEY and not is_string:
+            # A non-string where a key belongs: give it a synthetic key to keep the value.
+            self._note("missing_value")
+            self.out.append(f'"_{len(self.out)}":')
+            frame[1] = _VALUE
+
+    def _comma(self) -> None:
+        frame = self.stack[-1]
+        if frame[1] == _COMMA and not self.pending_comma:
+            self.pending_comma = True
+            return
+        if frame[1] == _COLON or (frame[1] == _VALUE and frame[0] == "}"):
+            self.out.append(":null" if frame[1] == _COLON else "null")
+            self._note("missing_value")
+            frame[1:] = [_COMMA, len(self.out)]
+            self.pending_comma = True
+            return
+        self._note("extra_comma")
+
+    def _colon(self) -> None:
+        frame = self.stack[-1]
+        if frame[1] == _COLON:
+            self.out.append(":")
+            frame[1] = _VALUE
+        else:
+            self._note("junk_skipped")
+
+    # -- scalars ----------------------------------------------------------------------------
+
+    def _scalar(self, i: int) -> None:
+        """A number / literal (or junk) starting at s[i]."""
+        s = self.s
+        m = _NUMBER.match(s, i)
+        if m:
+            self._before_value()
+            self.out.append(m.group(0))
+            self.clipped = m.end() >= len(s)
+            self._value_done()
+            self.pos = m.end()
+            return
+        m = _WORD.match(s, i)
+        if m and m.group(0) in _LITERALS:
+            if m.group(0) != _LITERALS[m.group(0)]:
+                self._note("python_literal")
+            self._before_value()
+            self.out.append(_LITERALS[m.group(0)])
+            self._value_done()
+            self.pos = m.end()
+            return
+        self._note("junk_skipped")
+        self.pos = m.end() if m else i + 1
+
+    def _string(self, quote_at: int) -> None:
+        s, n = self.s, len(self.s)
+        self._before_value(is_string=True)
+        is_key = self.stack[-1][1] == _KEY
+        out = self.out
+        m = _CLEAN_STRING.match(s, quote_at)
+        if m and (is_key or self._ends_string(m.end())):
+            out.append(m.group(0))
+            self.pos = m.end()
+            self._value_done()
+            return
+        out.append('"')
+        i = quote_at + 1
+        while True:
+            m = _STRING_SPECIAL.search(s, i)
+            if m is None:
+                out.append(s[i:])
+                out.append('"')
+                self._note("truncated")
+                self.clipped = True
+                self.pos = n
+                break
+            j = m.start()
+            if j > i:
+                out.append(s[i:j])
+            ch = s[j]
+            if ch == "\\":
+                nxt = s[j + 1] if j + 1 < n else ""
+                if nxt == "u" and _HEX4.match(s, j + 2):
+                    out.append(s[j : j + 6])
+                    i = j + 6
+                elif nxt and nxt in _VALID_ESCAPES:
+                    out.append(s[j : j + 2])
+                    i = j + 2
+                elif not nxt:
+                    # Truncated right after a backslash.
+                    i = j + 1
+                else:
+                    self._note("invalid_escape")
+                    out.append("\\\\")
+                    i = j + 1
+                continue
+            if ch == '"':
+                if is_key or self._ends_string(j + 1):
+                    out.append('"')
+                    self.pos = j + 1
+                    break
+                self._note("inner_quote_escaped")
+                out.append('\\"')
+                i = j + 1
+                continue
+            self._note("control_char_escaped")
+            out.append(_CONTROL_ESCAPES.get(ch) or f"\\u{ord(ch):04x}")
+            i = j + 1
+        self._value_done()
+
+    def _ends_string(self, k: int) -> bool:
+        """Whether a `"` (followed by s[k:]) closes the string rather than sits inside it."""
+        s = self.s
+        m = _WS.match(s, k)
+        k = m.end()
+        if k >= len(s) or s[k] in ',:}]"':
+            return True
+        # `"value"\n"next_key"` / `"value" "next"` is a missing comma, not an inner quote.
+        return "\n" in m.group(0) or "\r" in m.group(0)
+
+
+def _rewrite(s: str, start: int) -> Tuple[str, int, List[str]]:
+    rw = _Rewriter(s, start)
+    text, end = rw.run()
+    return text, end, rw.repairs
+
+
+def _record(site: Optional[str], result: JsonParseResult, clean: bool) -> None:
+    if not site:
+        return
+    outcome = "failed" if not result.ok else ("clean" if clean else "repaired")
+    inc_counter("json_parse_total", labels={"site": site, "outcome": outcome})
+    for code in result.repairs:
+        inc_counter("json_repair_total", labels={"site": site, "repair": code})
+
+
+def parse_json_object(text: Any, *, site: Optional[str] = None) -> JsonParseResult:
+    """Best-effort JSON object from LLM output; never raises."""
+    s = str(text or "")
+    result = JsonParseResult()
+    if not s.strip():
+        _record(site, result, False)
+        return result
+    try:
+        value = json.loads(s)
+    except Exception:
+        value = None
+    if isinstance(value, dict):
+        result.value, result.text = value, s
+        _record(site, result, True)
+        return result
+
+    start = s.find("{")
+    candidates = 0
+    while start >= 0 and candidates < _MAX_CANDIDATES:
+        candidates += 1
+        try:
+            value, end = _DECODER.raw_decode(s, start)
+        except Exception:
+            value = None
+        if isinstance(value, dict):
+            # Well-formed object wrapped in prose / code fences: no rewrite needed.
+            repairs = ["prose_skipped"] if s[:start].strip() else []
+            if s[end:].strip():
+                repairs.append("trailing_text")
+            result.value, result.text, result.repairs = value, s[start:end], repairs
+            _record(site, result, not repairs)
+            return result
+        fixed, end, repairs = _rewrite(s, start)
+        if s[:start].strip():
+            repairs.insert(0, "prose_skipped")
+        if s[end:].strip():
+            repairs.append("trailing_text")
+        try:
+            value = json.loads(fixed)
+        except Exception:
+            value = None
+        if isinstance(value, dict):
+            result.value, result.text, result.repairs = value, fixed, repairs
+            _record(site, result, False)
+            return result
+        result.repairs = repairs + ["unrepairable"]
+        start = s.find("{", max(end, start + 1))
+    _record(site, result, False)
+    return result
+
+
+def extract_json_object(
+    text: Any, *, site: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    return parse_json_object(text, site=site).value
+
+
+def repair_json_text(text: Any) -> Optional[str]:
+    """Repaired JSON text of the first object in `text` (None if nothing usable)."""
+    return parse_json_object(text).text
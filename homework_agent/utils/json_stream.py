@@ -0,0 +1,147 @@
+"""
+Incremental extraction of array elements from a JSON document that is still being streamed.
+
+Why:
+- Grading output (`results[]` / `questions[]`) used to be parsed only after the whole completion
+  finished, so the UI saw no verdict until the last token of a full page arrived.
+
+How (`StreamingArrayItems(keys).feed(delta)`):
+- Scans each delta once, keeping the scanner state (container stack, string/escape state, the
+  current top-level key) across calls, so total work is linear in the output length.
+- Text before the root `{` (e.g. a ```json fence) is ignored; only object elements of the watched
+  top-level arrays are returned, each as soon as its closing `}` arrives.
+- An element that does not parse on its own is skipped: the full-document parse at the end of the
+  stream remains the source of truth.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+_STRING_STOP = re.compile(r'["\\]')
+_STRUCTURE = re.compile(r'[{}\[\]",]')
+
+
+class StreamingArrayItems:
+    def __init__(self, keys: Iterable[str] = ("results", "questions")) -> None:
+        self._keys = frozenset(str(k) for k in keys)
+        self._stack: List[str] = []
+        self._done = False
+        self._in_str = False
+        self._escape = False
+        self._expect_key = False
+        self._key_parts: Optional[List[str]] = None
+        self._last_key = ""
+        # Depth of the watched array's elements (0 = not inside a watched array).
+        self._watch_depth = 0
+        self._item_parts: Optional[List[str]] = None
+        self.items_emitted = 0
+        self.items_skipped = 0
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, delta: str) -> List[Dict[str, Any]]:
+        """Consume the next chunk; return the watched elements it completed (in order)."""
+        out: List[Dict[str, Any]] = []
+        if not delta or self._done:
+            return out
+        n = len(delta)
+        pos = 0
+        item_from: Optional[int] = 0 if self._item_parts is not None else None
+        if self._escape:
+            self._escape = False
+            pos = 1
+        while pos < n:
+            if self._in_str:
+                m = _STRING_STOP.search(delta, pos)
+                if m is None:
+                    if self._key_parts is not None:
+                        self._key_parts.append(delta[pos:])
+                    pos = n
+                    break
+                i = m.start()
+                if delta[i] == "\\":
+                    if self._key_parts is not None:
+                        self._key_parts.append(delta[pos : i + 2])
+                    if i + 1 >= n:
+                        self._escape = True
+                    pos = i + 2
+                    continue
+                if self._key_parts is not None:
+                    self._key_parts.append(delta[pos:i])
+                    self._last_key = "".join(self._key_parts)
+                    self._key_parts = None
+                self._in_str = False
+                pos = i + 1
+                continue
+
+            m = _STRUCTURE.search(delta, pos)
+            if m is None:
+                break
+            i = m.start()
+            ch = delta[i]
+            pos = i + 1
+            if not self._stack:
+                if ch == "{":
+                    self._stack.append(ch)
+                    self._expect_key = True
+                continue
+            depth = len(self._stack)
+            if ch == '"':
+                self._in_str = True
+                if depth == 1 and self._expect_key:
+                    self._expect_key = False
+                    self._key_parts = []
+            elif ch == ",":
+                if depth == 1:
+                    self._expect_key = True
+            elif ch in "{[":
+                if ch == "[" and depth == 1 and self._last_key in self._keys:
+                    self._watch_depth = 2
+                elif (
+                    ch == "{"
+                    and self._watch_depth
+                    and depth == self._watch_depth
+                    and self._item_parts is None
+                ):
+                    self._item_parts = []
+                    item_from = i
+                self._stack.append(ch)
+            else:
+                self._stack.pop()
+                depth -= 1
+                if (
+                    self._item_parts is not None
+                    and item_from is not None
+                    and depth == self._watch_depth
+                ):
+                    self._item_parts.append(delta[item_from : i + 1])
+                    item = self._finish_item()
+                    item_from = None
+                    if item is not None:
+                        out.append(item)
+                elif ch == "]" and self._watch_depth and depth == 1:
+                    self._watch_depth = 0
+                if not self._stack:
+                    self._done = True
+                    break
+        if self._item_parts is not None and item_from is not None:
+            self._item_parts.append(delta[item_from:])
+        return out
+
+    def _finish_item(self) -> Optional[Dict[str, Any]]:
+        text = "".join(self._item_parts or [])
+        self._item_parts = None
+        try:
+            item = json.loads(text)
+        except Exception:
+            item = None
+        if not isinstance(item, dict):
+            self.items_skipped += 1
+            return None
+        self.items_emitted += 1
+        return item
@@ -0,0 +1,173 @@
+"""
+Opt-in, content-addressed response cache for deterministic LLM / vision calls.
+
+Why:
+- Re-grades, retried jobs, A/B benches and repeated chat relooks re-send byte-identical requests
+  (same image, same prompt, same model and decoding params) and pay for them every time.
+
+How:
+- Call sites opt in by name (`cache_site=` on `LLMClient` / `AsyncLLMClient` / `VisionClient`);
+  a site is only cached when listed in `LLM_RESPONSE_CACHE_SITES` (comma-separated, `*` = all).
+- The key is a hash of: normalized message text, image content digests (data URIs are hashed by
+  decoded bytes, URLs by their string: slice/page URLs are content-addressed or immutable), provider,
+  model, prompt version and decoding params. Anything not in the key must not change the output.
+- Entries live in the shared cache store (`get_cache_store()`, Redis when configured) under
+  `llmresp:<site>:<hash>` with `LLM_RESPONSE_CACHE_TTL_SECONDS`; responses larger than
+  `LLM_RESPONSE_CACHE_MAX_BYTES` are not stored. Size-based eviction beyond that is the store's
+  (in-memory LRU / Redis maxmemory policy).
+- /metrics: `llm_response_cache_total{site,outcome=hit|miss|store|skip}` and
+  `llm_response_cache_saved_tokens_total{site}` (tokens not re-paid thanks to hits).
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional, Sequence
+
+from homework_agent.utils.cache import get_async_cache_store, get_cache_store
+from homework_agent.utils.metrics import inc_counter
+from homework_agent.utils.settings import get_settings
+from homework_agent.utils.versioning import stable_json_hash
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llmresp:"
+# Bump to invalidate every cached response (e.g. after changing how results are post-processed).
+KEY_VERSION = 1
+
+
+def cache_enabled(site: Optional[str]) -> bool:
+    if not site:
+        return False
+    raw = str(get_settings().llm_response_cache_sites or "").strip()
+    if not raw:
+        return False
+    sites = {s.strip() for s in raw.split(",") if s.strip()}
+    return "*" in sites or str(site) in sites
+
+
+def _normalize_text(value: Any) -> str:
+    if not isinstance(value, str):
+        value = json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+    lines = value.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def image_digest(image: Any) -> str:
+    """Stable digest of an image reference (ImageRef, data URI or URL)."""
+    url = getattr(image, "url", None)
+    b64 = getattr(image, "base64", None)
+    ref = str(b64 or url or image or "")
+    if ref.startswith("data:") or (b64 and not url):
+        body = ref.split(",", 1)[1] if "," in ref else ref
+        try:
+            return "sha256:" + hashlib.sha256(base64.b64decode(body)).hexdigest()
+        except Exception:
+            pass
+    return "url:" + hashlib.sha256(ref.encode("utf-8")).hexdigest()
+
+
+def response_cache_key(
+    site: Optional[str],
+    *,
+    provider: Any,
+    model: Optional[str],
+    messages: Sequence[Any],
+    images: Sequence[Any] = (),
+    params: Optional[Dict[str, Any]] = None,
+    prompt_version: Optional[str] = None,
+) -> Optional[str]:
+    """Cache key for one request, or None when `site` is not enabled."""
+    if not cache_enabled(site):
+        return None
+    payload = {
+        "v": KEY_VERSION,
+        "provider": str(getattr(provider, "value", provider) or ""),
+        "model": str(model or ""),
+        "prompt_version": str(prompt_version or ""),
+        "messages": [_normalize_text(m) for m in messages],
+        "images": [image_digest(i) for i in images or ()],
+        "params": params or {},
+    }
+    return f"{KEY_PREFIX}{site}:{stable_json_hash(payload)}"
+
+
+def _record_hit(site: str, value: Dict[str, Any]) -> None:
+    inc_counter("llm_response_cache_total", labels={"site": site, "outcome": "hit"})
+    usage = value.get("usage") if isinstance(value, dict) else None
+    try:
+        saved = int((usage or {}).get("total_tokens") or 0)
+    except (TypeError, ValueError, AttributeError):
+        saved = 0
+    if saved > 0:
+        inc_counter(
+            "llm_response_cache_saved_tokens_total",
+            labels={"site": site},
+            value=saved,
+        )
+
+
+def _lookup_result(site: str, cached: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(cached, dict):
+        _record_hit(site, cached)
+        return cached
+    inc_counter("llm_response_cache_total", labels={"site": site, "outcome": "miss"})
+    return None
+
+
+def _storable(site: str, value: Dict[str, Any]) -> bool:
+    max_bytes = int(get_settings().llm_response_cache_max_bytes)
+    try:
+        size = len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+    except Exception:
+        size = max_bytes + 1
+    if max_bytes > 0 and size > max_bytes:
+        inc_counter(
+            "llm_response_cache_total", labels={"site": site, "outcome": "skip"}
+        )
+        return False
+    inc_counter("llm_response_cache_total", labels={"site": site, "outcome": "store"})
+    return True
+
+
+def _ttl() -> int:
+    return int(get_settings().llm_response_cache_ttl_seconds)
+
+
+def lookup_response(site: str, key: str) -> Optional[Dict[str, Any]]:
+    try:
+        cached = get_cache_store().get(key)
+    except Exception as e:
+        logger.debug("llm response cache read failed (%s): %s", site, e)
+        cached = None
+    return _lookup_result(site, cached)
+
+
+def store_response(site: str, key: str, value: Dict[str, Any]) -> None:
+    if not _storable(site, value):
+        return
+    try:
+        get_cache_store().set(key, value, ttl_seconds=_ttl())
+    except Exception as e:
+        logger.debug("llm response cache write failed (%s): %s", site, e)
+
+
+async def lookup_response_async(site: str, key: str) -> Optional[Dict[str, Any]]:
+    try:
+        cached = await get_async_cache_store().get(key)
+    except Exception as e:
+        logger.debug("llm response cache read failed (%s): %s", site, e)
+        cached = None
+    return _lookup_result(site, cached)
+
+
+async def store_response_async(site: str, key: str, value: Dict[str, Any]) -> None:
+    if not _storable(site, value):
+        return
+    try:
+        await get_async_cache_store().set(key, value, ttl_seconds=_ttl())
+    except Exception as e:
+        logger.debug("llm response cache write failed (%s): %s", site, e)
@@ -0,0 +1,426 @@
+"""
+Process-wide registry of OpenAI-compatible provider clients (SiliconFlow / Ark / OpenAI).
+
+Why:
+- `LLMClient._get_client`, `VisionClient`, the qindex locator and the SiliconFlow OCR client
+  built a fresh `OpenAI(...)` (and with it a fresh httpx connection pool) for every call, so
+  each LLM/vision request paid a new TCP + TLS handshake to the same provider host.
+
+Now:
+- `get_openai_client(provider, base_url=, api_key=, timeout=)` returns one shared client per
+  (provider, base_url, timeout, api key) for the process. Its httpx pool keeps connections
+  alive between calls (`LLM_HTTP_MAX_CONNECTIONS`, `LLM_HTTP_MAX_KEEPALIVE`,
+  `LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS`), optionally over HTTP/2 (`LLM_HTTP2=1`, needs `h2`).
+- `get_async_openai_client(...)` does the same with `AsyncOpenAI` per event loop (httpx async
+  connections are bound to the loop that created them); its pool is sized separately
+  (`LLM_ASYNC_HTTP_MAX_CONNECTIONS`) because one worker loop multiplexes many concurrent calls.
+- Clients are dropped after `fork()` (a child must not share sockets with its parent).
+- Every request goes through the provider quota governor (`utils/provider_limits.py`) in the
+  transport: the permit is held until the response body is closed, then released with the
+  `total_tokens` found at the end of the body. A call the quota does not admit in time gets a
+  local 429 (`x-should-retry: false`), i.e. the SDK's `RateLimitError`, without touching the
+  provider.
+- /metrics:
+  - `llm_client_registry_total{provider,outcome=hit|miss}`: client reuse.
+  - `llm_http_connections_total{provider,outcome=new|reused}`: per response, whether it was
+    served on a connection the pool already had open.
+  - `llm_http_pool_connections{provider,state=idle|active}`: current pool contents.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from homework_agent.utils.metrics import inc_counter, register_collector, set_gauge
+from homework_agent.utils.provider_limits import (
+    Permit,
+    ProviderQuotaExceeded,
+    acquire,
+    acquire_async,
+    has_limits,
+)
+from homework_agent.utils.settings import get_settings
+
+try:
+    import h2  # type: ignore  # noqa: F401
+
+    _HAS_H2 = True
+except ImportError:
+    _HAS_H2 = False  # HTTP/2 optional
+
+logger = logging.getLogger(__name__)
+
+_ClientKey = Tuple[str, str, float, str]
+
+_LOCK = threading.Lock()
+_CLIENTS: Dict[_ClientKey, OpenAI] = {}
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[_ClientKey, AsyncOpenAI]]" = (weakref.WeakKeyDictionary())
+_PID = os.getpid()
+
+
+def _http2_enabled() -> bool:
+    wanted = bool(get_settings().llm_http2)
+    if wanted and not _HAS_H2:
+        logger.warning(
+            "LLM_HTTP2=1 but the h2 package is not installed; using HTTP/1.1"
+        )
+        return False
+    return wanted
+
+
+def _key_fingerprint(api_key: str) -> str:
+    # Keys are part of the registry key (two tenants/keys never share a client) but are never
+    # kept in plain text outside the client itself.
+    return hashlib.sha256(str(api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+class _ReuseTracker:
+    """httpx response hook: counts responses served on new vs. already-open connections."""
+
+    def __init__(self, provider: str) -> None:
+        self.provider = provider
+        self._seen: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+    def __call__(self, response: httpx.Response) -> None:
+        self.record(response)
+
+    def record(self, response: httpx.Response) -> None:
+        stream = response.extensions.get("network_stream")
+        if stream is None:
+            return
+        try:
+            reused = stream in self._seen
+            if not reused:
+                self._seen.add(stream)
+        except TypeError:
+            return
+        inc_counter(
+            "llm_http_connections_total",
+            labels={
+                "provider": self.provider,
+                "outcome": "reused" if reused else "new",
+            },
+        )
+
+
+class _AsyncReuseTracker(_ReuseTracker):
+    """Same as `_ReuseTracker`; httpx.AsyncClient hooks must be awaitable."""
+
+    async def __call__(self, response: httpx.Response) -> None:  # type: ignore[override]
+        self.record(response)
+
+
+_MODEL_RE = re.compile(rb'"model"\s*:\s*"([^"]{1,200})"')
+_MAX_TOKENS_RE = re.compile(rb'"max_(?:output_|completion_)?tokens"\s*:\s*(\d+)')
+_DATA_URI_RE = re.compile(rb"data:[\w/+.-]{1,64};base64,[A-Za-z0-9+/=]+")
+_TOTAL_TOKENS_RE = re.compile(rb'"total_tokens"\s*:\s*(\d+)')
+# Rough per-image input token charge for the estimate (actual usage is reconciled on release).
+_IMAGE_TOKENS = 1000
+_USAGE_TAIL_BYTES = 8192
+
+
+def _quota_request(request: httpx.Request) -> Tuple[Optional[str], int]:
+    """(model, estimated total tokens) of an OpenAI-compatible request body."""
+    try:
+        body = request.content
+    except Exception:
+        return None, 0
+    m = _MODEL_RE.search(body)
+    model = m.group(1).decode("utf-8", errors="ignore") if m else None
+    mt = _MAX_TOKENS_RE.search(body)
+    images = 0
+    image_bytes = 0
+    for d in _DATA_URI_RE.finditer(body):
+        images += 1
+        image_bytes += d.end() - d.start()
+    # ~3 bytes per token for mixed CJK/ASCII JSON text.
+    prompt = max(0, len(body) - image_bytes) // 3 + images * _IMAGE_TOKENS
+    return model, prompt + (int(mt.group(1)) if mt else 0)
+
+
+def _used_tokens(tail: bytes) -> Optional[int]:
+    found = _TOTAL_TOKENS_RE.findall(tail)
+    return int(found[-1]) if found else None
+
+
+def _quota_exceeded_response(
+    request: httpx.Request, error: ProviderQuotaExceeded
+) -> httpx.Response:
+    return httpx.Response(
+        429,
+        headers={"x-should-retry": "false"},
+        json={
+            "error": {
+                "message": f"rate limit: {error}",
+                "type": "rate_limit_exceeded",
+                "code": "local_quota",
+            }
+        },
+        request=request,
+    )
+
+
+class _PermitStream(httpx.SyncByteStream):
+    """Holds the quota permit until the body is closed; remembers the tail for usage."""
+
+    def __init__(self, stream: httpx.SyncByteStream, permit: Permit) -> None:
+        self._stream = stream
+        self._permit = permit
+        self._tail = b""
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._stream:
+            self._tail = (self._tail + chunk)[-_USAGE_TAIL_BYTES:]
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._permit.release(used_tokens=_used_tokens(self._tail))
+
+
+class _AsyncPermitStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, permit: Permit) -> None:
+        self._stream = stream
+        self._permit = permit
+        self._tail = b""
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self._tail = (self._tail + chunk)[-_USAGE_TAIL_BYTES:]
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            await self._permit.release_async(used_tokens=_used_tokens(self._tail))
+
+
+class _GovernedTransport(httpx.BaseTransport):
+    """Consults the provider quota before each request (see module docstring)."""
+
+    def __init__(self, provider: str, inner: httpx.BaseTransport) -> None:
+        self.provider = provider
+        self._inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not has_limits(self.provider):
+            return self._inner.handle_request(request)
+        model, tokens = _quota_request(request)
+        try:
+            permit = acquire(self.provider, model, tokens=tokens)
+        except ProviderQuotaExceeded as e:
+            return _quota_exceeded_response(request, e)
+        try:
+            response = self._inner.handle_request(request)
+        except BaseException:
+            permit.release()
+            raise
+        response.stream = _PermitStream(response.stream, permit)
+        return response
+
+    def close(self) -> None:
+        self._inner.close()
+
+
+class _AsyncGovernedTransport(httpx.AsyncBaseTransport):
+    def __init__(self, provider: str, inner: httpx.AsyncBaseTransport) -> None:
+        self.provider = provider
+        self._inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not has_limits(self.provider):
+            return await self._inner.handle_async_request(request)
+        model, tokens = _quota_request(request)
+        try:
+            permit = await acquire_async(self.provider, model, tokens=tokens)
+        except ProviderQuotaExceeded as e:
+            return _quota_exceeded_response(request, e)
+        try:
+            response = await self._inner.handle_async_request(request)
+        except BaseException:
+            await permit.release_async()
+            raise
+        response.stream = _AsyncPermitStream(response.stream, permit)
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def _limits(max_connections: int) -> httpx.Limits:
+    settings = get_settings()
+    return httpx.Limits(
+        max_connections=int(max_connections) or None,
+        max_keepalive_connections=int(settings.llm_http_max_keepalive) or None,
+        keepalive_expiry=float(settings.llm_http_keepalive_expiry_seconds),
+    )
+
+
+def _build_http_client(provider: str, timeout: float) -> httpx.Client:
+    transport = httpx.HTTPTransport(
+        limits=_limits(get_settings().llm_http_max_connections),
+        http2=_http2_enabled(),
+    )
+    return httpx.Client(
+        timeout=timeout,
+        transport=_GovernedTransport(provider, transport),
+        follow_redirects=True,
+        event_hooks={"response": [_ReuseTracker(provider)]},
+    )
+
+
+def _check_pid() -> None:
+    global _PID
+    pid = os.getpid()
+    if pid != _PID:
+        # Forked worker: the inherited pools hold the parent's sockets; start fresh.
+        _CLIENTS.clear()
+        _ASYNC_CLIENTS.clear()
+        _PID = pid
+
+
+def _client_key(
+    provider: str, base_url: Optional[str], api_key: str, timeout: float
+) -> _ClientKey:
+    return (
+        str(provider),
+        str(base_url or ""),
+        float(timeout),
+        _key_fingerprint(api_key),
+    )
+
+
+def get_openai_client(
+    provider: str, *, base_url: Optional[str], api_key: str, timeout: float
+) -> OpenAI:
+    """Shared OpenAI-compatible client for (provider, base_url, timeout, api_key)."""
+    key = _client_key(provider, base_url, api_key, timeout)
+    with _LOCK:
+        _check_pid()
+        client = _CLIENTS.get(key)
+        if client is not None:
+            inc_counter(
+                "llm_client_registry_total",
+                labels={"provider": provider, "outcome": "hit"},
+            )
+            return client
+        client = OpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            timeout=float(timeout),
+            http_client=_build_http_client(provider, float(timeout)),
+        )
+        _CLIENTS[key] = client
+    inc_counter(
+        "llm_client_registry_total", labels={"provider": provider, "outcome": "miss"}
+    )
+    return client
+
+
+def get_async_openai_client(
+    provider: str, *, base_url: Optional[str], api_key: str, timeout: float
+) -> AsyncOpenAI:
+    """Shared `AsyncOpenAI` client for the running event loop (same key as the sync registry)."""
+    key = _client_key(provider, base_url, api_key, timeout)
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        _check_pid()
+        clients = _ASYNC_CLIENTS.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = AsyncOpenAI(
+                base_url=base_url,
+                api_key=api_key,
+                timeout=float(timeout),
+                http_client=httpx.AsyncClient(
+                    timeout=float(timeout),
+                    transport=_AsyncGovernedTransport(
+                        provider,
+                        httpx.AsyncHTTPTransport(
+                            limits=_limits(
+                                get_settings().llm_async_http_max_connections
+                            ),
+                            http2=_http2_enabled(),
+                        ),
+                    ),
+                    follow_redirects=True,
+                    event_hooks={"response": [_AsyncReuseTracker(provider)]},
+                ),
+            )
+            clients[key] = client
+            outcome = "miss"
+        else:
+            outcome = "hit"
+    inc_counter(
+        "llm_client_registry_total", labels={"provider": provider, "outcome": outcome}
+    )
+    return client
+
+
+def _pool_connections(client: Any) -> list:
+    http_client = getattr(client, "_client", None)
+    transport = getattr(http_client, "_transport", None)
+    transport = getattr(transport, "_inner", transport)
+    pool = getattr(transport, "_pool", None)
+    return list(getattr(pool, "connections", None) or [])
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """`{provider: {"idle": n, "active": n}}` summed over this process's registered clients."""
+    with _LOCK:
+        _check_pid()
+        clients = list(_CLIENTS.items())
+        for loop_clients in list(_ASYNC_CLIENTS.values()):
+            clients.extend(loop_clients.items())
+    out: Dict[str, Dict[str, int]] = {}
+    for (provider, _, _, _), client in clients:
+        agg = out.setdefault(provider, {"idle": 0, "active": 0})
+        for conn in _pool_connections(client):
+            try:
+                idle = bool(conn.is_idle())
+            except Exception:
+                continue
+            agg["idle" if idle else "active"] += 1
+    return out
+
+
+def _export_pool_stats() -> None:
+    for provider, counts in pool_stats().items():
+        for state, value in counts.items():
+            set_gauge(
+                "llm_http_pool_connections",
+                value=value,
+                labels={"provider": provider, "state": state},
+            )
+
+
+def reset_llm_clients() -> None:
+    """
+    Drop registered clients (tests / after credential rotation). Sync pools are closed; async
+    ones are simply released (closing them needs their own event loop).
+    """
+    with _LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+        _ASYNC_CLIENTS.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+register_collector(_export_pool_stats)
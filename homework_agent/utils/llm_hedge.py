@@ -0,0 +1,375 @@
+"""
+Hedged LLM requests across Ark and SiliconFlow (tail-latency control).
+
+Why:
+- Grading and chat can run on either provider (`ark` / `silicon`, equivalent models). A slow
+  provider response used to cost a full client timeout before anything else was tried.
+
+How:
+- Call sites opt in by name (`hedge_site=` on `LLMClient.generate` / `generate_with_images` /
+  `socratic_tutor_stream` and the `AsyncLLMClient` twins). A site hedges only when listed in
+  `LLM_HEDGE_SITES` as `site[:max_ratio]` (comma-separated, `*` = all), e.g.
+  `unified_grade:0.1,chat:0.2`. `max_ratio` (default `LLM_HEDGE_MAX_RATIO`) is the site's budget:
+  the share of its recent calls (last `_WINDOW`) allowed to fire a second request.
+- The primary runs alone for the hedge delay: the p90 of this site's recent primary latencies
+  (response time, or time to first chunk for streams) times `LLM_HEDGE_DELAY_MULTIPLIER`, clamped
+  to [`LLM_HEDGE_MIN_DELAY_SECONDS`, `LLM_HEDGE_DELAY_SECONDS`]; the latter is also used until
+  enough samples exist. Still pending after that -> the same request goes to the other provider.
+- The first successful answer wins; a failure on one side waits for the other. Loser handling:
+  async calls are cancelled (the HTTP request is aborted); sync streams are closed at their next
+  chunk; a blocking sync call cannot be interrupted, so it is left to finish and its tokens are
+  booked as extra spend.
+- /metrics:
+  - `llm_hedge_total{site,outcome=not_needed|primary_won|secondary_won|budget_exhausted|unavailable}`
+  - `llm_hedge_extra_requests_total{site,provider}`: second requests fired.
+  - `llm_hedge_extra_tokens_total{site,provider}`: tokens paid for answers that were discarded.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from homework_agent.utils.budget import extract_total_tokens
+from homework_agent.utils.metrics import inc_counter
+from homework_agent.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_WINDOW = 200
+_MIN_SAMPLES = 20
+_PAIRS = {"ark": "silicon", "silicon": "ark"}
+
+_LOCK = threading.Lock()
+_LATENCIES: Dict[Tuple[str, str], Deque[float]] = {}
+_HEDGED: Dict[str, Deque[bool]] = {}
+
+
+def site_budget(site: Optional[str]) -> Optional[float]:
+    """Max hedge ratio for `site`, or None when the site does not hedge."""
+    if not site:
+        return None
+    settings = get_settings()
+    default = float(settings.llm_hedge_max_ratio)
+    found: Optional[float] = None
+    for part in str(settings.llm_hedge_sites or "").split(","):
+        name, _, ratio = part.strip().partition(":")
+        if not name or name not in {str(site), "*"}:
+            continue
+        try:
+            value = float(ratio) if ratio.strip() else default
+        except ValueError:
+            value = default
+        if name == str(site):
+            return max(0.0, min(1.0, value))
+        found = max(0.0, min(1.0, value))
+    return found
+
+
+def secondary_provider(provider: str) -> Optional[str]:
+    return _PAIRS.get(str(provider or ""))
+
+
+def record_latency(site: str, provider: str, seconds: float) -> None:
+    with _LOCK:
+        _LATENCIES.setdefault((site, provider), deque(maxlen=_WINDOW)).append(
+            max(0.0, float(seconds))
+        )
+
+
+def hedge_delay(site: str, provider: str) -> float:
+    settings = get_settings()
+    ceiling = float(settings.llm_hedge_delay_seconds)
+    floor = min(ceiling, float(settings.llm_hedge_min_delay_seconds))
+    with _LOCK:
+        samples = sorted(_LATENCIES.get((site, provider)) or ())
+    if len(samples) < _MIN_SAMPLES:
+        return ceiling
+    p90 = samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+    return max(floor, min(ceiling, p90 * float(settings.llm_hedge_delay_multiplier)))
+
+
+def _admit(site: str, ratio: float, hedging: bool) -> bool:
+    """Book one call for `site`; when `hedging`, hedge only if the site's budget allows it."""
+    with _LOCK:
+        window = _HEDGED.setdefault(site, deque(maxlen=_WINDOW))
+        allowed = hedging and (sum(window) + 1) <= ratio * max(len(window) + 1, 10)
+        window.append(bool(allowed))
+        return allowed
+
+
+def _outcome(site: str, outcome: str) -> None:
+    inc_counter("llm_hedge_total", labels={"site": site, "outcome": outcome})
+
+
+def _extra_request(site: str, provider: str) -> None:
+    inc_counter(
+        "llm_hedge_extra_requests_total", labels={"site": site, "provider": provider}
+    )
+
+
+def _extra_tokens(site: str, provider: str, result: Any) -> None:
+    tokens = extract_total_tokens(getattr(result, "usage", None))
+    if tokens:
+        inc_counter(
+            "llm_hedge_extra_tokens_total",
+            labels={"site": site, "provider": provider},
+            value=tokens,
+        )
+
+
+def _spawn(fn: Callable[..., Any], *args: Any) -> None:
+    # Daemon thread in a copy of the caller's context (request ids / trace spans in logs).
+    ctx = contextvars.copy_context()
+    threading.Thread(target=ctx.run, args=(fn, *args), daemon=True).start()
+
+
+def _plan(site: Optional[str], provider: str) -> Optional[Tuple[str, float, float]]:
+    """(secondary, ratio, delay) when `site` hedges and has a second provider."""
+    ratio = site_budget(site)
+    if ratio is None:
+        return None
+    secondary = secondary_provider(provider)
+    if secondary is None:
+        _outcome(str(site), "unavailable")
+        return None
+    return secondary, ratio, hedge_delay(str(site), provider)
+
+
+def hedged_call(
+    site: Optional[str],
+    provider: str,
+    call: Callable[[str], T],
+    *,
+    is_failure: Callable[[T], bool],
+) -> T:
+    """
+    `call(provider)` with a hedge to the other provider (see module docstring). Exceptions and
+    results flagged by `is_failure` lose to a success from the other side; if both sides fail,
+    the primary's outcome is returned/raised.
+    """
+    plan = _plan(site, provider)
+    if plan is None:
+        return call(provider)
+    secondary, ratio, delay = plan
+    site = str(site)
+    results: "queue.Queue[Tuple[str, bool, Any]]" = queue.Queue()
+    started = time.monotonic()
+
+    def _run(p: str) -> None:
+        try:
+            out: Any = call(p)
+            ok = not is_failure(out)
+        except Exception as e:
+            out, ok = e, False
+        if p == provider:
+            record_latency(site, p, time.monotonic() - started)
+        results.put((p, ok, out))
+
+    _spawn(_run, provider)
+    try:
+        first = results.get(timeout=delay)
+    except queue.Empty:
+        first = None
+    if first is not None:
+        _admit(site, ratio, hedging=False)
+        _outcome(site, "not_needed")
+        return _unwrap(first)
+    if not _admit(site, ratio, hedging=True):
+        _outcome(site, "budget_exhausted")
+        return _unwrap(results.get())
+    _extra_request(site, secondary)
+    _spawn(_run, secondary)
+    first = results.get()
+    if first[1]:
+        # The other call cannot be interrupted: book its tokens when it finishes.
+        _spawn(lambda: _book_loser(site, results.get()))
+        chosen = first
+    else:
+        second = results.get()
+        chosen = second if second[1] or first[0] != provider else first
+        _book_loser(site, first if chosen is second else second)
+    _outcome(site, "primary_won" if chosen[0] == provider else "secondary_won")
+    if chosen[0] != provider:
+        logger.info(
+            "llm hedge: %s answered before %s (site=%s)", chosen[0], provider, site
+        )
+    return _unwrap(chosen)
+
+
+def _book_loser(site: str, item: Tuple[str, bool, Any]) -> None:
+    if not isinstance(item[2], BaseException):
+        _extra_tokens(site, item[0], item[2])
+
+
+def _unwrap(item: Tuple[str, bool, Any]) -> Any:
+    out = item[2]
+    if isinstance(out, BaseException):
+        raise out
+    return out
+
+
+async def hedged_call_async(
+    site: Optional[str],
+    provider: str,
+    call: Callable[[str], Awaitable[T]],
+    *,
+    is_failure: Callable[[T], bool],
+) -> T:
+    """`hedged_call` for event loops; the losing request is cancelled."""
+    plan = _plan(site, provider)
+    if plan is None:
+        return await call(provider)
+    secondary, ratio, delay = plan
+    site = str(site)
+    started = time.monotonic()
+    tasks: Dict[asyncio.Future, str] = {asyncio.ensure_future(call(provider)): provider}
+    try:
+        done, pending = await asyncio.wait(set(tasks), timeout=delay)
+        if done:
+            _admit(site, ratio, hedging=False)
+            _outcome(site, "not_needed")
+        elif not _admit(site, ratio, hedging=True):
+            _outcome(site, "budget_exhausted")
+            done, pending = await asyncio.wait(set(tasks))
+        else:
+            _extra_request(site, secondary)
+            tasks[asyncio.ensure_future(call(secondary))] = secondary
+            pending = set(tasks)
+            done = set()
+            winner: Optional[asyncio.Future] = None
+            while pending and winner is None:
+                finished, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                done |= finished
+                for task in finished:
+                    if task.exception() is None and not is_failure(task.result()):
+                        winner = winner or task
+            primary = next(iter(tasks))
+            winner = winner or primary
+            for task in done - {winner}:
+                if task.exception() is None:
+                    _extra_tokens(site, tasks[task], task.result())
+            _outcome(site, "primary_won" if winner is primary else "secondary_won")
+            if primary in done:
+                record_latency(site, provider, time.monotonic() - started)
+            return await winner
+        record_latency(site, provider, time.monotonic() - started)
+        return await next(iter(done))
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+_ITEM, _DONE, _ERROR = "item", "done", "error"
+
+
+def hedged_stream(
+    site: Optional[str],
+    provider: str,
+    make_stream: Callable[[str], Iterator[T]],
+) -> Iterator[T]:
+    """
+    Stream from `make_stream(provider)`, hedging on time to first item: whichever provider
+    yields first is streamed to the caller and the other stream is closed.
+    """
+    plan = _plan(site, provider)
+    if plan is None:
+        yield from make_stream(provider)
+        return
+    secondary, ratio, delay = plan
+    site = str(site)
+    events: "queue.Queue[Tuple[str, str, Any]]" = queue.Queue()
+    stop = {provider: threading.Event(), secondary: threading.Event()}
+    started = time.monotonic()
+
+    def _pump(p: str) -> None:
+        try:
+            stream = make_stream(p)
+            try:
+                for item in stream:
+                    if stop[p].is_set():
+                        break
+                    events.put((p, _ITEM, item))
+            finally:
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    close()
+            events.put((p, _DONE, None))
+        except Exception as e:
+            events.put((p, _ERROR, e))
+
+    _spawn(_pump, provider)
+    running = {provider}
+    failed: Dict[str, BaseException] = {}
+    winner: Optional[str] = None
+    first: Optional[Tuple[str, str, Any]] = None
+    hedged = False
+    try:
+        try:
+            first = events.get(timeout=delay)
+        except queue.Empty:
+            if _admit(site, ratio, hedging=True):
+                hedged = True
+                _extra_request(site, secondary)
+                running.add(secondary)
+                _spawn(_pump, secondary)
+            else:
+                _outcome(site, "budget_exhausted")
+        else:
+            _admit(site, ratio, hedging=False)
+            _outcome(site, "not_needed")
+        while winner is None and running:
+            p, kind, payload = first if first is not None else events.get()
+            first = None
+            if kind == _ITEM:
+                winner = p
+                if p == provider:
+                    record_latency(site, provider, time.monotonic() - started)
+                if hedged:
+                    _outcome(site, "primary_won" if p == provider else "secondary_won")
+                for other in running - {p}:
+                    stop[other].set()
+                yield payload
+            elif kind == _ERROR:
+                failed[p] = payload
+                running.discard(p)
+            else:
+                # Finished without yielding anything: an (empty) answer.
+                winner = p
+                running.discard(p)
+        if winner is None:
+            raise failed.get(provider) or next(iter(failed.values()))
+        while True:
+            p, kind, payload = events.get()
+            if p != winner:
+                continue
+            if kind == _ITEM:
+                yield payload
+            elif kind == _ERROR:
+                raise payload
+            else:
+                return
+    finally:
+        for ev in stop.values():
+            ev.set()
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import logging
 import time
 import threading
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 _LOCK = threading.Lock()
 
@@ -22,6 +25,9 @@ class _Histogram:
 
 _COUNTERS: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], _Counter] = {}
 _HISTS: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], _Histogram] = {}
+_GAUGES: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+# Called at scrape time to refresh gauges from live state (e.g. connection pools).
+_COLLECTORS: List[Callable[[], None]] = []
 
 
 def _labels_tuple(labels: Optional[Dict[str, str]]) -> Tuple[Tuple[str, str], ...]:
@@ -65,6 +71,20 @@ def observe_histogram(
                 h.counts[i] += 1
 
 
+def set_gauge(
+    name: str, *, value: float, labels: Optional[Dict[str, str]] = None
+) -> None:
+    key = (str(name), _labels_tuple(labels))
+    with _LOCK:
+        _GAUGES[key] = float(value)
+
+
+def register_collector(fn: Callable[[], None]) -> None:
+    with _LOCK:
+        if fn not in _COLLECTORS:
+            _COLLECTORS.append(fn)
+
+
 class Timer:
     def __init__(self) -> None:
         self._start = time.monotonic()
@@ -74,8 +94,18 @@ class Timer:
 
 
 def render_prometheus() -> str:
+    with _LOCK:
+        collectors = list(_COLLECTORS)
+    for fn in collectors:
+        try:
+            fn()
+        except Exception as e:
+            logger.debug("metrics collector failed: %s", e)
     lines: List[str] = []
     with _LOCK:
+        for (name, labels), v in sorted(_GAUGES.items(), key=lambda x: x[0][0]):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{_fmt_labels(labels)} {v:.0f}")
         for (name, labels), c in sorted(_COUNTERS.items(), key=lambda x: x[0][0]):
             label_str = _fmt_labels(labels)
             lines.append(f"# TYPE {name} counter")
@@ -0,0 +1,483 @@
+"""
+Cluster-wide provider quota governor (requests/min, tokens/min, max in-flight).
+
+Why:
+- Up to 50 KEDA-scaled workers plus the API call Ark / SiliconFlow / Baidu independently; nothing
+  kept the fleet under the provider quotas, so bursts turned into 429s, retries and wasted
+  latency budget.
+
+How:
+- Limits come from `PROVIDER_LIMITS_JSON`, keyed by `provider` or `provider:model` (the more
+  specific key wins), e.g.
+  `{"ark": {"rpm": 600, "tpm": 1000000, "max_inflight": 64}, "baidu_ocr": {"rpm": 60}}`.
+  Unlisted providers are not limited (no Redis round-trip).
+- `acquire(provider, model, tokens=)` takes one request from the rpm bucket, `tokens` from the
+  tpm bucket and an in-flight slot, atomically in one Lua script against Redis (shared by the
+  whole fleet; buckets refill continuously). Without Redis (or on Redis errors) the same
+  algorithm runs per process.
+- A caller that cannot be admitted waits (sleeping for the script's refill estimate) until its
+  deadline (`PROVIDER_QUOTA_MAX_WAIT_SECONDS` unless given), then gets
+  `ProviderQuotaExceeded`. Admission is not FIFO; waiters retry as capacity frees up.
+- `Permit.release(used_tokens=)` frees the slot and refunds the difference between reserved
+  and actually used tokens. In-flight slots are leases (`PROVIDER_QUOTA_LEASE_SECONDS`) so a
+  crashed worker cannot leak them.
+- OpenAI-compatible calls are governed in the shared HTTP transport (`utils/llm_clients.py`);
+  other HTTP clients (Baidu OCR) wrap their calls in `provider_quota(...)`.
+- /metrics: `provider_quota_total{provider,outcome=granted|waited|rejected}` and
+  `provider_quota_wait_seconds{provider}` (time spent waiting for quota).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Iterator, Optional, Tuple
+
+from homework_agent.utils.metrics import inc_counter, observe_histogram
+from homework_agent.utils.redis_pool import get_async_redis, get_redis
+from homework_agent.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "pquota:"
+_WAIT_BUCKETS = (0.0, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Poll interval when only the in-flight cap blocks (no refill time to compute).
+_INFLIGHT_POLL_MS = 50
+
+# KEYS: rpm bucket, tpm bucket, in-flight lease zset.
+# ARGV: rpm, tpm, max_inflight, tokens, permit id, lease ms. Returns 0 (admitted) or wait ms.
+_ACQUIRE_LUA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local max_inflight = tonumber(ARGV[3])
+local need = math.min(tonumber(ARGV[4]), tpm)
+local lease_ms = tonumber(ARGV[6])
+local function level(key, cap)
+  local v = redis.call('HMGET', key, 'level', 'ts')
+  local lvl = tonumber(v[1])
+  local ts = tonumber(v[2])
+  if lvl == nil or ts == nil then return cap end
+  return math.min(cap, lvl + math.max(0, now - ts) * cap / 60000)
+end
+local wait = 0
+local r_lvl = 0
+local t_lvl = 0
+if rpm > 0 then
+  r_lvl = level(KEYS[1], rpm)
+  if r_lvl < 1 then wait = math.max(wait, math.ceil((1 - r_lvl) * 60000 / rpm)) end
+end
+if tpm > 0 then
+  t_lvl = level(KEYS[2], tpm)
+  if t_lvl < need then wait = math.max(wait, math.ceil((need - t_lvl) * 60000 / tpm)) end
+end
+if max_inflight > 0 then
+  redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', now)
+  if redis.call('ZCARD', KEYS[3]) >= max_inflight then
+    wait = math.max(wait, tonumber(ARGV[7]))
+  end
+end
+if wait > 0 then return wait end
+if rpm > 0 then
+  redis.call('HSET', KEYS[1], 'level', tostring(r_lvl - 1), 'ts', now)
+  redis.call('PEXPIRE', KEYS[1], 120000)
+end
+if tpm > 0 and need > 0 then
+  redis.call('HSET', KEYS[2], 'level', tostring(t_lvl - need), 'ts', now)
+  redis.call('PEXPIRE', KEYS[2], 120000)
+end
+if max_inflight > 0 then
+  redis.call('ZADD', KEYS[3], now + lease_ms, ARGV[5])
+  redis.call('PEXPIRE', KEYS[3], lease_ms + 60000)
+end
+return 0
+"""
+
+# KEYS: tpm bucket, in-flight lease zset. ARGV: permit id, token refund (may be negative).
+_RELEASE_LUA = """
+redis.call('ZREM', KEYS[2], ARGV[1])
+local refund = tonumber(ARGV[2])
+if refund ~= 0 and redis.call('EXISTS', KEYS[1]) == 1 then
+  redis.call('HINCRBYFLOAT', KEYS[1], 'level', refund)
+end
+return 1
+"""
+
+
+class ProviderQuotaExceeded(RuntimeError):
+    """The provider quota did not admit the call before its deadline."""
+
+
+@dataclass(frozen=True)
+class ProviderLimit:
+    key: str
+    rpm: int = 0
+    tpm: int = 0
+    max_inflight: int = 0
+
+
+# Quota retry jitter (OS entropy; independent of anything seeding the `random` module).
+_JITTER = random.SystemRandom()
+
+_CONFIG_LOCK = threading.Lock()
+_CONFIG: Tuple[str, Dict[str, ProviderLimit]] = ("", {})
+
+
+def _load_limits() -> Dict[str, ProviderLimit]:
+    global _CONFIG
+    raw = str(get_settings().provider_limits_json or "").strip()
+    if raw == _CONFIG[0]:
+        return _CONFIG[1]
+    limits: Dict[str, ProviderLimit] = {}
+    try:
+        data = json.loads(raw) if raw else {}
+    except Exception as e:
+        logger.warning("PROVIDER_LIMITS_JSON is not valid JSON (%s); no limits", e)
+        data = {}
+    for key, cfg in (data.items() if isinstance(data, dict) else ()):
+        if not isinstance(cfg, dict):
+            continue
+        try:
+            limit = ProviderLimit(
+                key=str(key),
+                rpm=max(0, int(cfg.get("rpm") or 0)),
+                tpm=max(0, int(cfg.get("tpm") or 0)),
+                max_inflight=max(0, int(cfg.get("max_inflight") or 0)),
+            )
+        except (TypeError, ValueError):
+            continue
+        if limit.rpm or limit.tpm or limit.max_inflight:
+            limits[str(key)] = limit
+    with _CONFIG_LOCK:
+        _CONFIG = (raw, limits)
+    return limits
+
+
+def has_limits(provider: str) -> bool:
+    """Whether any limit applies to `provider` (cheap check before inspecting a request)."""
+    prefix = f"{provider}:"
+    return any(k == provider or k.startswith(prefix) for k in _load_limits())
+
+
+def limit_for(provider: str, model: Optional[str] = None) -> Optional[ProviderLimit]:
+    limits = _load_limits()
+    if not limits:
+        return None
+    if model:
+        specific = limits.get(f"{provider}:{model}")
+        if specific is not None:
+            return specific
+    return limits.get(str(provider))
+
+
+@dataclass
+class _LocalState:
+    rpm_level: Optional[float] = None
+    tpm_level: Optional[float] = None
+    ts: float = 0.0
+    inflight: Dict[str, float] = field(default_factory=dict)
+
+
+_LOCAL_LOCK = threading.Lock()
+_LOCAL: Dict[str, _LocalState] = {}
+
+
+def _local_try(
+    limit: ProviderLimit, tokens: int, permit_id: str, lease_s: float
+) -> int:
+    now = time.monotonic()
+    with _LOCAL_LOCK:
+        st = _LOCAL.setdefault(limit.key, _LocalState(ts=now))
+        elapsed = max(0.0, now - st.ts)
+        rpm_level = min(
+            limit.rpm,
+            (limit.rpm if st.rpm_level is None else st.rpm_level)
+            + elapsed * limit.rpm / 60.0,
+        )
+        tpm_level = min(
+            limit.tpm,
+            (limit.tpm if st.tpm_level is None else st.tpm_level)
+            + elapsed * limit.tpm / 60.0,
+        )
+        need = min(tokens, limit.tpm)
+        wait_ms = 0
+        if limit.rpm and rpm_level < 1:
+            wait_ms = max(wait_ms, int((1 - rpm_level) * 60000 / limit.rpm) + 1)
+        if limit.tpm and tpm_level < need:
+            wait_ms = max(wait_ms, int((need - tpm_level) * 60000 / limit.tpm) + 1)
+        if limit.max_inflight:
+            st.inflight = {k: v for k, v in st.inflight.items() if v > now}
+            if len(st.inflight) >= limit.max_inflight:
+                wait_ms = max(wait_ms, _INFLIGHT_POLL_MS)
+        if wait_ms:
+            return wait_ms
+        st.rpm_level = rpm_level - 1 if limit.rpm else None
+        st.tpm_level = tpm_level - need if limit.tpm else None
+        st.ts = now
+        if limit.max_inflight:
+            st.inflight[permit_id] = now + lease_s
+        return 0
+
+
+def _local_release(limit: ProviderLimit, permit_id: str, refund: int) -> None:
+    with _LOCAL_LOCK:
+        st = _LOCAL.get(limit.key)
+        if st is None:
+            return
+        st.inflight.pop(permit_id, None)
+        if refund and st.tpm_level is not None:
+            st.tpm_level += refund
+
+
+def _keys(limit: ProviderLimit) -> Tuple[str, str, str]:
+    base = f"{KEY_PREFIX}{{{limit.key}}}"
+    return f"{base}:rpm", f"{base}:tpm", f"{base}:inflight"
+
+
+def _acquire_args(
+    limit: ProviderLimit, tokens: int, permit_id: str, lease_s: float
+) -> list:
+    return [
+        limit.rpm,
+        limit.tpm,
+        limit.max_inflight,
+        max(0, int(tokens)),
+        permit_id,
+        int(lease_s * 1000),
+        _INFLIGHT_POLL_MS,
+    ]
+
+
+@dataclass
+class Permit:
+    """Admission for one outbound call; release it when the call is done."""
+
+    provider: str
+    limit: Optional[ProviderLimit] = None
+    tokens: int = 0
+    permit_id: str = ""
+    backend: str = ""
+    released: bool = False
+
+    def _refund(self, used_tokens: Optional[int]) -> int:
+        if used_tokens is None or not (self.limit and self.limit.tpm):
+            return 0
+        reserved = min(self.tokens, self.limit.tpm)
+        return int(reserved) - max(0, int(used_tokens))
+
+    def release(self, used_tokens: Optional[int] = None) -> None:
+        if self.released or self.limit is None:
+            return
+        self.released = True
+        refund = self._refund(used_tokens)
+        if self.backend == "redis":
+            try:
+                client = get_redis()
+                if client is not None:
+                    rpm_key, tpm_key, inflight_key = _keys(self.limit)
+                    client.register_script(_RELEASE_LUA)(
+                        keys=[tpm_key, inflight_key], args=[self.permit_id, refund]
+                    )
+                    return
+            except Exception as e:
+                logger.debug("provider quota release failed: %s", e)
+            return
+        _local_release(self.limit, self.permit_id, refund)
+
+    async def release_async(self, used_tokens: Optional[int] = None) -> None:
+        if self.released or self.limit is None:
+            return
+        if self.backend != "redis":
+            self.release(used_tokens)
+            return
+        self.released = True
+        try:
+            client = get_async_redis()
+            if client is not None:
+                rpm_key, tpm_key, inflight_key = _keys(self.limit)
+                await client.register_script(_RELEASE_LUA)(
+                    keys=[tpm_key, inflight_key],
+                    args=[self.permit_id, self._refund(used_tokens)],
+                )
+        except Exception as e:
+            logger.debug("provider quota release failed: %s", e)
+
+
+def _deadline(max_wait_seconds: Optional[float]) -> float:
+    wait = (
+        float(max_wait_seconds)
+        if max_wait_seconds is not None
+        else float(get_settings().provider_quota_max_wait_seconds)
+    )
+    return time.monotonic() + max(0.0, wait)
+
+
+def _next_sleep(wait_ms: int, deadline: float) -> Optional[float]:
+    """Seconds to sleep before retrying, or None when the deadline would pass first."""
+    remaining = deadline - time.monotonic()
+    sleep_s = wait_ms / 1000.0
+    if sleep_s > remaining:
+        return None
+    # Jitter so waiters released by the same refill don't all retry in lockstep.
+    return min(remaining, sleep_s * (1.0 + _JITTER.random() * 0.2))
+
+
+def _record(provider: str, outcome: str, started: float) -> None:
+    inc_counter(
+        "provider_quota_total", labels={"provider": provider, "outcome": outcome}
+    )
+    observe_histogram(
+        "provider_quota_wait_seconds",
+        value=max(0.0, time.monotonic() - started),
+        buckets=_WAIT_BUCKETS,
+        labels={"provider": provider},
+    )
+
+
+def _rejected(provider: str, limit: ProviderLimit, started: float) -> Exception:
+    _record(provider, "rejected", started)
+    return ProviderQuotaExceeded(
+        f"provider quota for {limit.key} did not admit the call within "
+        f"{time.monotonic() - started:.1f}s"
+    )
+
+
+def acquire(
+    provider: str,
+    model: Optional[str] = None,
+    *,
+    tokens: int = 0,
+    max_wait_seconds: Optional[float] = None,
+) -> Permit:
+    """Block until `provider`/`model` admits one call using `tokens` (estimate)."""
+    limit = limit_for(provider, model)
+    if limit is None:
+        return Permit(provider=provider)
+    started = time.monotonic()
+    deadline = _deadline(max_wait_seconds)
+    lease_s = float(get_settings().provider_quota_lease_seconds)
+    permit = Permit(
+        provider=provider, limit=limit, tokens=int(tokens), permit_id=uuid.uuid4().hex
+    )
+    waited = False
+    while True:
+        wait_ms = None
+        client = get_redis()
+        if client is not None:
+            try:
+                rpm_key, tpm_key, inflight_key = _keys(limit)
+                wait_ms = int(
+                    client.register_script(_ACQUIRE_LUA)(
+                        keys=[rpm_key, tpm_key, inflight_key],
+                        args=_acquire_args(limit, tokens, permit.permit_id, lease_s),
+                    )
+                )
+                permit.backend = "redis"
+            except Exception as e:
+                logger.debug("provider quota: redis unavailable (%s); local limits", e)
+        if wait_ms is None:
+            wait_ms = _local_try(limit, tokens, permit.permit_id, lease_s)
+            permit.backend = "local"
+        if wait_ms <= 0:
+            _record(provider, "waited" if waited else "granted", started)
+            return permit
+        sleep_s = _next_sleep(wait_ms, deadline)
+        if sleep_s is None:
+            raise _rejected(provider, limit, started)
+        waited = True
+        time.sleep(sleep_s)
+
+
+async def acquire_async(
+    provider: str,
+    model: Optional[str] = None,
+    *,
+    tokens: int = 0,
+    max_wait_seconds: Optional[float] = None,
+) -> Permit:
+    """`acquire` for event loops: waits with `asyncio.sleep`, talks to `redis.asyncio`."""
+    limit = limit_for(provider, model)
+    if limit is None:
+        return Permit(provider=provider)
+    started = time.monotonic()
+    deadline = _deadline(max_wait_seconds)
+    lease_s = float(get_settings().provider_quota_lease_seconds)
+    permit = Permit(
+        provider=provider, limit=limit, tokens=int(tokens), permit_id=uuid.uuid4().hex
+    )
+    waited = False
+    while True:
+        wait_ms = None
+        client = get_async_redis()
+        if client is not None:
+            try:
+                rpm_key, tpm_key, inflight_key = _keys(limit)
+                wait_ms = int(
+                    await client.register_script(_ACQUIRE_LUA)(
+                        keys=[rpm_key, tpm_key, inflight_key],
+                        args=_acquire_args(limit, tokens, permit.permit_id, lease_s),
+                    )
+                )
+                permit.backend = "redis"
+            except Exception as e:
+                logger.debug("provider quota: redis unavailable (%s); local limits", e)
+        if wait_ms is None:
+            wait_ms = _local_try(limit, tokens, permit.permit_id, lease_s)
+            permit.backend = "local"
+        if wait_ms <= 0:
+            _record(provider, "waited" if waited else "granted", started)
+            return permit
+        sleep_s = _next_sleep(wait_ms, deadline)
+        if sleep_s is None:
+            raise _rejected(provider, limit, started)
+        waited = True
+        await asyncio.sleep(sleep_s)
+
+
+@contextmanager
+def provider_quota(
+    provider: str,
+    model: Optional[str] = None,
+    *,
+    tokens: int = 0,
+    max_wait_seconds: Optional[float] = None,
+) -> Iterator[Permit]:
+    permit = acquire(provider, model, tokens=tokens, max_wait_seconds=max_wait_seconds)
+    try:
+        yield permit
+    finally:
+        permit.release()
+
+
+@asynccontextmanager
+async def provider_quota_async(
+    provider: str,
+    model: Optional[str] = None,
+    *,
+    tokens: int = 0,
+    max_wait_seconds: Optional[float] = None,
+) -> AsyncIterator[Permit]:
+    permit = await acquire_async(
+        provider, model, tokens=tokens, max_wait_seconds=max_wait_seconds
+    )
+    try:
+        yield permit
+    finally:
+        await permit.release_async()
+
+
+def reset_provider_limits() -> None:
+    """Forget cached config and local buckets (tests)."""
+    global _CONFIG
+    with _CONFIG_LOCK:
+        _CONFIG = ("", {})
+    with _LOCAL_LOCK:
+        _LOCAL.clear()
@@ -0,0 +1,200 @@
+"""
+Process-wide pooled Redis clients (sync and asyncio).
+
+Why:
+- Every queue module used to build `redis.Redis.from_url(...)` + `ping()` per enqueue, i.e. a new
+  TCP connection and an extra round trip on the request path.
+
+Now:
+- `get_redis(url)` returns one shared client (one connection pool) per URL for the process.
+- `get_async_redis(url)` does the same for `redis.asyncio`, per event loop (asyncio connections
+  are bound to the loop that created them).
+- Health is checked lazily: one PING when a client is first built, then redis-py's
+  `health_check_interval` re-checks only connections idle longer than that interval.
+  A failed first PING is remembered for `REDIS_RETRY_BACKOFF_SECONDS` so callers that fall
+  back to in-memory/sync paths don't hammer a down server.
+- Pool usage is exported on /metrics as `redis_pool_connections{kind,state,target}`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from homework_agent.utils.metrics import register_collector, set_gauge
+from homework_agent.utils.settings import get_settings
+
+try:
+    import redis  # type: ignore
+except ImportError:
+    redis = None  # Redis optional
+
+try:
+    import redis.asyncio as redis_asyncio  # type: ignore
+except ImportError:
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+_LOCK = threading.Lock()
+_CLIENTS: Dict[str, Any] = {}
+_FAILED_UNTIL: Dict[str, float] = {}
+_ASYNC_CLIENTS: (
+    "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, Any]]"
+) = weakref.WeakKeyDictionary()
+
+
+def _pool_kwargs(max_connections: int) -> Dict[str, Any]:
+    return {
+        "max_connections": int(max_connections) or None,
+        "health_check_interval": int(
+            get_settings().redis_health_check_interval_seconds
+        ),
+        "socket_keepalive": True,
+    }
+
+
+def redis_target(url: str) -> str:
+    """`host:port/db` of a Redis URL (no credentials), used as a metric label."""
+    try:
+        parts = urlsplit(url)
+        db = (parts.path or "/0").lstrip("/") or "0"
+        return f"{parts.hostname or ''}:{parts.port or 6379}/{db}"
+    except Exception:
+        return "unknown"
+
+
+def get_redis(url: Optional[str] = None) -> Optional[Any]:
+    """
+    Shared sync client for `url` (default: REDIS_URL). Returns None when redis is not installed,
+    no URL is configured, or the server did not answer the first PING (retried after a backoff).
+    """
+    url = url or os.getenv("REDIS_URL")
+    if not url or redis is None:
+        return None
+    client = _CLIENTS.get(url)
+    if client is not None:
+        return client
+    with _LOCK:
+        client = _CLIENTS.get(url)
+        if client is not None:
+            return client
+        if time.monotonic() < _FAILED_UNTIL.get(url, 0.0):
+            return None
+        client = redis.Redis.from_url(
+            url, **_pool_kwargs(get_settings().redis_max_connections)
+        )
+        try:
+            client.ping()
+        except Exception as e:
+            backoff = int(get_settings().redis_retry_backoff_seconds)
+            _FAILED_UNTIL[url] = time.monotonic() + backoff
+            logger.warning("Redis unavailable (%s): %s", redis_target(url), e)
+            try:
+                client.close()
+            except Exception:
+                pass
+            return None
+        _FAILED_UNTIL.pop(url, None)
+        _CLIENTS[url] = client
+        return client
+
+
+def get_redis_or_raise(url: Optional[str] = None) -> Any:
+    """Like `get_redis`, but raises RuntimeError with the reason (for REQUIRE_REDIS=1 paths)."""
+    url = url or os.getenv("REDIS_URL")
+    if redis is None:
+        raise RuntimeError("redis package not installed")
+    if not url:
+        raise RuntimeError("REDIS_URL is not set")
+    client = get_redis(url)
+    if client is None:
+        raise RuntimeError(f"Redis ping failed ({redis_target(url)})")
+    return client
+
+
+def get_async_redis(url: Optional[str] = None) -> Any:
+    """
+    Shared `redis.asyncio` client (one connection pool) per event loop and URL.
+    Returns None when `redis.asyncio` is unavailable or no URL is configured.
+    """
+    url = url or os.getenv("REDIS_URL")
+    if not url or redis_asyncio is None:
+        return None
+    loop = asyncio.get_running_loop()
+    clients = _ASYNC_CLIENTS.setdefault(loop, {})
+    client = clients.get(url)
+    if client is None:
+        client = redis_asyncio.Redis.from_url(
+            url, **_pool_kwargs(get_settings().redis_async_max_connections)
+        )
+        clients[url] = client
+    return client
+
+
+def _pool_counts(client: Any) -> Optional[Dict[str, int]]:
+    pool = getattr(client, "connection_pool", None)
+    if pool is None:
+        return None
+    in_use = len(getattr(pool, "_in_use_connections", ()) or ())
+    idle = len(getattr(pool, "_available_connections", ()) or ())
+    return {
+        "in_use": in_use,
+        "idle": idle,
+        "max": int(getattr(pool, "max_connections", 0) or 0),
+    }
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """`{"sync|<target>": {"in_use", "idle", "max"}, "async|<target>": ...}` for this process."""
+    out: Dict[str, Dict[str, int]] = {}
+    with _LOCK:
+        sync_clients = dict(_CLIENTS)
+    for url, client in sync_clients.items():
+        counts = _pool_counts(client)
+        if counts is not None:
+            out[f"sync|{redis_target(url)}"] = counts
+    for clients in list(_ASYNC_CLIENTS.values()):
+        for url, client in list(clients.items()):
+            counts = _pool_counts(client)
+            if counts is None:
+                continue
+            agg = out.setdefault(
+                f"async|{redis_target(url)}", {"in_use": 0, "idle": 0, "max": 0}
+            )
+            for k, v in counts.items():
+                agg[k] += v
+    return out
+
+
+def _export_pool_stats() -> None:
+    for name, counts in pool_stats().items():
+        kind, target = name.split("|", 1)
+        for state, value in counts.items():
+            set_gauge(
+                "redis_pool_connections",
+                value=value,
+                labels={"kind": kind, "state": state, "target": target},
+            )
+
+
+def reset_redis_clients() -> None:
+    """Drop cached clients (tests / after REDIS_URL changes). Open connections are closed."""
+    with _LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+        _FAILED_UNTIL.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+register_collector(_export_pool_stats)
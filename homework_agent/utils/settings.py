@@ -24,6 +24,57 @@ class Settings(BaseSettings):
     )
     cache_prefix: str = Field(default="", validation_alias="CACHE_PREFIX")
     require_redis: bool = Field(default=False, validation_alias="REQUIRE_REDIS")
+    # In-memory cache (no Redis / Redis ping failed): LRU bounds + background expiry sweep.
+    # Used by `utils/cache.get_cache_store`; 0 disables a bound.
+    cache_memory_max_entries: int = Field(
+        default=10000, validation_alias="CACHE_MEMORY_MAX_ENTRIES"
+    )
+    cache_memory_max_bytes: int = Field(
+        default=256 * 1024 * 1024, validation_alias="CACHE_MEMORY_MAX_BYTES"
+    )
+    cache_memory_sweep_interval_seconds: float = Field(
+        default=60.0, validation_alias="CACHE_MEMORY_SWEEP_INTERVAL_SECONDS"
+    )
+    # Near-cache in front of Redis for hot keys (invalidated via pub/sub).
+    cache_near_enabled: bool = Field(
+        default=True, validation_alias="CACHE_NEAR_ENABLED"
+    )
+    cache_near_ttl_seconds: float = Field(
+        default=5.0, validation_alias="CACHE_NEAR_TTL_SECONDS"
+    )
+    cache_near_max_entries: int = Field(
+        default=2048, validation_alias="CACHE_NEAR_MAX_ENTRIES"
+    )
+    cache_near_max_bytes: int = Field(
+        default=64 * 1024 * 1024, validation_alias="CACHE_NEAR_MAX_BYTES"
+    )
+    cache_near_prefixes: str = Field(
+        default="sess:,qbank:,qindex:,jobreq:,ocr_cache:",
+        validation_alias="CACHE_NEAR_PREFIXES",
+    )
+    # Redis cache value codec: auto|orjson|msgpack|json|legacy (plain JSON, no header).
+    # `legacy` until every pod can decode framed values; switch the default to `auto` next release.
+    cache_codec: str = Field(default="legacy", validation_alias="CACHE_CODEC")
+    # auto|zstd|lz4|zlib|none; only values >= CACHE_COMPRESS_MIN_BYTES are compressed.
+    cache_compression: str = Field(default="auto", validation_alias="CACHE_COMPRESSION")
+    cache_compress_min_bytes: int = Field(
+        default=4096, validation_alias="CACHE_COMPRESS_MIN_BYTES"
+    )
+    # Shared Redis pool (utils/redis_pool): sync pool size, idle-connection
+    # health check interval, and how long a failed first PING is remembered before retrying.
+    redis_max_connections: int = Field(
+        default=64, validation_alias="REDIS_MAX_CONNECTIONS"
+    )
+    redis_health_check_interval_seconds: int = Field(
+        default=30, validation_alias="REDIS_HEALTH_CHECK_INTERVAL_SECONDS"
+    )
+    redis_retry_backoff_seconds: int = Field(
+        default=5, validation_alias="REDIS_RETRY_BACKOFF_SECONDS"
+    )
+    # redis.asyncio pool size per event loop (async cache/queue calls from API handlers).
+    redis_async_max_connections: int = Field(
+        default=64, validation_alias="REDIS_ASYNC_MAX_CONNECTIONS"
+    )
 
     # App environment
     # dev | test | staging | prod
@@ -121,6 +172,16 @@ class Settings(BaseSettings):
     baidu_ocr_poll_max_seconds: int = Field(
         default=60, validation_alias="BAIDU_OCR_POLL_MAX_SECONDS"
     )
+    # Batched polling / pooled HTTP (services/ocr_baidu).
+    baidu_ocr_poll_backoff: float = Field(
+        default=1.5, validation_alias="BAIDU_OCR_POLL_BACKOFF"
+    )
+    baidu_ocr_poll_max_interval_seconds: float = Field(
+        default=10.0, validation_alias="BAIDU_OCR_POLL_MAX_INTERVAL_SECONDS"
+    )
+    baidu_ocr_http_max_connections: int = Field(
+        default=16, validation_alias="BAIDU_OCR_HTTP_MAX_CONNECTIONS"
+    )
 
     # OCR provider for qindex (bbox/slice). Default: SiliconFlow DeepSeek-OCR.
     # Values:
@@ -228,6 +289,99 @@ class Settings(BaseSettings):
     llm_client_timeout_seconds: int = Field(
         default=600, validation_alias="LLM_CLIENT_TIMEOUT_SECONDS"
     )
+    # Shared provider HTTP pools (utils/llm_clients): pool size, idle keep-alive
+    # connections kept per client and how long they stay open, optional HTTP/2 (needs `h2`).
+    llm_http_max_connections: int = Field(
+        default=32, validation_alias="LLM_HTTP_MAX_CONNECTIONS"
+    )
+    llm_http_max_keepalive: int = Field(
+        default=16, validation_alias="LLM_HTTP_MAX_KEEPALIVE"
+    )
+    llm_http_keepalive_expiry_seconds: float = Field(
+        default=60.0, validation_alias="LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS"
+    )
+    llm_http2: bool = Field(default=False, validation_alias="LLM_HTTP2")
+    # AsyncOpenAI pool size per event loop (AsyncLLMClient; autonomous agent calls).
+    llm_async_http_max_connections: int = Field(
+        default=256, validation_alias="LLM_ASYNC_HTTP_MAX_CONNECTIONS"
+    )
+    # Opt-in LLM/vision response cache (utils/llm_cache): enabled call sites
+    # (comma-separated, `*` = all), entry TTL and the largest response worth storing.
+    llm_response_cache_sites: str = Field(
+        default="", validation_alias="LLM_RESPONSE_CACHE_SITES"
+    )
+    llm_response_cache_ttl_seconds: int = Field(
+        default=86400, validation_alias="LLM_RESPONSE_CACHE_TTL_SECONDS"
+    )
+    llm_response_cache_max_bytes: int = Field(
+        default=256 * 1024, validation_alias="LLM_RESPONSE_CACHE_MAX_BYTES"
+    )
+    single_flight_lock_ttl_seconds: float = Field(
+        default=120.0, validation_alias="SINGLE_FLIGHT_LOCK_TTL_SECONDS"
+    )
+    single_flight_result_ttl_seconds: int = Field(
+        default=30, validation_alias="SINGLE_FLIGHT_RESULT_TTL_SECONDS"
+    )
+    single_flight_wait_seconds: float = Field(
+        default=120.0, validation_alias="SINGLE_FLIGHT_WAIT_SECONDS"
+    )
+    # Process-local image blob cache (utils/image_blob_cache): memory bound
+    # (0 = off), URL -> content freshness, decoded views kept, optional disk tier and its bound.
+    image_blob_cache_max_bytes: int = Field(
+        default=256 * 1024 * 1024, validation_alias="IMAGE_BLOB_CACHE_MAX_BYTES"
+    )
+    image_blob_cache_url_ttl_seconds: int = Field(
+        default=3600, validation_alias="IMAGE_BLOB_CACHE_URL_TTL_SECONDS"
+    )
+    image_blob_cache_max_decoded: int = Field(
+        default=4, validation_alias="IMAGE_BLOB_CACHE_MAX_DECODED"
+    )
+    image_blob_cache_dir: str = Field(
+        default="", validation_alias="IMAGE_BLOB_CACHE_DIR"
+    )
+    image_blob_cache_disk_max_bytes: int = Field(
+        default=2 * 1024 * 1024 * 1024,
+        validation_alias="IMAGE_BLOB_CACHE_DISK_MAX_BYTES",
+    )
+    # Content-addressed uploads (utils/storage_cas): how long Redis remembers
+    # that an object key was uploaded.
+    storage_cas_index_ttl_seconds: int = Field(
+        default=30 * 86400, validation_alias="STORAGE_CAS_INDEX_TTL_SECONDS"
+    )
+    # Per-page slice pipeline (core/layout_index): crop+encode threads
+    # (0 = min(4, cpu)) and concurrent slice uploads.
+    slice_encode_workers: int = Field(
+        default=0, validation_alias="SLICE_ENCODE_WORKERS"
+    )
+    slice_upload_concurrency: int = Field(
+        default=8, validation_alias="SLICE_UPLOAD_CONCURRENCY"
+    )
+    # qindex (core/qindex): pages OCR'd/sliced concurrently per build.
+    qindex_page_concurrency: int = Field(
+        default=4, validation_alias="QINDEX_PAGE_CONCURRENCY"
+    )
+    provider_limits_json: str = Field(
+        default="", validation_alias="PROVIDER_LIMITS_JSON"
+    )
+    provider_quota_max_wait_seconds: float = Field(
+        default=30.0, validation_alias="PROVIDER_QUOTA_MAX_WAIT_SECONDS"
+    )
+    provider_quota_lease_seconds: float = Field(
+        default=600.0, validation_alias="PROVIDER_QUOTA_LEASE_SECONDS"
+    )
+    llm_hedge_sites: str = Field(default="", validation_alias="LLM_HEDGE_SITES")
+    llm_hedge_max_ratio: float = Field(
+        default=0.1, validation_alias="LLM_HEDGE_MAX_RATIO"
+    )
+    llm_hedge_delay_seconds: float = Field(
+        default=20.0, validation_alias="LLM_HEDGE_DELAY_SECONDS"
+    )
+    llm_hedge_min_delay_seconds: float = Field(
+        default=2.0, validation_alias="LLM_HEDGE_MIN_DELAY_SECONDS"
+    )
+    llm_hedge_delay_multiplier: float = Field(
+        default=1.0, validation_alias="LLM_HEDGE_DELAY_MULTIPLIER"
+    )
     tool_calling_enabled: bool = Field(
         default=True, validation_alias="TOOL_CALLING_ENABLED"
     )
@@ -398,6 +552,72 @@ class Settings(BaseSettings):
     grade_queue_name: str = Field(
         default="grade:queue", validation_alias="GRADE_QUEUE_NAME"
     )
+    # Grade worker: jobs in flight per worker process (one shared event loop).
+    # NOTE: effective grading parallelism is also capped by AUTONOMOUS_AGENT_MAX_CONCURRENCY.
+    grade_worker_concurrency: int = Field(
+        default=1, validation_alias="GRADE_WORKER_CONCURRENCY"
+    )
+    # Multi-page jobs: pages graded concurrently per job (results still merge in page order).
+    grade_page_concurrency: int = Field(
+        default=2, validation_alias="GRADE_PAGE_CONCURRENCY"
+    )
+    # Grade queue fair scheduling: "lane:weight" pairs (deficit round robin, cost = pages),
+    # users round robin inside a lane. The first lane is the default.
+    grade_queue_lanes: str = Field(
+        default="interactive:4,bulk:1", validation_alias="GRADE_QUEUE_LANES"
+    )
+    # Rolling deploys: enqueue via per-user sub-queues + dispatch markers only once every grade
+    # worker understands markers (older workers drop them). Off = plain LPUSH, served FIFO.
+    grade_queue_fair_enqueue: bool = Field(
+        default=False, validation_alias="GRADE_QUEUE_FAIR_ENQUEUE"
+    )
+    # Jobs with at most this many pages go to the interactive lane, larger ones to bulk.
+    grade_queue_interactive_max_pages: int = Field(
+        default=3, validation_alias="GRADE_QUEUE_INTERACTIVE_MAX_PAGES"
+    )
+    # Redis job queues (grade/qindex/facts/review_cards): lease-based delivery.
+    # A leased job not acked/heartbeated within the timeout is redelivered to another worker;
+    # after MAX_DELIVERIES failed deliveries it is moved to `{queue}:dead`.
+    job_queue_visibility_timeout_seconds: int = Field(
+        default=120, validation_alias="JOB_QUEUE_VISIBILITY_TIMEOUT_SECONDS"
+    )
+    job_queue_max_deliveries: int = Field(
+        default=3, validation_alias="JOB_QUEUE_MAX_DELIVERIES"
+    )
+    # Job progress events (`GET /jobs/{job_id}/events`, SSE): per-job capped stream in Redis.
+    job_events_enabled: bool = Field(
+        default=True, validation_alias="JOB_EVENTS_ENABLED"
+    )
+    job_events_maxlen: int = Field(default=500, validation_alias="JOB_EVENTS_MAXLEN")
+    job_events_poll_interval_ms: int = Field(
+        default=250, validation_alias="JOB_EVENTS_POLL_INTERVAL_MS"
+    )
+    # SSE subscribers wait for new events with `XREAD BLOCK` (one pooled async connection per
+    # open stream while waiting); 0 or a failed blocking read falls back to polling above.
+    job_events_block_ms: int = Field(
+        default=5000, validation_alias="JOB_EVENTS_BLOCK_MS"
+    )
+    job_events_heartbeat_seconds: float = Field(
+        default=15.0, validation_alias="JOB_EVENTS_HEARTBEAT_SECONDS"
+    )
+    job_events_max_stream_seconds: float = Field(
+        default=900.0, validation_alias="JOB_EVENTS_MAX_STREAM_SECONDS"
+    )
+    # Rolling deploys: the terminal write also copies result/page summaries/cards into `job:{id}`
+    # so pods that predate the segmented job layout still serve finished jobs. Turn off once
+    # all pods are new.
+    job_state_legacy_mirror: bool = Field(
+        default=True, validation_alias="JOB_STATE_LEGACY_MIRROR"
+    )
+    # Jobs leased per dequeue round trip (grade worker: capped by free slots).
+    job_queue_batch_size: int = Field(
+        default=1, validation_alias="JOB_QUEUE_BATCH_SIZE"
+    )
+
+    # Verdict cards streamed from the grading LLM output as each `results[]` element completes
+    grade_stream_results_enabled: bool = Field(
+        default=True, validation_alias="GRADE_STREAM_RESULTS_ENABLED"
+    )
 
     # Review cards (Layer 3: auto re-check for visually risky items)
     grade_review_cards_enabled: bool = Field(
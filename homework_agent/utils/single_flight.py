@@ -0,0 +1,225 @@
+"""
+Single-flight coalescing of identical in-flight upstream calls (OCR / vision / qindex).
+
+Why:
+- The API (qindex), the grade worker (placeholder-card OCR) and chat (relook) can ask the same
+  provider about the same page at the same moment; each paid for its own upstream call.
+
+How (`single_flight(name, key_parts, fn)`):
+- In-process: concurrent callers with the same key wait for the first one (threading.Event).
+- Across processes (Redis, shared pool): the first caller takes `sf:lock:<name>:<hash>`
+  (SET NX PX), runs `fn` and writes the encoded result to `sf:res:<name>:<hash>` for
+  `SINGLE_FLIGHT_RESULT_TTL_SECONDS`. Others poll the result key; if the lock disappears without
+  a result (leader crashed) one of them takes over. A leader exception is shared as
+  `SingleFlightError` so waiters fail the same way instead of stampeding a failing provider.
+- Waiters give up after `SINGLE_FLIGHT_WAIT_SECONDS` and call `fn` themselves; Redis errors or
+  no Redis degrade to in-process coalescing only. Results must be JSON-serializable after
+  `encode` (default: as-is). Results rejected by `share_if` (e.g. error payloads returned as
+  values) are handed to in-process waiters only and never written to Redis.
+- /metrics: `single_flight_total{name,outcome=leader|shared|local_shared|timeout|bypass}`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from homework_agent.utils.metrics import inc_counter
+from homework_agent.utils.redis_pool import get_redis
+from homework_agent.utils.settings import get_settings
+from homework_agent.utils.versioning import stable_json_hash
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_ERROR_FIELD = "__single_flight_error__"
+
+
+class SingleFlightError(RuntimeError):
+    """The leader of a coalesced call failed; waiters re-raise its error."""
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+_LOCAL_LOCK = threading.Lock()
+_LOCAL: Dict[str, _Call] = {}
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _count(name: str, outcome: str) -> None:
+    inc_counter("single_flight_total", labels={"name": name, "outcome": outcome})
+
+
+def flight_key(name: str, key_parts: Any) -> str:
+    return f"{name}:{stable_json_hash({'k': key_parts})[:32]}"
+
+
+def single_flight(
+    name: str,
+    key_parts: Any,
+    fn: Callable[[], T],
+    *,
+    encode: Callable[[T], Any] = _identity,
+    decode: Callable[[Any], T] = _identity,
+    share_if: Optional[Callable[[T], bool]] = None,
+    wait_seconds: Optional[float] = None,
+) -> T:
+    """
+    Run `fn()` once for all concurrent callers with the same (name, key_parts) and return its
+    result to each of them. `name` is also the metric label (e.g. "ocr_fallback").
+    """
+    key = flight_key(name, key_parts)
+    wait_s = (
+        float(wait_seconds)
+        if wait_seconds is not None
+        else float(get_settings().single_flight_wait_seconds)
+    )
+    with _LOCAL_LOCK:
+        call = _LOCAL.get(key)
+        leader = call is None
+        if leader:
+            call = _Call()
+            _LOCAL[key] = call
+    if not leader:
+        if not call.done.wait(wait_s):
+            _count(name, "timeout")
+            return fn()
+        _count(name, "local_shared")
+        if call.error is not None:
+            raise SingleFlightError(
+                f"{name}: {call.error.__class__.__name__}: {call.error}"
+            ) from call.error
+        return call.result
+    try:
+        call.result = _distributed(name, key, fn, encode, decode, share_if, wait_s)
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _LOCAL_LOCK:
+            _LOCAL.pop(key, None)
+        call.done.set()
+
+
+def _distributed(
+    name: str,
+    key: str,
+    fn: Callable[[], T],
+    encode: Callable[[T], Any],
+    decode: Callable[[Any], T],
+    share_if: Optional[Callable[[T], bool]],
+    wait_s: float,
+) -> T:
+    client = get_redis()
+    if client is None:
+        _count(name, "leader")
+        return fn()
+    lock_key = f"sf:lock:{key}"
+    res_key = f"sf:res:{key}"
+    lock_ms = int(float(get_settings().single_flight_lock_ttl_seconds) * 1000)
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait_s
+    delay = 0.05
+    try:
+        while True:
+            shared = _read_result(client, res_key, name, decode)
+            if shared is not _MISSING:
+                return shared
+            if client.set(lock_key, token, nx=True, px=max(1000, lock_ms)):
+                break
+            if time.monotonic() >= deadline:
+                _count(name, "timeout")
+                return fn()
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+    except SingleFlightError:
+        raise
+    except Exception as e:
+        logger.warning(
+            "single_flight %s: redis unavailable (%s); calling directly", name, e
+        )
+        _count(name, "bypass")
+        return fn()
+
+    _count(name, "leader")
+    result_ttl = max(1, int(get_settings().single_flight_result_ttl_seconds))
+    try:
+        result = fn()
+    except BaseException as e:
+        if isinstance(e, Exception):
+            _write(
+                client,
+                res_key,
+                {_ERROR_FIELD: f"{e.__class__.__name__}: {e}"},
+                min(result_ttl, 5),
+            )
+        _release(client, lock_key, token)
+        raise
+    try:
+        if share_if is None or share_if(result):
+            _write(client, res_key, {"v": encode(result)}, result_ttl)
+    finally:
+        _release(client, lock_key, token)
+    return result
+
+
+class _Missing:
+    pass
+
+
+_MISSING: Any = _Missing()
+
+
+def _read_result(client: Any, res_key: str, name: str, decode: Callable) -> Any:
+    raw = client.get(res_key)
+    if raw is None:
+        return _MISSING
+    try:
+        payload = json.loads(raw)
+    except Exception:
+        return _MISSING
+    if not isinstance(payload, dict):
+        return _MISSING
+    if _ERROR_FIELD in payload:
+        _count(name, "shared")
+        raise SingleFlightError(f"{name}: {payload[_ERROR_FIELD]}")
+    if "v" not in payload:
+        return _MISSING
+    _count(name, "shared")
+    return decode(payload["v"])
+
+
+def _write(client: Any, res_key: str, payload: Dict[str, Any], ttl: int) -> None:
+    try:
+        client.set(
+            res_key,
+            json.dumps(payload, ensure_ascii=False, default=str),
+            ex=int(ttl),
+        )
+    except Exception as e:
+        logger.debug("single_flight result write failed: %s", e)
+
+
+def _release(client: Any, lock_key: str, token: str) -> None:
+    try:
+        current = client.get(lock_key)
+        if isinstance(current, bytes):
+            current = current.decode("utf-8", errors="ignore")
+        if current == token:
+            client.delete(lock_key)
+    except Exception as e:
+        logger.debug("single_flight lock release failed: %s", e)
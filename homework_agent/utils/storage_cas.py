@@ -0,0 +1,114 @@
+"""
+Content-addressed object keys and an "already uploaded" index for Supabase Storage.
+
+Why:
+- `upload_bytes` wrote every crop to `{prefix}{uuid4}.jpg`, so each qindex re-run, diagram slice,
+  OpenCV slice upload or retried grade re-uploaded byte-identical images under new names.
+
+How (`SupabaseStorageClient.upload_bytes(..., content_addressed=True)`):
+- The object key is `{prefix}{sha256(bytes)}{suffix}`: same bytes under the same prefix ->
+  same object -> same public URL.
+- Before uploading, the key is looked up in a process-local LRU, then in Redis
+  (`storage_cas:<bucket>:<key>` -> public URL, `STORAGE_CAS_INDEX_TTL_SECONDS`, shared pool).
+  A hit skips the upload entirely. On a miss the bytes are uploaded; a "duplicate" answer
+  from Storage (object exists but was not indexed) counts as a hit. Either way the key is
+  then indexed.
+- Redis errors degrade to the local index + upload path; nothing here ever fails an upload.
+- /metrics: `storage_cas_total{outcome=local_hit|redis_hit|exists|uploaded}` and
+  `storage_cas_saved_bytes_total`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from homework_agent.utils.metrics import inc_counter
+from homework_agent.utils.redis_pool import get_redis
+from homework_agent.utils.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "storage_cas:"
+_LOCAL_MAX = 4096
+
+_LOCK = threading.Lock()
+_LOCAL: "OrderedDict[str, str]" = OrderedDict()
+
+
+def _ttl_seconds() -> int:
+    return max(1, int(get_settings().storage_cas_index_ttl_seconds))
+
+
+def object_key(data: bytes, *, prefix: str, suffix: str) -> str:
+    return f"{prefix}{hashlib.sha256(data).hexdigest()}{suffix}"
+
+
+def _index_key(bucket: str, key: str) -> str:
+    return f"{KEY_PREFIX}{bucket}:{key}"
+
+
+def record(outcome: str, size: int = 0) -> None:
+    inc_counter("storage_cas_total", labels={"outcome": outcome})
+    if outcome in ("local_hit", "redis_hit") and size:
+        inc_counter("storage_cas_saved_bytes_total", value=float(size))
+
+
+def lookup(bucket: str, key: str, *, size: int = 0) -> Optional[str]:
+    """Public URL of an already-uploaded object, or None (then upload it)."""
+    ikey = _index_key(bucket, key)
+    with _LOCK:
+        url = _LOCAL.get(ikey)
+        if url is not None:
+            _LOCAL.move_to_end(ikey)
+    if url is not None:
+        record("local_hit", size)
+        return url
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        raw = client.get(ikey)
+    except Exception as e:
+        logger.debug(f"storage_cas lookup failed: {e}")
+        return None
+    if not raw:
+        return None
+    url = raw.decode("utf-8") if isinstance(raw, bytes) else str(raw)
+    _remember_local(ikey, url)
+    record("redis_hit", size)
+    return url
+
+
+def remember(bucket: str, key: str, url: str) -> None:
+    ikey = _index_key(bucket, key)
+    _remember_local(ikey, url)
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.set(ikey, url, ex=max(1, _ttl_seconds()))
+    except Exception as e:
+        logger.debug(f"storage_cas index write failed: {e}")
+
+
+def is_duplicate_error(err: Exception) -> bool:
+    """Storage rejected the upload because the object already exists."""
+    msg = str(err or "").lower()
+    return any(s in msg for s in ("duplicate", "already exists", "409"))
+
+
+def _remember_local(ikey: str, url: str) -> None:
+    with _LOCK:
+        _LOCAL[ikey] = url
+        _LOCAL.move_to_end(ikey)
+        while len(_LOCAL) > _LOCAL_MAX:
+            _LOCAL.popitem(last=False)
+
+
+def clear_local_index() -> None:
+    with _LOCK:
+        _LOCAL.clear()
@@ -15,6 +15,7 @@ from supabase import Client, create_client
 
 from PIL import Image
 
+from homework_agent.utils import storage_cas
 from homework_agent.utils.settings import get_settings
 
 try:
@@ -239,9 +240,18 @@ class SupabaseStorageClient:
         mime_type: str = "image/jpeg",
         suffix: str = ".jpg",
         prefix: str = "slices/",
+        content_addressed: bool = False,
     ) -> str:
-        """上传内存中的二进制内容（用于切片/裁剪图）并返回公网 URL"""
+        """上传内存中的二进制内容（用于切片/裁剪图）并返回公网 URL
+
+        content_addressed=True：对象名取内容 SHA-256（见 utils/storage_cas），
+        相同内容已上传过则跳过上传，直接返回同一个 URL。
+        """
         file_ext = suffix if suffix.startswith(".") else f".{suffix}"
+        if content_addressed:
+            return self._upload_content_addressed(
+                file_content, mime_type=mime_type, file_ext=file_ext, prefix=prefix
+            )
         unique_filename = f"{prefix}{uuid.uuid4().hex}{file_ext}"
         self.client.storage.from_(self.bucket).upload(
             path=unique_filename,
@@ -253,6 +263,30 @@ class SupabaseStorageClient:
         )
         return str(public_url).rstrip("?")
 
+    def _upload_content_addressed(
+        self, file_content: bytes, *, mime_type: str, file_ext: str, prefix: str
+    ) -> str:
+        key = storage_cas.object_key(file_content, prefix=prefix, suffix=file_ext)
+        size = len(file_content)
+        cached = storage_cas.lookup(self.bucket, key, size=size)
+        if cached:
+            return cached
+        bucket = self.client.storage.from_(self.bucket)
+        try:
+            bucket.upload(
+                path=key,
+                file=file_content,
+                file_options={"content-type": mime_type},
+            )
+            storage_cas.record("uploaded", size)
+        except Exception as e:
+            if not storage_cas.is_duplicate_error(e):
+                raise
+            storage_cas.record("exists", size)
+        public_url = str(bucket.get_public_url(key)).rstrip("?")
+        storage_cas.remember(self.bucket, key, public_url)
+        return public_url
+
     def download_bytes(
         self,
         path: str,
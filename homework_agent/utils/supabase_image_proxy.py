@@ -4,10 +4,8 @@ import io
 import logging
 from typing import List, Optional
 
-from homework_agent.utils.url_image_helpers import (
-    _normalize_public_url,
-    _safe_fetch_public_url_bytes,
-)
+from homework_agent.utils.image_blob_cache import fetch_image_bytes
+from homework_agent.utils.url_image_helpers import _normalize_public_url
 from homework_agent.utils.settings import get_settings
 
 logger = logging.getLogger(__name__)
@@ -45,10 +43,9 @@ def _create_proxy_image_urls(
 
     for u in cleaned:
         try:
-            fetched = _safe_fetch_public_url_bytes(
+            fetched = fetch_image_bytes(
                 u,
                 timeout_seconds=25.0,
-                max_redirects=3,
                 max_bytes=max_bytes,
             )
             if not fetched:
@@ -76,6 +73,7 @@ def _create_proxy_image_urls(
                 mime_type="image/jpeg",
                 suffix=".jpg",
                 prefix=base_prefix,
+                content_addressed=True,
             )
             out.append(_normalize_public_url(proxy_url) or proxy_url)
         except Exception as e:
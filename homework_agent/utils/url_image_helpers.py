@@ -8,6 +8,7 @@ import socket
 from typing import TYPE_CHECKING, Any, List, Optional, Tuple
 from urllib.parse import urljoin, urlsplit
 
+from homework_agent.utils.image_blob_cache import fetch_image_bytes
 from homework_agent.utils.settings import DEFAULT_MAX_UPLOAD_IMAGE_BYTES
 
 logger = logging.getLogger(__name__)
@@ -222,9 +223,9 @@ def _download_as_data_uri(url: str) -> Optional[str]:
     if not url:
         return None
 
-    # Try using httpx for public URLs first
+    # Try the shared image cache (SSRF-safe httpx fetch on a miss) for public URLs first
     try:
-        out = _safe_fetch_public_url_bytes(url, timeout_seconds=20.0, max_redirects=3)
+        out = fetch_image_bytes(url, timeout_seconds=20.0)
         if not out:
             return None
         data, content_type = out
@@ -19,7 +19,13 @@ from datetime import datetime
 from typing import Any, Dict, Optional
 
 from homework_agent.services.facts_extractor import extract_facts_from_grade_result
-from homework_agent.services.facts_queue import FactsJob, get_redis_client, queue_key
+from homework_agent.services.facts_queue import (
+    FactsJob,
+    get_redis_client,
+    job_queue as facts_job_queue,
+    queue_key,
+)
+from homework_agent.services.job_queue import dequeue_batch_size
 from homework_agent.utils.taxonomy import taxonomy_version
 from homework_agent.utils.logging_setup import setup_file_logging, silence_noisy_loggers
 from homework_agent.utils.observability import log_event
@@ -99,6 +105,92 @@ def _upsert_rows(*, table: str, rows: list[dict], on_conflict: str) -> None:
     _safe_table(table).upsert(rows, on_conflict=on_conflict).execute()
 
 
+def _process_raw(client: Any, raw: str, *, lock_ttl_seconds: int) -> None:
+    job = FactsJob.from_json(raw)
+    if not job.submission_id or not job.user_id:
+        return
+
+    token = _acquire_lock(
+        client, submission_id=job.submission_id, ttl_seconds=lock_ttl_seconds
+    )
+    if not token:
+        log_event(
+            logger,
+            "facts_job_skipped_locked",
+            request_id=job.request_id,
+            session_id=job.session_id,
+            submission_id=job.submission_id,
+        )
+        return
+
+    started = time.monotonic()
+    try:
+        row = _load_submission(user_id=job.user_id, submission_id=job.submission_id)
+        if not row:
+            log_event(
+                logger,
+                "facts_job_failed",
+                level="warning",
+                request_id=job.request_id,
+                session_id=job.session_id,
+                submission_id=job.submission_id,
+                error="submission_not_found",
+                error_type="NotFound",
+            )
+            return
+        facts = extract_facts_from_grade_result(
+            user_id=job.user_id,
+            submission_id=job.submission_id,
+            created_at=row.get("created_at"),
+            subject=row.get("subject"),
+            grade_result=row.get("grade_result") or {},
+            taxonomy_version=taxonomy_version() or None,
+        )
+        profile_id = str(row.get("profile_id") or "").strip() or None
+        if profile_id:
+            for a in facts.question_attempts:
+                if isinstance(a, dict):
+                    a["profile_id"] = profile_id
+            for st in facts.question_steps:
+                if isinstance(st, dict):
+                    st["profile_id"] = profile_id
+        _upsert_rows(
+            table="question_attempts",
+            rows=facts.question_attempts,
+            on_conflict="user_id,submission_id,item_id",
+        )
+        _upsert_rows(
+            table="question_steps",
+            rows=facts.question_steps,
+            on_conflict="user_id,submission_id,item_id,step_index",
+        )
+        log_event(
+            logger,
+            "facts_job_done",
+            request_id=job.request_id,
+            session_id=job.session_id,
+            submission_id=job.submission_id,
+            attempts=len(facts.question_attempts),
+            steps=len(facts.question_steps),
+            elapsed_ms=int((time.monotonic() - started) * 1000),
+        )
+    except Exception as e:
+        log_event(
+            logger,
+            "facts_job_error",
+            level="error",
+            request_id=job.request_id,
+            session_id=job.session_id,
+            submission_id=job.submission_id,
+            error_type=e.__class__.__name__,
+            error=str(e),
+        )
+        logger.exception("Facts worker error: %s", e)
+        time.sleep(1)
+    finally:
+        _release_lock(client, submission_id=job.submission_id, token=token)
+
+
 def main() -> int:
     settings = get_settings()
     logging.basicConfig(
@@ -124,110 +216,40 @@ def main() -> int:
     _install_signal_handlers(stopper)
 
     log_event(logger, "facts_worker_started", queue=qkey)
-    while not stopper.stop:
-        try:
-            item = client.brpop(qkey, timeout=2)
-            if not item:
-                continue
-            _, raw = item
-            job = FactsJob.from_json(
-                raw.decode("utf-8") if isinstance(raw, (bytes, bytearray)) else str(raw)
-            )
-            if not job.submission_id or not job.user_id:
-                continue
-
-            token = _acquire_lock(
-                client, submission_id=job.submission_id, ttl_seconds=ttl_seconds
-            )
-            if not token:
-                log_event(
-                    logger,
-                    "facts_job_skipped_locked",
-                    request_id=job.request_id,
-                    session_id=job.session_id,
-                    submission_id=job.submission_id,
-                )
-                continue
-
-            started = time.monotonic()
+    job_queue = facts_job_queue(client)
+    batch_size = dequeue_batch_size()
+    with job_queue.lease_keeper() as leases:
+        while not stopper.stop:
             try:
-                row = _load_submission(
-                    user_id=job.user_id, submission_id=job.submission_id
-                )
-                if not row:
-                    log_event(
-                        logger,
-                        "facts_job_failed",
-                        level="warning",
-                        request_id=job.request_id,
-                        session_id=job.session_id,
-                        submission_id=job.submission_id,
-                        error="submission_not_found",
-                        error_type="NotFound",
-                    )
-                    continue
-                facts = extract_facts_from_grade_result(
-                    user_id=job.user_id,
-                    submission_id=job.submission_id,
-                    created_at=row.get("created_at"),
-                    subject=row.get("subject"),
-                    grade_result=row.get("grade_result") or {},
-                    taxonomy_version=taxonomy_version() or None,
-                )
-                profile_id = str(row.get("profile_id") or "").strip() or None
-                if profile_id:
-                    for a in facts.question_attempts:
-                        if isinstance(a, dict):
-                            a["profile_id"] = profile_id
-                    for st in facts.question_steps:
-                        if isinstance(st, dict):
-                            st["profile_id"] = profile_id
-                _upsert_rows(
-                    table="question_attempts",
-                    rows=facts.question_attempts,
-                    on_conflict="user_id,submission_id,item_id",
-                )
-                _upsert_rows(
-                    table="question_steps",
-                    rows=facts.question_steps,
-                    on_conflict="user_id,submission_id,item_id,step_index",
-                )
+                batch = job_queue.pop_batch(batch_size, timeout_seconds=2)
+            except Exception as e:  # pragma: no cover
                 log_event(
                     logger,
-                    "facts_job_done",
-                    request_id=job.request_id,
-                    session_id=job.session_id,
-                    submission_id=job.submission_id,
-                    attempts=len(facts.question_attempts),
-                    steps=len(facts.question_steps),
-                    elapsed_ms=int((time.monotonic() - started) * 1000),
-                )
-            except Exception as e:
-                log_event(
-                    logger,
-                    "facts_job_error",
+                    "facts_worker_dequeue_failed",
                     level="error",
-                    request_id=job.request_id,
-                    session_id=job.session_id,
-                    submission_id=job.submission_id,
                     error_type=e.__class__.__name__,
                     error=str(e),
                 )
-                logger.exception("Facts worker error: %s", e)
                 time.sleep(1)
-            finally:
-                _release_lock(client, submission_id=job.submission_id, token=token)
-
-        except Exception as e:  # pragma: no cover
-            log_event(
-                logger,
-                "facts_worker_loop_error",
-                level="error",
-                error_type=e.__class__.__name__,
-                error=str(e),
-            )
-            logger.exception("Facts worker loop error: %s", e)
-            time.sleep(1)
+                continue
+            leases.track(batch)
+            for raw in batch:
+                if stopper.stop:
+                    break
+                try:
+                    _process_raw(client, raw, lock_ttl_seconds=ttl_seconds)
+                except Exception as e:  # pragma: no cover
+                    log_event(
+                        logger,
+                        "facts_worker_loop_error",
+                        level="error",
+                        error_type=e.__class__.__name__,
+                        error=str(e),
+                    )
+                    logger.exception("Facts worker loop error: %s", e)
+                    time.sleep(1)
+                finally:
+                    leases.ack(raw)
 
     log_event(logger, "facts_worker_stopped")
     return 0
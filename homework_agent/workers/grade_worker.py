@@ -10,6 +10,10 @@ Run:
 
 Notes:
 - Consumes `grade:queue` and updates `job:{job_id}` in the shared cache (Redis).
+- Runs up to `GRADE_WORKER_CONCURRENCY` jobs at once on a single event loop; a job is only
+  popped when a slot is free. SIGTERM/SIGINT stops popping and drains in-flight jobs.
+- Jobs are leased (see `services/job_queue.py`) and acked after completion, so a killed worker's
+  jobs are redelivered to another replica after `JOB_QUEUE_VISIBILITY_TIMEOUT_SECONDS`.
 """
 
 from __future__ import annotations
@@ -18,32 +22,39 @@ import asyncio
 import logging
 import signal
 import time
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
 from homework_agent.utils.logging_setup import setup_file_logging, silence_noisy_loggers
 from homework_agent.utils.settings import get_settings
+from homework_agent.utils.metrics import observe_histogram
 from homework_agent.utils.observability import log_event
 from homework_agent.models.schemas import GradeRequest, Subject
 from homework_agent.api.grade import perform_grading
 from homework_agent.services.grade_queue import (
+    get_job_summary,
     get_redis_client,
+    job_queue as grade_job_queue,
     queue_key,
     load_job_request,
     set_job_status,
     GradeJob,
 )
+from homework_agent.services.job_queue import LeaseKeeper, dequeue_batch_size
 from homework_agent.services.facts_queue import enqueue_facts_job
 from homework_agent.api.session import IDP_TTL_HOURS
 from homework_agent.api.session import (
     get_question_bank,
     persist_question_bank,
     save_mistakes,
+    session_pipeline,
 )
 from homework_agent.core.qbank import (
     build_question_bank,
     build_question_bank_from_vision_raw_text,
 )
+from homework_agent.core.qbank_builder import normalize_questions
 from homework_agent.core.question_cards import (
     build_question_cards_from_questions_list,
     build_question_cards_from_questions_map,
@@ -269,531 +280,507 @@ def _maybe_bill_grade_job(
         )
 
 
-def main() -> int:
+def _page_concurrency() -> int:
     settings = get_settings()
-    logging.basicConfig(
-        level=getattr(logging, settings.log_level.upper(), logging.INFO)
+    try:
+        return max(1, int(getattr(settings, "grade_page_concurrency", 1) or 1))
+    except Exception:
+        return 1
+
+
+@dataclass
+class _PageOutcome:
+    page_index: int
+    page_url: str
+    questions: List[Dict[str, Any]]
+    wrong_items: List[Dict[str, Any]]
+    verdict_cards: List[Dict[str, Any]]
+    review_cards: List[Dict[str, Any]]
+    bank_questions: Dict[str, Any]
+    vision_raw_text: str
+    warnings: List[str]
+    blank_count: int
+    meta: Dict[str, Any]
+    summary: Dict[str, Any]
+
+
+@dataclass
+class _PagesAggregate:
+    bank: Dict[str, Any]
+    wrong_items: List[Dict[str, Any]]
+    questions: List[Dict[str, Any]]
+    warnings: List[str]
+    cards_by_id: Dict[str, Dict[str, Any]]
+    page_summaries: List[Dict[str, Any]]
+    blank_count: int
+    prompt_tokens: int
+    completion_tokens: int
+
+
+def _build_page_outcome(
+    *,
+    page_index: int,
+    page_url: str,
+    page_result: Any,
+    page_meta: Dict[str, Any],
+    page_elapsed_ms: int,
+) -> _PageOutcome:
+    """Normalize one graded page (cards, wrong items, summary); no I/O."""
+    page_wrong_items = _result_items_to_dicts(getattr(page_result, "wrong_items", None))
+    page_questions_list = getattr(page_result, "questions", None)
+    if not isinstance(page_questions_list, list):
+        page_questions_list = []
+    questions = [q for q in page_questions_list if isinstance(q, dict)]
+
+    # A-7 Layer 2: verdict cards (page batch update).
+    verdict_cards, blank_count = build_question_cards_from_questions_list(
+        page_index=int(page_index),
+        questions=questions,
+        card_state="verdict_ready",
     )
-    silence_noisy_loggers()
-    if getattr(settings, "log_to_file", True):
-        level = getattr(logging, settings.log_level.upper(), logging.INFO)
-        setup_file_logging(
-            log_file_path="logs/grade_worker.log",
-            level=level,
-            logger_names=["", "homework_agent"],
+    blank_item_ids = {
+        str(c.get("item_id") or "").strip()
+        for c in verdict_cards
+        if isinstance(c, dict) and c.get("answer_state") == "blank"
+    }
+
+    # Attach page context to wrong items and ensure stable per-page item_ids for demo selection.
+    page_item_ids: List[str] = []
+    page_wrong_items_filtered: List[Dict[str, Any]] = []
+    for wi in page_wrong_items:
+        if not isinstance(wi, dict):
+            continue
+        wi["page_index"] = int(page_index)
+        wi["page_no"] = int(page_index) + 1
+        if page_url:
+            wi["page_image_url"] = page_url
+        item_id = make_card_item_id(
+            page_index=int(page_index),
+            question_number=wi.get("question_number"),
         )
+        wi["item_id"] = item_id
+        if item_id in blank_item_ids:
+            continue
+        page_item_ids.append(item_id)
+        page_wrong_items_filtered.append(wi)
 
-    client = get_redis_client()
-    if client is None:
-        logger.error(
-            "REDIS_URL not configured or redis unavailable; cannot start grade worker."
+    # Attach page context to question list (used for final /grade result + chat hints).
+    for q in questions:
+        q.setdefault("page_index", int(page_index))
+        q.setdefault("page_no", int(page_index) + 1)
+        if page_url:
+            q.setdefault("page_image_url", page_url)
+        q["item_id"] = make_card_item_id(
+            page_index=int(page_index),
+            question_number=q.get("question_number") or q.get("question_index"),
         )
-        return 2
 
-    qkey = queue_key()
-    ttl_seconds = int(IDP_TTL_HOURS * 3600)
-    stopper = _Stopper()
-    _install_signal_handlers(stopper)
+    page_warnings = [
+        str(w).strip()
+        for w in (getattr(page_result, "warnings", None) or [])
+        if str(w).strip()
+    ]
+    vision_raw_text = str(getattr(page_result, "vision_raw_text", None) or "").strip()
 
-    log_event(logger, "grade_worker_started", queue=qkey)
-    while not stopper.stop:
-        try:
-            item = client.brpop(qkey, timeout=2)
-            if not item:
-                continue
-            _, raw = item
-            job = GradeJob.from_json(
-                raw.decode("utf-8") if isinstance(raw, (bytes, bytearray)) else str(raw)
-            )
-            if not job.job_id:
-                continue
+    uncertain_count = 0
+    for c in verdict_cards:
+        if not isinstance(c, dict) or c.get("answer_state") == "blank":
+            continue
+        if str(c.get("verdict") or "").strip().lower() == "uncertain":
+            uncertain_count += 1
+    needs_review = _needs_review(
+        warnings=page_warnings, uncertain_count=uncertain_count
+    )
 
-            payload = load_job_request(job.job_id) or {}
-            req_obj = (
-                payload.get("grade_request") if isinstance(payload, dict) else None
-            )
-            provider = payload.get("provider") if isinstance(payload, dict) else None
-            provider = str(provider or job.provider or "").strip() or "ark"
-            grade_image_input_variant = (
-                payload.get("grade_image_input_variant")
-                if isinstance(payload, dict)
-                else None
-            )
-            idempotency_key = (
-                str(payload.get("idempotency_key") or "").strip()
-                if isinstance(payload, dict)
-                else ""
-            ) or None
-            grade_image_input_variant = (
-                str(grade_image_input_variant).strip().lower()
-                if grade_image_input_variant is not None
-                else ""
-            ) or None
-            if not isinstance(req_obj, dict):
-                # Mark failed so clients can see it.
-                set_job_status(
-                    job.job_id,
-                    {
-                        "status": "failed",
-                        "created_at": _iso_now(),
-                        "request": None,
-                        "result": None,
-                        "error": "job request payload missing",
-                        "finished_at": _iso_now(),
-                    },
-                    ttl_seconds=ttl_seconds,
-                )
-                continue
+    return _PageOutcome(
+        page_index=int(page_index),
+        page_url=page_url,
+        questions=questions,
+        wrong_items=page_wrong_items_filtered,
+        verdict_cards=verdict_cards,
+        review_cards=[],
+        bank_questions={},
+        vision_raw_text=vision_raw_text,
+        warnings=page_warnings,
+        blank_count=int(blank_count),
+        meta=dict(page_meta or {}),
+        summary={
+            "page_index": int(page_index),
+            "wrong_count": int(len(page_wrong_items_filtered)),
+            "uncertain_count": uncertain_count,
+            "blank_count": int(blank_count),
+            "needs_review": bool(needs_review),
+            "warnings": page_warnings[:10],
+            # Demo helper: allow "进入辅导（本页）" without extra endpoints.
+            "wrong_item_ids": page_item_ids[:30],
+            "page_elapsed_ms": int(page_elapsed_ms),
+        },
+    )
 
-            set_job_status(
-                job.job_id,
-                {
-                    "status": "running",
-                    "created_at": _iso_now(),
-                    "request": req_obj,
-                    "result": None,
-                    "total_pages": (
-                        len(req_obj.get("images") or [])
-                        if isinstance(req_obj, dict)
-                        and isinstance(req_obj.get("images"), list)
-                        else None
-                    ),
-                    "done_pages": (
-                        0
-                        if isinstance(req_obj, dict)
-                        and isinstance(req_obj.get("images"), list)
-                        and len(req_obj.get("images") or []) > 0
-                        else None
-                    ),
-                    "page_summaries": (
-                        []
-                        if isinstance(req_obj, dict)
-                        and isinstance(req_obj.get("images"), list)
-                        and len(req_obj.get("images") or []) > 0
-                        else None
-                    ),
-                },
-                ttl_seconds=ttl_seconds,
-            )
-            log_event(
-                logger,
-                "grade_job_start",
-                request_id=job.request_id,
-                session_id=job.session_id,
-                job_id=job.job_id,
-                provider=provider,
+
+def _streamed_verdict_cards(
+    *, page_index: int, item: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """Verdict card for one result streamed by the grader before its page has finished."""
+    cards, _ = build_question_cards_from_questions_list(
+        page_index=int(page_index),
+        questions=normalize_questions([item]),
+        card_state="verdict_ready",
+    )
+    return cards
+
+
+def _page_bank_questions(
+    outcome: _PageOutcome, *, session_id: str, subject: Any
+) -> Dict[str, Any]:
+    page_bank = build_question_bank(
+        session_id=session_id,
+        subject=subject,
+        questions=outcome.questions,
+        vision_raw_text=outcome.vision_raw_text,
+        page_image_urls=[outcome.page_url] if outcome.page_url else [],
+        visual_facts_map=None,
+    )
+    questions = page_bank.get("questions") if isinstance(page_bank, dict) else None
+    return questions if isinstance(questions, dict) else {}
+
+
+def _aggregate_pages(
+    *,
+    outcomes: Dict[int, _PageOutcome],
+    placeholders: Dict[int, List[Dict[str, Any]]],
+    base_bank: Dict[str, Any],
+    total_pages: int,
+    streamed: Optional[Dict[int, List[Dict[str, Any]]]] = None,
+) -> _PagesAggregate:
+    """
+    Rebuild the multi-page aggregate from finished pages in page-index order.
+
+    Pages may finish in any order; recomputing from scratch keeps question-number collision
+    suffixes, card merges and warning order identical to a sequential run. Cards `streamed`
+    for a page still being graded sit on top of its placeholders until the page outcome
+    replaces them.
+    """
+    cards_by_id: Dict[str, Dict[str, Any]] = {}
+    merged_questions: Dict[str, Any] = {}
+    collisions: List[Dict[str, Any]] = []
+    vision_pages: List[Tuple[int, str]] = []
+    wrong_items: List[Dict[str, Any]] = []
+    questions: List[Dict[str, Any]] = []
+    warnings: List[str] = []
+    page_summaries: List[Dict[str, Any]] = []
+    meta: Dict[str, Any] = dict(base_bank.get("meta") or {})
+    blank_count = 0
+    prompt_tokens = 0
+    completion_tokens = 0
+
+    for page_index in range(int(total_pages)):
+        cards_by_id = merge_question_cards(
+            cards_by_id, placeholders.get(page_index) or []
+        )
+        outcome = outcomes.get(page_index)
+        if outcome is None:
+            cards_by_id = merge_question_cards(
+                cards_by_id, (streamed or {}).get(page_index) or []
             )
+            continue
+        cards_by_id = merge_question_cards(cards_by_id, outcome.verdict_cards)
+        cards_by_id = merge_question_cards(cards_by_id, outcome.review_cards)
+        wrong_items.extend(outcome.wrong_items)
+        questions.extend(outcome.questions)
+        for w in outcome.warnings:
+            if w not in warnings:
+                warnings.append(w)
+        merged_questions = _merge_questions_with_page_context(
+            agg=merged_questions,
+            page_questions=outcome.bank_questions,
+            page_index=int(page_index),
+            page_image_url=outcome.page_url,
+            collisions=collisions,
+        )
+        if outcome.vision_raw_text:
+            vision_pages.append((int(page_index), outcome.vision_raw_text))
+        usage = outcome.meta.get("llm_usage")
+        if isinstance(usage, dict):
+            prompt_tokens += int(usage.get("prompt_tokens") or 0)
+            completion_tokens += int(usage.get("completion_tokens") or 0)
+        meta.update({k: v for k, v in outcome.meta.items() if v is not None})
+        blank_count += int(outcome.blank_count)
+        page_summaries.append(dict(outcome.summary))
+
+    meta["pages_total"] = int(total_pages)
+    meta["pages_done"] = int(len(outcomes))
+    if collisions:
+        meta["question_number_collisions"] = list(collisions)[-50:]
+    bank = dict(base_bank)
+    bank["questions"] = merged_questions
+    bank["vision_raw_text"] = _concat_vision_raw_text_pages(vision_pages)
+    bank["meta"] = meta
+    return _PagesAggregate(
+        bank=bank,
+        wrong_items=wrong_items,
+        questions=questions,
+        warnings=warnings,
+        cards_by_id=cards_by_id,
+        page_summaries=page_summaries,
+        blank_count=blank_count,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+    )
 
-            started = time.monotonic()
-            try:
-                req = GradeRequest(**req_obj)
-                if grade_image_input_variant:
-                    try:
-                        setattr(
-                            req, "_grade_image_input_variant", grade_image_input_variant
-                        )
-                    except Exception:
-                        pass
 
-                page_image_urls: List[str] = [
-                    str(getattr(img, "url", "") or "").strip()
-                    for img in (getattr(req, "images", None) or [])
-                    if str(getattr(img, "url", "") or "").strip()
-                ]
-                total_pages = max(0, len(getattr(req, "images", None) or []))
-                subj_value = _subject_value(getattr(req, "subject", "math"))
-
-                # A-6: Multi-page progressive experience (single job + partial output).
-                if total_pages > 1:
-                    page_summaries: List[Dict[str, Any]] = []
-                    agg_wrong_items: List[Dict[str, Any]] = []
-                    agg_questions: List[Dict[str, Any]] = []
-                    agg_warnings: List[str] = []
-                    vision_pages: List[Tuple[int, str]] = []
-                    collisions: List[Dict[str, Any]] = []
-                    cards_by_id: Dict[str, Dict[str, Any]] = {}
-                    total_blank_count = 0
-                    total_prompt_tokens = 0
-                    total_completion_tokens = 0
-
-                    agg_bank: Dict[str, Any] = {
-                        "session_id": str(req.session_id or job.session_id or ""),
-                        "subject": subj_value,
-                        "page_image_urls": [u for u in page_image_urls if u],
-                        "vision_raw_text": "",
-                        "questions": {},
-                        "meta": {
-                            "pages_total": int(total_pages),
-                            "pages_done": 0,
-                        },
-                    }
+def _persist_bank_and_mistakes(
+    session_id: str, wrong_items: List[Dict[str, Any]], **bank_kwargs: Any
+) -> None:
+    """qbank snapshot + mistakes for /chat, written in one cache round trip."""
+    with session_pipeline() as pipe:
+        persist_question_bank(session_id=session_id, cache=pipe, **bank_kwargs)
+        save_mistakes(session_id, wrong_items, cache=pipe)
 
-                    set_job_status(
-                        job.job_id,
-                        _now_job_payload(
-                            user_id=str(job.user_id),
-                            status="running",
-                            req_obj=req_obj,
-                            total_pages=int(total_pages),
-                            done_pages=0,
-                            page_summaries=[],
-                            question_cards=[],
-                        ),
-                        ttl_seconds=ttl_seconds,
-                    )
 
-                    for page_index, img in enumerate(
-                        getattr(req, "images", None) or []
-                    ):
-                        page_url = str(getattr(img, "url", "") or "").strip()
-                        req_page = req.model_copy(update={"images": [img]})
-
-                        # A-7 Layer 1: placeholder cards (best-effort, do not block grading on failures).
-                        if page_url:
-                            try:
-                                ocr_res = ocr_question_cards(
-                                    image=page_url, provider=str(provider or "ark")
-                                )
-                                ocr_text = (
-                                    str(ocr_res.get("text") or "").strip()
-                                    if isinstance(ocr_res, dict)
-                                    else ""
-                                )
-                                if ocr_text:
-                                    vision_qbank = (
-                                        build_question_bank_from_vision_raw_text(
-                                            session_id=str(
-                                                req.session_id or job.session_id or ""
-                                            ),
-                                            subject=req.subject,
-                                            vision_raw_text=ocr_text,
-                                            page_image_urls=[page_url],
-                                        )
-                                    )
-                                    placeholders = (
-                                        build_question_cards_from_questions_map(
-                                            page_index=int(page_index),
-                                            questions=(
-                                                vision_qbank.get("questions")
-                                                if isinstance(vision_qbank, dict)
-                                                else {}
-                                            ),
-                                            card_state="placeholder",
-                                        )
-                                    )
-                                    cards_by_id = merge_question_cards(
-                                        cards_by_id, placeholders
-                                    )
-                                    set_job_status(
-                                        job.job_id,
-                                        _now_job_payload(
-                                            user_id=str(job.user_id),
-                                            status="running",
-                                            req_obj=req_obj,
-                                            total_pages=int(total_pages),
-                                            done_pages=int(len(page_summaries)),
-                                            page_summaries=page_summaries,
-                                            question_cards=sort_question_cards(
-                                                cards_by_id
-                                            ),
-                                            started=started,
-                                        ),
-                                        ttl_seconds=ttl_seconds,
-                                    )
-                                    log_event(
-                                        logger,
-                                        "grade_job_page_placeholders_ready",
-                                        request_id=job.request_id,
-                                        session_id=job.session_id,
-                                        job_id=job.job_id,
-                                        page_index=int(page_index),
-                                        cards=len(placeholders),
-                                        source=str(ocr_res.get("source") or "network"),
-                                    )
-                            except Exception as e:
-                                log_event(
-                                    logger,
-                                    "grade_job_page_placeholders_failed",
-                                    level="warning",
-                                    request_id=job.request_id,
-                                    session_id=job.session_id,
-                                    job_id=job.job_id,
-                                    page_index=int(page_index),
-                                    error_type=e.__class__.__name__,
-                                    error=str(e),
-                                )
+def _decode_job(raw: Any) -> Optional[GradeJob]:
+    try:
+        job = GradeJob.from_json(
+            raw.decode("utf-8") if isinstance(raw, (bytes, bytearray)) else str(raw)
+        )
+    except Exception as e:
+        log_event(
+            logger,
+            "grade_job_decode_failed",
+            level="warning",
+            request_id=None,
+            error_type=e.__class__.__name__,
+            error=str(e),
+        )
+        return None
+    return job if job.job_id else None
 
-                        page_started = time.monotonic()
-                        page_result = asyncio.run(perform_grading(req_page, provider))
-                        page_elapsed_ms = int((time.monotonic() - page_started) * 1000)
 
-                        page_wrong_items = _result_items_to_dicts(
-                            getattr(page_result, "wrong_items", None)
-                        )
-                        page_questions_list = getattr(page_result, "questions", None)
-                        if not isinstance(page_questions_list, list):
-                            page_questions_list = []
+def _worker_concurrency() -> int:
+    settings = get_settings()
+    try:
+        return max(1, int(getattr(settings, "grade_worker_concurrency", 1) or 1))
+    except Exception:
+        return 1
 
-                        # A-7 Layer 2: verdict cards (page batch update).
-                        verdict_cards, blank_count = (
-                            build_question_cards_from_questions_list(
-                                page_index=int(page_index),
-                                questions=[
-                                    q
-                                    for q in page_questions_list
-                                    if isinstance(q, dict)
-                                ],
-                                card_state="verdict_ready",
-                            )
-                        )
-                        total_blank_count += int(blank_count)
-                        cards_by_id = merge_question_cards(cards_by_id, verdict_cards)
-                        blank_item_ids = {
-                            str(c.get("item_id") or "").strip()
-                            for c in verdict_cards
-                            if isinstance(c, dict) and c.get("answer_state") == "blank"
-                        }
-
-                        # Layer 3: enqueue review cards for a small set of visually risky items.
-                        settings = get_settings()
-                        if bool(getattr(settings, "grade_review_cards_enabled", True)):
-                            try:
-                                max_per_page = int(
-                                    getattr(
-                                        settings, "grade_review_cards_max_per_page", 2
-                                    )
-                                    or 0
-                                )
-                            except Exception:
-                                max_per_page = 2
-                            try:
-                                candidates = pick_review_candidates(
-                                    subject=req.subject,
-                                    page_index=int(page_index),
-                                    questions=[
-                                        q
-                                        for q in page_questions_list
-                                        if isinstance(q, dict)
-                                    ],
-                                    max_per_page=max_per_page,
-                                )
-                            except Exception:
-                                candidates = []
-                            for cand in candidates or []:
-                                if cand.item_id in blank_item_ids:
-                                    continue
-                                # Mark as review pending in cards (front-end flips later).
-                                cards_by_id = merge_question_cards(
-                                    cards_by_id,
-                                    [
-                                        {
-                                            "item_id": cand.item_id,
-                                            "card_state": "review_pending",
-                                            "review_reasons": list(
-                                                cand.review_reasons or []
-                                            )[:8],
-                                        }
-                                    ],
-                                )
-                                enqueue_review_card_job(
-                                    job_id=job.job_id,
-                                    session_id=str(
-                                        req.session_id or job.session_id or ""
-                                    ),
-                                    request_id=job.request_id,
-                                    subject=str(subj_value),
-                                    page_index=int(page_index),
-                                    question_number=str(cand.question_number),
-                                    item_id=str(cand.item_id),
-                                    review_reasons=list(cand.review_reasons or [])[:8],
-                                    page_image_url=str(page_url or "").strip() or None,
-                                    question_content=(
-                                        str(
-                                            next(
-                                                (
-                                                    q.get("question_content")
-                                                    for q in page_questions_list
-                                                    if isinstance(q, dict)
-                                                    and str(
-                                                        q.get("question_number") or ""
-                                                    ).strip()
-                                                    == str(cand.question_number)
-                                                ),
-                                                "",
-                                            )
-                                        ).strip()
-                                        or None
-                                    ),
-                                )
 
-                        # Attach page context to wrong items and ensure stable per-page item_ids for demo selection.
-                        page_item_ids: List[str] = []
-                        page_wrong_items_filtered: List[Dict[str, Any]] = []
-                        for wi in page_wrong_items:
-                            if not isinstance(wi, dict):
-                                continue
-                            wi["page_index"] = int(page_index)
-                            wi["page_no"] = int(page_index) + 1
-                            if page_url:
-                                wi["page_image_url"] = page_url
-                            item_id = make_card_item_id(
-                                page_index=int(page_index),
-                                question_number=wi.get("question_number"),
-                            )
-                            wi["item_id"] = item_id
-                            if item_id in blank_item_ids:
-                                continue
-                            page_item_ids.append(item_id)
-                            page_wrong_items_filtered.append(wi)
-
-                        # Attach page context to question list (used for final /grade result + chat hints).
-                        for q in page_questions_list:
-                            if not isinstance(q, dict):
-                                continue
-                            q.setdefault("page_index", int(page_index))
-                            q.setdefault("page_no", int(page_index) + 1)
-                            if page_url:
-                                q.setdefault("page_image_url", page_url)
-                            q["item_id"] = make_card_item_id(
-                                page_index=int(page_index),
-                                question_number=q.get("question_number")
-                                or q.get("question_index"),
-                            )
+async def _process_job(job: GradeJob, *, ttl_seconds: int) -> None:
+    """Run one grade job to completion and publish its status under `job:{job_id}`."""
+    # Leased jobs are redelivered when a worker dies before ack; don't regrade (and re-bill)
+    # a job that already reached a terminal state.
+    current = await asyncio.to_thread(get_job_summary, job.job_id) or {}
+    if str(current.get("status") or "") in {"done", "failed"}:
+        log_event(
+            logger,
+            "grade_job_redelivery_skipped",
+            request_id=job.request_id,
+            session_id=job.session_id,
+            job_id=job.job_id,
+            status=current.get("status"),
+        )
+        return
+    payload = await asyncio.to_thread(load_job_request, job.job_id) or {}
+    req_obj = payload.get("grade_request") if isinstance(payload, dict) else None
+    provider = payload.get("provider") if isinstance(payload, dict) else None
+    provider = str(provider or job.provider or "").strip() or "ark"
+    grade_image_input_variant = (
+        payload.get("grade_image_input_variant") if isinstance(payload, dict) else None
+    )
+    idempotency_key = (
+        str(payload.get("idempotency_key") or "").strip()
+        if isinstance(payload, dict)
+        else ""
+    ) or None
+    grade_image_input_variant = (
+        str(grade_image_input_variant).strip().lower()
+        if grade_image_input_variant is not None
+        else ""
+    ) or None
+    if not isinstance(req_obj, dict):
+        # Mark failed so clients can see it.
+        await asyncio.to_thread(
+            set_job_status,
+            job.job_id,
+            {
+                "status": "failed",
+                "created_at": _iso_now(),
+                "request": None,
+                "result": None,
+                "error": "job request payload missing",
+                "finished_at": _iso_now(),
+            },
+            ttl_seconds=ttl_seconds,
+        )
+        return
 
-                        # Aggregate wrong_items and warnings.
-                        agg_wrong_items.extend(
-                            [
-                                wi
-                                for wi in page_wrong_items_filtered
-                                if isinstance(wi, dict)
-                            ]
-                        )
-                        agg_questions.extend(
-                            [q for q in page_questions_list if isinstance(q, dict)]
-                        )
-                        page_warnings = list(
-                            getattr(page_result, "warnings", None) or []
-                        )
-                        for w in page_warnings:
-                            s = str(w).strip()
-                            if s and s not in agg_warnings:
-                                agg_warnings.append(s)
+    await asyncio.to_thread(
+        set_job_status,
+        job.job_id,
+        {
+            "status": "running",
+            "created_at": _iso_now(),
+            "request": req_obj,
+            "result": None,
+            "total_pages": (
+                len(req_obj.get("images") or [])
+                if isinstance(req_obj, dict) and isinstance(req_obj.get("images"), list)
+                else None
+            ),
+            "done_pages": (
+                0
+                if isinstance(req_obj, dict)
+                and isinstance(req_obj.get("images"), list)
+                and len(req_obj.get("images") or []) > 0
+                else None
+            ),
+            "page_summaries": (
+                []
+                if isinstance(req_obj, dict)
+                and isinstance(req_obj.get("images"), list)
+                and len(req_obj.get("images") or []) > 0
+                else None
+            ),
+        },
+        ttl_seconds=ttl_seconds,
+    )
+    log_event(
+        logger,
+        "grade_job_start",
+        request_id=job.request_id,
+        session_id=job.session_id,
+        job_id=job.job_id,
+        provider=provider,
+    )
 
-                        # Incremental qbank merge (union of done pages).
-                        try:
-                            page_bank = build_question_bank(
-                                session_id=str(req.session_id or job.session_id or ""),
-                                subject=req.subject,
-                                questions=[
-                                    q
-                                    for q in page_questions_list
-                                    if isinstance(q, dict)
-                                ],
-                                vision_raw_text=str(
-                                    getattr(page_result, "vision_raw_text", None) or ""
-                                ),
-                                page_image_urls=[page_url] if page_url else [],
-                                visual_facts_map=None,
-                            )
-                            page_questions = (
-                                page_bank.get("questions")
-                                if isinstance(page_bank, dict)
-                                else None
-                            )
-                            page_questions = (
-                                page_questions
-                                if isinstance(page_questions, dict)
-                                else {}
-                            )
+    started = time.monotonic()
+    try:
+        req = GradeRequest(**req_obj)
+        if grade_image_input_variant:
+            try:
+                setattr(req, "_grade_image_input_variant", grade_image_input_variant)
+            except Exception:
+                pass
+
+        page_image_urls: List[str] = [
+            str(getattr(img, "url", "") or "").strip()
+            for img in (getattr(req, "images", None) or [])
+            if str(getattr(img, "url", "") or "").strip()
+        ]
+        total_pages = max(0, len(getattr(req, "images", None) or []))
+        subj_value = _subject_value(getattr(req, "subject", "math"))
+
+        # A-6: Multi-page progressive experience (single job + partial output).
+        if total_pages > 1:
+            session_for_pages = str(req.session_id or job.session_id or "")
+            base_bank: Dict[str, Any] = {
+                "session_id": session_for_pages,
+                "subject": subj_value,
+                "page_image_urls": [u for u in page_image_urls if u],
+                "vision_raw_text": "",
+                "questions": {},
+                "meta": {
+                    "pages_total": int(total_pages),
+                    "pages_done": 0,
+                },
+            }
+            outcomes: Dict[int, _PageOutcome] = {}
+            placeholders_by_page: Dict[int, List[Dict[str, Any]]] = {}
+            streamed_by_page: Dict[int, List[Dict[str, Any]]] = {}
+            # Pages are graded concurrently (bounded per job); every status/qbank publish happens
+            # under `merge_lock` from an aggregate rebuilt in page order.
+            page_slots = asyncio.Semaphore(_page_concurrency())
+            merge_lock = asyncio.Lock()
+
+            await asyncio.to_thread(
+                set_job_status,
+                job.job_id,
+                _now_job_payload(
+                    user_id=str(job.user_id),
+                    status="running",
+                    req_obj=req_obj,
+                    total_pages=int(total_pages),
+                    done_pages=0,
+                    page_summaries=[],
+                    question_cards=[],
+                ),
+                ttl_seconds=ttl_seconds,
+            )
 
-                            agg_questions_map = (
-                                agg_bank.get("questions")
-                                if isinstance(agg_bank.get("questions"), dict)
-                                else {}
+            async def _publish_running() -> _PagesAggregate:
+                agg_now = _aggregate_pages(
+                    outcomes=outcomes,
+                    placeholders=placeholders_by_page,
+                    base_bank=base_bank,
+                    total_pages=int(total_pages),
+                    streamed=streamed_by_page,
+                )
+                await asyncio.to_thread(
+                    set_job_status,
+                    job.job_id,
+                    _now_job_payload(
+                        user_id=str(job.user_id),
+                        status="running",
+                        req_obj=req_obj,
+                        total_pages=int(total_pages),
+                        done_pages=int(len(outcomes)),
+                        page_summaries=agg_now.page_summaries,
+                        question_cards=sort_question_cards(agg_now.cards_by_id),
+                        started=started,
+                    ),
+                    ttl_seconds=ttl_seconds,
+                )
+                return agg_now
+
+            async def _grade_page(page_index: int, img: Any) -> None:
+                page_url = str(getattr(img, "url", "") or "").strip()
+                req_page = req.model_copy(update={"images": [img]})
+                async with page_slots:
+                    # A-7 Layer 1: placeholder cards (best-effort, do not block grading on failures).
+                    if page_url:
+                        try:
+                            ocr_res = await asyncio.to_thread(
+                                ocr_question_cards,
+                                image=page_url,
+                                provider=str(provider or "ark"),
                             )
-                            merged_questions = _merge_questions_with_page_context(
-                                agg=agg_questions_map,
-                                page_questions=page_questions,
-                                page_index=int(page_index),
-                                page_image_url=page_url,
-                                collisions=collisions,
+                            ocr_text = (
+                                str(ocr_res.get("text") or "").strip()
+                                if isinstance(ocr_res, dict)
+                                else ""
                             )
-                            agg_bank["questions"] = merged_questions
-                            agg_bank["page_image_urls"] = [
-                                u for u in page_image_urls if u
-                            ]
-
-                            vt = str(
-                                getattr(page_result, "vision_raw_text", None) or ""
-                            ).strip()
-                            if vt:
-                                vision_pages.append((int(page_index), vt))
-                                agg_bank["vision_raw_text"] = (
-                                    _concat_vision_raw_text_pages(vision_pages)
+                            if ocr_text:
+                                vision_qbank = build_question_bank_from_vision_raw_text(
+                                    session_id=session_for_pages,
+                                    subject=req.subject,
+                                    vision_raw_text=ocr_text,
+                                    page_image_urls=[page_url],
                                 )
-
-                            meta_now: Dict[str, Any] = {}
-                            bank_now = (
-                                get_question_bank(job.session_id)
-                                if job.session_id
-                                else None
-                            )
-                            if isinstance(bank_now, dict) and isinstance(
-                                bank_now.get("meta"), dict
-                            ):
-                                meta_now = dict(bank_now.get("meta") or {})
-                            usage_now = (
-                                meta_now.get("llm_usage")
-                                if isinstance(meta_now, dict)
-                                else None
-                            )
-                            if isinstance(usage_now, dict):
-                                total_prompt_tokens += int(
-                                    usage_now.get("prompt_tokens") or 0
+                                placeholders = build_question_cards_from_questions_map(
+                                    page_index=int(page_index),
+                                    questions=(
+                                        vision_qbank.get("questions")
+                                        if isinstance(vision_qbank, dict)
+                                        else {}
+                                    ),
+                                    card_state="placeholder",
                                 )
-                                total_completion_tokens += int(
-                                    usage_now.get("completion_tokens") or 0
+                                async with merge_lock:
+                                    placeholders_by_page[int(page_index)] = placeholders
+                                    await _publish_running()
+                                log_event(
+                                    logger,
+                                    "grade_job_page_placeholders_ready",
+                                    request_id=job.request_id,
+                                    session_id=job.session_id,
+                                    job_id=job.job_id,
+                                    page_index=int(page_index),
+                                    cards=len(placeholders),
+                                    source=str(ocr_res.get("source") or "network"),
                                 )
-                            meta = (
-                                agg_bank.get("meta")
-                                if isinstance(agg_bank.get("meta"), dict)
-                                else {}
-                            )
-                            meta.update(
-                                {k: v for k, v in meta_now.items() if v is not None}
-                            )
-                            meta["pages_total"] = int(total_pages)
-                            meta["pages_done"] = int(page_index) + 1
-                            if collisions:
-                                meta["question_number_collisions"] = list(collisions)[
-                                    -50:
-                                ]
-                            agg_bank["meta"] = meta
-
-                            persist_question_bank(
-                                session_id=str(req.session_id or job.session_id or ""),
-                                bank=agg_bank,
-                                grade_status="running",
-                                grade_summary=f"批改进行中：已完成 {int(page_index) + 1}/{total_pages} 页",
-                                grade_warnings=list(
-                                    dict.fromkeys(
-                                        [
-                                            *agg_warnings,
-                                            f"批改尚未完成：当前仅完成 {int(page_index) + 1}/{total_pages} 页（辅导仅基于已完成页）",
-                                        ]
-                                    )
-                                ),
-                                request_id=job.request_id,
-                                timings_ms=None,
-                            )
-                            save_mistakes(
-                                str(req.session_id or job.session_id or ""),
-                                agg_wrong_items,
-                            )
                         except Exception as e:
                             log_event(
                                 logger,
-                                "grade_worker_partial_qbank_failed",
+                                "grade_job_page_placeholders_failed",
                                 level="warning",
                                 request_id=job.request_id,
                                 session_id=job.session_id,
@@ -803,529 +790,740 @@ def main() -> int:
                                 error=str(e),
                             )
 
-                        wrong_count = int(len(page_wrong_items_filtered))
-                        uncertain_count = 0
-                        for c in verdict_cards:
-                            if not isinstance(c, dict):
-                                continue
-                            if c.get("answer_state") == "blank":
-                                continue
-                            if (
-                                str(c.get("verdict") or "").strip().lower()
-                                == "uncertain"
-                            ):
-                                uncertain_count += 1
-                        needs_review = _needs_review(
-                            warnings=[str(w) for w in page_warnings if str(w).strip()],
-                            uncertain_count=uncertain_count,
-                        )
-
-                        page_summaries.append(
-                            {
-                                "page_index": int(page_index),
-                                "wrong_count": wrong_count,
-                                "uncertain_count": uncertain_count,
-                                "blank_count": int(blank_count),
-                                "needs_review": bool(needs_review),
-                                "warnings": [
-                                    str(w) for w in page_warnings if str(w).strip()
-                                ][:10],
-                                # Demo helper: allow "进入辅导（本页）" without extra endpoints.
-                                "wrong_item_ids": page_item_ids[:30],
-                                "page_elapsed_ms": int(page_elapsed_ms),
-                            }
+                    async def _on_result(item: Dict[str, Any]) -> None:
+                        cards = _streamed_verdict_cards(
+                            page_index=int(page_index), item=item
                         )
+                        if not cards:
+                            return
+                        async with merge_lock:
+                            if int(page_index) in outcomes:
+                                return
+                            streamed_by_page.setdefault(int(page_index), []).extend(
+                                cards
+                            )
+                            await _publish_running()
 
-                        set_job_status(
-                            job.job_id,
-                            _now_job_payload(
-                                user_id=str(job.user_id),
-                                status="running",
-                                req_obj=req_obj,
-                                total_pages=int(total_pages),
-                                done_pages=int(page_index) + 1,
-                                page_summaries=page_summaries,
-                                question_cards=sort_question_cards(cards_by_id),
-                                started=started,
-                            ),
-                            ttl_seconds=ttl_seconds,
-                        )
-                        log_event(
-                            logger,
-                            "grade_job_page_done",
-                            request_id=job.request_id,
-                            session_id=job.session_id,
-                            job_id=job.job_id,
-                            page_index=int(page_index),
-                            done_pages=int(page_index) + 1,
-                            total_pages=int(total_pages),
-                            page_elapsed_ms=int(page_elapsed_ms),
-                        )
+                    page_started = time.monotonic()
+                    page_meta: Dict[str, Any] = {}
+                    page_result = await perform_grading(
+                        req_page, provider, meta_out=page_meta, on_result=_on_result
+                    )
+                    page_elapsed_ms = int((time.monotonic() - page_started) * 1000)
+
+                outcome = _build_page_outcome(
+                    page_index=int(page_index),
+                    page_url=page_url,
+                    page_result=page_result,
+                    page_meta=page_meta,
+                    page_elapsed_ms=page_elapsed_ms,
+                )
+                blank_item_ids = {
+                    str(c.get("item_id") or "").strip()
+                    for c in outcome.verdict_cards
+                    if isinstance(c, dict) and c.get("answer_state") == "blank"
+                }
 
-                    # Normalize `questions[*].question_content` to the OCR-grounded "full text"
-                    # (stem + options) so UI can consistently show full stems and clamp in the frontend.
+                # Layer 3: enqueue review cards for a small set of visually risky items.
+                settings = get_settings()
+                if bool(getattr(settings, "grade_review_cards_enabled", True)):
                     try:
-                        from homework_agent.core.qbank_parser import (
-                            _normalize_question_number as _norm_qn,
+                        max_per_page = int(
+                            getattr(settings, "grade_review_cards_max_per_page", 2) or 0
                         )
-
-                        qmap = (
-                            agg_bank.get("questions")
-                            if isinstance(agg_bank.get("questions"), dict)
-                            else {}
-                        )
-
-                        def _looks_like_placeholder(s: str) -> bool:
-                            t = (s or "").strip()
-                            if not t:
-                                return True
-                            return t.startswith("（批改未完成") or t.startswith(
-                                "（未提取到"
-                            )
-
-                        for q in agg_questions:
-                            if not isinstance(q, dict):
-                                continue
-                            qn_raw = q.get("question_number") or q.get("question_index")
-                            qn = str(qn_raw or "").strip()
-                            qn_key = _norm_qn(qn) or qn
-                            src = qmap.get(qn_key) or qmap.get(qn)
-                            if not isinstance(src, dict):
-                                continue
-                            full = src.get("question_text") or src.get(
-                                "question_content"
-                            )
-                            full_s = str(full or "").strip()
-                            if full_s and not _looks_like_placeholder(full_s):
-                                q["question_content"] = full_s
-                            # Prefer OCR/parsed options if missing (helps UI reconstruct full text).
-                            if (
-                                q.get("options") is None
-                                and src.get("options") is not None
-                            ):
-                                q["options"] = src.get("options")
-
-                        # Keep job.question_cards aligned with the same full text (ResultSummary may render from /jobs/{job_id}).
-                        for _item_id, c in list((cards_by_id or {}).items()):
-                            if not isinstance(c, dict):
-                                continue
-                            qn = str(c.get("question_number") or "").strip()
-                            if not qn:
-                                continue
-                            qn_key = _norm_qn(qn) or qn
-                            src = qmap.get(qn_key) or qmap.get(qn)
-                            if not isinstance(src, dict):
-                                continue
-                            full = src.get("question_text") or src.get(
-                                "question_content"
-                            )
-                            full_s = str(full or "").strip()
-                            if full_s and not _looks_like_placeholder(full_s):
-                                c["question_content"] = full_s
-                                cards_by_id[str(c.get("item_id") or _item_id)] = c
                     except Exception:
-                        pass
-
-                    grade_result_dict: Dict[str, Any] = {
-                        "wrong_items": agg_wrong_items,
-                        "summary": (
-                            f"共 {total_pages} 页：错题 {len(agg_wrong_items)} 道"
-                            + (
-                                f"（未作答 {int(total_blank_count)} 题）"
-                                if int(total_blank_count) > 0
-                                else ""
-                            )
-                        ),
-                        "subject": subj_value,
-                        "job_id": job.job_id,
-                        "session_id": str(req.session_id or job.session_id or ""),
-                        "status": "done",
-                        "total_items": len(
-                            [q for q in agg_questions if isinstance(q, dict)]
-                        )
-                        or None,
-                        "wrong_count": len(agg_wrong_items),
-                        "blank_count": int(total_blank_count),
-                        "cross_subject_flag": None,
-                        "warnings": agg_warnings,
-                        "vision_raw_text": agg_bank.get("vision_raw_text") or None,
-                        "visual_facts": None,
-                        "figure_present": None,
-                        "questions": agg_questions,
-                    }
-
-                    # Persist final qbank snapshot as done (overwrite running markers).
+                        max_per_page = 2
                     try:
-                        meta = (
-                            agg_bank.get("meta")
-                            if isinstance(agg_bank.get("meta"), dict)
-                            else {}
-                        )
-                        meta["pages_total"] = int(total_pages)
-                        meta["pages_done"] = int(total_pages)
-                        agg_bank["meta"] = meta
-                        persist_question_bank(
-                            session_id=str(req.session_id or job.session_id or ""),
-                            bank=agg_bank,
-                            grade_status="done",
-                            grade_summary=str(
-                                grade_result_dict.get("summary") or ""
-                            ).strip(),
-                            grade_warnings=agg_warnings,
-                            request_id=job.request_id,
-                            timings_ms=None,
-                        )
-                        save_mistakes(
-                            str(req.session_id or job.session_id or ""),
-                            agg_wrong_items,
-                        )
-                    except Exception as e:
-                        log_event(
-                            logger,
-                            "grade_worker_finalize_qbank_failed",
-                            level="warning",
-                            request_id=job.request_id,
-                            session_id=job.session_id,
-                            job_id=job.job_id,
-                            error_type=e.__class__.__name__,
-                            error=str(e),
+                        candidates = pick_review_candidates(
+                            subject=req.subject,
+                            page_index=int(page_index),
+                            questions=outcome.questions,
+                            max_per_page=max_per_page,
                         )
-
-                    # Best-effort: persist Submission facts + enqueue derived facts job.
-                    upload_id = str(getattr(req, "upload_id", "") or "").strip()
-                    if upload_id and job.user_id:
-                        try:
-                            bank_now = (
-                                get_question_bank(job.session_id)
-                                if job.session_id
-                                else None
-                            )
-                            meta_now = (
-                                dict(bank_now.get("meta") or {})
-                                if isinstance(bank_now, dict)
-                                and isinstance(bank_now.get("meta"), dict)
-                                else {}
-                            )
-                            meta_now = {
-                                k: v for k, v in meta_now.items() if v is not None
+                    except Exception:
+                        candidates = []
+                    for cand in candidates or []:
+                        if cand.item_id in blank_item_ids:
+                            continue
+                        # Mark as review pending in cards (front-end flips later).
+                        outcome.review_cards.append(
+                            {
+                                "item_id": cand.item_id,
+                                "card_state": "review_pending",
+                                "review_reasons": list(cand.review_reasons or [])[:8],
                             }
-                            update_submission_after_grade(
-                                user_id=str(job.user_id),
-                                submission_id=upload_id,
-                                session_id=str(job.session_id),
-                                request_id=job.request_id,
-                                subject=subj_value,
-                                page_image_urls=page_image_urls or None,
-                                proxy_page_image_urls=None,
-                                vision_raw_text=grade_result_dict.get(
-                                    "vision_raw_text"
-                                ),
-                                grade_result=grade_result_dict,
-                                warnings=list(grade_result_dict.get("warnings") or []),
-                                meta=meta_now or None,
-                            )
-                            enqueue_facts_job(
-                                submission_id=upload_id,
-                                user_id=str(job.user_id),
-                                session_id=str(job.session_id),
-                                request_id=job.request_id,
-                            )
-                            log_event(
-                                logger,
-                                "grade_worker_persisted_submission",
-                                request_id=job.request_id,
-                                session_id=job.session_id,
-                                job_id=job.job_id,
-                                submission_id=upload_id,
-                            )
-                        except Exception as e:
-                            log_event(
-                                logger,
-                                "grade_worker_persist_submission_failed",
-                                level="warning",
-                                request_id=job.request_id,
-                                session_id=job.session_id,
-                                job_id=job.job_id,
-                                submission_id=upload_id,
-                                error_type=e.__class__.__name__,
-                                error=str(e),
-                            )
-
-                    set_job_status(
-                        job.job_id,
-                        _now_job_payload(
-                            user_id=str(job.user_id),
-                            status="done",
-                            req_obj=req_obj,
-                            total_pages=int(total_pages),
-                            done_pages=int(total_pages),
-                            page_summaries=page_summaries,
-                            question_cards=sort_question_cards(cards_by_id),
-                            result=grade_result_dict,
-                            started=started,
-                            finished=True,
-                        ),
-                        ttl_seconds=ttl_seconds,
-                    )
-                    log_event(
-                        logger,
-                        "grade_job_done",
-                        request_id=job.request_id,
-                        session_id=job.session_id,
-                        job_id=job.job_id,
-                        elapsed_ms=int((time.monotonic() - started) * 1000),
-                    )
-                    try:
-                        bank_now = (
-                            get_question_bank(job.session_id)
-                            if job.session_id
-                            else None
-                        )
-                        meta_now = (
-                            (bank_now or {}).get("meta")
-                            if isinstance(bank_now, dict)
-                            else None
                         )
-                        meta_now = meta_now if isinstance(meta_now, dict) else {}
-                        _maybe_bill_grade_job(
-                            user_id=str(job.user_id),
+                        await asyncio.to_thread(
+                            enqueue_review_card_job,
+                            job_id=job.job_id,
+                            session_id=session_for_pages,
                             request_id=job.request_id,
-                            session_id=str(job.session_id),
-                            idempotency_key=idempotency_key or job.job_id,
-                            prompt_tokens=int(total_prompt_tokens),
-                            completion_tokens=int(total_completion_tokens),
-                            model=str(meta_now.get("llm_model") or "") or None,
+                            subject=str(subj_value),
+                            page_index=int(page_index),
+                            question_number=str(cand.question_number),
+                            item_id=str(cand.item_id),
+                            review_reasons=list(cand.review_reasons or [])[:8],
+                            page_image_url=str(page_url or "").strip() or None,
+                            question_content=(
+                                str(
+                                    next(
+                                        (
+                                            q.get("question_content")
+                                            for q in outcome.questions
+                                            if str(
+                                                q.get("question_number") or ""
+                                            ).strip()
+                                            == str(cand.question_number)
+                                        ),
+                                        "",
+                                    )
+                                ).strip()
+                                or None
+                            ),
                         )
-                    except Exception:
-                        pass
-                    continue
 
-                # Single-page: keep existing behavior.
-                result = asyncio.run(perform_grading(req, provider))
-
-                # Best-effort: persist Submission facts + enqueue derived facts job.
-                # NOTE: grade_homework endpoint does this after perform_grading, but worker path must do it too.
-                upload_id = str(getattr(req, "upload_id", "") or "").strip()
-                if upload_id and job.user_id:
+                async with merge_lock:
+                    outcomes[int(page_index)] = outcome
+                    done_pages = int(len(outcomes))
+                    # Incremental qbank merge (union of done pages).
                     try:
-                        bank_now = (
-                            get_question_bank(job.session_id)
-                            if job.session_id
-                            else None
-                        )
-                        meta_now = (
-                            dict(bank_now.get("meta") or {})
-                            if isinstance(bank_now, dict)
-                            and isinstance(bank_now.get("meta"), dict)
-                            else {}
+                        outcome.bank_questions = _page_bank_questions(
+                            outcome, session_id=session_for_pages, subject=req.subject
                         )
-                        # Keep meta small and non-null for audit/debug
-                        meta_now = {k: v for k, v in meta_now.items() if v is not None}
-
-                        page_image_urls = [
-                            str(getattr(img, "url", "") or "").strip()
-                            for img in (getattr(req, "images", None) or [])
-                            if str(getattr(img, "url", "") or "").strip()
-                        ]
-                        subj = (
-                            req.subject.value
-                            if hasattr(req.subject, "value")
-                            else str(req.subject)
+                        agg_now = _aggregate_pages(
+                            outcomes=outcomes,
+                            placeholders=placeholders_by_page,
+                            base_bank=base_bank,
+                            total_pages=int(total_pages),
+                            streamed=streamed_by_page,
                         )
-                        update_submission_after_grade(
-                            user_id=str(job.user_id),
-                            submission_id=upload_id,
-                            session_id=str(job.session_id),
-                            request_id=job.request_id,
-                            subject=subj,
-                            page_image_urls=page_image_urls or None,
-                            proxy_page_image_urls=None,
-                            vision_raw_text=getattr(result, "vision_raw_text", None),
-                            grade_result=(
-                                result.model_dump()
-                                if hasattr(result, "model_dump")
-                                else {}
+                        await asyncio.to_thread(
+                            _persist_bank_and_mistakes,
+                            session_for_pages,
+                            agg_now.wrong_items,
+                            bank=agg_now.bank,
+                            grade_status="running",
+                            grade_summary=f"批改进行中：已完成 {done_pages}/{total_pages} 页",
+                            grade_warnings=list(
+                                dict.fromkeys(
+                                    [
+                                        *agg_now.warnings,
+                                        f"批改尚未完成：当前仅完成 {done_pages}/{total_pages} 页（辅导仅基于已完成页）",
+                                    ]
+                                )
                             ),
-                            warnings=list(getattr(result, "warnings", None) or []),
-                            meta=meta_now or None,
-                        )
-                        enqueue_facts_job(
-                            submission_id=upload_id,
-                            user_id=str(job.user_id),
-                            session_id=str(job.session_id),
-                            request_id=job.request_id,
-                        )
-                        log_event(
-                            logger,
-                            "grade_worker_persisted_submission",
                             request_id=job.request_id,
-                            session_id=job.session_id,
-                            job_id=job.job_id,
-                            submission_id=upload_id,
+                            timings_ms=None,
                         )
                     except Exception as e:
                         log_event(
                             logger,
-                            "grade_worker_persist_submission_failed",
+                            "grade_worker_partial_qbank_failed",
                             level="warning",
                             request_id=job.request_id,
                             session_id=job.session_id,
                             job_id=job.job_id,
-                            submission_id=upload_id,
+                            page_index=int(page_index),
                             error_type=e.__class__.__name__,
                             error=str(e),
                         )
 
-                # Keep session-scoped mistakes available for demo tutoring context selection.
-                questions_list = getattr(result, "questions", None)
-                if not isinstance(questions_list, list):
-                    questions_list = []
-                qc, blank_n = build_question_cards_from_questions_list(
-                    page_index=0,
-                    questions=[q for q in questions_list if isinstance(q, dict)],
-                    card_state="verdict_ready",
+                    await _publish_running()
+                log_event(
+                    logger,
+                    "grade_job_page_done",
+                    request_id=job.request_id,
+                    session_id=job.session_id,
+                    job_id=job.job_id,
+                    page_index=int(page_index),
+                    done_pages=done_pages,
+                    total_pages=int(total_pages),
+                    page_elapsed_ms=int(page_elapsed_ms),
                 )
-                blank_item_ids = {
-                    str(c.get("item_id") or "").strip()
-                    for c in qc
-                    if isinstance(c, dict) and c.get("answer_state") == "blank"
-                }
-                wrong_items_dicts = _result_items_to_dicts(
-                    getattr(result, "wrong_items", None)
+
+            page_tasks = [
+                asyncio.create_task(_grade_page(int(page_index), img))
+                for page_index, img in enumerate(getattr(req, "images", None) or [])
+            ]
+            try:
+                await asyncio.gather(*page_tasks)
+            except BaseException:
+                # A failed page fails the job (same as the sequential path): stop the rest.
+                for t in page_tasks:
+                    t.cancel()
+                await asyncio.gather(*page_tasks, return_exceptions=True)
+                raise
+
+            agg = _aggregate_pages(
+                outcomes=outcomes,
+                placeholders=placeholders_by_page,
+                base_bank=base_bank,
+                total_pages=int(total_pages),
+            )
+            agg_bank = agg.bank
+            agg_wrong_items = agg.wrong_items
+            agg_questions = agg.questions
+            agg_warnings = agg.warnings
+            cards_by_id = agg.cards_by_id
+            page_summaries = agg.page_summaries
+            total_blank_count = agg.blank_count
+            total_prompt_tokens = agg.prompt_tokens
+            total_completion_tokens = agg.completion_tokens
+
+            # Normalize `questions[*].question_content` to the OCR-grounded "full text"
+            # (stem + options) so UI can consistently show full stems and clamp in the frontend.
+            try:
+                from homework_agent.core.qbank_parser import (
+                    _normalize_question_number as _norm_qn,
                 )
-                wrong_items_filtered: List[Dict[str, Any]] = []
-                for wi in wrong_items_dicts:
-                    if not isinstance(wi, dict):
-                        continue
-                    wi["page_index"] = 0
-                    wi["page_no"] = 1
-                    wi["item_id"] = make_card_item_id(
-                        page_index=0, question_number=wi.get("question_number")
-                    )
-                    if wi["item_id"] in blank_item_ids:
-                        continue
-                    wrong_items_filtered.append(wi)
 
-                try:
-                    save_mistakes(
-                        str(req.session_id or job.session_id or ""),
-                        wrong_items_filtered,
-                    )
-                except Exception:
-                    pass
+                qmap = (
+                    agg_bank.get("questions")
+                    if isinstance(agg_bank.get("questions"), dict)
+                    else {}
+                )
 
-                uncertain_count = 0
-                for c in qc:
+                def _looks_like_placeholder(s: str) -> bool:
+                    t = (s or "").strip()
+                    if not t:
+                        return True
+                    return t.startswith("（批改未完成") or t.startswith("（未提取到")
+
+                for q in agg_questions:
+                    if not isinstance(q, dict):
+                        continue
+                    qn_raw = q.get("question_number") or q.get("question_index")
+                    qn = str(qn_raw or "").strip()
+                    qn_key = _norm_qn(qn) or qn
+                    src = qmap.get(qn_key) or qmap.get(qn)
+                    if not isinstance(src, dict):
+                        continue
+                    full = src.get("question_text") or src.get("question_content")
+                    full_s = str(full or "").strip()
+                    if full_s and not _looks_like_placeholder(full_s):
+                        q["question_content"] = full_s
+                    # Prefer OCR/parsed options if missing (helps UI reconstruct full text).
+                    if q.get("options") is None and src.get("options") is not None:
+                        q["options"] = src.get("options")
+
+                # Keep job.question_cards aligned with the same full text (ResultSummary may render from /jobs/{job_id}).
+                for _item_id, c in list((cards_by_id or {}).items()):
                     if not isinstance(c, dict):
                         continue
-                    if c.get("answer_state") == "blank":
+                    qn = str(c.get("question_number") or "").strip()
+                    if not qn:
+                        continue
+                    qn_key = _norm_qn(qn) or qn
+                    src = qmap.get(qn_key) or qmap.get(qn)
+                    if not isinstance(src, dict):
                         continue
-                    if str(c.get("verdict") or "").strip().lower() == "uncertain":
-                        uncertain_count += 1
-                warnings_list = [
-                    str(w)
-                    for w in (getattr(result, "warnings", None) or [])
-                    if str(w).strip()
-                ][:10]
-                needs_review = _needs_review(
-                    warnings=warnings_list,
-                    uncertain_count=uncertain_count,
+                    full = src.get("question_text") or src.get("question_content")
+                    full_s = str(full or "").strip()
+                    if full_s and not _looks_like_placeholder(full_s):
+                        c["question_content"] = full_s
+                        cards_by_id[str(c.get("item_id") or _item_id)] = c
+            except Exception:
+                pass
+
+            grade_result_dict: Dict[str, Any] = {
+                "wrong_items": agg_wrong_items,
+                "summary": (
+                    f"共 {total_pages} 页：错题 {len(agg_wrong_items)} 道"
+                    + (
+                        f"（未作答 {int(total_blank_count)} 题）"
+                        if int(total_blank_count) > 0
+                        else ""
+                    )
+                ),
+                "subject": subj_value,
+                "job_id": job.job_id,
+                "session_id": str(req.session_id or job.session_id or ""),
+                "status": "done",
+                "total_items": len([q for q in agg_questions if isinstance(q, dict)])
+                or None,
+                "wrong_count": len(agg_wrong_items),
+                "blank_count": int(total_blank_count),
+                "cross_subject_flag": None,
+                "warnings": agg_warnings,
+                "vision_raw_text": agg_bank.get("vision_raw_text") or None,
+                "visual_facts": None,
+                "figure_present": None,
+                "questions": agg_questions,
+            }
+
+            # Persist final qbank snapshot as done (overwrite running markers).
+            try:
+                meta = (
+                    agg_bank.get("meta")
+                    if isinstance(agg_bank.get("meta"), dict)
+                    else {}
                 )
-                result_dict = (
-                    result.model_dump() if hasattr(result, "model_dump") else {}
+                meta["pages_total"] = int(total_pages)
+                meta["pages_done"] = int(total_pages)
+                agg_bank["meta"] = meta
+                await asyncio.to_thread(
+                    _persist_bank_and_mistakes,
+                    str(req.session_id or job.session_id or ""),
+                    agg_wrong_items,
+                    bank=agg_bank,
+                    grade_status="done",
+                    grade_summary=str(grade_result_dict.get("summary") or "").strip(),
+                    grade_warnings=agg_warnings,
+                    request_id=job.request_id,
+                    timings_ms=None,
                 )
-                if isinstance(result_dict, dict):
-                    result_dict["wrong_items"] = wrong_items_filtered
-                    result_dict["wrong_count"] = int(len(wrong_items_filtered))
-                    result_dict["blank_count"] = int(blank_n)
+            except Exception as e:
+                log_event(
+                    logger,
+                    "grade_worker_finalize_qbank_failed",
+                    level="warning",
+                    request_id=job.request_id,
+                    session_id=job.session_id,
+                    job_id=job.job_id,
+                    error_type=e.__class__.__name__,
+                    error=str(e),
+                )
+
+            # Best-effort: persist Submission facts + enqueue derived facts job.
+            upload_id = str(getattr(req, "upload_id", "") or "").strip()
+            if upload_id and job.user_id:
                 try:
                     bank_now = (
-                        get_question_bank(job.session_id) if job.session_id else None
+                        await asyncio.to_thread(get_question_bank, job.session_id)
+                        if job.session_id
+                        else None
                     )
                     meta_now = (
-                        (bank_now or {}).get("meta")
+                        dict(bank_now.get("meta") or {})
                         if isinstance(bank_now, dict)
-                        else None
+                        and isinstance(bank_now.get("meta"), dict)
+                        else {}
                     )
-                    meta_now = meta_now if isinstance(meta_now, dict) else {}
-                    usage_now = (
-                        meta_now.get("llm_usage")
-                        if isinstance(meta_now, dict)
-                        else None
+                    meta_now = {k: v for k, v in meta_now.items() if v is not None}
+                    await asyncio.to_thread(
+                        update_submission_after_grade,
+                        user_id=str(job.user_id),
+                        submission_id=upload_id,
+                        session_id=str(job.session_id),
+                        request_id=job.request_id,
+                        subject=subj_value,
+                        page_image_urls=page_image_urls or None,
+                        proxy_page_image_urls=None,
+                        vision_raw_text=grade_result_dict.get("vision_raw_text"),
+                        grade_result=grade_result_dict,
+                        warnings=list(grade_result_dict.get("warnings") or []),
+                        meta=meta_now or None,
                     )
-                    if isinstance(usage_now, dict):
-                        _maybe_bill_grade_job(
-                            user_id=str(job.user_id),
-                            request_id=job.request_id,
-                            session_id=str(job.session_id),
-                            idempotency_key=idempotency_key or job.job_id,
-                            prompt_tokens=int(usage_now.get("prompt_tokens") or 0),
-                            completion_tokens=int(
-                                usage_now.get("completion_tokens") or 0
-                            ),
-                            model=str(meta_now.get("llm_model") or "") or None,
-                        )
-                except Exception:
-                    pass
-                set_job_status(
-                    job.job_id,
-                    _now_job_payload(
+                    await asyncio.to_thread(
+                        enqueue_facts_job,
+                        submission_id=upload_id,
                         user_id=str(job.user_id),
-                        status="done",
-                        req_obj=req_obj,
-                        total_pages=1,
-                        done_pages=1,
-                        page_summaries=[
-                            {
-                                "page_index": 0,
-                                "wrong_count": int(len(wrong_items_filtered)),
-                                "uncertain_count": int(uncertain_count),
-                                "blank_count": int(blank_n),
-                                "needs_review": bool(needs_review),
-                                "warnings": warnings_list,
-                            }
-                        ],
-                        question_cards=qc,
-                        result=result_dict if isinstance(result_dict, dict) else None,
-                        started=started,
-                        finished=True,
+                        session_id=str(job.session_id),
+                        request_id=job.request_id,
+                    )
+                    log_event(
+                        logger,
+                        "grade_worker_persisted_submission",
+                        request_id=job.request_id,
+                        session_id=job.session_id,
+                        job_id=job.job_id,
+                        submission_id=upload_id,
+                    )
+                except Exception as e:
+                    log_event(
+                        logger,
+                        "grade_worker_persist_submission_failed",
+                        level="warning",
+                        request_id=job.request_id,
+                        session_id=job.session_id,
+                        job_id=job.job_id,
+                        submission_id=upload_id,
+                        error_type=e.__class__.__name__,
+                        error=str(e),
+                    )
+
+            await asyncio.to_thread(
+                set_job_status,
+                job.job_id,
+                _now_job_payload(
+                    user_id=str(job.user_id),
+                    status="done",
+                    req_obj=req_obj,
+                    total_pages=int(total_pages),
+                    done_pages=int(total_pages),
+                    page_summaries=page_summaries,
+                    question_cards=sort_question_cards(cards_by_id),
+                    result=grade_result_dict,
+                    started=started,
+                    finished=True,
+                ),
+                ttl_seconds=ttl_seconds,
+            )
+            log_event(
+                logger,
+                "grade_job_done",
+                request_id=job.request_id,
+                session_id=job.session_id,
+                job_id=job.job_id,
+                elapsed_ms=int((time.monotonic() - started) * 1000),
+            )
+            try:
+                bank_now = (
+                    await asyncio.to_thread(get_question_bank, job.session_id)
+                    if job.session_id
+                    else None
+                )
+                meta_now = (
+                    (bank_now or {}).get("meta") if isinstance(bank_now, dict) else None
+                )
+                meta_now = meta_now if isinstance(meta_now, dict) else {}
+                await asyncio.to_thread(
+                    _maybe_bill_grade_job,
+                    user_id=str(job.user_id),
+                    request_id=job.request_id,
+                    session_id=str(job.session_id),
+                    idempotency_key=idempotency_key or job.job_id,
+                    prompt_tokens=int(total_prompt_tokens),
+                    completion_tokens=int(total_completion_tokens),
+                    model=str(meta_now.get("llm_model") or "") or None,
+                )
+            except Exception:
+                pass
+            return
+
+        # Single-page: keep existing behavior, plus verdict cards published as they stream in.
+        streamed_cards: Dict[str, Dict[str, Any]] = {}
+
+        async def _on_result(item: Dict[str, Any]) -> None:
+            nonlocal streamed_cards
+            cards = _streamed_verdict_cards(page_index=0, item=item)
+            if not cards:
+                return
+            streamed_cards = merge_question_cards(streamed_cards, cards)
+            await asyncio.to_thread(
+                set_job_status,
+                job.job_id,
+                _now_job_payload(
+                    user_id=str(job.user_id),
+                    status="running",
+                    req_obj=req_obj,
+                    total_pages=int(total_pages),
+                    done_pages=0,
+                    page_summaries=[],
+                    question_cards=sort_question_cards(streamed_cards),
+                    started=started,
+                ),
+                ttl_seconds=ttl_seconds,
+            )
+
+        result = await perform_grading(req, provider, on_result=_on_result)
+
+        # Best-effort: persist Submission facts + enqueue derived facts job.
+        # NOTE: grade_homework endpoint does this after perform_grading, but worker path must do it too.
+        upload_id = str(getattr(req, "upload_id", "") or "").strip()
+        if upload_id and job.user_id:
+            try:
+                bank_now = (
+                    await asyncio.to_thread(get_question_bank, job.session_id)
+                    if job.session_id
+                    else None
+                )
+                meta_now = (
+                    dict(bank_now.get("meta") or {})
+                    if isinstance(bank_now, dict)
+                    and isinstance(bank_now.get("meta"), dict)
+                    else {}
+                )
+                # Keep meta small and non-null for audit/debug
+                meta_now = {k: v for k, v in meta_now.items() if v is not None}
+
+                page_image_urls = [
+                    str(getattr(img, "url", "") or "").strip()
+                    for img in (getattr(req, "images", None) or [])
+                    if str(getattr(img, "url", "") or "").strip()
+                ]
+                subj = (
+                    req.subject.value
+                    if hasattr(req.subject, "value")
+                    else str(req.subject)
+                )
+                await asyncio.to_thread(
+                    update_submission_after_grade,
+                    user_id=str(job.user_id),
+                    submission_id=upload_id,
+                    session_id=str(job.session_id),
+                    request_id=job.request_id,
+                    subject=subj,
+                    page_image_urls=page_image_urls or None,
+                    proxy_page_image_urls=None,
+                    vision_raw_text=getattr(result, "vision_raw_text", None),
+                    grade_result=(
+                        result.model_dump() if hasattr(result, "model_dump") else {}
                     ),
-                    ttl_seconds=ttl_seconds,
+                    warnings=list(getattr(result, "warnings", None) or []),
+                    meta=meta_now or None,
+                )
+                await asyncio.to_thread(
+                    enqueue_facts_job,
+                    submission_id=upload_id,
+                    user_id=str(job.user_id),
+                    session_id=str(job.session_id),
+                    request_id=job.request_id,
                 )
                 log_event(
                     logger,
-                    "grade_job_done",
+                    "grade_worker_persisted_submission",
                     request_id=job.request_id,
                     session_id=job.session_id,
                     job_id=job.job_id,
-                    elapsed_ms=int((time.monotonic() - started) * 1000),
+                    submission_id=upload_id,
                 )
             except Exception as e:
-                set_job_status(
-                    job.job_id,
-                    {
-                        "user_id": str(job.user_id),
-                        "status": "failed",
-                        "created_at": _iso_now(),
-                        "request": req_obj,
-                        "result": None,
-                        "error": str(e),
-                        "finished_at": _iso_now(),
-                        "elapsed_ms": int((time.monotonic() - started) * 1000),
-                    },
-                    ttl_seconds=ttl_seconds,
-                )
                 log_event(
                     logger,
-                    "grade_job_failed",
+                    "grade_worker_persist_submission_failed",
                     level="warning",
                     request_id=job.request_id,
                     session_id=job.session_id,
                     job_id=job.job_id,
+                    submission_id=upload_id,
                     error_type=e.__class__.__name__,
                     error=str(e),
                 )
+
+        # Keep session-scoped mistakes available for demo tutoring context selection.
+        questions_list = getattr(result, "questions", None)
+        if not isinstance(questions_list, list):
+            questions_list = []
+        qc, blank_n = build_question_cards_from_questions_list(
+            page_index=0,
+            questions=[q for q in questions_list if isinstance(q, dict)],
+            card_state="verdict_ready",
+        )
+        blank_item_ids = {
+            str(c.get("item_id") or "").strip()
+            for c in qc
+            if isinstance(c, dict) and c.get("answer_state") == "blank"
+        }
+        wrong_items_dicts = _result_items_to_dicts(getattr(result, "wrong_items", None))
+        wrong_items_filtered: List[Dict[str, Any]] = []
+        for wi in wrong_items_dicts:
+            if not isinstance(wi, dict):
+                continue
+            wi["page_index"] = 0
+            wi["page_no"] = 1
+            wi["item_id"] = make_card_item_id(
+                page_index=0, question_number=wi.get("question_number")
+            )
+            if wi["item_id"] in blank_item_ids:
+                continue
+            wrong_items_filtered.append(wi)
+
+        try:
+            await asyncio.to_thread(
+                save_mistakes,
+                str(req.session_id or job.session_id or ""),
+                wrong_items_filtered,
+            )
+        except Exception:
+            pass
+
+        uncertain_count = 0
+        for c in qc:
+            if not isinstance(c, dict):
+                continue
+            if c.get("answer_state") == "blank":
+                continue
+            if str(c.get("verdict") or "").strip().lower() == "uncertain":
+                uncertain_count += 1
+        warnings_list = [
+            str(w) for w in (getattr(result, "warnings", None) or []) if str(w).strip()
+        ][:10]
+        needs_review = _needs_review(
+            warnings=warnings_list,
+            uncertain_count=uncertain_count,
+        )
+        result_dict = result.model_dump() if hasattr(result, "model_dump") else {}
+        if isinstance(result_dict, dict):
+            result_dict["wrong_items"] = wrong_items_filtered
+            result_dict["wrong_count"] = int(len(wrong_items_filtered))
+            result_dict["blank_count"] = int(blank_n)
+        try:
+            bank_now = (
+                await asyncio.to_thread(get_question_bank, job.session_id)
+                if job.session_id
+                else None
+            )
+            meta_now = (
+                (bank_now or {}).get("meta") if isinstance(bank_now, dict) else None
+            )
+            meta_now = meta_now if isinstance(meta_now, dict) else {}
+            usage_now = (
+                meta_now.get("llm_usage") if isinstance(meta_now, dict) else None
+            )
+            if isinstance(usage_now, dict):
+                await asyncio.to_thread(
+                    _maybe_bill_grade_job,
+                    user_id=str(job.user_id),
+                    request_id=job.request_id,
+                    session_id=str(job.session_id),
+                    idempotency_key=idempotency_key or job.job_id,
+                    prompt_tokens=int(usage_now.get("prompt_tokens") or 0),
+                    completion_tokens=int(usage_now.get("completion_tokens") or 0),
+                    model=str(meta_now.get("llm_model") or "") or None,
+                )
+        except Exception:
+            pass
+        await asyncio.to_thread(
+            set_job_status,
+            job.job_id,
+            _now_job_payload(
+                user_id=str(job.user_id),
+                status="done",
+                req_obj=req_obj,
+                total_pages=1,
+                done_pages=1,
+                page_summaries=[
+                    {
+                        "page_index": 0,
+                        "wrong_count": int(len(wrong_items_filtered)),
+                        "uncertain_count": int(uncertain_count),
+                        "blank_count": int(blank_n),
+                        "needs_review": bool(needs_review),
+                        "warnings": warnings_list,
+                    }
+                ],
+                question_cards=qc,
+                result=result_dict if isinstance(result_dict, dict) else None,
+                started=started,
+                finished=True,
+            ),
+            ttl_seconds=ttl_seconds,
+        )
+        log_event(
+            logger,
+            "grade_job_done",
+            request_id=job.request_id,
+            session_id=job.session_id,
+            job_id=job.job_id,
+            elapsed_ms=int((time.monotonic() - started) * 1000),
+        )
+    except Exception as e:
+        await asyncio.to_thread(
+            set_job_status,
+            job.job_id,
+            {
+                "user_id": str(job.user_id),
+                "status": "failed",
+                "created_at": _iso_now(),
+                "request": req_obj,
+                "result": None,
+                "error": str(e),
+                "finished_at": _iso_now(),
+                "elapsed_ms": int((time.monotonic() - started) * 1000),
+            },
+            ttl_seconds=ttl_seconds,
+        )
+        log_event(
+            logger,
+            "grade_job_failed",
+            level="warning",
+            request_id=job.request_id,
+            session_id=job.session_id,
+            job_id=job.job_id,
+            error_type=e.__class__.__name__,
+            error=str(e),
+        )
+
+
+_QUEUE_WAIT_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800)
+
+
+def _observe_queue_wait(job: GradeJob) -> None:
+    """Per-lane queue wait (enqueue -> lease), the signal fair scheduling is meant to bound."""
+    lane = job.lane or "default"
+    wait_s = max(0.0, time.time() - float(job.enqueued_at or 0.0))
+    observe_histogram(
+        "grade_queue_wait_seconds",
+        value=wait_s,
+        buckets=_QUEUE_WAIT_BUCKETS,
+        labels={"lane": lane},
+    )
+    log_event(
+        logger,
+        "grade_job_dequeued",
+        request_id=job.request_id,
+        session_id=job.session_id,
+        job_id=job.job_id,
+        lane=lane,
+        queue_wait_ms=int(wait_s * 1000),
+    )
+
+
+async def _run_job_guarded(
+    job: GradeJob, *, raw: str, leases: LeaseKeeper, ttl_seconds: int
+) -> None:
+    try:
+        await _process_job(job, ttl_seconds=ttl_seconds)
+    except Exception as e:  # pragma: no cover
+        log_event(
+            logger,
+            "grade_worker_error",
+            level="error",
+            request_id=job.request_id,
+            session_id=job.session_id,
+            job_id=job.job_id,
+            error_type=e.__class__.__name__,
+            error=str(e),
+        )
+        logger.exception("Grade worker error: %s", e)
+    finally:
+        await asyncio.to_thread(leases.ack, raw)
+
+
+async def _serve(
+    job_queue: Any,
+    *,
+    ttl_seconds: int,
+    stopper: _Stopper,
+    concurrency: int,
+    batch_size: int = 1,
+) -> None:
+    """
+    Long-lived consume loop: keep up to `concurrency` jobs in flight on one event loop.
+
+    Backpressure: slots are reserved before popping, so the worker never leases a job
+    it cannot start immediately (the rest stay visible to other replicas/KEDA). When several
+    slots are free, up to `batch_size` jobs are leased in one round trip.
+    Jobs are acked only after they finish; a crash leaves them leased and they are redelivered
+    once the lease expires. On stop, no new jobs are popped and in-flight jobs are drained.
+    """
+    slots = asyncio.Semaphore(max(1, int(concurrency)))
+    batch_size = max(1, min(int(batch_size), int(concurrency)))
+    in_flight: set[asyncio.Task] = set()
+    leases = job_queue.lease_keeper()
+    leases.start()
+
+    def _on_done(task: asyncio.Task) -> None:
+        in_flight.discard(task)
+        slots.release()
+
+    while not stopper.stop:
+        await slots.acquire()
+        if stopper.stop:
+            slots.release()
+            break
+        reserved = 1
+        while reserved < batch_size and not slots.locked():
+            await slots.acquire()
+            reserved += 1
+        try:
+            batch = await asyncio.to_thread(
+                job_queue.pop_batch, reserved, timeout_seconds=2
+            )
         except Exception as e:  # pragma: no cover
+            for _ in range(reserved):
+                slots.release()
             log_event(
                 logger,
                 "grade_worker_error",
@@ -1335,8 +1533,70 @@ def main() -> int:
                 error=str(e),
             )
             logger.exception("Grade worker error: %s", e)
-            time.sleep(1)
+            await asyncio.sleep(1)
+            continue
+        for _ in range(reserved - len(batch)):
+            slots.release()
+        leases.track(batch)
+        for raw in batch:
+            job = _decode_job(raw)
+            if job is None:
+                # Undecodable payloads would never succeed; drop them instead of redelivering.
+                await asyncio.to_thread(leases.ack, raw)
+                slots.release()
+                continue
+            _observe_queue_wait(job)
+            task = asyncio.create_task(
+                _run_job_guarded(job, raw=raw, leases=leases, ttl_seconds=ttl_seconds),
+                name=f"grade_job:{job.job_id}",
+            )
+            in_flight.add(task)
+            task.add_done_callback(_on_done)
 
+    if in_flight:
+        log_event(logger, "grade_worker_draining", in_flight=len(in_flight))
+        await asyncio.gather(*list(in_flight), return_exceptions=True)
+    await asyncio.to_thread(leases.release_all)
+    leases.stop()
+
+
+def main() -> int:
+    settings = get_settings()
+    logging.basicConfig(
+        level=getattr(logging, settings.log_level.upper(), logging.INFO)
+    )
+    silence_noisy_loggers()
+    if getattr(settings, "log_to_file", True):
+        level = getattr(logging, settings.log_level.upper(), logging.INFO)
+        setup_file_logging(
+            log_file_path="logs/grade_worker.log",
+            level=level,
+            logger_names=["", "homework_agent"],
+        )
+
+    client = get_redis_client()
+    if client is None:
+        logger.error(
+            "REDIS_URL not configured or redis unavailable; cannot start grade worker."
+        )
+        return 2
+
+    qkey = queue_key()
+    ttl_seconds = int(IDP_TTL_HOURS * 3600)
+    concurrency = _worker_concurrency()
+    stopper = _Stopper()
+    _install_signal_handlers(stopper)
+
+    log_event(logger, "grade_worker_started", queue=qkey, concurrency=concurrency)
+    asyncio.run(
+        _serve(
+            grade_job_queue(client),
+            ttl_seconds=ttl_seconds,
+            stopper=stopper,
+            concurrency=concurrency,
+            batch_size=dequeue_batch_size(),
+        )
+    )
     log_event(logger, "grade_worker_stopped")
     return 0
 
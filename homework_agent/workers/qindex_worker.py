@@ -21,8 +21,10 @@ from typing import Any
 
 from homework_agent.utils.settings import get_settings
 from homework_agent.utils.logging_setup import setup_file_logging, silence_noisy_loggers
+from homework_agent.services.job_queue import dequeue_batch_size
 from homework_agent.services.qindex_queue import (
     get_redis_client,
+    job_queue as qindex_job_queue,
     queue_key,
     QIndexJob,
     store_qindex_result,
@@ -51,6 +53,77 @@ def _install_signal_handlers(stopper: _Stopper) -> None:
     signal.signal(signal.SIGTERM, _handle)
 
 
+def _process_raw(raw: str, *, ttl_seconds: int) -> None:
+    job = QIndexJob.from_json(raw)
+    if not job.session_id or not job.page_urls:
+        return
+
+    # Slice all questions - removed visual_risk filtering to ensure comprehensive coverage
+    allow = (
+        job.question_numbers or None
+    )  # None = no filtering, slice all detected questions
+    log_event(
+        logger,
+        "qindex_job_start",
+        request_id=job.request_id,
+        session_id=job.session_id,
+        pages=len(job.page_urls),
+        questions=len(allow or []),
+    )
+    index: dict[str, Any] = build_question_index_for_pages(
+        job.page_urls,
+        question_numbers=allow,
+        session_id=job.session_id,
+        # Publish each finished page right away so chat can use early slices.
+        on_progress=lambda partial: store_qindex_result(
+            job.session_id,
+            partial,
+            ttl_seconds=ttl_seconds,
+            request_id=job.request_id,
+        ),
+    )
+    store_qindex_result(
+        job.session_id,
+        index,
+        ttl_seconds=ttl_seconds,
+        request_id=job.request_id,
+    )
+    # Best-effort: persist per-question slice refs to Postgres (7d TTL) for robustness.
+    try:
+        sub = resolve_submission_for_session(job.session_id) or {}
+        sid = str(sub.get("submission_id") or "").strip()
+        uid = str(sub.get("user_id") or "").strip()
+        pid = str(sub.get("profile_id") or "").strip()
+        if sid and uid:
+            persist_qindex_slices(
+                user_id=uid,
+                profile_id=(pid if pid else None),
+                submission_id=sid,
+                session_id=job.session_id,
+                qindex=index,
+                request_id=job.request_id,
+            )
+    except Exception as e:
+        log_event(
+            logger,
+            "qindex_slices_persist_failed",
+            level="warning",
+            request_id=job.request_id,
+            session_id=job.session_id,
+            error_type=e.__class__.__name__,
+            error=str(e),
+        )
+
+    log_event(
+        logger,
+        "qindex_job_done",
+        request_id=job.request_id,
+        session_id=job.session_id,
+        questions=len(index.get("questions") or {}),
+        warnings=index.get("warnings") or [],
+    )
+
+
 def main() -> int:
     settings = get_settings()
     logging.basicConfig(
@@ -91,87 +164,42 @@ def main() -> int:
     qkey = queue_key()
     log_event(logger, "qindex_worker_started", queue=qkey)
 
-    while not stopper.stop:
-        try:
-            item = client.brpop(qkey, timeout=2)
-            if not item:
-                continue
-            _, raw = item
-            job = QIndexJob.from_json(
-                raw.decode("utf-8") if isinstance(raw, (bytes, bytearray)) else str(raw)
-            )
-            if not job.session_id or not job.page_urls:
-                continue
-
-            # Slice all questions - removed visual_risk filtering to ensure comprehensive coverage
-            allow = (
-                job.question_numbers or None
-            )  # None = no filtering, slice all detected questions
-            log_event(
-                logger,
-                "qindex_job_start",
-                request_id=job.request_id,
-                session_id=job.session_id,
-                pages=len(job.page_urls),
-                questions=len(allow or []),
-            )
-            index: dict[str, Any] = build_question_index_for_pages(
-                job.page_urls,
-                question_numbers=allow,
-                session_id=job.session_id,
-            )
-            store_qindex_result(
-                job.session_id,
-                index,
-                ttl_seconds=ttl_seconds,
-                request_id=job.request_id,
-            )
-            # Best-effort: persist per-question slice refs to Postgres (7d TTL) for robustness.
+    job_queue = qindex_job_queue(client)
+    batch_size = dequeue_batch_size()
+    with job_queue.lease_keeper() as leases:
+        while not stopper.stop:
             try:
-                sub = resolve_submission_for_session(job.session_id) or {}
-                sid = str(sub.get("submission_id") or "").strip()
-                uid = str(sub.get("user_id") or "").strip()
-                pid = str(sub.get("profile_id") or "").strip()
-                if sid and uid:
-                    persist_qindex_slices(
-                        user_id=uid,
-                        profile_id=(pid if pid else None),
-                        submission_id=sid,
-                        session_id=job.session_id,
-                        qindex=index,
-                        request_id=job.request_id,
-                    )
-            except Exception as e:
+                batch = job_queue.pop_batch(batch_size, timeout_seconds=2)
+            except Exception as e:  # pragma: no cover
                 log_event(
                     logger,
-                    "qindex_slices_persist_failed",
-                    level="warning",
-                    request_id=job.request_id,
-                    session_id=job.session_id,
+                    "qindex_worker_dequeue_failed",
+                    level="error",
                     error_type=e.__class__.__name__,
                     error=str(e),
                 )
-
-            log_event(
-                logger,
-                "qindex_job_done",
-                request_id=job.request_id,
-                session_id=job.session_id,
-                questions=len(index.get("questions") or {}),
-                warnings=index.get("warnings") or [],
-            )
-
-        except Exception as e:  # pragma: no cover
-            log_event(
-                logger,
-                "qindex_worker_error",
-                level="error",
-                request_id=None,
-                error_type=e.__class__.__name__,
-                error=str(e),
-            )
-            logger.exception("QIndex worker error: %s", e)
-            time.sleep(1)
+                time.sleep(1)
+                continue
+            leases.track(batch)
+            for raw in batch:
+                if stopper.stop:
+                    # Unstarted jobs are released back to the queue when the lease keeper exits.
+                    break
+                try:
+                    _process_raw(raw, ttl_seconds=ttl_seconds)
+                except Exception as e:  # pragma: no cover
+                    log_event(
+                        logger,
+                        "qindex_worker_error",
+                        level="error",
+                        request_id=None,
+                        error_type=e.__class__.__name__,
+                        error=str(e),
+                    )
+                    logger.exception("QIndex worker error: %s", e)
+                    time.sleep(1)
+                finally:
+                    leases.ack(raw)
 
     log_event(logger, "qindex_worker_stopped")
     return 0
@@ -1,7 +1,7 @@
 """
 Review Cards worker process.
 
-Consumes `review_cards:queue` and updates `job:{job_id}.question_cards[]` in cache.
+Consumes `review_cards:queue` and updates the job's question cards (`job:{job_id}:cards:{page}`) in cache.
 
 Goal:
 - Produce "review_ready" evidence for visually risky questions without blocking /grade completion.
@@ -22,16 +22,19 @@ from homework_agent.models.vision_facts import GateResult
 from homework_agent.services.review_cards_queue import (
     ReviewCardJob,
     get_redis_client,
+    job_queue as review_cards_job_queue,
     queue_key,
     enqueue_review_card_job,
 )
+from homework_agent.services.job_events import publish_job_event
+from homework_agent.services.job_queue import dequeue_batch_size
+from homework_agent.services.job_state import update_job_card
 from homework_agent.services.vision_facts import (
     detect_scene_type,
     extract_visual_facts,
     gate_visual_facts,
     select_vfe_images,
 )
-from homework_agent.utils.cache import get_cache_store
 from homework_agent.utils.logging_setup import setup_file_logging, silence_noisy_loggers
 from homework_agent.utils.observability import log_event
 from homework_agent.utils.settings import get_settings
@@ -95,29 +98,11 @@ def _update_job_card(
     patch: Dict[str, Any],
     ttl_seconds: int,
 ) -> bool:
-    cache = get_cache_store()
-    job = cache.get(f"job:{job_id}")
-    if not isinstance(job, dict):
+    # Rewrites only the card's page segment (+ the small status record), not the whole job.
+    merged = update_job_card(job_id, str(item_id), patch or {}, ttl_seconds=ttl_seconds)
+    if merged is None:
         return False
-    cards = job.get("question_cards")
-    if not isinstance(cards, list):
-        cards = []
-    changed = False
-    for i, c in enumerate(cards):
-        if not isinstance(c, dict):
-            continue
-        if str(c.get("item_id") or "").strip() != str(item_id):
-            continue
-        merged = dict(c)
-        merged.update({k: v for k, v in (patch or {}).items() if v is not None})
-        cards[i] = merged
-        changed = True
-        break
-    if not changed:
-        return False
-    job["question_cards"] = cards
-    job["updated_at"] = _iso_now()
-    cache.set(f"job:{job_id}", job, ttl_seconds=ttl_seconds)
+    publish_job_event(job_id, "card", merged, ttl_seconds=ttl_seconds)
     return True
 
 
@@ -310,6 +295,107 @@ async def _run_vfe_review(
     return payload
 
 
+def _process_raw(raw: str, *, ttl_seconds: int, budget: int, max_attempts: int) -> None:
+    job = ReviewCardJob.from_json(raw)
+    if not job.job_id or not job.session_id or not job.item_id:
+        return
+
+    # Mark review as pending (in case it was enqueued before the UI saw it).
+    _update_job_card(
+        job_id=job.job_id,
+        item_id=job.item_id,
+        patch={
+            "card_state": "review_pending",
+            "review_reasons": job.review_reasons[:8],
+            "review_updated_at": _iso_now(),
+        },
+        ttl_seconds=ttl_seconds,
+    )
+
+    # Best-effort: wait for qindex slices if not ready (requeue a few times).
+    qidx = get_question_index(job.session_id) or {}
+    has_slices = False
+    try:
+        refs = _pick_qindex_refs_for_question(
+            qindex=qidx,
+            question_number=job.question_number,
+            page_index=int(job.page_index),
+        )
+        if isinstance(refs, dict) and refs.get("pages"):
+            has_slices = True
+    except Exception:
+        has_slices = False
+
+    if not has_slices and int(job.attempt) < max_attempts:
+        # Re-enqueue to give qindex worker time; do not spin tight.
+        time.sleep(1.5 + 0.5 * int(job.attempt))
+        enqueue_review_card_job(
+            job_id=job.job_id,
+            session_id=job.session_id,
+            request_id=job.request_id,
+            subject=job.subject,
+            page_index=int(job.page_index),
+            question_number=job.question_number,
+            item_id=job.item_id,
+            review_reasons=list(job.review_reasons or []),
+            page_image_url=job.page_image_url,
+            question_content=job.question_content,
+            attempt=int(job.attempt) + 1,
+        )
+        return
+
+    subject = Subject.MATH
+    try:
+        subject = Subject(str(job.subject or "math").strip().lower())
+    except Exception:
+        subject = Subject.MATH
+
+    payload = asyncio.run(
+        _run_vfe_review(
+            session_id=job.session_id,
+            subject=subject,
+            question_number=str(job.question_number),
+            page_index=int(job.page_index),
+            page_image_url=job.page_image_url,
+            qcontent=str(job.question_content or ""),
+            visual_risk=True,
+            user_text="",
+            timeout_s=float(budget),
+            request_id=job.request_id,
+        )
+    )
+
+    ok = bool(payload.get("status") == "ok")
+    patch = {
+        "card_state": "review_ready" if ok else "review_failed",
+        "review_updated_at": _iso_now(),
+        "review_summary": payload.get("review_summary"),
+        "relook_error": payload.get("relook_error"),
+        "vfe_gate": payload.get("vfe_gate"),
+        "vfe_scene_type": payload.get("vfe_scene_type"),
+        "vfe_image_source": payload.get("vfe_image_source"),
+        "vfe_image_urls": payload.get("vfe_image_urls"),
+        "visual_facts": payload.get("visual_facts"),
+    }
+    _update_job_card(
+        job_id=job.job_id,
+        item_id=job.item_id,
+        patch=patch,
+        ttl_seconds=ttl_seconds,
+    )
+    log_event(
+        logger,
+        "review_cards_item_done",
+        request_id=job.request_id,
+        session_id=job.session_id,
+        job_id=job.job_id,
+        item_id=job.item_id,
+        question_number=str(job.question_number),
+        page_index=int(job.page_index),
+        status="ok" if ok else "failed",
+    )
+
+
 def main() -> int:
     settings = get_settings()
     logging.basicConfig(
@@ -348,123 +434,46 @@ def main() -> int:
     )
     log_event(logger, "review_cards_worker_started", queue=qkey, budget_s=budget)
 
-    while not stopper.stop:
-        try:
-            item = client.brpop(qkey, timeout=2)
-            if not item:
-                continue
-            _, raw = item
-            job = ReviewCardJob.from_json(
-                raw.decode("utf-8") if isinstance(raw, (bytes, bytearray)) else str(raw)
-            )
-            if not job.job_id or not job.session_id or not job.item_id:
-                continue
-
-            # Mark review as pending (in case it was enqueued before the UI saw it).
-            _update_job_card(
-                job_id=job.job_id,
-                item_id=job.item_id,
-                patch={
-                    "card_state": "review_pending",
-                    "review_reasons": job.review_reasons[:8],
-                    "review_updated_at": _iso_now(),
-                },
-                ttl_seconds=ttl_seconds,
-            )
-
-            # Best-effort: wait for qindex slices if not ready (requeue a few times).
-            qidx = get_question_index(job.session_id) or {}
-            has_slices = False
+    job_queue = review_cards_job_queue(client)
+    batch_size = dequeue_batch_size()
+    with job_queue.lease_keeper() as leases:
+        while not stopper.stop:
             try:
-                refs = _pick_qindex_refs_for_question(
-                    qindex=qidx,
-                    question_number=job.question_number,
-                    page_index=int(job.page_index),
-                )
-                if isinstance(refs, dict) and refs.get("pages"):
-                    has_slices = True
-            except Exception:
-                has_slices = False
-
-            if not has_slices and int(job.attempt) < max_attempts:
-                # Re-enqueue to give qindex worker time; do not spin tight.
-                time.sleep(1.5 + 0.5 * int(job.attempt))
-                enqueue_review_card_job(
-                    job_id=job.job_id,
-                    session_id=job.session_id,
-                    request_id=job.request_id,
-                    subject=job.subject,
-                    page_index=int(job.page_index),
-                    question_number=job.question_number,
-                    item_id=job.item_id,
-                    review_reasons=list(job.review_reasons or []),
-                    page_image_url=job.page_image_url,
-                    question_content=job.question_content,
-                    attempt=int(job.attempt) + 1,
+                batch = job_queue.pop_batch(batch_size, timeout_seconds=2)
+            except Exception as e:  # pragma: no cover
+                log_event(
+                    logger,
+                    "review_cards_worker_dequeue_failed",
+                    level="error",
+                    error_type=e.__class__.__name__,
+                    error=str(e),
                 )
+                time.sleep(1)
                 continue
-
-            subject = Subject.MATH
-            try:
-                subject = Subject(str(job.subject or "math").strip().lower())
-            except Exception:
-                subject = Subject.MATH
-
-            payload = asyncio.run(
-                _run_vfe_review(
-                    session_id=job.session_id,
-                    subject=subject,
-                    question_number=str(job.question_number),
-                    page_index=int(job.page_index),
-                    page_image_url=job.page_image_url,
-                    qcontent=str(job.question_content or ""),
-                    visual_risk=True,
-                    user_text="",
-                    timeout_s=float(budget),
-                    request_id=job.request_id,
-                )
-            )
-
-            ok = bool(payload.get("status") == "ok")
-            patch = {
-                "card_state": "review_ready" if ok else "review_failed",
-                "review_updated_at": _iso_now(),
-                "review_summary": payload.get("review_summary"),
-                "relook_error": payload.get("relook_error"),
-                "vfe_gate": payload.get("vfe_gate"),
-                "vfe_scene_type": payload.get("vfe_scene_type"),
-                "vfe_image_source": payload.get("vfe_image_source"),
-                "vfe_image_urls": payload.get("vfe_image_urls"),
-                "visual_facts": payload.get("visual_facts"),
-            }
-            _update_job_card(
-                job_id=job.job_id,
-                item_id=job.item_id,
-                patch=patch,
-                ttl_seconds=ttl_seconds,
-            )
-            log_event(
-                logger,
-                "review_cards_item_done",
-                request_id=job.request_id,
-                session_id=job.session_id,
-                job_id=job.job_id,
-                item_id=job.item_id,
-                question_number=str(job.question_number),
-                page_index=int(job.page_index),
-                status="ok" if ok else "failed",
-            )
-        except Exception as e:  # pragma: no cover
-            log_event(
-                logger,
-                "review_cards_worker_error",
-                level="error",
-                request_id=None,
-                error_type=e.__class__.__name__,
-                error=str(e),
-            )
-            logger.exception("Review cards worker error: %s", e)
-            time.sleep(1)
+            leases.track(batch)
+            for raw in batch:
+                if stopper.stop:
+                    break
+                try:
+                    _process_raw(
+                        raw,
+                        ttl_seconds=ttl_seconds,
+                        budget=budget,
+                        max_attempts=max_attempts,
+                    )
+                except Exception as e:  # pragma: no cover
+                    log_event(
+                        logger,
+                        "review_cards_worker_error",
+                        level="error",
+                        request_id=None,
+                        error_type=e.__class__.__name__,
+                        error=str(e),
+                    )
+                    logger.exception("Review cards worker error: %s", e)
+                    time.sleep(1)
+                finally:
+                    leases.ack(raw)
 
     log_event(logger, "review_cards_worker_stopped")
     return 0
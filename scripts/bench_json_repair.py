@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared tolerant JSON parser (utils/json_repair) against the old regex repair.
+
+For a corpus of malformed LLM grading outputs it reports, per implementation:
+- how many outputs still fail to parse (each one used to cost a paid `_repair_with_llm` call
+  in the unified grader, up to `json_repair_max_attempts`)
+- CPU time per parse (time.process_time, median of --repeat runs)
+
+The "legacy" path is the pre-consolidation `llm._repair_json_text` (json.loads -> brace scan ->
+regex passes -> suffix guessing), copied here verbatim so the comparison stays reproducible.
+
+Usage:
+  export PYTHONPATH=$(pwd)
+  python scripts/bench_json_repair.py --repeat 20 --results 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from homework_agent.utils.json_repair import parse_json_object
+
+# --- legacy implementation (pre-consolidation services/llm.py) ---------------------------------
+
+
+def _legacy_extract_first_json_object(text: str) -> Optional[str]:
+    if not text:
+        return None
+    s = str(text)
+    start = s.find("{")
+    if start < 0:
+        return None
+    depth = 0
+    in_str = False
+    esc = False
+    for i in range(start, len(s)):
+        ch = s[i]
+        if in_str:
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif ch == '"':
+                in_str = False
+            continue
+        if ch == '"':
+            in_str = True
+            continue
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return s[start : i + 1]
+    return None
+
+
+def _legacy_repair_json_text(text: str) -> Optional[str]:
+    """
+    Attempt to repair malformed JSON from LLM output.
+
+    Handles common issues:
+    - Trailing commas before } or ]
+    - Missing commas between elements (e.g., }{, ][, "...", etc.)
+    - Leading/trailing prose around JSON block
+    """
+    if not text:
+        return None
+    s = str(text)
+    block = _legacy_extract_first_json_object(s)
+    if not block:
+        start = s.find("{")
+        end = s.rfind("}")
+        if start >= 0 and end > start:
+            block = s[start : end + 1]
+        elif start >= 0:
+            # Truncated JSON - no closing brace found, extract from start to end
+            block = s[start:]
+        else:
+            return None
+
+    # Step 1: Remove trailing commas before closing braces/brackets.
+    cleaned = re.sub(r",\s*([}\]])", r"\1", block)
+
+    # Step 2: Insert missing commas between elements.
+    # Pattern: `}` followed by whitespace/newline then `{` or `"` (next element)
+    cleaned = re.sub(r"}\s*\n\s*{", r"},\n{", cleaned)
+    cleaned = re.sub(r"}\s*\n\s*\"", r"},\n\"", cleaned)
+    # Pattern: `]` followed by whitespace/newline then `{` or `[` (next element in array context)
+    cleaned = re.sub(r"]\s*\n\s*\[", r"],\n[", cleaned)
+    cleaned = re.sub(
+        r"]\s*\n\s*{", r"},\n{", cleaned
+    )  # Note: this might be inside an array of objects
+    # Pattern: closing quote of value, newline, then opening quote of key (missing comma)
+    # e.g., "value"\n"key" -> "value",\n"key"
+    # Be careful: only match when it looks like end-of-value followed by new key
+    cleaned = re.sub(r'"\s*\n\s*"([^"]+)":', r'",\n"\1":', cleaned)
+
+    # Step 3: Try to fix unterminated strings by attempting suffix repairs
+    # Count unbalanced quotes, braces, brackets
+    try:
+        import json
+
+        json.loads(cleaned)
+        return cleaned  # Already valid
+    except Exception:
+        pass
+
+    # Step 3b: Escape control characters that might be in unterminated strings
+    # This helps when LLM output is truncated mid-string
+    def escape_control_chars(s: str) -> str:
+        # Escape newlines and tabs that aren't already escaped
+        result = []
+        i = 0
+        while i < len(s):
+            c = s[i]
+            if c == "\\" and i + 1 < len(s):
+                # Already escaped, keep as is
+                result.append(s[i : i + 2])
+                i += 2
+            elif c == "\n":
+                result.append("\\n")
+                i += 1
+            elif c == "\r":
+                result.append("\\r")
+                i += 1
+            elif c == "\t":
+                result.append("\\t")
+                i += 1
+            else:
+                result.append(c)
+                i += 1
+        return "".join(result)
+
+    cleaned_escaped = escape_control_chars(cleaned)
+
+    # Try common suffix repairs for truncated output
+    suffixes_to_try = [
+        '"}]}',  # Close string, close array, close object
+        '"}]',  # Close string, close array
+        '"]}',  # Close string, close array, close object
+        '"}',  # Close string, close object
+        '"]',  # Close string, close array
+        '"',  # Just close string
+        "}]}",  # Close array, close object
+        "}]",  # Close array
+        "]}",  # Close array, close object
+        "}",  # Close object
+        "]",  # Close array
+    ]
+
+    for suffix in suffixes_to_try:
+        try:
+            import json
+
+            json.loads(cleaned_escaped + suffix)
+            return cleaned_escaped + suffix
+        except Exception:
+            continue
+
+    return cleaned
+
+
+def _legacy_parse(text: str) -> Optional[Dict[str, Any]]:
+    try:
+        obj = json.loads(text)
+    except Exception:
+        repaired = _legacy_repair_json_text(text)
+        if not repaired:
+            return None
+        try:
+            obj = json.loads(repaired)
+        except Exception:
+            return None
+    return obj if isinstance(obj, dict) else None
+
+
+def _new_parse(text: str) -> Optional[Dict[str, Any]]:
+    return parse_json_object(text).value
+
+
+# --- corpus ------------------------------------------------------------------------------------
+
+
+def _grading_doc(n: int) -> str:
+    results = [
+        {
+            "question_number": str(i + 1),
+            "verdict": "incorrect" if i % 3 == 0 else "correct",
+            "student_answer": f"x = {i} + 1",
+            "reason": "计算过程缺少一步移项" if i % 3 == 0 else "",
+            "judgment_basis": ["依据来源：OCR+图像理解", f"第{i + 1}题步骤完整"],
+            "score": i % 5,
+        }
+        for i in range(n)
+    ]
+    return json.dumps(
+        {
+            "status": "done",
+            "ocr_text": "作业第1页",
+            "results": results,
+            "summary": "完成",
+        },
+        ensure_ascii=False,
+        indent=2,
+    )
+
+
+def build_corpus(n_results: int) -> Dict[str, str]:
+    doc = _grading_doc(n_results)
+    return {
+        "clean": doc,
+        "prose_and_fence": "好的，以下是批改结果：\n```json\n"
+        + doc
+        + "\n```\n如有疑问请追问。",
+        "trailing_commas": doc.replace("\n    }", ",\n    }").replace(
+            "\n  ]", ",\n  ]"
+        ),
+        "missing_commas": doc.replace("},\n    {", "}\n    {"),
+        "truncated_mid_string": doc[: int(len(doc) * 0.7)],
+        "truncated_mid_key": doc[: doc.rfind('"verdict"') + 5],
+        "latex_escapes": doc.replace("x = ", "\\(x\\) = \\frac12 + "),
+        "raw_newlines": doc.replace("计算过程", "计算\n过程"),
+        "python_literals": doc.replace('"score": 0', '"score": None').replace(
+            '"status": "done"', '"status": "done", "partial": False'
+        ),
+        "inner_quotes": doc.replace("缺少一步移项", '缺少"移项"一步'),
+        "mixed": "结果："
+        + doc.replace("},\n    {", "}\n    {").replace("x = ", "\\(x\\) = ")[
+            : int(len(doc) * 0.8)
+        ],
+    }
+
+
+# --- benchmark ---------------------------------------------------------------------------------
+
+
+def _cpu_us(fn: Callable[[str], Any], text: str, repeat: int) -> float:
+    samples: List[float] = []
+    for _ in range(repeat):
+        t0 = time.process_time()
+        fn(text)
+        samples.append((time.process_time() - t0) * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument(
+        "--results", type=int, default=40, help="results[] items per document"
+    )
+    args = ap.parse_args()
+
+    corpus = build_corpus(args.results)
+    rows = []
+    legacy_fail = new_fail = 0
+    legacy_cpu = new_cpu = 0.0
+    for name, text in corpus.items():
+        lv, nv = _legacy_parse(text), _new_parse(text)
+        lc, nc = _cpu_us(_legacy_parse, text, args.repeat), _cpu_us(
+            _new_parse, text, args.repeat
+        )
+        legacy_fail += lv is None
+        new_fail += nv is None
+        legacy_cpu += lc
+        new_cpu += nc
+        rows.append((name, len(text), lv is not None, nv is not None, lc, nc))
+
+    print(
+        f"{'case':<22}{'chars':>8}{'legacy_ok':>11}{'new_ok':>8}{'legacy_us':>11}{'new_us':>9}"
+    )
+    for name, size, lok, nok, lc, nc in rows:
+        print(f"{name:<22}{size:>8}{str(lok):>11}{str(nok):>8}{lc:>11.0f}{nc:>9.0f}")
+    print()
+    print(
+        f"LLM repair calls needed: legacy={legacy_fail} new={new_fail} (of {len(corpus)})"
+    )
+    print(f"total CPU per pass (us): legacy={legacy_cpu:.0f} new={new_cpu:.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())